@@ -13,72 +13,190 @@ EC2 State event transformation
 This function is triggered every time a state change event is triggered by an EC2 instance tagged
 with IDEA_CLUSTER. It repackages the event, appends tag information and then publishes an 'Ec2.StateChangeEvent'
 intended for the different modules that have subscribed to this event within the cluster
+
+The function accepts a single EventBridge event, a list of events or an SQS batch of events. The tags of the instances
+are read with one DescribeInstances call per 200 instances of the batch and are cached across invocations of a warm
+container, so that the transitions of an instance (pending, running, stopping, stopped ...) are described once.
 """
 import boto3
 import os
 import json
 import logging
 import re
+import time
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
 sns_client = boto3.client('sns')
-ec2_resource = boto3.resource('ec2')
+ec2_client = boto3.client('ec2')
 
+EC2_STATE_CHANGE_DETAIL_TYPE = 'EC2 Instance State-change Notification'
+# maximum number of values of a DescribeInstances filter
+DESCRIBE_INSTANCES_MAX_IDS = 200
+# maximum number of entries of an SNS PublishBatch request
+PUBLISH_BATCH_MAX_ENTRIES = 10
+# tags of an instance are re-read after this duration, to pick up the tags added after launch
+TAG_CACHE_TTL_SECONDS = 900
+TAG_CACHE_MAX_ENTRIES = 10000
 
-def handler(event, _):
-    try:
-        detail_type = event['detail-type']
-        if detail_type != 'EC2 Instance State-change Notification':
+# instance-id -> (cached at, tags of the instance)
+tag_cache = {}
+
+
+def get_cached_tags(instance_id):
+    entry = tag_cache.get(instance_id)
+    if entry is None:
+        return None
+    cached_at, tags = entry
+    if time.time() - cached_at > TAG_CACHE_TTL_SECONDS:
+        tag_cache.pop(instance_id, None)
+        return None
+    return tags
+
+
+def cache_tags(instance_id, tags):
+    tag_cache.pop(instance_id, None)
+    while len(tag_cache) >= TAG_CACHE_MAX_ENTRIES:
+        # entries are kept in insertion order, the oldest entry is evicted first
+        tag_cache.pop(next(iter(tag_cache)))
+    tag_cache[instance_id] = (time.time(), tags)
+
+
+def describe_tags(instance_ids):
+    """
+    read the tags of the instances not found in the cache, with one DescribeInstances call per 200 instances.
+    DescribeInstances is eventually consistent, so a new instance may not be returned yet: only the instances found with
+    tags are cached, and the others are described again on their next event.
+    :return: the tags of each instance, empty for the instances that are not found
+    """
+    result = {}
+    missing = []
+    for instance_id in dict.fromkeys(instance_ids):
+        tags = get_cached_tags(instance_id)
+        if tags is None:
+            missing.append(instance_id)
+        else:
+            result[instance_id] = tags
+
+    for start in range(0, len(missing), DESCRIBE_INSTANCES_MAX_IDS):
+        chunk = missing[start:start + DESCRIBE_INSTANCES_MAX_IDS]
+        found = {}
+        next_token = None
+        while True:
+            request = {
+                'Filters': [{'Name': 'instance-id', 'Values': chunk}],
+                'MaxResults': 1000
+            }
+            if next_token is not None:
+                request['NextToken'] = next_token
+            response = ec2_client.describe_instances(**request)
+            for reservation in response.get('Reservations', []):
+                for instance in reservation.get('Instances', []):
+                    found[instance['InstanceId']] = {tag['Key']: tag['Value'] for tag in instance.get('Tags', [])}
+            next_token = response.get('NextToken')
+            if next_token is None:
+                break
+        for instance_id in chunk:
+            tags = found.get(instance_id, {})
+            if len(tags) > 0:
+                cache_tags(instance_id, tags)
+            result[instance_id] = tags
+    return result
+
+
+def get_events(event):
+    """
+    :return: the EC2 state change events of a single event, a list of events or an SQS batch
+    """
+    if isinstance(event, list):
+        events = event
+    elif 'Records' in event:
+        events = [json.loads(record['body']) for record in event['Records']]
+    else:
+        events = [event]
+
+    result = []
+    for state_change_event in events:
+        detail_type = state_change_event.get('detail-type')
+        if detail_type != EC2_STATE_CHANGE_DETAIL_TYPE:
             logger.error(f'ERROR. Invalid detail type {detail_type}')
-            return
-
-        cluster_name_tag_key = os.environ.get('IDEA_CLUSTER_NAME_TAG_KEY')
-        cluster_name_tag_value = os.environ.get('IDEA_CLUSTER_NAME_TAG_VALUE')
-        idea_tag_prefix = os.environ.get('IDEA_TAG_PREFIX')
-
-        instance_id = event['detail']['instance-id']
-        state = event['detail']['state']
-        ec2instance = ec2_resource.Instance(instance_id)
-        event['detail']['tags'] = {}
-        cluster_match = False
-
-        message_attributes = {}
-        for tags in ec2instance.tags:
-            if tags["Key"].startswith(idea_tag_prefix):
-                event['detail']['tags'][tags["Key"]] = tags["Value"]
-                message_attributes[re.sub(r"[^a-zA-Z0-9_\-\.]+","_",tags["Key"]).strip()] = {
-                        'DataType': 'String',
-                        'StringValue': tags["Value"]
-                        }
-
-            if tags["Key"] == cluster_name_tag_key and tags["Value"] == cluster_name_tag_value:
-                cluster_match = True
-
-        if not cluster_match:
-            logger.info(f'tag_key(s): {cluster_name_tag_key} and tag_value(s): {cluster_name_tag_value} on instance-id: {instance_id} not found. NO=OP.')
-            return
-
-        forwarding_event = {
-            'header': {
-                'namespace': 'Ec2.StateChangeEvent',
-                'request_id': instance_id
-            },
-            'payload': event['detail']
-        }
-
-        logger.info(f'forwarding ec2-state-event for {instance_id} for state {state}')
-        forwarding_topic_arn = os.environ.get('IDEA_EC2_STATE_SNS_TOPIC_ARN')
-        response = sns_client.publish(
+            continue
+        result.append(state_change_event)
+    return result
+
+
+def build_publish_entry(entry_id, state_change_event, tags):
+    """
+    :return: the PublishBatch entry of the event, or None if the instance is not tagged with the cluster name
+    """
+    cluster_name_tag_key = os.environ.get('IDEA_CLUSTER_NAME_TAG_KEY')
+    cluster_name_tag_value = os.environ.get('IDEA_CLUSTER_NAME_TAG_VALUE')
+    idea_tag_prefix = os.environ.get('IDEA_TAG_PREFIX')
+
+    instance_id = state_change_event['detail']['instance-id']
+    state = state_change_event['detail']['state']
+    if tags.get(cluster_name_tag_key) != cluster_name_tag_value:
+        logger.info(f'tag_key(s): {cluster_name_tag_key} and tag_value(s): {cluster_name_tag_value} on instance-id: {instance_id} not found. NO=OP.')
+        return None
+
+    detail = dict(state_change_event['detail'])
+    detail['tags'] = {}
+    message_attributes = {}
+    for key, value in tags.items():
+        if key.startswith(idea_tag_prefix):
+            detail['tags'][key] = value
+            message_attributes[re.sub(r"[^a-zA-Z0-9_\-\.]+", "_", key).strip()] = {
+                'DataType': 'String',
+                'StringValue': value
+            }
+
+    forwarding_event = {
+        'header': {
+            'namespace': 'Ec2.StateChangeEvent',
+            'request_id': instance_id
+        },
+        'payload': detail
+    }
+
+    logger.info(f'forwarding ec2-state-event for {instance_id} for state {state}')
+    return {
+        'Id': entry_id,
+        'MessageStructure': 'json',
+        'MessageAttributes': message_attributes,
+        'Message': json.dumps({
+            'default': json.dumps(forwarding_event),
+            'sqs': forwarding_event,
+        })
+    }
+
+
+def publish(entries):
+    forwarding_topic_arn = os.environ.get('IDEA_EC2_STATE_SNS_TOPIC_ARN')
+    for start in range(0, len(entries), PUBLISH_BATCH_MAX_ENTRIES):
+        response = sns_client.publish_batch(
             TopicArn=forwarding_topic_arn,
-            MessageStructure='json',
-            MessageAttributes=message_attributes,
-            Message=json.dumps({
-                'default': json.dumps(forwarding_event),
-                'sqs': forwarding_event,
-            }))
-
-        logger.info(response)
+            PublishBatchRequestEntries=entries[start:start + PUBLISH_BATCH_MAX_ENTRIES]
+        )
+        for failed in response.get('Failed', []):
+            logger.error(f'failed to forward ec2-state-event: {failed}')
+
+
+def handler(event, _):
+    try:
+        state_change_events = get_events(event)
+        tags_by_instance_id = describe_tags([state_change_event['detail']['instance-id'] for state_change_event in state_change_events])
+
+        entries = []
+        for state_change_event in state_change_events:
+            instance_id = state_change_event['detail']['instance-id']
+            tags = tags_by_instance_id.get(instance_id, {})
+            entry = build_publish_entry(str(len(entries)), state_change_event, tags)
+            if entry is not None:
+                entries.append(entry)
+            if state_change_event['detail']['state'] == 'terminated':
+                tag_cache.pop(instance_id, None)
+
+        publish(entries)
     except Exception as e:
         logger.exception(f'Error in Handling ec2 state change event: {event}, error: {e}')
@@ -21,6 +21,7 @@ import os
 from .virtual_desktop_controller_server_db import VirtualDesktopControllerServerDB
 from .virtual_desktop_controller_user_sessions_db import VirtualDesktopControllerUserSessionsDB
 from .shared_storage_db import SharedStorageDB
+from .cache import TTLCache
 from .utils import Utils
 
 logger = logging.getLogger()
@@ -33,11 +34,77 @@ READ_AND_WRITE_ROLE_NAME_ARN = os.environ.get('READ_AND_WRITE_ROLE_NAME_ARN')
 OBJECT_STORAGE_CUSTOM_PROJECT_NAME_PREFIX = os.environ.get('OBJECT_STORAGE_CUSTOM_PROJECT_NAME_PREFIX')
 OBJECT_STORAGE_CUSTOM_PROJECT_NAME_AND_USERNAME_PREFIX = os.environ.get('OBJECT_STORAGE_CUSTOM_PROJECT_NAME_AND_USERNAME_PREFIX')
 OBJECT_STORAGE_NO_CUSTOM_PREFIX = os.environ.get('OBJECT_STORAGE_NO_CUSTOM_PREFIX')
+STORAGE_PROVIDER_S3_BUCKET = os.environ.get('STORAGE_PROVIDER_S3_BUCKET')
+
+# instance -> (owner, session, project, private ip) lookups are cached for a short time,
+# temporary credentials are served from cache until they are close to expiring
+INSTANCE_CONTEXT_CACHE_TTL_SECONDS = int(os.environ.get('INSTANCE_CONTEXT_CACHE_TTL_SECONDS', 60))
+CREDENTIALS_REFRESH_MARGIN_SECONDS = int(os.environ.get('CREDENTIALS_REFRESH_MARGIN_SECONDS', 900))
+ROLE_SESSION_NAME = 'S3-Mount-Temporary-Credentials'
 
 vdc_server_db = VirtualDesktopControllerServerDB(CLUSTER_NAME, MODULE_ID, logger)
 vdc_user_session_db = VirtualDesktopControllerUserSessionsDB(CLUSTER_NAME, MODULE_ID, logger)
 shared_storage_db = SharedStorageDB(logger)
 
+instance_context_cache = TTLCache(ttl_seconds=INSTANCE_CONTEXT_CACHE_TTL_SECONDS)
+credentials_cache = TTLCache(ttl_seconds=0)
+
+
+def get_instance_context(instance_id: str) -> dict:
+    """
+    Resolve the session owner, session id, project and private IP of a VDI instance.
+    Only fully resolved lookups are cached, failures are retried on the next request.
+    """
+    instance_context = instance_context_cache.get(instance_id)
+    if instance_context is not None:
+        return instance_context
+
+    server_response = vdc_server_db.get_owner_id_and_session_id(instance_id)
+    if not server_response:
+        raise ValueError(f'Invalid instance, instance_id {instance_id} is not a VDI')
+
+    owner_id, session_id = server_response.get("owner_id"), server_response.get("session_id")
+    if not all([owner_id, session_id]):
+        raise ValueError(f'Invalid instance, instance_id {instance_id} is not a VDI')
+
+    project_id = vdc_user_session_db.get_project_id(owner_id, session_id)
+    if not project_id:
+        raise ValueError('Instance is not associated with a project or lost project tag')
+
+    private_ip = Utils.get_instance_private_ip(instance_id)
+    if not private_ip:
+        raise ValueError(f'Invalid instance, instance_id {instance_id} credentials is not from the origin')
+
+    instance_context = {
+        'owner_id': owner_id,
+        'session_id': session_id,
+        'project_id': project_id,
+        'private_ip': private_ip,
+    }
+    instance_context_cache.put(instance_id, instance_context)
+    return instance_context
+
+
+def get_temporary_credentials(instance_id: str, role_arn: str, read_only: bool, bucket_arn: str, prefix: str):
+    session_policy = Utils.generate_session_policy(read_only, bucket_arn, prefix)
+    cache_key = (instance_id, role_arn, session_policy)
+    credentials = credentials_cache.get(cache_key)
+    if credentials is not None:
+        return credentials
+
+    credentials = Utils.get_temporary_credentials(
+        role_arn=role_arn,
+        role_session_name=ROLE_SESSION_NAME,
+        bucket_arn=bucket_arn,
+        read_only=read_only,
+        prefix=prefix,
+        session_policy=session_policy
+    )
+    if credentials is not None:
+        ttl_seconds = Utils.get_seconds_until_expiration(credentials['Expiration']) - CREDENTIALS_REFRESH_MARGIN_SECONDS
+        credentials_cache.put(cache_key, credentials, ttl_seconds=ttl_seconds)
+    return credentials
+
 
 def handler(event, _):
     try:
@@ -51,21 +118,14 @@ def handler(event, _):
         if not all([filesystem_name, instance_id, source_ip]):
             raise ValueError('Invalid input parameters in the request context')
 
-        server_response = vdc_server_db.get_owner_id_and_session_id(instance_id)
-        if not server_response:
-            raise ValueError(f'Invalid instance, instance_id {instance_id} is not a VDI')
-
-        owner_id, session_id = server_response.get("owner_id"), server_response.get("session_id")
-        if not all([owner_id, session_id]):
-            raise ValueError(f'Invalid instance, instance_id {instance_id} is not a VDI')
+        instance_context = get_instance_context(instance_id)
+        owner_id = instance_context['owner_id']
+        project_id = instance_context['project_id']
 
-        project_id = vdc_user_session_db.get_project_id(owner_id, session_id)
-        if not project_id:
-            raise ValueError('Instance is not associated with a project or lost project tag')
-
-        if not Utils.validate_instance_origin(instance_id, source_ip):
+        if instance_context['private_ip'] != source_ip:
             raise ValueError(f'Invalid instance, instance_id {instance_id} credentials is not from the origin')
 
+        # all filesystem settings are fetched with a single batch read
         object_storage_model = shared_storage_db.get_object_storage_model(filesystem_name)
         if not object_storage_model:
             raise ValueError(f'Filesystem {filesystem_name} does not exist')
@@ -73,10 +133,10 @@ def handler(event, _):
         if project_id not in object_storage_model.get_projects():
             raise ValueError(f'Filesystem is not associated with project {project_id}')
 
-        if not shared_storage_db.is_provider_s3(filesystem_name):
+        if object_storage_model.get_provider() != STORAGE_PROVIDER_S3_BUCKET:
             raise ValueError(f'Filesystem {filesystem_name} is not associated with an S3 Bucket')
 
-        read_only = shared_storage_db.get_object_storage_read_only(filesystem_name)
+        read_only = object_storage_model.is_read_only()
         bucket_arn = object_storage_model.get_bucket_arn()
         bucket_arn_without_prefix = Utils.extract_bucket_arn_without_prefix(bucket_arn)
 
@@ -85,7 +145,7 @@ def handler(event, _):
 
         prefix = Utils.extract_prefix_from_bucket_arn(bucket_arn)
         if not read_only:
-            custom_bucket_prefix = shared_storage_db.get_object_storage_custom_bucket_prefix(filesystem_name)
+            custom_bucket_prefix = object_storage_model.get_custom_bucket_prefix()
             append_prefix = {
                 OBJECT_STORAGE_CUSTOM_PROJECT_NAME_PREFIX: project_id,
                 OBJECT_STORAGE_CUSTOM_PROJECT_NAME_AND_USERNAME_PREFIX: f'{project_id}/{owner_id}',
@@ -97,15 +157,15 @@ def handler(event, _):
 
             prefix = f'{prefix.rstrip("/")}/{append_prefix}' if prefix else append_prefix
 
-        role_arn = shared_storage_db.get_object_storage_iam_role_arn(filesystem_name) or (
+        role_arn = object_storage_model.get_iam_role_arn() or (
             READ_ONLY_ROLE_NAME_ARN if read_only else READ_AND_WRITE_ROLE_NAME_ARN
         )
 
-        credentials = Utils.get_temporary_credentials(
+        credentials = get_temporary_credentials(
+            instance_id=instance_id,
             role_arn=role_arn,
-            role_session_name='S3-Mount-Temporary-Credentials',
-            bucket_arn=bucket_arn_without_prefix,
             read_only=read_only,
+            bucket_arn=bucket_arn_without_prefix,
             prefix=prefix
         )
         if credentials is None:
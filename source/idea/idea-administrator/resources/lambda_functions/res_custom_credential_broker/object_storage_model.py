@@ -14,8 +14,9 @@ OBJECT_STORAGE_DB_READ_ONLY_KEY = "read_only"
 
 
 class ObjectStorageModel:
-    def __init__(self, filesystem_name, projects, read_only, bucket_arn, iam_role_arn=None, custom_bucket_prefix=None):
+    def __init__(self, filesystem_name, projects, read_only, bucket_arn, iam_role_arn=None, custom_bucket_prefix=None, provider=None):
         self.filesystem_name = filesystem_name
+        self.provider = provider
         self.projects = projects
         self.read_only = read_only
         self.iam_role_arn = iam_role_arn
@@ -25,6 +26,9 @@ class ObjectStorageModel:
     def get_filesystem_name(self):
         return self.filesystem_name
 
+    def get_provider(self):
+        return self.provider
+
     def get_projects(self):
         return self.projects
 
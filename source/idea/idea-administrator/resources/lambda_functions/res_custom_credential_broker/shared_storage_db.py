@@ -85,7 +85,8 @@ class SharedStorageDB:
                 read_only=object_storage.get('read_only'),
                 bucket_arn=object_storage.get('bucket_arn'),
                 iam_role_arn=object_storage.get('iam_role_arn'),
-                custom_bucket_prefix=object_storage.get('custom_bucket_prefix')
+                custom_bucket_prefix=object_storage.get('custom_bucket_prefix'),
+                provider=object_storage.get('provider')
             )
         return None
 
@@ -10,6 +10,7 @@
 #  and limitations under the License.
 import json
 import re
+from datetime import datetime, timezone
 import boto3
 from botocore.exceptions import BotoCoreError, ClientError
 import logging
@@ -48,18 +49,23 @@ class Utils:
         return event.get('queryStringParameters', {}).get('filesystemName')
 
     @staticmethod
-    def validate_instance_origin(instance_id: str, source_ip: str):
+    def get_instance_private_ip(instance_id: str):
         ec2 = boto3.client('ec2')
         try:
             response = ec2.describe_instances(InstanceIds=[instance_id])
         except Exception as e:
             logger.error(f"Error describing instance: {e}")
-            return False
+            return None
         reservations = response.get('Reservations', [])
         if len(reservations) != 1:
-            return False
+            return None
         instance = reservations[0]['Instances'][0]
-        if instance.get('PrivateIpAddress') != source_ip:
+        return instance.get('PrivateIpAddress')
+
+    @staticmethod
+    def validate_instance_origin(instance_id: str, source_ip: str):
+        private_ip = Utils.get_instance_private_ip(instance_id)
+        if not private_ip or private_ip != source_ip:
             return False
         return True
 
@@ -118,14 +124,16 @@ class Utils:
         return json.dumps(policy, indent=4)
 
     @staticmethod
-    def get_temporary_credentials(role_arn: str, role_session_name: str, read_only: bool, bucket_arn, prefix=None):
+    def get_temporary_credentials(role_arn: str, role_session_name: str, read_only: bool, bucket_arn, prefix=None, session_policy=None):
         sts = boto3.client('sts')
+        if session_policy is None:
+            session_policy = Utils.generate_session_policy(read_only, bucket_arn, prefix)
         try:
             response = sts.assume_role(
                 RoleArn=role_arn,
                 RoleSessionName=role_session_name,
                 DurationSeconds=TEMPORARY_CREDENTIALS_TIME_IN_SECONDS,
-                Policy=Utils.generate_session_policy(read_only, bucket_arn, prefix)
+                Policy=session_policy
             )
         except (BotoCoreError, ClientError) as e:
             logger.error(f"Error assuming role: {e}")
@@ -140,6 +148,17 @@ class Utils:
             "Expiration": credentials['Expiration'].isoformat()
         }
 
+    @staticmethod
+    def get_seconds_until_expiration(expiration: str) -> float:
+        """
+        Returns the number of seconds until the ISO 8601 expiration timestamp.
+        Timestamps without a timezone are treated as UTC.
+        """
+        expires_at = datetime.fromisoformat(expiration)
+        if expires_at.tzinfo is None:
+            expires_at = expires_at.replace(tzinfo=timezone.utc)
+        return (expires_at - datetime.now(timezone.utc)).total_seconds()
+
     @staticmethod
     def extract_bucket_arn_without_prefix(bucket_arn: str):
         match = re.match(r"^(arn:aws(?:-cn|-us-gov)?:(s3:::)[^/]+)", bucket_arn)
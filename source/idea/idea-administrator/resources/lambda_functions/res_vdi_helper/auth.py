@@ -9,8 +9,10 @@
 #  OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions
 #  and limitations under the License.
 import logging
+import os
 import re
-from typing import Any, Dict
+import time
+from typing import Any, Dict, Optional
 
 import boto3
 from res.resources import servers
@@ -22,6 +24,17 @@ from .actions import VDIHelperActions
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
+# the origin of an instance is re-validated after this duration, so that a re-assigned IP address or server is picked up
+INSTANCE_CONTEXT_CACHE_TTL_SECONDS = int(os.environ.get("INSTANCE_CONTEXT_CACHE_TTL_SECONDS", 30))
+INSTANCE_CONTEXT_CACHE_MAX_ENTRIES = 1024
+
+INSTANCE_CONTEXT_PRIVATE_IP_KEY = "private_ip"
+INSTANCE_CONTEXT_OWNER_KEY = "owner"
+INSTANCE_CONTEXT_SESSION_ID_KEY = "session_id"
+
+# instance-id -> (expires at, instance context), kept across invocations of a warm container
+instance_context_cache: Dict[str, Any] = {}
+
 
 def get_user_arn_from_request_context(request_context):
     return request_context.get("identity", {}).get("userArn")
@@ -44,35 +57,89 @@ def get_source_ip_from_request_context(request_context):
     return request_context.get("identity", {}).get("sourceIp")
 
 
-def validate_instance_origin(instance_id: str, source_ip: str):
+def get_instance_private_ip(instance_id: str) -> Optional[str]:
     ec2 = boto3.client("ec2")
     try:
         response = ec2.describe_instances(InstanceIds=[instance_id])
     except Exception as e:
         logger.error(f"Error describing instance: {e}")
-        return False
+        return None
     reservations = response.get("Reservations", [])
     if len(reservations) != 1:
-        return False
+        return None
     instance = reservations[0]["Instances"][0]
-    if instance.get("PrivateIpAddress") != source_ip:
-        return False
-    return True
+    return instance.get("PrivateIpAddress")
+
 
+def validate_instance_origin(instance_id: str, source_ip: str):
+    private_ip = get_instance_private_ip(instance_id)
+    return private_ip is not None and private_ip == source_ip
+
+
+def get_cached_instance_context(instance_id: str) -> Optional[Dict[str, Any]]:
+    entry = instance_context_cache.get(instance_id)
+    if entry is None:
+        return None
+    expires_at, instance_context = entry
+    if expires_at <= time.monotonic():
+        instance_context_cache.pop(instance_id, None)
+        return None
+    return instance_context
+
+
+def cache_instance_context(instance_id: str, instance_context: Dict[str, Any]) -> None:
+    if INSTANCE_CONTEXT_CACHE_TTL_SECONDS <= 0:
+        return
+    instance_context_cache.pop(instance_id, None)
+    while len(instance_context_cache) >= INSTANCE_CONTEXT_CACHE_MAX_ENTRIES:
+        # entries are kept in insertion order, the oldest entry is evicted first
+        instance_context_cache.pop(next(iter(instance_context_cache)))
+    instance_context_cache[instance_id] = (time.monotonic() + INSTANCE_CONTEXT_CACHE_TTL_SECONDS, instance_context)
+
+
+def get_instance_context(instance_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Resolve the private IP, session owner and session id of a VDI instance.
+    Only fully resolved lookups are cached, failures are retried on the next request.
+    """
+    instance_context = get_cached_instance_context(instance_id)
+    if instance_context is not None:
+        return instance_context
 
-def run_common_validations(instance_id: str, source_ip: str) -> bool:
     try:
-        server_details = servers.get_server(instance_id=instance_id)
-        owner_id = server_details.get(servers.SERVER_DB_SESSION_OWNER_KEY)
-        session_id = server_details.get(servers.SERVER_DB_SESSION_ID_KEY)
-        if not all([owner_id, session_id]):
-            return False
-        if not validate_instance_origin(instance_id, source_ip):
-            return False
-        return True
-    except ServerNotFound as e:
+        server = servers.get_server(instance_id=instance_id)
+    except ServerNotFound:
         logger.error(f"Invalid instance, instance_id {instance_id} is not a VDI")
-        return False
+        return None
+    owner_id = server.get(servers.SERVER_DB_SESSION_OWNER_KEY)
+    session_id = server.get(servers.SERVER_DB_SESSION_ID_KEY)
+    if not all([owner_id, session_id]):
+        return None
+    private_ip = get_instance_private_ip(instance_id)
+    if not private_ip:
+        return None
+
+    instance_context = {
+        INSTANCE_CONTEXT_PRIVATE_IP_KEY: private_ip,
+        INSTANCE_CONTEXT_OWNER_KEY: owner_id,
+        INSTANCE_CONTEXT_SESSION_ID_KEY: session_id,
+    }
+    cache_instance_context(instance_id, instance_context)
+    return instance_context
+
+
+def run_common_validations(instance_id: str, source_ip: str) -> Optional[Dict[str, Any]]:
+    """
+    :return: the instance context if the request originates from the VDI instance, None otherwise
+    """
+    instance_context = get_instance_context(instance_id)
+    if instance_context is None:
+        return None
+    if instance_context[INSTANCE_CONTEXT_PRIVATE_IP_KEY] != source_ip:
+        # the cached context may be outdated, e.g. the instance was re-created with the same private IP of another instance
+        instance_context_cache.pop(instance_id, None)
+        return None
+    return instance_context
 
 
 def get_action_level_validations() -> Dict[str, Any]:
@@ -91,7 +158,10 @@ def run_action_level_validations(action: str):
     return True
 
 
-def validate(event: Dict[str, Any]):
+def validate(event: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    :return: the instance context of the caller if the request is valid, None otherwise
+    """
     logger.info(f"event: {event}")
     request_context = event["requestContext"]
     instance_id = get_instance_id_from_request_context(request_context)
@@ -100,14 +170,14 @@ def validate(event: Dict[str, Any]):
     if not all([instance_id, source_ip]):
         raise ValueError("Invalid input parameters in the request context")
 
-    is_valid_instance = run_common_validations(instance_id, source_ip)
-    if not is_valid_instance:
+    instance_context = run_common_validations(instance_id, source_ip)
+    if instance_context is None:
         logger.error("Unauthorized access. Failed common validations.")
-        return False
+        return None
 
     action = event["queryStringParameters"].get("action", "")
     is_valid_action = run_action_level_validations(action)
     if not is_valid_action:
         logger.error("Unauthorized action or payload. Failed action level validation.")
-        return False
-    return True
+        return None
+    return instance_context
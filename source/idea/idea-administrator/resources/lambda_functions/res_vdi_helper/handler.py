@@ -2,14 +2,19 @@
 #  SPDX-License-Identifier: Apache-2.0
 import json
 import logging
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 
 from res.resources import servers, sessions, vdi_management
 from res.exceptions import UserSessionNotFound
 
 
 from .actions import VDIHelperActions
-from .auth import get_instance_id_from_request_context, validate
+from .auth import (
+    INSTANCE_CONTEXT_OWNER_KEY,
+    INSTANCE_CONTEXT_SESSION_ID_KEY,
+    get_instance_id_from_request_context,
+    validate,
+)
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
@@ -17,8 +22,8 @@ logger.setLevel(logging.INFO)
 def handler(event: Dict[str, Any], _: Any) -> Dict[str, Any]:
 
     try:
-        is_valid_event = validate(event)
-        if not is_valid_event:
+        instance_context = validate(event)
+        if not instance_context:
             raise RuntimeError("Unauthorized access")
         else:
             request_context = event["requestContext"]
@@ -28,7 +33,7 @@ def handler(event: Dict[str, Any], _: Any) -> Dict[str, Any]:
 
             if action == VDIHelperActions.VDI_AUTO_STOP:
                 transition_state = params.get("transition_state", "")
-                handle_vdi_auto_stop(instance_id, transition_state)
+                handle_vdi_auto_stop(instance_id, transition_state, instance_context)
 
     except Exception as e:
         logger.exception(f"Error in validating VDI Helper caller: {event}, error: {e}")
@@ -40,16 +45,25 @@ def handler(event: Dict[str, Any], _: Any) -> Dict[str, Any]:
     }
 
 
-def handle_vdi_auto_stop(instance_id: str, transition_state: str) -> None:
+def handle_vdi_auto_stop(
+    instance_id: str,
+    transition_state: str,
+    instance_context: Optional[Dict[str, Any]] = None,
+) -> None:
     if not transition_state:
         raise RuntimeError("Request query parameters does not contain transition_state")
     if transition_state not in ["Stop", "Terminate"]:
         raise RuntimeError(f"Invalid transition state {transition_state}")
     logger.info(f"VDI auto stop for {instance_id} with transition_state {transition_state}")
-    # Has been validated that the server is already present
-    server = servers.get_server(instance_id=instance_id)
-    session_id = server.get(servers.SERVER_DB_SESSION_ID_KEY)
-    owner = server.get(servers.SERVER_DB_SESSION_OWNER_KEY)
+    if instance_context:
+        # resolved while validating the request, the server is not read again
+        session_id = instance_context[INSTANCE_CONTEXT_SESSION_ID_KEY]
+        owner = instance_context[INSTANCE_CONTEXT_OWNER_KEY]
+    else:
+        # Has been validated that the server is already present
+        server = servers.get_server(instance_id=instance_id)
+        session_id = server.get(servers.SERVER_DB_SESSION_ID_KEY)
+        owner = server.get(servers.SERVER_DB_SESSION_OWNER_KEY)
 
     try:
         session = sessions.get_session(owner=owner, session_id=session_id)
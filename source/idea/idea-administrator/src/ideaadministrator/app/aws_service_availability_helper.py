@@ -10,17 +10,39 @@
 #  OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions
 #  and limitations under the License.
 
+import ideaadministrator
 from ideadatamodel import constants
 from ideasdk.utils import Utils
 from ideasdk.context import SocaCliContext
+from ideaadministrator.app.teardown_planner import call_with_throttling_backoff
 
-from typing import List, Dict
+from typing import List, Dict, Set, Optional
+from concurrent.futures import ThreadPoolExecutor
 from prettytable import PrettyTable
+import threading
+import os
+import time
+
+# the services available in a region rarely change
+DEFAULT_CACHE_TTL_SECONDS = 24 * 60 * 60
+DEFAULT_MAX_WORKERS = 10
+# maximum page size of GetParametersByPath
+GET_PARAMETERS_BY_PATH_MAX_RESULTS = 10
 
 
 class AwsServiceAvailabilityHelper:
 
-    def __init__(self, aws_region: str = None, aws_profile: str = None, aws_secondary_profile: str = None):
+    def __init__(self, aws_region: str = None, aws_profile: str = None, aws_secondary_profile: str = None,
+                 refresh: bool = False,
+                 cache_file: Optional[str] = None,
+                 cache_ttl_seconds: int = DEFAULT_CACHE_TTL_SECONDS,
+                 max_workers: int = DEFAULT_MAX_WORKERS):
+        """
+        :param refresh: ignore the cached services of the regions, and read them again from SSM
+        :param cache_file: json file with the services of each region, default: ~/.idea/cache/aws-service-availability.json
+        :param cache_ttl_seconds: duration after which the cached services of a region are read again
+        :param max_workers: number of regions read concurrently
+        """
         if Utils.is_empty(aws_region):
             aws_region = 'us-east-1'
 
@@ -39,6 +61,12 @@ class AwsServiceAvailabilityHelper:
 
         self.context = SocaCliContext()
 
+        self.refresh = refresh
+        self._cache_file = cache_file
+        self.cache_ttl_seconds = cache_ttl_seconds
+        self.max_workers = max_workers
+        self._cache_lock = threading.RLock()
+
         self.idea_services = {
             'acm': {
                 'title': 'AWS Certificate Manager (ACM)',
@@ -208,22 +236,75 @@ class AwsServiceAvailabilityHelper:
         self.idea_service_names = list(self.idea_services.keys())
         self.idea_service_names.sort()
 
-    def get_available_services(self, aws_region: str) -> Dict:
-        result = {}
+    @property
+    def cache_file(self) -> str:
+        if Utils.is_empty(self._cache_file):
+            self._cache_file = os.path.join(ideaadministrator.props.soca_cache_dir, 'aws-service-availability.json')
+        return self._cache_file
+
+    def _read_cache(self) -> Dict:
+        if not Utils.is_file(self.cache_file):
+            return {}
+        try:
+            with open(self.cache_file, 'r') as f:
+                cache = Utils.from_json(f.read())
+            if not isinstance(cache, dict):
+                return {}
+            return cache
+        except Exception as e:
+            # a corrupt cache is rebuilt
+            self.context.warning(f'failed to read service availability cache: {self.cache_file}, err: {e}')
+            return {}
 
+    def get_cached_region_services(self, aws_region: str, cache: Dict) -> Optional[Set[str]]:
+        if self.refresh:
+            return None
+        entry = Utils.get_value_as_dict(aws_region, cache)
+        if entry is None:
+            return None
+        cached_at = Utils.get_value_as_float('cached_at', entry, 0)
+        if time.time() - cached_at > self.cache_ttl_seconds:
+            return None
+        return set(Utils.get_value_as_list('services', entry, []))
+
+    def cache_region_services(self, region_services: Dict[str, Set[str]]):
+        """
+        merge the services of the regions into the cache file. the file is replaced atomically, so that a concurrent
+        reader never sees a partially written file.
+        """
+        if len(region_services) == 0:
+            return
+        with self._cache_lock:
+            cache = self._read_cache()
+            now = time.time()
+            for aws_region, services in region_services.items():
+                cache[aws_region] = {
+                    'cached_at': now,
+                    'services': sorted(services)
+                }
+            try:
+                os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
+                tmp_file = f'{self.cache_file}.{os.getpid()}.tmp'
+                with open(tmp_file, 'w') as f:
+                    f.write(Utils.to_json(cache))
+                os.replace(tmp_file, self.cache_file)
+            except OSError as e:
+                self.context.warning(f'failed to write service availability cache: {self.cache_file}, err: {e}')
+
+    def fetch_region_services(self, aws_region: str) -> Set[str]:
+        """
+        all the services available in the region, from the AWS global infrastructure parameters of SSM
+        """
         next_token = None
         all_services = set()
         while True:
-
-            if next_token is None:
-                get_parameters_result = self.ssm_client.get_parameters_by_path(
-                    Path=f'/aws/service/global-infrastructure/regions/{aws_region}/services'
-                )
-            else:
-                get_parameters_result = self.ssm_client.get_parameters_by_path(
-                    Path=f'/aws/service/global-infrastructure/regions/{aws_region}/services',
-                    NextToken=next_token
-                )
+            request = {
+                'Path': f'/aws/service/global-infrastructure/regions/{aws_region}/services',
+                'MaxResults': GET_PARAMETERS_BY_PATH_MAX_RESULTS
+            }
+            if next_token is not None:
+                request['NextToken'] = next_token
+            get_parameters_result = call_with_throttling_backoff(lambda: self.ssm_client.get_parameters_by_path(**request))
 
             parameters = Utils.get_value_as_list('Parameters', get_parameters_result, [])
             for parameter in parameters:
@@ -232,23 +313,51 @@ class AwsServiceAvailabilityHelper:
             next_token = Utils.get_value_as_string('NextToken', get_parameters_result)
             if next_token is None:
                 break
+        return all_services
+
+    def get_region_services(self, aws_regions: List[str]) -> Dict[str, Set[str]]:
+        """
+        the services available in each region. regions not found in the cache are read concurrently and cached.
+        """
+        result = {}
+        regions_to_fetch = []
+        with self._cache_lock:
+            cache = {} if self.refresh else self._read_cache()
+        for aws_region in dict.fromkeys(aws_regions):
+            services = self.get_cached_region_services(aws_region, cache)
+            if services is None:
+                regions_to_fetch.append(aws_region)
+            else:
+                result[aws_region] = services
+
+        if len(regions_to_fetch) > 0:
+            max_workers = max(1, min(self.max_workers, len(regions_to_fetch)))
+            with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='service-availability') as executor:
+                fetched = dict(zip(regions_to_fetch, executor.map(self.fetch_region_services, regions_to_fetch)))
+            self.cache_region_services(fetched)
+            result.update(fetched)
 
+        return result
+
+    def get_available_services(self, aws_region: str) -> Dict:
+        all_services = self.get_region_services([aws_region])[aws_region]
+        result = {}
         for service in self.idea_services:
             result[service] = service in all_services
-
         return result
 
     def get_availability_matrix(self, aws_regions: List[str]) -> List[Dict]:
+        region_services = self.get_region_services(aws_regions)
         matrix = {}
         for aws_region in aws_regions:
-            service_map = self.get_available_services(aws_region=aws_region)
-            for service, available in service_map.items():
+            all_services = region_services[aws_region]
+            for service in self.idea_services:
                 if service in matrix:
                     region_info = matrix[service]
                 else:
                     region_info = {}
                     matrix[service] = region_info
-                region_info[aws_region] = available
+                region_info[aws_region] = service in all_services
 
         result = []
         for service, region_info in matrix.items():
@@ -13,15 +13,50 @@ from ideasdk.context import SocaCliContext, SocaContextOptions
 from ideasdk.config.cluster_config_db import ClusterConfigDB
 from ideasdk.utils import Utils
 from ideadatamodel import constants, exceptions, errorcodes, EC2Instance, SocaMemory, SocaMemoryUnit
-
-from typing import Optional, List, Mapping
+from ideaadministrator.app.teardown_planner import (
+    TeardownPlan,
+    TeardownTask,
+    TeardownExecutor,
+    call_with_throttling_backoff,
+    map_concurrently,
+    DEFAULT_MAX_WORKERS
+)
+
+from typing import Optional, List, Mapping, Dict, Set
 from prettytable import PrettyTable
+import threading
 import time
 import botocore.exceptions
 
+# rough duration estimates used for the dry-run critical path. actual durations depend on the resources in each stack.
+ESTIMATE_APP_MODULE_CLEAN_UP_SECONDS = 120
+ESTIMATE_DETACH_LAMBDA_VPC_SECONDS = 930
+ESTIMATE_TERMINATE_EC2_INSTANCES_SECONDS = 30
+ESTIMATE_DELETE_STACK_SECONDS = 600
+ESTIMATE_DELETE_IDENTITY_PROVIDER_STACK_SECONDS = 300
+ESTIMATE_DELETE_CLUSTER_STACK_SECONDS = 1200
+ESTIMATE_DELETE_BACKUPS_SECONDS = 120
+ESTIMATE_DELETE_BOOTSTRAP_SECONDS = 300
+ESTIMATE_DELETE_TARGET_GROUPS_SECONDS = 30
+ESTIMATE_DELETE_DYNAMODB_TABLES_SECONDS = 60
+ESTIMATE_DELETE_CLOUDWATCH_LOGS_SECONDS = 60
+
+# TerminateInstances accepts multiple instance ids per call
+TERMINATE_INSTANCES_BATCH_SIZE = 100
+
+TASK_APP_MODULE_CLEAN_UP = 'app-module-clean-up'
+TASK_DETACH_LAMBDA_VPC = 'detach-lambda-vpc'
+TASK_TERMINATE_EC2_INSTANCES = 'terminate-ec2-instances'
+TASK_DELETE_BACKUPS = 'delete-backup-recovery-points'
+TASK_DELETE_BOOTSTRAP = 'delete-bootstrap-and-s3-bucket'
+TASK_DELETE_TARGET_GROUPS = 'delete-target-groups'
+TASK_DELETE_DYNAMODB_TABLES = 'delete-dynamodb-tables'
+TASK_DELETE_CLOUDWATCH_LOGS = 'delete-cloudwatch-logs'
+
+
 class DeleteCluster:
 
-    def __init__(self, cluster_name: str, aws_region: str, aws_profile: str, delete_bootstrap: bool, delete_databases: bool, delete_backups: bool, delete_cloudwatch_logs: bool, delete_all: bool, force: bool):
+    def __init__(self, cluster_name: str, aws_region: str, aws_profile: str, delete_bootstrap: bool, delete_databases: bool, delete_backups: bool, delete_cloudwatch_logs: bool = False, delete_all: bool = False, force: bool = False, dry_run: bool = False, max_workers: int = DEFAULT_MAX_WORKERS):
         self.cluster_name = cluster_name
         self.aws_region = aws_region
         self.aws_profile = aws_profile
@@ -31,8 +66,12 @@ class DeleteCluster:
         self.delete_cloudwatch_logs = delete_cloudwatch_logs
         self.delete_all = delete_all
         self.force = force
+        self.dry_run = dry_run
+        self.max_workers = max_workers
         self.delete_failed_attempt = 0
         self.delete_failed_max_attempts = 3
+        self.delete_failed_attempt_lock = threading.Lock()
+        self.termination_protection_confirmed = False
 
         self.context = SocaCliContext(
             options=SocaContextOptions(
@@ -75,6 +114,10 @@ class DeleteCluster:
         self.cluster_stacks = []
         # Identity Provider stacks - requires disable of the UserPool protection
         self.identity_provider_stacks = []
+        # stack name -> names of the stacks that import its exports and must be deleted first
+        self.stack_importers: Dict[str, Set[str]] = {}
+
+        self.vpc_lambda_functions = []
 
         self.dynamodb_tables = []
 
@@ -95,23 +138,18 @@ class DeleteCluster:
                 }
             ]
         )
-        for ec2_instance in ec2_instances:
-            if ec2_instance.state == 'terminated':
-                continue
+        ec2_instances = [
+            ec2_instance for ec2_instance in ec2_instances
+            if ec2_instance.state != 'terminated' and ec2_instance.get_tag(constants.BI_TAG_DEPLOYMENT) != "true"
+        ]
 
-            if ec2_instance.get_tag(constants.BI_TAG_DEPLOYMENT) == "true":
-                continue
+        # termination protection can only be described per instance. describe concurrently with a bounded
+        # worker pool, throttled requests are retried with backoff.
+        termination_protection = map_concurrently(self._is_termination_protected, ec2_instances, max_workers=self.max_workers)
 
-            # check termination protection instances
-            describe_instance_attribute_result = self.context.aws().ec2().describe_instance_attribute(
-                Attribute='disableApiTermination',
-                InstanceId=ec2_instance.instance_id
-            )
-            disable_api_termination = Utils.get_value_as_dict('DisableApiTermination', describe_instance_attribute_result)
-            disable_api_termination_enabled = Utils.get_value_as_bool('Value', disable_api_termination, False)
-            if disable_api_termination_enabled:
+        for ec2_instance, termination_protected in zip(ec2_instances, termination_protection):
+            if termination_protected:
                 termination_protected_instances.append(ec2_instance)
-            time.sleep(0.1)  # 10 tps - might need to be adjusted in-future. allowed 100 TPS - https://docs.aws.amazon.com/AWSEC2/latest/APIReference/throttling.html
 
             # app and infra node type instances will be terminated by their respective cloudformation stacks
             # we are primarily interested in the instances launched without CloudFormation stack
@@ -123,6 +161,14 @@ class DeleteCluster:
         self.termination_protected_ec2_instances = termination_protected_instances
         self.ec2_instances = ec2_instances_to_delete
 
+    def _is_termination_protected(self, ec2_instance: EC2Instance) -> bool:
+        describe_instance_attribute_result = self.context.aws().ec2().describe_instance_attribute(
+            Attribute='disableApiTermination',
+            InstanceId=ec2_instance.instance_id
+        )
+        disable_api_termination = Utils.get_value_as_dict('DisableApiTermination', describe_instance_attribute_result)
+        return Utils.get_value_as_bool('Value', disable_api_termination, False)
+
     @staticmethod
     def print_ec2_instances(ec2_instances: List[EC2Instance]):
         instance_table = PrettyTable(['Name', 'Instance Id', 'Private IP', 'Instance Type', 'Status'])
@@ -137,27 +183,28 @@ class DeleteCluster:
             ])
         print(instance_table)
 
+    def _disable_termination_protection(self, ec2_instance: EC2Instance):
+        self.context.info(f'disabling termination protection for EC2 instance: {ec2_instance.instance_id} ...')
+        self.context.aws().ec2().modify_instance_attribute(
+            InstanceId=ec2_instance.instance_id,
+            DisableApiTermination={
+                'Value': False
+            }
+        )
+        self.context.success(f'termination protection disabled for EC2 instance: {ec2_instance.instance_id}')
+
     def delete_ec2_instances(self):
         if len(self.termination_protected_ec2_instances) > 0:
-            for ec2_instance in self.termination_protected_ec2_instances:
-                self.context.info(f'disabling termination protection for EC2 instance: {ec2_instance.instance_id} ...')
-                self.context.aws().ec2().modify_instance_attribute(
-                    InstanceId=ec2_instance.instance_id,
-                    DisableApiTermination={
-                        'Value': False
-                    }
-                )
-                self.context.success(f'termination protection disabled for EC2 instance: {ec2_instance.instance_id}')
-                time.sleep(1)
-
-        if len(self.ec2_instances) > 0:
-            for ec2_instance in self.ec2_instances:
-                self.context.info(f'terminating EC2 instance: {ec2_instance.instance_id}')
-                self.context.aws().ec2().terminate_instances(
-                    InstanceIds=[ec2_instance.instance_id]
-                )
-                self.context.success(f'terminated EC2 instance: {ec2_instance.instance_id}')
-                time.sleep(1)
+            map_concurrently(self._disable_termination_protection, self.termination_protected_ec2_instances, max_workers=self.max_workers)
+
+        instance_ids = [ec2_instance.instance_id for ec2_instance in self.ec2_instances]
+        for i in range(0, len(instance_ids), TERMINATE_INSTANCES_BATCH_SIZE):
+            batch = instance_ids[i:i + TERMINATE_INSTANCES_BATCH_SIZE]
+            self.context.info(f'terminating EC2 instances: {batch}')
+            call_with_throttling_backoff(lambda: self.context.aws().ec2().terminate_instances(
+                InstanceIds=batch
+            ))
+            self.context.success(f'terminated {len(batch)} EC2 instances')
 
     def _get_app_instance(self, module_id: str) -> Optional[EC2Instance]:
         describe_instances_result = self.context.aws().ec2().describe_instances(
@@ -204,6 +251,9 @@ class DeleteCluster:
             print(f'executing app-module-clean-up commands for app: {module_id}')
             instance_ids.append(app_instance.instance_id)
 
+        if len(instance_ids) == 0:
+            return
+
         command_to_execute = 'sudo resctl app-module-clean-up'
         if self.delete_databases:
             command_to_execute = f'{command_to_execute} --delete-databases'
@@ -246,26 +296,27 @@ class DeleteCluster:
         stacks_to_delete = []
         cluster_stacks = []
         identity_provider_stacks = []
-        paginator = self.context.aws().cloudformation().get_paginator('list_stacks')
-        page_iterator = paginator.paginate()
-        # TODO: Use S3 select instead of looping on all the stacks for more efficient tag based querying 
-        for page in page_iterator:
-            for stacks in page.get('StackSummaries', []):
-                stack_name = stacks.get('StackName')
+        # describe_stacks without a stack name returns all active stacks along with their tags and outputs,
+        # so the stacks of the cluster can be discovered page by page without a describe call per stack.
+        paginator = self.context.aws().cloudformation().get_paginator('describe_stacks')
+        for page in paginator.paginate():
+            for stack in page.get('Stacks', []):
+                stack_name = stack.get('StackName')
 
                 if not stack_name:
                     continue
-                
+
                 if not stack_name.strip().startswith(self.cluster_name):
                     continue
-                
-                stack_id = stacks.get('StackId')
-                stack = self.describe_cloud_formation_stack(stack_id)
-                
-                if stack['StackStatus'] == 'DELETE_COMPLETE':
+
+                if stack.get('StackStatus') == 'DELETE_COMPLETE':
                     continue
 
-                tags = stack.get('Tags', {})
+                # nested stacks are deleted along with their parent stack
+                if Utils.is_not_empty(stack.get('ParentId')):
+                    continue
+
+                tags = stack.get('Tags', [])
                 tag_value = None
                 for tag in tags:
                     if tag['Key'] == constants.IDEA_TAG_ENVIRONMENT_NAME:
@@ -280,20 +331,50 @@ class DeleteCluster:
 
                 if self.is_batteries_included_stack(stack):
                     continue
-                
+
                 if self.is_cluster_stack(stack_name):
                     cluster_stacks.append(stack)
                 elif self.is_identity_provider_stack(stack_name):
                     identity_provider_stacks.append(stack)
                 else:
                     stacks_to_delete.append(stack)
-                
-                # sleep for a while to ensure we don't flood describe_stack() API
-                time.sleep(0.5)
+
         self.cloud_formation_stacks = stacks_to_delete
         self.cluster_stacks = cluster_stacks
         self.identity_provider_stacks = identity_provider_stacks
 
+    def _list_export_importers(self, export_name: str) -> List[str]:
+        importers = []
+        try:
+            paginator = self.context.aws().cloudformation().get_paginator('list_imports')
+            for page in paginator.paginate(ExportName=export_name):
+                importers.extend(page.get('Imports', []))
+        except botocore.exceptions.ClientError as e:
+            # raised when the export is not imported by any stack
+            if e.response['Error']['Code'] != 'ValidationError':
+                raise e
+        return importers
+
+    def find_stack_dependencies(self):
+        """
+        find the stacks that import exports of other stacks of the cluster.
+        an importing stack must be deleted before the stack that exports the value.
+        """
+        exports = []
+        for stack in self.cloud_formation_stacks + self.identity_provider_stacks + self.cluster_stacks:
+            stack_name = Utils.get_value_as_string('StackName', stack)
+            for output in Utils.get_value_as_list('Outputs', stack, []):
+                export_name = Utils.get_value_as_string('ExportName', output)
+                if Utils.is_not_empty(export_name):
+                    exports.append((stack_name, export_name))
+
+        importers = map_concurrently(lambda export: self._list_export_importers(export[1]), exports, max_workers=self.max_workers)
+        self.stack_importers = {}
+        for (stack_name, _), importing_stacks in zip(exports, importers):
+            for importing_stack in importing_stacks:
+                if importing_stack != stack_name:
+                    self.stack_importers.setdefault(stack_name, set()).add(importing_stack)
+
     def print_cloud_formation_stacks(self):
         stacks_table = PrettyTable(['Stack Name', 'Status', 'Termination Protection'])
         stacks_table.align = 'l'
@@ -327,7 +408,7 @@ class DeleteCluster:
                 raise e
 
         enable_termination_protection = Utils.get_value_as_bool('EnableTerminationProtection', stack, False)
-        if not self.force and enable_termination_protection:
+        if not self.force and not self.termination_protection_confirmed and enable_termination_protection:
             confirm = self.context.prompt(f'Termination protection is enabled for stack: {stack_name}. Disable and terminate?')
             if not confirm:
                 self.context.error('Abort cluster deletion')
@@ -345,6 +426,11 @@ class DeleteCluster:
             StackName=stack_name
         )
 
+    def delete_cloud_formation_stack_and_wait(self, stack_name: str):
+        self.delete_cloud_formation_stack(stack_name)
+        if not self.check_stack_deletion_status([stack_name]):
+            raise exceptions.general_exception(f'failed to delete CloudFormation stack: {stack_name}')
+
     def delete_dynamo_table(self, table_name: str):
         try:
             print(f'deleting table: {table_name} ...')
@@ -416,52 +502,48 @@ class DeleteCluster:
                     NetworkInterfaceId=network_interface_id
                 )
 
-    def detach_vpc_from_lambda_functions(self):
+    def _is_cluster_vpc_lambda_function(self, function: Mapping) -> bool:
+        function_arn = function['FunctionArn']
+        try:
+            tags = self.context.aws().lambda_().list_tags(Resource=function_arn)['Tags']
+            return tags.get(constants.IDEA_TAG_ENVIRONMENT_NAME) == self.cluster_name
+        except Exception as e:
+            self.context.error(f"Error retrieving tags for function {function_arn}: {e}")
+            return False
+
+    def find_vpc_lambda_functions(self):
         # List all functions with a VPC configuration
-        response = self.context.aws().lambda_().list_functions()
-        vpc_functions = []
-        # Filter functions based on tags
-        for func in response['Functions']:
-            if 'VpcConfig' in func:
-                function_arn = func['FunctionArn']
-                try:
-                    tags = self.context.aws().lambda_().list_tags(Resource=function_arn)['Tags']
-                    if tags.get(constants.IDEA_TAG_ENVIRONMENT_NAME) == self.cluster_name:
-                        vpc_functions.append(func)
-                except Exception as e:
-                    self.context.error(f"Error retrieving tags for function {function_arn}: {e}")
-
-        # Handle pagination if there are more functions
-        while 'NextMarker' in response:
-            response = self.context.aws().lambda_().list_functions(Marker=response['NextMarker'])
-            for func in response['Functions']:
+        functions = []
+        paginator = self.context.aws().lambda_().get_paginator('list_functions')
+        for page in paginator.paginate():
+            for func in page.get('Functions', []):
                 if 'VpcConfig' in func:
-                    function_arn = func['FunctionArn']
-                    try:
-                        tags = self.context.aws().lambda_().list_tags(Resource=function_arn)['Tags']
-                        if tags.get(constants.IDEA_TAG_ENVIRONMENT_NAME) == self.cluster_name:
-                            vpc_functions.append(func)
-                    except Exception as e:
-                        self.context.error(f"Error retrieving tags for function {function_arn}: {e}")
+                    functions.append(func)
+
+        # Filter functions based on tags
+        is_cluster_function = map_concurrently(self._is_cluster_vpc_lambda_function, functions, max_workers=self.max_workers)
+        self.vpc_lambda_functions = [func for func, matches in zip(functions, is_cluster_function) if matches]
+
+    def _detach_vpc_from_lambda_function(self, function: Mapping):
+        function_name = function['FunctionName']
+        self.context.info(f"Removing VPC configuration from function: {function_name}")
+        try:
+            call_with_throttling_backoff(lambda: self.context.aws().lambda_().update_function_configuration(
+                FunctionName=function_name,
+                VpcConfig={
+                    'SubnetIds': [],
+                    'SecurityGroupIds': []
+                }
+            ))
+            self.context.info(f"VPC configuration removed from function: {function_name}")
+        except Exception as e:
+            self.context.error(f"Error removing VPC configuration from function {function_name}: {e}")
 
+    def detach_vpc_from_lambda_functions(self):
         # Remove the VPC configuration from each function
-        for function in vpc_functions:
-            function_name = function['FunctionName']
-            self.context.info(f"Removing VPC configuration from function: {function_name}")
-            
-            try:
-                self.context.aws().lambda_().update_function_configuration(
-                    FunctionName=function_name,
-                    VpcConfig={
-                        'SubnetIds': [],
-                        'SecurityGroupIds': []
-                    }
-                )
-                self.context.info(f"VPC configuration removed from function: {function_name}")
-            except Exception as e:
-                self.context.error(f"Error removing VPC configuration from function {function_name}: {e}")
-        
-        if vpc_functions:
+        map_concurrently(self._detach_vpc_from_lambda_function, self.vpc_lambda_functions, max_workers=self.max_workers)
+
+        if self.vpc_lambda_functions:
             # If there were any Lambda functions connected to a RES VPC,
             # then the ENIs will take approximately ~15 minutes to delete.
             self.context.info("Waiting at least 15 minutes for Lambda functions previously attached to VPC to clean up any of their leftover ENIs...")
@@ -487,10 +569,13 @@ class DeleteCluster:
                         self.context.success(f'stack: {stack_name}, status: {stack_status}')
                         stacks_deleted.append(stack_name)
                     elif stack_status == 'DELETE_FAILED':
-                        if self.delete_failed_attempt < self.delete_failed_max_attempts:
+                        with self.delete_failed_attempt_lock:
+                            retry_delete = self.delete_failed_attempt < self.delete_failed_max_attempts
+                            if retry_delete:
+                                self.delete_failed_attempt += 1
+                        if retry_delete:
                             self.context.warning(f'stack: {stack_name}, status: {stack_status}, submitting a new delete_cloud_formation_stack request. [Loop {self.delete_failed_attempt}/{self.delete_failed_max_attempts}]')
                             self.delete_cloud_formation_stack(stack_name)
-                            self.delete_failed_attempt += 1
                         else:
                             self.context.error(f'stack: {stack_name}, status: {stack_status}')
                             stacks_deleted.append(stack_name)
@@ -543,6 +628,7 @@ class DeleteCluster:
             raise SystemExit(1)
 
     def find_dynamodb_tables(self):
+        self.dynamodb_tables = []
         last_evaluated_table_name = None
         while True:
             if Utils.is_empty(last_evaluated_table_name):
@@ -570,8 +656,7 @@ class DeleteCluster:
         print(f'{len(tables)} tables will be deleted.')
 
     def delete_dynamodb_tables(self):
-        for table in self.dynamodb_tables:
-            self.delete_dynamo_table(table)
+        map_concurrently(self.delete_dynamo_table, self.dynamodb_tables, max_workers=self.max_workers)
 
         # Cleanup Cloudwatch Alarms for all tables
         self.delete_cloudwatch_alarms()
@@ -634,6 +719,7 @@ class DeleteCluster:
 
     def find_cloudwatch_logs(self):
         self.context.info('Searching for CloudWatch log groups to be deleted ...')
+        self.cloudwatch_logs = []
         paginator = self.context.aws().logs().get_paginator('describe_log_groups')
 
         for prefix in {f'/{self.cluster_name}', f'/aws/lambda/{self.cluster_name}'}:
@@ -663,16 +749,14 @@ class DeleteCluster:
         total_size_mb = SocaMemory(value=total_size, unit=SocaMemoryUnit.BYTES)
         print(f'{len(logs)} log groups will be deleted. Total Size: {total_size_mb.as_unit(SocaMemoryUnit.MB)}')
 
+    def _delete_cloudwatch_log_group(self, log_group: Dict):
+        log_group_name = log_group.get('name')
+        print(f'deleting cloudwatch log group: {log_group_name} ...')
+        self.context.aws().logs().delete_log_group(logGroupName=log_group_name)
+        self.context.success(f'deleted log group: {log_group_name}')
+
     def delete_cloudwatch_log_groups(self):
-        for log_group in self.cloudwatch_logs:
-            try:
-                log_group_name = log_group.get('name')
-                print(f'deleting cloudwatch log group: {log_group_name} ...')
-                self.context.aws().logs().delete_log_group(logGroupName=log_group_name)
-                self.context.success(f'deleted log group: {log_group_name}')
-                time.sleep(.1)
-            except botocore.exceptions.BotoCoreError as e:
-                raise e
+        map_concurrently(self._delete_cloudwatch_log_group, self.cloudwatch_logs, max_workers=self.max_workers)
 
     def delete_bootstrap_and_s3_bucket(self):
         stack_name = self.get_bootstrap_stack_name()
@@ -743,38 +827,36 @@ class DeleteCluster:
                 BackupVaultName=backup_vault_name
             )
 
-            total_recovery_points = 0
-            total_deleted = 0
+            recovery_points = []
 
             bu_paginator = self.context.aws().backup().get_paginator('list_recovery_points_by_backup_vault')
             bu_iterator = bu_paginator.paginate(BackupVaultName=backup_vault_name)
 
             for _page in bu_iterator:
-                recovery_points = Utils.get_value_as_list('RecoveryPoints', _page, [])
-                total_recovery_points += len(recovery_points)
-
-            _rp_delete_start = Utils.current_time_ms()
-            self.context.info(f"Deleting {len(recovery_points)} recovery points from AWS Backup...")
-            for recovery_point in recovery_points:
-                recovery_point_arn = Utils.get_value_as_string('RecoveryPointArn', recovery_point)
-
-                # can be one of: 'COMPLETED'|'PARTIAL'|'DELETING'|'EXPIRED'
-                # if status is not COMPLETED/EXPIRED, do not attempt to delete, but wait for deletion or backup completion.
-                recovery_point_status = Utils.get_value_as_string('Status', recovery_point)
-                if recovery_point_status not in ('COMPLETED', 'EXPIRED'):
-                    continue
+                recovery_points.extend(Utils.get_value_as_list('RecoveryPoints', _page, []))
+
+            # can be one of: 'COMPLETED'|'PARTIAL'|'DELETING'|'EXPIRED'
+            # if status is not COMPLETED/EXPIRED, do not attempt to delete, but wait for deletion or backup completion.
+            recovery_point_arns = [
+                Utils.get_value_as_string('RecoveryPointArn', recovery_point)
+                for recovery_point in recovery_points
+                if Utils.get_value_as_string('Status', recovery_point) in ('COMPLETED', 'EXPIRED')
+            ]
 
+            def delete_recovery_point(recovery_point_arn: str):
                 self.context.info(f'deleting recovery point: {recovery_point_arn} ...')
                 self.context.aws().backup().delete_recovery_point(
                     BackupVaultName=backup_vault_name,
                     RecoveryPointArn=recovery_point_arn
                 )
-                total_deleted += 1
-                time.sleep(.1)
+
+            _rp_delete_start = Utils.current_time_ms()
+            self.context.info(f"Deleting {len(recovery_point_arns)} recovery points from AWS Backup...")
+            map_concurrently(delete_recovery_point, recovery_point_arns, max_workers=self.max_workers)
 
             _rp_delete_end = Utils.current_time_ms()
             _run_time_ms = int((_rp_delete_end - _rp_delete_start) / 1_000)
-            self.context.info(f'deleted {total_recovery_points} recovery points in {_run_time_ms} seconds.')
+            self.context.info(f'deleted {len(recovery_point_arns)} of {len(recovery_points)} recovery points in {_run_time_ms} seconds.')
 
         except botocore.exceptions.ClientError as e:
             if e.response['Error']['Code'] != 'ResourceNotFoundException':
@@ -814,12 +896,155 @@ class DeleteCluster:
                         self.context.info(f'Target group : {tg_name}')
                         target_group_arns.append(tg_arn)
 
-            for target_group_arn in target_group_arns:
-                self.context.aws().elbv2().delete_target_group(TargetGroupArn=target_group_arn)
+            map_concurrently(
+                lambda target_group_arn: self.context.aws().elbv2().delete_target_group(TargetGroupArn=target_group_arn),
+                target_group_arns,
+                max_workers=self.max_workers
+            )
 
         except Exception as e:
             self.context.error(f'Error deleting target groups: {e}')
 
+    def confirm_stack_termination_protection(self) -> bool:
+        protected_stacks = [
+            Utils.get_value_as_string('StackName', stack)
+            for stack in self.cloud_formation_stacks + self.identity_provider_stacks + self.cluster_stacks
+            if Utils.get_value_as_bool('EnableTerminationProtection', stack, False)
+        ]
+        if len(protected_stacks) == 0 or self.force:
+            self.termination_protection_confirmed = True
+            return True
+        self.termination_protection_confirmed = self.context.prompt(f'Termination protection is enabled for stacks: {protected_stacks}. Disable and terminate?')
+        return self.termination_protection_confirmed
+
+    def build_teardown_plan(self, delete_backups: bool, delete_bootstrap: bool, delete_databases: bool, delete_cloudwatch_logs: bool) -> TeardownPlan:
+        """
+        build the dependency graph of the cluster teardown:
+        * instances and lambda VPC attachments are cleaned up before any stack is deleted
+        * module stacks are deleted concurrently, a stack importing an export is deleted before the exporting stack
+        * the identity provider stack is deleted after the module stacks, and the cluster stack after all other stacks
+        * recovery points are deleted concurrently with the stacks, before the cluster stack deletes the backup vault
+        """
+        plan = TeardownPlan()
+
+        if len(self.app_modules) > 0:
+            plan.add_task(TeardownTask(
+                task_id=TASK_APP_MODULE_CLEAN_UP,
+                description='run app-module-clean-up on application instances',
+                action=self.invoke_app_app_module_clean_up,
+                estimated_seconds=ESTIMATE_APP_MODULE_CLEAN_UP_SECONDS
+            ))
+        if len(self.vpc_lambda_functions) > 0:
+            plan.add_task(TeardownTask(
+                task_id=TASK_DETACH_LAMBDA_VPC,
+                description=f'detach VPC from {len(self.vpc_lambda_functions)} lambda functions and wait for ENI clean-up',
+                action=self.detach_vpc_from_lambda_functions,
+                estimated_seconds=ESTIMATE_DETACH_LAMBDA_VPC_SECONDS
+            ))
+        if len(self.ec2_instances) > 0 or len(self.termination_protected_ec2_instances) > 0:
+            plan.add_task(TeardownTask(
+                task_id=TASK_TERMINATE_EC2_INSTANCES,
+                description=f'terminate {len(self.ec2_instances)} EC2 instances',
+                action=self.delete_ec2_instances,
+                estimated_seconds=ESTIMATE_TERMINATE_EC2_INSTANCES_SECONDS
+            ))
+            plan.add_dependency(TASK_TERMINATE_EC2_INSTANCES, TASK_APP_MODULE_CLEAN_UP)
+        pre_stack_task_ids = [TASK_APP_MODULE_CLEAN_UP, TASK_DETACH_LAMBDA_VPC, TASK_TERMINATE_EC2_INSTANCES]
+
+        def add_stack_task(stack: Mapping, description: str, estimated_seconds: int, depends_on: List[str]) -> str:
+            stack_name = Utils.get_value_as_string('StackName', stack)
+            task_id = f'stack:{stack_name}'
+            plan.add_task(TeardownTask(
+                task_id=task_id,
+                description=description,
+                action=lambda: self.delete_cloud_formation_stack_and_wait(stack_name),
+                estimated_seconds=estimated_seconds
+            ))
+            for dependency in depends_on:
+                plan.add_dependency(task_id, dependency)
+            return task_id
+
+        module_stack_task_ids = [
+            add_stack_task(stack, 'delete module stack', ESTIMATE_DELETE_STACK_SECONDS, pre_stack_task_ids)
+            for stack in self.cloud_formation_stacks
+        ]
+        for exporting_stack, importing_stacks in self.stack_importers.items():
+            for importing_stack in importing_stacks:
+                plan.add_dependency(f'stack:{exporting_stack}', f'stack:{importing_stack}')
+
+        identity_provider_stack_task_ids = [
+            add_stack_task(stack, 'delete identity provider stack', ESTIMATE_DELETE_IDENTITY_PROVIDER_STACK_SECONDS, pre_stack_task_ids + module_stack_task_ids)
+            for stack in self.identity_provider_stacks
+        ]
+
+        if delete_backups:
+            plan.add_task(TeardownTask(
+                task_id=TASK_DELETE_BACKUPS,
+                description='delete backup vault recovery points',
+                action=self.delete_backup_vault_recovery_points,
+                estimated_seconds=ESTIMATE_DELETE_BACKUPS_SECONDS
+            ))
+
+        cluster_stack_task_ids = [
+            add_stack_task(stack, 'delete cluster stack', ESTIMATE_DELETE_CLUSTER_STACK_SECONDS, pre_stack_task_ids + module_stack_task_ids + identity_provider_stack_task_ids + [TASK_DELETE_BACKUPS])
+            for stack in self.cluster_stacks
+        ]
+        all_stack_task_ids = module_stack_task_ids + identity_provider_stack_task_ids + cluster_stack_task_ids
+
+        if delete_bootstrap:
+            plan.add_task(TeardownTask(
+                task_id=TASK_DELETE_BOOTSTRAP,
+                description='delete bootstrap stack and cluster S3 bucket',
+                action=self.delete_bootstrap_and_s3_bucket,
+                estimated_seconds=ESTIMATE_DELETE_BOOTSTRAP_SECONDS
+            ))
+            for task_id in all_stack_task_ids:
+                plan.add_dependency(TASK_DELETE_BOOTSTRAP, task_id)
+
+        # QUIC support modifies the target groups which cloudformation cannot recognize.
+        # target groups can only be deleted after load balancers and listeners have been deleted by the cluster stack.
+        plan.add_task(TeardownTask(
+            task_id=TASK_DELETE_TARGET_GROUPS,
+            description='delete target groups',
+            action=self.delete_target_groups,
+            estimated_seconds=ESTIMATE_DELETE_TARGET_GROUPS_SECONDS
+        ))
+        for task_id in all_stack_task_ids:
+            plan.add_dependency(TASK_DELETE_TARGET_GROUPS, task_id)
+
+        if delete_databases and len(self.dynamodb_tables) > 0:
+            plan.add_task(TeardownTask(
+                task_id=TASK_DELETE_DYNAMODB_TABLES,
+                description=f'delete {len(self.dynamodb_tables)} dynamodb tables and alarms',
+                action=self.delete_dynamodb_tables,
+                estimated_seconds=ESTIMATE_DELETE_DYNAMODB_TABLES_SECONDS
+            ))
+            for task_id in pre_stack_task_ids + all_stack_task_ids:
+                plan.add_dependency(TASK_DELETE_DYNAMODB_TABLES, task_id)
+
+        if delete_cloudwatch_logs:
+            def delete_cloudwatch_logs_action():
+                # log groups can be created while stacks are deleted, search again before deleting
+                self.find_cloudwatch_logs()
+                self.delete_cloudwatch_log_groups()
+
+            plan.add_task(TeardownTask(
+                task_id=TASK_DELETE_CLOUDWATCH_LOGS,
+                description='delete cloudwatch log groups',
+                action=delete_cloudwatch_logs_action,
+                estimated_seconds=ESTIMATE_DELETE_CLOUDWATCH_LOGS_SECONDS
+            ))
+            for task_id in all_stack_task_ids + [TASK_DELETE_BOOTSTRAP]:
+                plan.add_dependency(TASK_DELETE_CLOUDWATCH_LOGS, task_id)
+
+        return plan
+
+    def _on_teardown_task_completed(self, task: TeardownTask, error: Optional[BaseException]):
+        if error is None:
+            self.context.success(f'teardown task completed: {task.task_id}')
+        else:
+            self.context.error(f'teardown task failed: {task.task_id}, error: {error}')
+
     def invoke(self):
 
         # Finding ec2 instances
@@ -831,15 +1056,41 @@ class DeleteCluster:
 
         # Finding CloudFormation stacks
         self.find_cloud_formation_stacks()
+        self.find_stack_dependencies()
         self.print_cloud_formation_stacks()
 
+        self.find_vpc_lambda_functions()
+
+        delete_backups = self.delete_backups or self.delete_all
+        delete_bootstrap = self.delete_bootstrap or self.delete_all
+        delete_databases = self.delete_databases or self.delete_all
+        delete_cloudwatch_logs = self.delete_cloudwatch_logs or self.delete_all
+
+        if delete_databases:
+            self.find_dynamodb_tables()
+            if Utils.is_not_empty(self.dynamodb_tables):
+                self.print_dynamodb_tables()
+
+        if delete_cloudwatch_logs:
+            self.find_cloudwatch_logs()
+            if Utils.is_not_empty(self.cloudwatch_logs):
+                self.print_cloudwatch_logs()
+
+        if self.dry_run:
+            self.context.print_rule('Teardown Plan (dry run)')
+            self.build_teardown_plan(
+                delete_backups=delete_backups,
+                delete_bootstrap=delete_bootstrap,
+                delete_databases=delete_databases,
+                delete_cloudwatch_logs=delete_cloudwatch_logs
+            ).print_plan()
+            return
+
         if not self.force:
             confirm = self.context.prompt(f'Are you sure you want to delete cluster: {self.cluster_name}, region: {self.aws_region} ?')
             if not confirm:
                 return
 
-        self.invoke_app_app_module_clean_up()
-
         if Utils.is_not_empty(self.termination_protected_ec2_instances):
             self.print_ec2_instances(self.termination_protected_ec2_instances)
             print(f'found {len(self.termination_protected_ec2_instances)} EC2 instances with termination protection enabled.')
@@ -848,60 +1099,39 @@ class DeleteCluster:
                 if not confirm:
                     return
 
-        self.detach_vpc_from_lambda_functions()
+        # all confirmations are collected before the teardown starts, as tasks run concurrently
+        if not self.confirm_stack_termination_protection():
+            self.context.error('Abort cluster deletion')
+            raise SystemExit
 
-        self.delete_ec2_instances()
-        self.delete_cloud_formation_stacks()
+        if delete_backups and not self.force:
+            delete_backups = self.context.prompt(f'Are you sure you want to delete all the backup recovery points associated with the cluster: 'f'{self.cluster_name}?')
 
-        # Delete identity-provider stack - removing UserPool protection
-        self.delete_identity_provider_stacks()
+        if delete_bootstrap and not self.force:
+            delete_bootstrap = self.context.prompt(f'Are you sure you want to delete the bootstrap stack and S3 Bucket associated with the cluster: 'f'{self.cluster_name}? This action is not reversible.')
 
-        # delete backups if applicable
-        if self.delete_backups or self.delete_all:
-            confirm_delete_backups = self.force
-            if not self.force:
-                confirm_delete_backups = self.context.prompt(f'Are you sure you want to delete all the backup recovery points associated with the cluster: 'f'{self.cluster_name}?')
+        if delete_databases and Utils.is_not_empty(self.dynamodb_tables) and not self.force:
+            delete_databases = self.context.prompt(f'Are you sure you want to delete all dynamodb tables associated with the cluster: 'f'{self.cluster_name}?')
 
-            if confirm_delete_backups:
-                self.delete_backup_vault_recovery_points()
+        if delete_cloudwatch_logs and not self.force:
+            delete_cloudwatch_logs = self.context.prompt(f'Are you sure you want to delete all cloudwatch logs associated with the cluster: 'f'{self.cluster_name}?')
 
-        self.delete_cluster_stack()
-
-        if self.delete_bootstrap or self.delete_all:
-            confirm_delete_bootstrap = self.force
-            if not self.force:
-                confirm_delete_bootstrap = self.context.prompt(f'Are you sure you want to delete the bootstrap stack and S3 Bucket associated with the cluster: 'f'{self.cluster_name}? This action is not reversible.')
-
-            if confirm_delete_bootstrap:
-                self.delete_bootstrap_and_s3_bucket()
-
-        #Required here because QUIC support modifies the target groups which cloudformation cannot recognize
-        #At this point load balancers and listeners have been deleted
-        self.context.info(f'Deleting target groups...')
-        self.delete_target_groups()
-        
-        if self.delete_databases or self.delete_all:
-            self.find_dynamodb_tables()
-            if Utils.is_not_empty(self.dynamodb_tables):
-                self.print_dynamodb_tables()
-
-                confirm_delete_databases = self.force
-                if not self.force:
-                    confirm_delete_databases = self.context.prompt(f'Are you sure you want to delete all dynamodb tables associated with the cluster: 'f'{self.cluster_name}?')
-
-                if confirm_delete_databases:
-                    self.delete_dynamodb_tables()
-
-        if self.delete_cloudwatch_logs or self.delete_all:
-            self.find_cloudwatch_logs()
-            if Utils.is_not_empty(self.cloudwatch_logs):
-                self.print_cloudwatch_logs()
-
-                confirm_delete_cloudwatch_logs = self.force
-                if not self.force:
-                    confirm_delete_cloudwatch_logs = self.context.prompt(f'Are you sure you want to delete all cloudwatch logs associated with the cluster: 'f'{self.cluster_name}?')
-
-                if confirm_delete_cloudwatch_logs:
-                    self.delete_cloudwatch_log_groups()
+        plan = self.build_teardown_plan(
+            delete_backups=delete_backups,
+            delete_bootstrap=delete_bootstrap,
+            delete_databases=delete_databases,
+            delete_cloudwatch_logs=delete_cloudwatch_logs
+        )
+        plan.print_plan()
 
-        
+        executor = TeardownExecutor(
+            plan=plan,
+            max_workers=self.max_workers,
+            on_task_started=lambda task: self.context.info(f'starting teardown task: {task.task_id} ({task.description}) ...'),
+            on_task_completed=self._on_teardown_task_completed
+        )
+        if not executor.execute():
+            if len(executor.skipped) > 0:
+                self.context.error(f'teardown tasks skipped due to failed dependencies: {sorted(executor.skipped)}')
+            self.context.error('failed to delete cluster. abort!')
+            raise SystemExit(1)
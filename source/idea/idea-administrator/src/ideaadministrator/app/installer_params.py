@@ -805,7 +805,7 @@ class MetricsProviderPrompt(DefaultPrompt[str]):
             profile_string = f"s (primary:  {aws_profile}, secondary: {aws_secondary_profile})"
 
         with self.context.spinner(f'checking available services in region: {aws_region} using AWS Profile{profile_string} ...'):
-            availability_helper = AwsServiceAvailabilityHelper(aws_region=aws_region, aws_profile=aws_profile, aws_secondary_profile=aws_secondary_profile)
+            availability_helper = AwsServiceAvailabilityHelper(aws_region=aws_region, aws_profile=aws_profile, aws_secondary_profile=aws_secondary_profile, refresh=refresh)
             available_services = availability_helper.get_available_services(aws_region)
 
         result = [
@@ -15,10 +15,16 @@ from ideadatamodel import exceptions, constants, EC2Instance
 from ideasdk.utils import Utils
 
 from ideasdk.context import SocaCliContext, SocaContextOptions
-
-from typing import List
+from ideaadministrator.app.rolling_patch import (
+    RollingPatchEngine,
+    plan_patch_waves,
+    ec2_instance_status_health_check,
+    DEFAULT_MAX_CONCURRENCY,
+    DEFAULT_MAX_ERRORS
+)
+
+from typing import List, Optional
 import os
-import time
 from prettytable import PrettyTable
 
 PATCH_LOG = '/root/bootstrap/logs/patch.log'
@@ -29,7 +35,12 @@ class PatchHelper:
     def __init__(self, cluster_name: str, aws_region: str, aws_profile: str, component: str,
                  instance_selector: str,
                  module_id: str, package_uri: str, force: bool,
-                 patch_command: str):
+                 patch_command: str,
+                 batch_size: Optional[int] = None,
+                 batch_percentage: Optional[float] = None,
+                 canary_size: int = 0,
+                 max_concurrency: Optional[str] = None,
+                 max_errors: Optional[str] = None):
 
         if Utils.is_empty(cluster_name):
             raise exceptions.invalid_params('cluster_name is required')
@@ -47,6 +58,11 @@ class PatchHelper:
         self.user_package_uri = package_uri
         self.force = force
         self.patch_command = patch_command
+        self.batch_size = batch_size
+        self.batch_percentage = batch_percentage
+        self.canary_size = Utils.get_as_int(canary_size, default=0)
+        self.max_concurrency = Utils.get_as_string(max_concurrency, default=DEFAULT_MAX_CONCURRENCY)
+        self.max_errors = Utils.get_as_string(max_errors, default=DEFAULT_MAX_ERRORS)
 
         self.context = SocaCliContext(options=SocaContextOptions(
             cluster_name=cluster_name,
@@ -135,7 +151,8 @@ class PatchHelper:
     def patch_app(self):
 
         self.context.info('searching for applicable ec2 instances ...')
-        describe_instances_result = self.context.aws().ec2().describe_instances(
+        describe_instances_paginator = self.context.aws().ec2().get_paginator('describe_instances')
+        describe_instances_pages = describe_instances_paginator.paginate(
             Filters=[
                 {
                     'Name': 'instance-state-name',
@@ -159,20 +176,20 @@ class PatchHelper:
         instances_to_patch = []
         instances_cannot_be_patched = []
 
-        reservations = Utils.get_value_as_list('Reservations', describe_instances_result, [])
-        for reservation in reservations:
-            instances = Utils.get_value_as_list('Instances', reservation)
-            for instance in instances:
-                ec2_instance = EC2Instance(instance)
-                if ec2_instance.state == 'running':
-                    if Utils.is_empty(self.instance_selector) or self.instance_selector == 'all':
-                        instances_to_patch.append(ec2_instance)
-                    else:
-                        if self.instance_selector == 'any':
+        for describe_instances_result in describe_instances_pages:
+            reservations = Utils.get_value_as_list('Reservations', describe_instances_result, [])
+            for reservation in reservations:
+                instances = Utils.get_value_as_list('Instances', reservation)
+                for instance in instances:
+                    ec2_instance = EC2Instance(instance)
+                    if ec2_instance.state == 'running':
+                        if Utils.is_empty(self.instance_selector) or self.instance_selector == 'all':
                             instances_to_patch.append(ec2_instance)
-                            break
-                else:
-                    instances_cannot_be_patched = ec2_instance
+                        else:
+                            if self.instance_selector == 'any' and len(instances_to_patch) == 0:
+                                instances_to_patch.append(ec2_instance)
+                    else:
+                        instances_cannot_be_patched.append(ec2_instance)
 
         if len(instances_cannot_be_patched) > 0:
             self.context.warning('Below instances cannot be patched as the instances are not running: ')
@@ -183,95 +200,66 @@ class PatchHelper:
             return
 
         self.print_ec2_instance_table(instances_to_patch)
+
+        waves = plan_patch_waves(
+            instance_ids=[ec2_instance.instance_id for ec2_instance in instances_to_patch],
+            batch_size=self.batch_size,
+            batch_percentage=self.batch_percentage,
+            canary_size=self.canary_size
+        )
+        self.context.info(f'{len(instances_to_patch)} instances will be patched in {len(waves)} wave(s) of: {", ".join([str(len(wave)) for wave in waves])} instances, '
+                          f'max concurrency: {self.max_concurrency}, max errors: {self.max_errors}')
+
         if not self.force:
             confirm = self.context.prompt(f'Are you sure you want to patch the above running ec2 instances for module: {self.module_name}?')
             if not confirm:
                 self.context.info('Patch aborted!')
                 return
 
-        with self.context.spinner('patching ec2 instances via AWS Systems Manager (Run Command) ... '):
-
-            if Utils.is_empty(self.patch_command):
-                package_uri = self.try_get_s3_package_uri()
-                patch_command = self.get_patch_run_command(package_uri)
-            else:
-                patch_command = self.patch_command
-            print(f'patch command: {patch_command}')
-
-            instance_ids = []
-            for ec2_instance in instances_to_patch:
-                instance_ids.append(ec2_instance.instance_id)
-
-            send_command_result = self.context.aws().ssm().send_command(
-                InstanceIds=instance_ids,
-                DocumentName='AWS-RunShellScript',
-                Parameters={
-                    'commands': [
-                        f'sudo echo "# $(date) executing patch ..." >> {PATCH_LOG}',
-                        patch_command,
-                        f'sudo tail -10 {PATCH_LOG}'
-                    ]
-                }
-            )
-
-            command_id = send_command_result['Command']['CommandId']
-            while True:
-                list_command_invocations_result = self.context.aws().ssm().list_command_invocations(
-                    CommandId=command_id,
-                    Details=False
-                )
-                command_invocations = list_command_invocations_result['CommandInvocations']
-
-                completed_count = 0
-                failed_count = 0
-
-                for command_invocation in command_invocations:
-                    status = command_invocation['Status']
-
-                    if status in ('Success', 'TimedOut', 'Cancelled', 'Failed'):
-                        completed_count += 1
-
-                    if status in ('TimedOut', 'Cancelled', 'Failed'):
-                        failed_count += 1
-
-                if len(command_invocations) > 0:
-                    self.context.info(f'Patching completed on {completed_count} out of {len(command_invocations)} instances')
-                if completed_count == len(command_invocations) and len(command_invocations) > 0:
-                    break
-
-                time.sleep(10)
-
-        list_command_invocations_result = self.context.aws().ssm().list_command_invocations(
-            CommandId=command_id,
-            Details=True
+        if Utils.is_empty(self.patch_command):
+            package_uri = self.try_get_s3_package_uri()
+            patch_command = self.get_patch_run_command(package_uri)
+        else:
+            patch_command = self.patch_command
+        print(f'patch command: {patch_command}')
+
+        self.context.info('patching ec2 instances via AWS Systems Manager (Run Command) ... ')
+        engine = RollingPatchEngine(
+            ssm_client=self.context.aws().ssm(),
+            commands=[
+                f'sudo echo "# $(date) executing patch ..." >> {PATCH_LOG}',
+                patch_command,
+                f'sudo tail -10 {PATCH_LOG}'
+            ],
+            waves=waves,
+            max_concurrency=self.max_concurrency,
+            max_errors=self.max_errors,
+            health_check=ec2_instance_status_health_check(self.context.aws().ec2()),
+            comment=f'patch module: {self.module_id}'
         )
-        command_invocations = list_command_invocations_result['CommandInvocations']
+        result = engine.run()
 
-        instance_id_to_command_invocations = {}
-        for command_invocation in command_invocations:
-            instance_id = command_invocation['InstanceId']
-            instance_id_to_command_invocations[instance_id] = command_invocation
-
-        self.context.info(f'Patch execution status for SSM Command Id: {command_id}')
+        statuses = result.get_statuses()
+        self.context.info(f'Patch execution status for SSM Command Id(s): {", ".join([command_id for wave in result.waves for command_id in wave.command_ids])}')
         table = PrettyTable(['Instance Id', 'Instance Name', 'Host Name', 'Private IP', 'State', 'Patch Status'])
         table.align = 'l'
         for ec2_instance in instances_to_patch:
-            command_invocation = instance_id_to_command_invocations[ec2_instance.instance_id]
-            patch_status = command_invocation['Status']
             table.add_row([
                 ec2_instance.instance_id,
                 ec2_instance.get_tag('Name'),
                 ec2_instance.private_dns_name_fqdn,
                 ec2_instance.private_ip_address,
                 ec2_instance.state,
-                patch_status
+                statuses.get(ec2_instance.instance_id)
             ])
 
         print(table)
 
-        if failed_count > 0:
+        if result.halted_reason is not None:
+            self.context.error(f'Patch halted: {result.halted_reason}. Remaining waves were not patched.')
+        if result.failed_count > 0:
             self.context.error(f'Patch failed. Please check the patch logs for the instances at {PATCH_LOG}')
-        else:
+        elif result.is_success():
             self.context.success('Patch executed successfully. Please verify the patch functionality as per release notes / change log.')
 
     def apply(self):
@@ -0,0 +1,374 @@
+#  Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance
+#  with the License. A copy of the License is located at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  or in the 'license' file accompanying this file. This file is distributed on an 'AS IS' BASIS, WITHOUT WARRANTIES
+#  OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions
+#  and limitations under the License.
+
+from ideadatamodel import exceptions
+from ideasdk.utils import Utils
+from ideaadministrator.app.teardown_planner import call_with_throttling_backoff
+
+from typing import Optional, List, Dict, Callable, Tuple, Any
+from prettytable import PrettyTable
+import math
+import time
+
+# SendCommand accepts up to 50 instance ids per request
+SSM_SEND_COMMAND_MAX_INSTANCE_IDS = 50
+# maximum page size of ListCommandInvocations
+SSM_LIST_COMMAND_INVOCATIONS_MAX_RESULTS = 50
+# DescribeInstanceStatus accepts up to 100 instance ids per request
+EC2_DESCRIBE_INSTANCE_STATUS_MAX_INSTANCE_IDS = 100
+
+DEFAULT_MAX_CONCURRENCY = '50'
+DEFAULT_MAX_ERRORS = '0'
+DEFAULT_POLL_INTERVAL_SECONDS = 10
+
+INVOCATION_STATUS_PENDING = 'Pending'
+INVOCATION_STATUS_SUCCESS = 'Success'
+INVOCATION_STATUS_SKIPPED = 'Skipped'
+INVOCATION_FAILED_STATUSES = {'TimedOut', 'Cancelled', 'Failed'}
+INVOCATION_COMPLETED_STATUSES = {INVOCATION_STATUS_SUCCESS} | INVOCATION_FAILED_STATUSES
+
+WAVE_STATUS_PENDING = 'Pending'
+WAVE_STATUS_IN_PROGRESS = 'InProgress'
+WAVE_STATUS_COMPLETED = 'Completed'
+WAVE_STATUS_FAILED = 'Failed'
+WAVE_STATUS_SKIPPED = 'Skipped'
+
+
+def parse_ssm_rate(value: str, total: int) -> int:
+    """
+    convert an SSM MaxConcurrency or MaxErrors value, an absolute number (eg. 10) or a percentage (eg. 10%),
+    to a number of instances out of total.
+    """
+    value = Utils.get_as_string(value, default='').strip()
+    try:
+        if value.endswith('%'):
+            percentage = float(value[:-1])
+            if not 0 <= percentage <= 100:
+                raise ValueError(value)
+            return math.floor(total * percentage / 100)
+        count = int(value)
+        if count < 0:
+            raise ValueError(value)
+        return count
+    except ValueError:
+        raise exceptions.invalid_params(f'invalid value: {value}. expected a number or a percentage, eg. 10 or 10%')
+
+
+def split_ssm_rate(value: str, chunk_count: int, minimum: int = 0) -> List[str]:
+    """
+    split an SSM MaxConcurrency value of a wave across the SendCommand chunks of the wave.
+    a percentage applies to each chunk as is. an absolute number is divided across the chunks, so that the chunks,
+    which run at the same time, do not exceed it together. each chunk gets at least minimum, so the chunks together
+    can exceed an absolute number lower than chunk_count * minimum.
+    """
+    value = Utils.get_as_string(value, default='').strip()
+    if value.endswith('%'):
+        return [value] * chunk_count
+    total = parse_ssm_rate(value, 0)
+    share, remainder = divmod(total, chunk_count)
+    return [str(max(share + (1 if index < remainder else 0), minimum)) for index in range(chunk_count)]
+
+
+def plan_patch_waves(instance_ids: List[str], batch_size: Optional[int] = None, batch_percentage: Optional[float] = None, canary_size: int = 0) -> List[List[str]]:
+    """
+    split the instances to patch into waves.
+    the first wave has canary_size instances if a canary is requested. the remaining instances are patched in
+    batches of batch_size instances, or batch_percentage percent of all instances. all remaining instances are
+    patched in a single wave if neither is provided.
+    """
+    if batch_size is not None and batch_percentage is not None:
+        raise exceptions.invalid_params('only one of batch_size or batch_percentage can be provided')
+    if batch_size is not None and batch_size <= 0:
+        raise exceptions.invalid_params('batch_size must be greater than 0')
+    if batch_percentage is not None and not 0 < batch_percentage <= 100:
+        raise exceptions.invalid_params('batch_percentage must be greater than 0 and less than or equal to 100')
+    if canary_size is not None and canary_size < 0:
+        raise exceptions.invalid_params('canary_size must be greater than or equal to 0')
+
+    instance_ids = list(dict.fromkeys(instance_ids))
+    waves = []
+    remaining = instance_ids
+    if canary_size and len(instance_ids) > 0:
+        waves.append(remaining[:canary_size])
+        remaining = remaining[canary_size:]
+
+    if batch_size is None and batch_percentage is None:
+        wave_size = max(len(remaining), 1)
+    elif batch_size is not None:
+        wave_size = batch_size
+    else:
+        wave_size = max(1, math.ceil(len(instance_ids) * batch_percentage / 100))
+
+    for start in range(0, len(remaining), wave_size):
+        waves.append(remaining[start:start + wave_size])
+    return waves
+
+
+class PatchWave:
+    """
+    a batch of instances patched with the same set of SSM commands
+    """
+
+    def __init__(self, index: int, instance_ids: List[str]):
+        self.index = index
+        self.instance_ids = instance_ids
+        self.command_ids: List[str] = []
+        self.statuses: Dict[str, str] = {instance_id: INVOCATION_STATUS_PENDING for instance_id in instance_ids}
+        self.status = WAVE_STATUS_PENDING
+        self.started_at: Optional[float] = None
+        self.completed_at: Optional[float] = None
+
+    def count(self, statuses) -> int:
+        return len([status for status in self.statuses.values() if status in statuses])
+
+    @property
+    def completed_count(self) -> int:
+        return self.count(INVOCATION_COMPLETED_STATUSES)
+
+    @property
+    def failed_count(self) -> int:
+        return self.count(INVOCATION_FAILED_STATUSES)
+
+    def is_complete(self) -> bool:
+        return self.completed_count == len(self.instance_ids)
+
+    def __repr__(self):
+        return f'PatchWave({self.index}, {len(self.instance_ids)} instances)'
+
+
+class RollingPatchResult:
+
+    def __init__(self, waves: List[PatchWave], halted_reason: Optional[str] = None):
+        self.waves = waves
+        self.halted_reason = halted_reason
+
+    def get_statuses(self) -> Dict[str, str]:
+        statuses = {}
+        for wave in self.waves:
+            for instance_id, status in wave.statuses.items():
+                statuses[instance_id] = INVOCATION_STATUS_SKIPPED if wave.status == WAVE_STATUS_SKIPPED else status
+        return statuses
+
+    @property
+    def failed_count(self) -> int:
+        return sum([wave.failed_count for wave in self.waves])
+
+    def is_success(self) -> bool:
+        return self.halted_reason is None and self.failed_count == 0
+
+
+class RollingPatchEngine:
+    """
+    patch a fleet of instances with SSM Run Command, one wave at a time.
+
+    each wave is sent with SendCommand in chunks of 50 instances. MaxConcurrency applies to the wave: a percentage is
+    sent as is with each chunk, and an absolute number is divided across the chunks of the wave. SendCommand requires
+    a MaxConcurrency of at least 1, so an absolute MaxConcurrency lower than the number of chunks runs one instance
+    per chunk at once, eg. a MaxConcurrency of 2 for a wave of 200 instances runs 4 instances at once.
+    MaxErrors is sent as is with each chunk, so that a chunk does not stop on errors that the wave allows, and the
+    failed invocations of the whole wave are checked by the health gate.
+    the invocations of the wave are tracked with a paginated ListCommandInvocations until all instances of the wave
+    have completed. the next wave is sent only if the wave passes the health gate:
+        * the failed invocations of the wave do not exceed MaxErrors, applied to the size of the wave
+        * health_check, if provided, reports the instances of the wave as healthy
+    """
+
+    def __init__(self, ssm_client: Any,
+                 commands: List[str],
+                 waves: List[List[str]],
+                 max_concurrency: str = DEFAULT_MAX_CONCURRENCY,
+                 max_errors: str = DEFAULT_MAX_ERRORS,
+                 health_check: Optional[Callable[[List[str]], Tuple[bool, Optional[str]]]] = None,
+                 poll_interval_seconds: float = DEFAULT_POLL_INTERVAL_SECONDS,
+                 document_name: str = 'AWS-RunShellScript',
+                 comment: Optional[str] = None,
+                 clock: Callable[[], float] = time.time,
+                 sleep: Callable[[float], None] = time.sleep,
+                 print_progress: bool = True):
+
+        # validate rates before the first command is sent
+        parse_ssm_rate(max_concurrency, 1)
+        parse_ssm_rate(max_errors, 1)
+
+        self.ssm_client = ssm_client
+        self.commands = commands
+        self.waves = [PatchWave(index + 1, instance_ids) for index, instance_ids in enumerate(waves) if len(instance_ids) > 0]
+        self.max_concurrency = max_concurrency
+        self.max_errors = max_errors
+        self.health_check = health_check
+        self.poll_interval_seconds = poll_interval_seconds
+        self.document_name = document_name
+        self.comment = comment
+        self.clock = clock
+        self.sleep = sleep
+        self.print_progress = print_progress
+
+    def send_wave(self, wave: PatchWave):
+        wave.status = WAVE_STATUS_IN_PROGRESS
+        wave.started_at = self.clock()
+        chunks = [wave.instance_ids[start:start + SSM_SEND_COMMAND_MAX_INSTANCE_IDS] for start in range(0, len(wave.instance_ids), SSM_SEND_COMMAND_MAX_INSTANCE_IDS)]
+        # SendCommand requires a MaxConcurrency of at least 1
+        max_concurrency = split_ssm_rate(self.max_concurrency, len(chunks), minimum=1)
+        for index, instance_ids in enumerate(chunks):
+            request = {
+                'InstanceIds': instance_ids,
+                'DocumentName': self.document_name,
+                'MaxConcurrency': max_concurrency[index],
+                'MaxErrors': self.max_errors,
+                'Parameters': {
+                    'commands': self.commands
+                }
+            }
+            if Utils.is_not_empty(self.comment):
+                request['Comment'] = self.comment
+            result = call_with_throttling_backoff(lambda: self.ssm_client.send_command(**request))
+            wave.command_ids.append(result['Command']['CommandId'])
+
+    def list_command_invocations(self, command_id: str, details: bool = False) -> List[Dict]:
+        """
+        all the invocations of the command, across pages
+        """
+        invocations = []
+        next_token = None
+        while True:
+            request = {
+                'CommandId': command_id,
+                'Details': details,
+                'MaxResults': SSM_LIST_COMMAND_INVOCATIONS_MAX_RESULTS
+            }
+            if next_token is not None:
+                request['NextToken'] = next_token
+            result = call_with_throttling_backoff(lambda: self.ssm_client.list_command_invocations(**request))
+            invocations += Utils.get_value_as_list('CommandInvocations', result, [])
+            next_token = Utils.get_value_as_string('NextToken', result)
+            if Utils.is_empty(next_token):
+                break
+        return invocations
+
+    def update_wave(self, wave: PatchWave):
+        for command_id in wave.command_ids:
+            for invocation in self.list_command_invocations(command_id):
+                instance_id = invocation['InstanceId']
+                if instance_id in wave.statuses:
+                    wave.statuses[instance_id] = invocation['Status']
+
+    def wait_for_wave(self, wave: PatchWave):
+        while True:
+            self.update_wave(wave)
+            if wave.is_complete():
+                break
+            if self.print_progress:
+                self.print_progress_table()
+            self.sleep(self.poll_interval_seconds)
+        wave.completed_at = self.clock()
+
+    def check_health(self, wave: PatchWave) -> Tuple[bool, Optional[str]]:
+        allowed_errors = parse_ssm_rate(self.max_errors, len(wave.instance_ids))
+        if wave.failed_count > allowed_errors:
+            return False, f'patch failed on {wave.failed_count} out of {len(wave.instance_ids)} instances of wave {wave.index}, max errors: {self.max_errors}'
+        if self.health_check is not None:
+            healthy, message = self.health_check(wave.instance_ids)
+            if not healthy:
+                return False, f'health check failed after wave {wave.index}: {message}'
+        return True, None
+
+    def estimate_remaining_seconds(self) -> Optional[float]:
+        """
+        estimated time to patch the remaining waves, using the average duration per instance of the completed waves.
+        None until the first wave has completed.
+        """
+        completed = [wave for wave in self.waves if wave.completed_at is not None]
+        if len(completed) == 0:
+            return None
+        completed_instances = sum([len(wave.instance_ids) for wave in completed])
+        completed_seconds = sum([wave.completed_at - wave.started_at for wave in completed])
+        seconds_per_instance = completed_seconds / completed_instances
+
+        remaining_seconds = 0.0
+        now = self.clock()
+        for wave in self.waves:
+            if wave.status == WAVE_STATUS_PENDING:
+                remaining_seconds += seconds_per_instance * len(wave.instance_ids)
+            elif wave.status == WAVE_STATUS_IN_PROGRESS and wave.completed_at is None:
+                elapsed = now - wave.started_at
+                remaining_seconds += max(seconds_per_instance * len(wave.instance_ids) - elapsed, 0)
+        return remaining_seconds
+
+    def build_progress_table(self) -> PrettyTable:
+        table = PrettyTable(['Wave', 'Instances', 'Pending', 'In Progress', 'Success', 'Failed', 'Status', 'Duration'])
+        table.align = 'l'
+        now = self.clock()
+        for wave in self.waves:
+            success_count = wave.count({INVOCATION_STATUS_SUCCESS})
+            in_progress_count = len(wave.instance_ids) - wave.completed_count - wave.count({INVOCATION_STATUS_PENDING})
+            if wave.started_at is None:
+                duration = '-'
+            else:
+                duration = Utils.duration(int((wave.completed_at or now) - wave.started_at), absolute=True)
+            table.add_row([
+                wave.index,
+                len(wave.instance_ids),
+                wave.count({INVOCATION_STATUS_PENDING}),
+                in_progress_count,
+                success_count,
+                wave.failed_count,
+                wave.status,
+                duration
+            ])
+        return table
+
+    def print_progress_table(self):
+        print(self.build_progress_table())
+        completed = sum([wave.completed_count for wave in self.waves])
+        total = sum([len(wave.instance_ids) for wave in self.waves])
+        remaining_seconds = self.estimate_remaining_seconds()
+        if remaining_seconds is None:
+            estimate = 'available after the first wave'
+        else:
+            estimate = f'{Utils.duration(int(remaining_seconds), absolute=True)} remaining'
+        print(f'patched {completed} out of {total} instances. estimated completion: {estimate}')
+
+    def run(self) -> RollingPatchResult:
+        halted_reason = None
+        for wave in self.waves:
+            if halted_reason is not None:
+                wave.status = WAVE_STATUS_SKIPPED
+                continue
+            self.send_wave(wave)
+            self.wait_for_wave(wave)
+            healthy, halted_reason = self.check_health(wave)
+            wave.status = WAVE_STATUS_COMPLETED if healthy else WAVE_STATUS_FAILED
+            if self.print_progress:
+                self.print_progress_table()
+        return RollingPatchResult(waves=self.waves, halted_reason=halted_reason)
+
+
+def ec2_instance_status_health_check(ec2_client: Any) -> Callable[[List[str]], Tuple[bool, Optional[str]]]:
+    """
+    health check passing if all instances are running and none of the EC2 instance or system status checks are impaired
+    """
+
+    def health_check(instance_ids: List[str]) -> Tuple[bool, Optional[str]]:
+        unhealthy = []
+        for start in range(0, len(instance_ids), EC2_DESCRIBE_INSTANCE_STATUS_MAX_INSTANCE_IDS):
+            chunk = instance_ids[start:start + EC2_DESCRIBE_INSTANCE_STATUS_MAX_INSTANCE_IDS]
+            result = call_with_throttling_backoff(lambda: ec2_client.describe_instance_status(InstanceIds=chunk, IncludeAllInstances=True))
+            for instance_status in Utils.get_value_as_list('InstanceStatuses', result, []):
+                state = Utils.get_value_as_string('Name', instance_status.get('InstanceState', {}))
+                instance_check = Utils.get_value_as_string('Status', instance_status.get('InstanceStatus', {}))
+                system_check = Utils.get_value_as_string('Status', instance_status.get('SystemStatus', {}))
+                if state != 'running' or 'impaired' in (instance_check, system_check):
+                    unhealthy.append(instance_status['InstanceId'])
+        if len(unhealthy) > 0:
+            return False, f'instances not running or with impaired status checks: {", ".join(unhealthy)}'
+        return True, None
+
+    return health_check
@@ -0,0 +1,271 @@
+#  Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance
+#  with the License. A copy of the License is located at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  or in the 'license' file accompanying this file. This file is distributed on an 'AS IS' BASIS, WITHOUT WARRANTIES
+#  OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions
+#  and limitations under the License.
+
+from ideadatamodel import exceptions
+from ideasdk.utils import Utils
+
+from typing import Optional, List, Dict, Set, Tuple, Callable, TypeVar, Iterable
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
+from prettytable import PrettyTable
+import botocore.exceptions
+import time
+
+T = TypeVar('T')
+
+DEFAULT_MAX_WORKERS = 10
+DEFAULT_MAX_RETRIES = 6
+DEFAULT_BACKOFF_IN_SECONDS = 1
+
+THROTTLING_ERROR_CODES = {
+    'Throttling',
+    'ThrottlingException',
+    'ThrottledException',
+    'RequestThrottled',
+    'RequestThrottledException',
+    'RequestLimitExceeded',
+    'TooManyRequestsException',
+    'ProvisionedThroughputExceededException',
+    'SlowDown'
+}
+
+
+def is_throttling_error(error: BaseException) -> bool:
+    if not isinstance(error, botocore.exceptions.ClientError):
+        return False
+    error_code = Utils.get_value_as_string('Code', error.response.get('Error', {}), default='')
+    return error_code in THROTTLING_ERROR_CODES
+
+
+def call_with_throttling_backoff(fn: Callable[[], T], max_retries: int = DEFAULT_MAX_RETRIES, backoff_in_seconds: float = DEFAULT_BACKOFF_IN_SECONDS) -> T:
+    """
+    invoke fn and retry with exponential backoff when AWS throttles the request.
+    any other error is raised immediately.
+    """
+    attempt = 0
+    while True:
+        try:
+            return fn()
+        except botocore.exceptions.ClientError as e:
+            if not is_throttling_error(e) or attempt >= max_retries:
+                raise e
+            time.sleep(Utils.get_retry_backoff_interval(
+                current_retry=attempt,
+                backoff_in_seconds=backoff_in_seconds
+            ))
+            attempt += 1
+
+
+def map_concurrently(fn: Callable[..., T], items: Iterable, max_workers: int = DEFAULT_MAX_WORKERS) -> List[T]:
+    """
+    apply fn to each item using a bounded worker pool, retrying throttled calls.
+    results are returned in the same order as the items.
+    """
+    items = list(items)
+    if len(items) == 0:
+        return []
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(items)), thread_name_prefix='teardown-discovery') as executor:
+        return list(executor.map(lambda item: call_with_throttling_backoff(lambda: fn(item)), items))
+
+
+class TeardownTask:
+    """
+    a unit of work in the cluster teardown, such as deleting a CloudFormation stack.
+    depends_on lists the task ids that must complete before this task can start.
+    """
+
+    def __init__(self, task_id: str, description: str, action: Optional[Callable[[], None]] = None, depends_on: Optional[List[str]] = None, estimated_seconds: int = 0):
+        self.task_id = task_id
+        self.description = description
+        self.action = action
+        self.depends_on: Set[str] = set(depends_on or [])
+        self.estimated_seconds = estimated_seconds
+
+    def __repr__(self):
+        return f'TeardownTask({self.task_id})'
+
+
+class TeardownPlan:
+    """
+    directed acyclic graph of teardown tasks.
+    """
+
+    def __init__(self):
+        self.tasks: Dict[str, TeardownTask] = {}
+
+    def add_task(self, task: TeardownTask) -> TeardownTask:
+        if task.task_id in self.tasks:
+            raise exceptions.invalid_params(f'duplicate teardown task: {task.task_id}')
+        self.tasks[task.task_id] = task
+        return task
+
+    def has_task(self, task_id: str) -> bool:
+        return task_id in self.tasks
+
+    def add_dependency(self, task_id: str, depends_on: str):
+        """
+        add an edge if both tasks are part of the plan. tasks are only added when there is work to do,
+        so dependencies on absent tasks are ignored.
+        """
+        if task_id not in self.tasks or depends_on not in self.tasks or task_id == depends_on:
+            return
+        self.tasks[task_id].depends_on.add(depends_on)
+
+    def is_empty(self) -> bool:
+        return len(self.tasks) == 0
+
+    def get_dependents(self) -> Dict[str, Set[str]]:
+        dependents = {task_id: set() for task_id in self.tasks}
+        for task in self.tasks.values():
+            for depends_on in task.depends_on:
+                dependents[depends_on].add(task.task_id)
+        return dependents
+
+    def get_waves(self) -> List[List[TeardownTask]]:
+        """
+        group tasks into waves where every task in a wave only depends on tasks in earlier waves.
+        raises an exception if a dependency is missing or the graph has a cycle.
+        """
+        for task in self.tasks.values():
+            for depends_on in task.depends_on:
+                if depends_on not in self.tasks:
+                    raise exceptions.invalid_params(f'teardown task: {task.task_id} depends on unknown task: {depends_on}')
+
+        remaining = {task_id: set(task.depends_on) for task_id, task in self.tasks.items()}
+        waves = []
+        while len(remaining) > 0:
+            ready = sorted([task_id for task_id, depends_on in remaining.items() if len(depends_on) == 0])
+            if len(ready) == 0:
+                raise exceptions.invalid_params(f'teardown plan has a dependency cycle between: {sorted(remaining.keys())}')
+            waves.append([self.tasks[task_id] for task_id in ready])
+            for task_id in ready:
+                del remaining[task_id]
+            for depends_on in remaining.values():
+                depends_on.difference_update(ready)
+        return waves
+
+    def get_critical_path(self) -> Tuple[List[TeardownTask], int]:
+        """
+        the longest chain of dependent tasks by estimated duration.
+        with unbounded workers, this is the estimated time for the full teardown.
+        """
+        finish_times: Dict[str, int] = {}
+        previous: Dict[str, Optional[str]] = {}
+        for wave in self.get_waves():
+            for task in wave:
+                slowest_dependency = None
+                start_time = 0
+                for depends_on in sorted(task.depends_on):
+                    if finish_times[depends_on] > start_time:
+                        start_time = finish_times[depends_on]
+                        slowest_dependency = depends_on
+                finish_times[task.task_id] = start_time + task.estimated_seconds
+                previous[task.task_id] = slowest_dependency
+
+        if len(finish_times) == 0:
+            return [], 0
+
+        last_task_id = max(sorted(finish_times.keys()), key=lambda task_id: finish_times[task_id])
+        path = []
+        task_id = last_task_id
+        while task_id is not None:
+            path.append(self.tasks[task_id])
+            task_id = previous[task_id]
+        path.reverse()
+        return path, finish_times[last_task_id]
+
+    def print_plan(self):
+        plan_table = PrettyTable(['Wave', 'Task', 'Description', 'Depends On', 'Estimate'])
+        plan_table.align = 'l'
+        for index, wave in enumerate(self.get_waves()):
+            for task in wave:
+                plan_table.add_row([
+                    index + 1,
+                    task.task_id,
+                    task.description,
+                    ', '.join(sorted(task.depends_on)),
+                    Utils.duration(task.estimated_seconds, absolute=True)
+                ])
+        print(plan_table)
+
+        critical_path, estimated_seconds = self.get_critical_path()
+        print(f'{len(self.tasks)} teardown tasks planned.')
+        print(f'critical path: {" -> ".join([task.task_id for task in critical_path])}')
+        print(f'estimated teardown time (critical path): {Utils.duration(estimated_seconds, absolute=True)}')
+
+
+class TeardownExecutor:
+    """
+    runs the tasks of a TeardownPlan on a bounded worker pool.
+    a task is submitted as soon as all of its dependencies completed successfully.
+    if a task fails, all tasks that transitively depend on it are skipped.
+    """
+
+    def __init__(self, plan: TeardownPlan, max_workers: int = DEFAULT_MAX_WORKERS, on_task_started: Optional[Callable[[TeardownTask], None]] = None, on_task_completed: Optional[Callable[[TeardownTask, Optional[BaseException]], None]] = None):
+        self.plan = plan
+        self.max_workers = max(1, max_workers)
+        self.on_task_started = on_task_started
+        self.on_task_completed = on_task_completed
+        self.completed: List[str] = []
+        self.failed: Dict[str, BaseException] = {}
+        self.skipped: List[str] = []
+
+    def _run_task(self, task: TeardownTask):
+        if self.on_task_started is not None:
+            self.on_task_started(task)
+        if task.action is not None:
+            task.action()
+
+    def _skip_dependents(self, task_id: str, dependents: Dict[str, Set[str]]):
+        pending = list(dependents[task_id])
+        while len(pending) > 0:
+            dependent = pending.pop()
+            if dependent in self.skipped:
+                continue
+            self.skipped.append(dependent)
+            pending.extend(dependents[dependent])
+
+    def execute(self) -> bool:
+        """
+        :return: True if all tasks completed successfully
+        """
+        # validates the graph before any task is started
+        self.plan.get_waves()
+        dependents = self.plan.get_dependents()
+        remaining = {task_id: set(task.depends_on) for task_id, task in self.plan.tasks.items()}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='teardown') as executor:
+            futures: Dict[Future, str] = {}
+
+            def submit(task_id: str):
+                futures[executor.submit(self._run_task, self.plan.tasks[task_id])] = task_id
+
+            for task_id in sorted(remaining.keys()):
+                if len(remaining[task_id]) == 0:
+                    submit(task_id)
+
+            while len(futures) > 0:
+                done, _ = wait(list(futures.keys()), return_when=FIRST_COMPLETED)
+                for future in done:
+                    task_id = futures.pop(future)
+                    error = future.exception()
+                    if self.on_task_completed is not None:
+                        self.on_task_completed(self.plan.tasks[task_id], error)
+                    if error is not None:
+                        self.failed[task_id] = error
+                        self._skip_dependents(task_id, dependents)
+                        continue
+                    self.completed.append(task_id)
+                    for dependent in sorted(dependents[task_id]):
+                        remaining[dependent].discard(task_id)
+                        if len(remaining[dependent]) == 0 and dependent not in self.skipped:
+                            submit(dependent)
+
+        return len(self.failed) == 0
@@ -38,6 +38,7 @@ from ideaadministrator.app_props import AdministratorProps
 from ideaadministrator.app.cdk.cdk_invoker import CdkInvoker
 from ideaadministrator.app.config_generator import ConfigGenerator
 from ideaadministrator.app.delete_cluster import DeleteCluster
+from ideaadministrator.app.teardown_planner import DEFAULT_MAX_WORKERS
 from ideaadministrator.app.patch_helper import PatchHelper
 from ideaadministrator.app.deployment_helper import DeploymentHelper
 from ideaadministrator.integration_tests.test_context import TestContext
@@ -976,8 +977,14 @@ def upload_packages(cluster_name: str, aws_region: str, aws_profile: str, deploy
 @click.option('--instance-selector', help='Can be one of: [all, one]')
 @click.option('--patch-command', help='Patch Command')
 @click.option('--force', is_flag=True, help='Skip all confirmation prompts')
+@click.option('--batch-size', type=int, help='Number of instances patched in each wave. Default: all instances in a single wave')
+@click.option('--batch-percentage', type=float, help='Percentage of instances patched in each wave. Cannot be used with --batch-size')
+@click.option('--canary-size', type=int, default=0, help='Number of instances patched in a first wave, before the remaining instances. Default: 0')
+@click.option('--max-concurrency', help='SSM MaxConcurrency of each wave, a number or a percentage. Default: 50')
+@click.option('--max-errors', help='SSM MaxErrors of each wave, a number or a percentage. Patching stops when a wave exceeds it. Default: 0')
 @click.argument('module', required=True)
-def patch_module(cluster_name: str, aws_region: str, aws_profile: str, package_uri: str, component: str, instance_selector: str, force: bool, patch_command: str, module: str):
+def patch_module(cluster_name: str, aws_region: str, aws_profile: str, package_uri: str, component: str, instance_selector: str, force: bool, patch_command: str,
+                 batch_size: int, batch_percentage: float, canary_size: int, max_concurrency: str, max_errors: str, module: str):
     """
     patch application module with the current release
 
@@ -993,7 +1000,12 @@ def patch_module(cluster_name: str, aws_region: str, aws_profile: str, package_u
         instance_selector=instance_selector,
         module_id=module,
         force=force,
-        patch_command=patch_command
+        patch_command=patch_command,
+        batch_size=batch_size,
+        batch_percentage=batch_percentage,
+        canary_size=canary_size,
+        max_concurrency=max_concurrency,
+        max_errors=max_errors
     ).apply()
 
 
@@ -1367,7 +1379,9 @@ def quick_setup(ctx, values_file: str, existing_resources: bool, termination_pro
 @click.option('--delete-cloudwatch-logs', is_flag=True, help='Delete CloudWatch Logs')
 @click.option('--delete-all', is_flag=True, help='Delete all')
 @click.option('--force', is_flag=True, help='Skip confirmation prompts')
-def delete_cluster(cluster_name: str, aws_region: str, aws_profile: str, delete_bootstrap: bool, delete_databases: bool, delete_backups: bool, delete_cloudwatch_logs: bool, delete_all: bool, force: bool):
+@click.option('--dry-run', is_flag=True, help='Print the teardown plan and its estimated duration without deleting any resources')
+@click.option('--max-workers', type=int, default=DEFAULT_MAX_WORKERS, help=f'Maximum number of concurrent teardown tasks. Default: {DEFAULT_MAX_WORKERS}')
+def delete_cluster(cluster_name: str, aws_region: str, aws_profile: str, delete_bootstrap: bool, delete_databases: bool, delete_backups: bool, delete_cloudwatch_logs: bool, delete_all: bool, force: bool, dry_run: bool, max_workers: int):
     """
     delete cluster
     """
@@ -1381,7 +1395,9 @@ def delete_cluster(cluster_name: str, aws_region: str, aws_profile: str, delete_
         delete_backups=delete_backups,
         delete_cloudwatch_logs=delete_cloudwatch_logs,
         delete_all=delete_all,
-        force=force
+        force=force,
+        dry_run=dry_run,
+        max_workers=max_workers
     ).invoke()
 
 
@@ -1562,12 +1578,13 @@ def aws_services():
 
 @utils.command('check-aws-services', context_settings=CLICK_SETTINGS)
 @click.option('--aws-profile', help='AWS Profile Name')
+@click.option('--refresh', is_flag=True, help='Ignore the cached service availability of the regions and read it again from AWS')
 @click.argument('AWS_REGION', nargs=-1, required=True)
-def check_aws_services(aws_profile: str, aws_region):
+def check_aws_services(aws_profile: str, refresh: bool, aws_region):
     """
     check and print availability of AWS services required by IDEA for a given AWS region
     """
-    helper = AwsServiceAvailabilityHelper(aws_profile=aws_profile)
+    helper = AwsServiceAvailabilityHelper(aws_profile=aws_profile, refresh=refresh)
     helper.print_availability_matrix(aws_regions=list(aws_region))
 
 
@@ -160,6 +160,12 @@ class AdministratorProps:
         os.makedirs(downloads_dir, exist_ok=True)
         return downloads_dir
 
+    @property
+    def soca_cache_dir(self) -> str:
+        cache_dir = os.path.join(self.idea_user_home, 'cache')
+        os.makedirs(cache_dir, exist_ok=True)
+        return cache_dir
+
     @property
     def app_name(self) -> str:
         return ideaadministrator_meta.__name__
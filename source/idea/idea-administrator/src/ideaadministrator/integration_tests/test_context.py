@@ -103,6 +103,7 @@ class TestContext:
             raise exceptions.general_exception(f'could not find api context path for module: {module_id}')
 
         client = SocaClient(context=self.idea_context, options=SocaClientOptions(enable_logging=self.debug,
+                                                                                 log_sample_rate=1.0,
                                                                                  endpoint=f'{self.cluster_endpoint}{api_path}',
                                                                                  verify_ssl=False,
                                                                                  timeout=timeout))
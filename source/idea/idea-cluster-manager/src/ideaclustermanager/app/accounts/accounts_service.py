@@ -50,7 +50,7 @@ from res.resources import accounts
 from res.clients.ad_sync import ad_sync_client
 from res import exceptions as res_exceptions
 
-from typing import Optional
+from typing import Optional, List, Dict
 import os
 import time
 import json
@@ -157,6 +157,14 @@ class AccountsService:
         user = accounts.get_user(username)
         return UserDAO.convert_from_db(user)
 
+    def get_users(self, usernames: List[str]) -> Dict[str, User]:
+        """
+        batched lookup of multiple users
+        :return: users keyed by username. users that do not exist are omitted.
+        """
+        users = accounts.get_users(usernames)
+        return {username: UserDAO.convert_from_db(user) for username, user in users.items()}
+
     def get_user_by_email(self, email: str) -> User:
         email = AuthUtils.sanitize_email(email=email)
         if not email:
@@ -57,6 +57,8 @@ class CognitoUserPool:
 
         self.options = options
 
+        self._user_cache = context.cache().register_cache('accounts.users')
+
         self._sso_client_id: Optional[str] = None
         self._sso_client_secret: Optional[str] = None
 
@@ -127,7 +129,7 @@ class CognitoUserPool:
 
         cache_key = self.build_user_cache_key(username)
 
-        user = self._context.cache().short_term().get(cache_key)
+        user = self._user_cache.get(cache_key)
         if user is not None:
             return user
 
@@ -145,11 +147,12 @@ class CognitoUserPool:
                 raise e
 
         _api_query_end = Utils.current_time_ms()
+        self._user_cache.record_load_time(_api_query_end - _api_query_start)
         if self._logger.isEnabledFor(logging.DEBUG):
             self._logger.debug(f"Cognito-API query: {_api_query_end - _api_query_start}ms")
 
         user = CognitoUser(**result)
-        self._context.cache().short_term().set(cache_key, user)
+        self._user_cache.set(cache_key, user)
         return user
 
     def admin_create_user(self, username: str, uid: str, email: str, password: Optional[str] = None, email_verified=False):
@@ -268,7 +271,7 @@ class CognitoUserPool:
                 pass
             else:
                 raise e
-        self._context.cache().short_term().delete(self.build_user_cache_key(username))
+        self._user_cache.delete(self.build_user_cache_key(username))
 
     def admin_enable_user(self, username: str):
         if Utils.is_empty(username):
@@ -277,7 +280,7 @@ class CognitoUserPool:
             UserPoolId=self.user_pool_id,
             Username=username
         )
-        self._context.cache().short_term().delete(self.build_user_cache_key(username))
+        self._user_cache.delete(self.build_user_cache_key(username))
 
     def admin_disable_user(self, username: str):
         if Utils.is_empty(username):
@@ -287,7 +290,7 @@ class CognitoUserPool:
             UserPoolId=self.user_pool_id,
             Username=username
         )
-        self._context.cache().short_term().delete(self.build_user_cache_key(username))
+        self._user_cache.delete(self.build_user_cache_key(username))
 
     def password_updated(self, username: str):
         if not self.is_activedirectory():
@@ -328,7 +331,7 @@ class CognitoUserPool:
 
         self.password_updated(username)
 
-        self._context.cache().short_term().delete(self.build_user_cache_key(username))
+        self._user_cache.delete(self.build_user_cache_key(username))
         self._logger.info(f'SetPassword: {username}, Permanent: {permanent}')
 
     def admin_reset_password(self, username: str):
@@ -336,7 +339,7 @@ class CognitoUserPool:
             UserPoolId=self.user_pool_id,
             Username=username,
         )
-        self._context.cache().short_term().delete(self.build_user_cache_key(username))
+        self._user_cache.delete(self.build_user_cache_key(username))
         self._logger.info(f'ResetPassword: {username}')
 
     def admin_update_email(self, username: str, email: str, email_verified: bool = False):
@@ -354,7 +357,7 @@ class CognitoUserPool:
                 }
             ]
         )
-        self._context.cache().short_term().delete(self.build_user_cache_key(username))
+        self._user_cache.delete(self.build_user_cache_key(username))
 
     def admin_set_email_verified(self, username: str):
         self._context.aws().cognito_idp().admin_update_user_attributes(
@@ -367,7 +370,7 @@ class CognitoUserPool:
                 }
             ]
         )
-        self._context.cache().short_term().delete(self.build_user_cache_key(username))
+        self._user_cache.delete(self.build_user_cache_key(username))
 
     def admin_global_sign_out(self, username: str):
         self._context.aws().cognito_idp().admin_user_global_sign_out(
@@ -462,7 +465,7 @@ class CognitoUserPool:
             self.admin_set_email_verified(request.username)
             self.password_updated(request.username)
             auth_result = self.build_auth_result(cognito_auth_result)
-            self._context.cache().short_term().delete(self.build_user_cache_key(request.username))
+            self._user_cache.delete(self.build_user_cache_key(request.username))
 
         return RespondToAuthChallengeResult(
             challenge_name=challenge_name,
@@ -525,7 +528,7 @@ class CognitoUserPool:
             ConfirmationCode=confirmation_code
         )
         self.password_updated(username)
-        self._context.cache().short_term().delete(self.build_user_cache_key(username))
+        self._user_cache.delete(self.build_user_cache_key(username))
 
     def change_password(self, username: str, access_token: str, old_password: str, new_password: str):
         self._context.aws().cognito_idp().change_password(
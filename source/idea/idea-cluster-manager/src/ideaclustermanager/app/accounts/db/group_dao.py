@@ -12,6 +12,7 @@
 from ideasdk.utils import Utils
 from ideadatamodel import ListGroupsRequest, ListGroupsResult, Group, SocaPaginator
 from ideasdk.context import SocaContext
+from ideasdk.dynamodb.dynamodb_filter_compiler import DynamoDBFilterCompiler
 
 from typing import Dict
 
@@ -25,6 +26,7 @@ class GroupDAO:
         else:
             self.logger = context.logger('group-dao')
         self.table = None
+        self.filter_compiler = DynamoDBFilterCompiler(hash_key='group_name')
 
     def get_table_name(self) -> str:
         return f'{self.context.cluster_name()}.accounts.groups'
@@ -79,48 +81,21 @@ class GroupDAO:
 
     def list_groups(self, request: ListGroupsRequest) -> ListGroupsResult:
 
-        scan_request = {}
-
-        cursor = request.cursor
-        last_evaluated_key = None
-        if Utils.is_not_empty(cursor):
-            last_evaluated_key = Utils.from_json(Utils.base64_decode(cursor))
-        if last_evaluated_key is not None:
-            scan_request['ExclusiveStartKey'] = last_evaluated_key
-
-        scan_filter = None
-        if Utils.is_not_empty(request.filters):
-            scan_filter = {}
-            for filter_ in request.filters:
-                if filter_.eq is not None:
-                    scan_filter[filter_.key] = {
-                        'AttributeValueList': [filter_.eq],
-                        'ComparisonOperator': 'EQ'
-                    }
-                if filter_.like is not None:
-                    scan_filter[filter_.key] = {
-                        'AttributeValueList': [filter_.like],
-                        'ComparisonOperator': 'CONTAINS'
-                    }
-        if scan_filter is not None:
-            scan_request['ScanFilter'] = scan_filter
-
-        scan_result = self.table.scan(**scan_request)
+        list_result = self.filter_compiler.list(
+            table=self.table,
+            filters=request.filters,
+            cursor=request.cursor
+        )
 
-        db_groups = Utils.get_value_as_list('Items', scan_result, [])
+        db_groups = list_result.items
         groups = []
         for db_group in db_groups:
             group = self.convert_from_db(db_group)
             groups.append(group)
 
-        response_cursor = None
-        last_evaluated_key = Utils.get_any_value('LastEvaluatedKey', scan_result)
-        if last_evaluated_key is not None:
-            response_cursor = Utils.base64_encode(Utils.to_json(last_evaluated_key))
-
         return ListGroupsResult(
             listing=groups,
             paginator=SocaPaginator(
-                cursor=response_cursor
+                cursor=list_result.cursor
             )
         )
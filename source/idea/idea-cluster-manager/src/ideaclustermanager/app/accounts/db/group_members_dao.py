@@ -10,13 +10,17 @@
 #  and limitations under the License.
 
 from ideasdk.utils import Utils
-from ideadatamodel import exceptions, ListUsersInGroupRequest, ListUsersInGroupResult, SocaPaginator, constants
+from ideadatamodel import exceptions, ListUsersInGroupRequest, ListUsersInGroupResult, SocaPaginator, User, constants
 from ideasdk.context import SocaContext
 
 from ideaclustermanager.app.accounts.db.user_dao import UserDAO
 
 from boto3.dynamodb.conditions import Key
 from res.resources import accounts
+from typing import List, Optional
+
+# user attributes available in the group membership items. the users are only read by key to omit deleted users.
+MEMBERSHIP_USER_ATTRIBUTES = {'username'}
 
 
 class GroupMembersDAO:
@@ -35,6 +39,25 @@ class GroupMembersDAO:
     def initialize(self):
         self.table = self.context.aws().dynamodb_table().Table(self.get_table_name())
 
+    @staticmethod
+    def _get_users(usernames: List[str], projection: Optional[List[str]] = None) -> List[User]:
+        """
+        read the members of the groups using batched reads, in the order of the memberships.
+        members that are not users anymore are omitted.
+        """
+        if Utils.is_not_empty(projection) and set(projection).issubset(MEMBERSHIP_USER_ATTRIBUTES):
+            db_users = accounts.get_users(usernames, projection=list(MEMBERSHIP_USER_ATTRIBUTES))
+            return [User(username=username) for username in usernames if username in db_users]
+
+        db_users = accounts.get_users(usernames, projection=projection)
+        users = []
+        for username in usernames:
+            db_user = db_users.get(username)
+            if db_user is None:
+                continue
+            users.append(UserDAO.convert_from_db(db_user))
+        return users
+
     def list_users_in_group(self, request: ListUsersInGroupRequest) -> ListUsersInGroupResult:
         group_names = request.group_names
         if Utils.is_empty(group_names):
@@ -44,7 +67,7 @@ class GroupMembersDAO:
         exclusive_start_keys = None
         last_evaluated_keys = {}
         username_set = set()
-        users = []
+        usernames = []
 
         if Utils.is_not_empty(cursor):
             exclusive_start_keys = Utils.from_json(Utils.base64_decode(cursor))
@@ -69,11 +92,7 @@ class GroupMembersDAO:
                 if db_username in username_set:
                     continue
                 username_set.add(db_username)
-                db_user = accounts.get_user(db_username)
-                if db_user is None:
-                    continue
-                user = UserDAO.convert_from_db(db_user)
-                users.append(user)
+                usernames.append(db_username)
 
             last_evaluated_key = Utils.get_any_value('LastEvaluatedKey', query_result)
             if Utils.is_not_empty(last_evaluated_key):
@@ -84,7 +103,7 @@ class GroupMembersDAO:
             response_cursor = Utils.base64_encode(Utils.to_json(last_evaluated_keys))
 
         return ListUsersInGroupResult(
-            listing=users,
+            listing=self._get_users(usernames, request.projection),
             paginator=SocaPaginator(
                 page_size=request.page_size,
                 cursor=response_cursor
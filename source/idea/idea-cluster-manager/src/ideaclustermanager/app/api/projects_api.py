@@ -112,7 +112,7 @@ class ProjectsAPI(BaseAPI):
         result = self.context.projects.get_project(request)
         project = result.project
         if project.is_budgets_enabled():
-            budget = self.context.aws_util().budgets_get_budget(budget_name=project.budget.budget_name)
+            budget = self.context.budgets_snapshot.get_budget(budget_name=project.budget.budget_name)
             project.budget = budget
         context.success(result)
 
@@ -129,7 +129,7 @@ class ProjectsAPI(BaseAPI):
         for project in result.listing:
             if project.is_budgets_enabled():
                 try:
-                    budget = self.context.aws_util().budgets_get_budget(
+                    budget = self.context.budgets_snapshot.get_budget(
                         budget_name=project.budget.budget_name
                     )
                     project.budget = budget
@@ -10,6 +10,7 @@
 #  and limitations under the License.
 from ideasdk.context import SocaContext, SocaContextOptions
 from ideasdk.auth import TokenService, ApiAuthorizationServiceBase
+from ideasdk.aws import BudgetsSnapshotService
 from ideasdk.utils import GroupNameHelper
 from ideasdk.client.vdc_client import AbstractVirtualDesktopControllerClient
 
@@ -48,3 +49,4 @@ class ClusterManagerAppContext(SocaContext):
         self.snapshots: Optional[SnapshotsService] = None
         self.vdc_client: Optional[AbstractVirtualDesktopControllerClient] = None
         self.shared_filesystem: Optional[SharedFilesystemService]
+        self.budgets_snapshot: Optional[BudgetsSnapshotService] = None
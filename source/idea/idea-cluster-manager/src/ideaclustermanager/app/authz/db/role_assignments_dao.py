@@ -28,12 +28,17 @@ class RoleAssignmentsDAO:
             self.logger = context.logger('role-assignments-dao')
 
         self.role_assignments_table = None
+        self.group_members_table = None
 
     def get_role_assignments_table_name(self) -> str:
         return f'{self.context.cluster_name()}.authz.role-assignments'
 
+    def get_group_members_table_name(self) -> str:
+        return f'{self.context.cluster_name()}.accounts.group-members'
+
     def initialize(self):
         self.role_assignments_table = self.context.aws().dynamodb_table().Table(self.get_role_assignments_table_name())
+        self.group_members_table = self.context.aws().dynamodb_table().Table(self.get_group_members_table_name())
 
         # ToDo: Add GSI for role_id if it doesn't exist
     
@@ -143,16 +148,18 @@ class RoleAssignmentsDAO:
             while True:
                 if not Utils.is_empty(actor_key):
                     query_params = { 'KeyConditionExpression': Key('actor_key').eq(actor_key) }
-                    if pagination_key: query_params.ExclusiveStartKey = pagination_key
+                    if pagination_key: query_params['ExclusiveStartKey'] = pagination_key
                     result = self.role_assignments_table.query(**query_params)
                 elif not Utils.is_empty(resource_key):
                     query_params = { 'KeyConditionExpression': Key('resource_key').eq(resource_key), 'IndexName': GSI_RESOURCE_KEY }
-                    if pagination_key: query_params.ExclusiveStartKey = pagination_key
+                    if pagination_key: query_params['ExclusiveStartKey'] = pagination_key
                     result = self.role_assignments_table.query(**query_params)
                 elif not Utils.is_empty(role_id):
                     # This helps list all assignments for a role in the system
                     # ToDo: update table to use a new GSI for role_id
-                    result = self.role_assignments_table.scan(FilterExpression=Attr("role_id").eq(role_id))
+                    scan_params = { 'FilterExpression': Attr("role_id").eq(role_id) }
+                    if pagination_key: scan_params['ExclusiveStartKey'] = pagination_key
+                    result = self.role_assignments_table.scan(**scan_params)
             
                 query_output = Utils.get_value_as_list('Items', result, [])
                 for item in query_output:
@@ -184,17 +191,32 @@ class RoleAssignmentsDAO:
         # dedup the results and send it
         return list(set(project_ids))
 
+    def get_users_by_group_name(self, group_name: str) -> List[str]:
+        usernames = []
+        pagination_key = None
+        while True:
+            query_params = { 'KeyConditionExpression': Key('group_name').eq(group_name) }
+            if pagination_key: query_params['ExclusiveStartKey'] = pagination_key
+            result = self.group_members_table.query(**query_params)
+            usernames.extend(Utils.get_value_as_string('username', item) for item in Utils.get_value_as_list('Items', result, []))
+            pagination_key = Utils.get_any_value('LastEvaluatedKey', result)
+            if pagination_key is None:
+                break
+        return usernames
+
     def get_all_users_for_project(self, project_id: str) -> List[str]:
-        role_assignments = self.list_role_assignments(ListRoleAssignmentsRequest(resource_key=f'{project_id}:project')).items
+        if Utils.is_empty(project_id):
+            raise exceptions.invalid_params('project_id is required')
+
+        role_assignments = self.list_role_assignments(resource_key=f'{project_id}:project')
         user_ids = [role_assignment.actor_id for role_assignment in role_assignments if role_assignment.actor_type=="user"]
         group_ids = [role_assignment.actor_id for role_assignment in role_assignments if role_assignment.actor_type=="group"]
 
-        # Add all users grom group in user_ids
+        # Add all users from group in user_ids
         for group_id in group_ids:
             user_ids.extend(self.get_users_by_group_name(group_id))
 
-        return user_ids
-    
+        return sorted(set(user_ids))
 
     def get_projects_by_group_name(self, group_name: str) -> List[str]:
         if Utils.is_empty(group_name):
@@ -203,4 +225,4 @@ class RoleAssignmentsDAO:
         role_assignments = self.list_role_assignments(actor_key=f'{group_name}:group')
         project_ids = [role_assignment.resource_id for role_assignment in role_assignments if role_assignment.resource_type=="project"]
 
-        return project_ids
\ No newline at end of file
+        return project_ids
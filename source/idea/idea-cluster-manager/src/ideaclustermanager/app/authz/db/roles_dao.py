@@ -12,6 +12,7 @@
 from ideasdk.utils import Utils
 from ideadatamodel import exceptions, Role, SocaPaginator, ProjectPermissions, VDIPermissions, SocaFilter, SocaListingPayload
 from ideasdk.context import SocaContext
+from ideasdk.dynamodb.dynamodb_filter_compiler import DynamoDBFilterCompiler
 
 from typing import List, Optional, Dict
 from boto3.dynamodb.conditions import Attr
@@ -26,6 +27,7 @@ class RolesDAO:
             self.logger = context.logger('roles-dao')
 
         self.roles_table = None
+        self.filter_compiler = DynamoDBFilterCompiler(hash_key='role_id')
 
     def get_roles_table_name(self) -> str:
         return f'{self.context.cluster_name()}.authz.roles'
@@ -129,34 +131,13 @@ class RolesDAO:
     def list_roles(self, include_permissions: bool, cursor: str, filters: List[SocaFilter] ) -> SocaListingPayload:
         self.logger.info(f'list roles')
 
-        scan_request = {}
-
-        last_evaluated_key = None
-        if Utils.is_not_empty(cursor):
-            last_evaluated_key = Utils.from_json(Utils.base64_decode(cursor))
-        if last_evaluated_key is not None:
-            scan_request['LastEvaluatedKey'] = last_evaluated_key
-        
-        scan_filter = None
-        if Utils.is_not_empty(filters):
-            scan_filter = {}
-            for filter_ in filters:
-                if filter_.eq is not None:
-                    scan_filter[filter_.key] = {
-                        'AttributeValueList': [filter_.eq],
-                        'ComparisonOperator': 'EQ'
-                    }
-                if filter_.like is not None:
-                    scan_filter[filter_.key] = {
-                        'AttributeValueList': [filter_.like],
-                        'ComparisonOperator': 'CONTAINS'
-                    }
-        if scan_filter is not None:
-            scan_request['ScanFilter'] = scan_filter
-
-        scan_result = self.roles_table.scan(**scan_request)
+        list_result = self.filter_compiler.list(
+            table=self.roles_table,
+            filters=filters,
+            cursor=cursor
+        )
 
-        db_roles = Utils.get_value_as_list('Items', scan_result, [])
+        db_roles = list_result.items
         roles = []
         for db_role in db_roles:
             role = self.convert_from_db(db_role)
@@ -165,15 +146,10 @@ class RolesDAO:
                 delattr(role, 'projects')
             roles.append(role)
         
-        response_cursor = None
-        last_evaluated_key = Utils.get_any_value('LastEvaluatedKey', scan_result)
-        if last_evaluated_key is not None:
-            response_cursor = Utils.base64_encode(Utils.to_json(last_evaluated_key))
-
         return SocaListingPayload(
             listing=roles,
             paginator=SocaPaginator(
-                cursor=response_cursor
+                cursor=list_result.cursor
             )
         )
     
@@ -11,6 +11,7 @@
 
 import ideasdk.app
 from ideasdk.auth import TokenService, TokenServiceOptions
+from ideasdk.aws import BudgetsSnapshotService
 from ideadatamodel import constants
 from ideasdk.client.evdi_client import EvdiClient
 from ideasdk.server import SocaServerOptions
@@ -164,7 +165,13 @@ class ClusterManagerApp(ideasdk.app.SocaApp):
         self.context.projects = ProjectsService(
             context=self.context,
             accounts_service=self.context.accounts,
-            vdc_client=self.context.vdc_client
+            vdc_client=self.context.vdc_client,
+            evdi_client=evdi_client
+        )
+
+        # project budgets
+        self.context.budgets_snapshot = BudgetsSnapshotService(
+            context=self.context
         )
 
         # notifications
@@ -193,6 +200,8 @@ class ClusterManagerApp(ideasdk.app.SocaApp):
 
         self.context.notifications.start()
 
+        self.context.budgets_snapshot.start()
+
         try:
             self.context.distributed_lock().acquire(key='initialize-defaults')
             self.context.roles.create_defaults()
@@ -212,3 +221,6 @@ class ClusterManagerApp(ideasdk.app.SocaApp):
 
         if self.context.notifications is not None:
             self.context.notifications.stop()
+
+        if self.context.budgets_snapshot is not None:
+            self.context.budgets_snapshot.stop()
@@ -12,6 +12,7 @@
 from ideasdk.utils import Utils
 from ideadatamodel import (exceptions, EmailTemplate, ListEmailTemplatesRequest, ListEmailTemplatesResult, SocaPaginator)
 from ideasdk.context import SocaContext
+from ideasdk.dynamodb.dynamodb_filter_compiler import DynamoDBFilterCompiler
 
 from typing import Dict, Optional
 from boto3.dynamodb.conditions import Attr
@@ -27,6 +28,7 @@ class EmailTemplatesDAO:
         else:
             self.logger = context.logger('email-templates-dao')
         self.table = None
+        self.filter_compiler = DynamoDBFilterCompiler(hash_key='name')
 
     def get_table_name(self) -> str:
         return f'{self.context.cluster_name()}.email-templates'
@@ -149,48 +151,21 @@ class EmailTemplatesDAO:
         )
 
     def list_email_templates(self, request: ListEmailTemplatesRequest) -> ListEmailTemplatesResult:
-        scan_request = {}
-
-        cursor = request.cursor
-        last_evaluated_key = None
-        if Utils.is_not_empty(cursor):
-            last_evaluated_key = Utils.from_json(Utils.base64_decode(cursor))
-        if last_evaluated_key is not None:
-            scan_request['ExclusiveStartKey'] = last_evaluated_key
-
-        scan_filter = None
-        if Utils.is_not_empty(request.filters):
-            scan_filter = {}
-            for filter_ in request.filters:
-                if filter_.eq is not None:
-                    scan_filter[filter_.key] = {
-                        'AttributeValueList': [filter_.eq],
-                        'ComparisonOperator': 'EQ'
-                    }
-                if filter_.like is not None:
-                    scan_filter[filter_.key] = {
-                        'AttributeValueList': [filter_.like],
-                        'ComparisonOperator': 'CONTAINS'
-                    }
-        if scan_filter is not None:
-            scan_request['ScanFilter'] = scan_filter
-
-        scan_result = self.table.scan(**scan_request)
-
-        db_email_templates = Utils.get_value_as_list('Items', scan_result, [])
+        list_result = self.filter_compiler.list(
+            table=self.table,
+            filters=request.filters,
+            cursor=request.cursor
+        )
+
+        db_email_templates = list_result.items
         email_templates = []
         for db_email_template in db_email_templates:
             email_template = self.convert_from_db(db_email_template)
             email_templates.append(email_template)
 
-        response_cursor = None
-        last_evaluated_key = Utils.get_any_value('LastEvaluatedKey', scan_result)
-        if last_evaluated_key is not None:
-            response_cursor = Utils.base64_encode(Utils.to_json(last_evaluated_key))
-
         return ListEmailTemplatesResult(
             listing=email_templates,
             paginator=SocaPaginator(
-                cursor=response_cursor
+                cursor=list_result.cursor
             )
         )
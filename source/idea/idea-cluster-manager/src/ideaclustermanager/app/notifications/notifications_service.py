@@ -12,17 +12,20 @@
 from ideasdk.context import SocaContext
 from ideasdk.service import SocaService
 from ideasdk.utils import Utils, Jinja2Utils
-from ideadatamodel import Notification
+from ideadatamodel import Notification, User
 from res.resources import email_templates
 
 from ideaclustermanager.app.accounts.accounts_service import AccountsService
+from ideaclustermanager.app.notifications.rate_limiter import TokenBucketRateLimiter
 
-from typing import Dict
-from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor, wait
+import jinja2
 import threading
-import time
 
-MAX_WORKERS = 1  # must be between 1 and 10
+MAX_WORKERS = 10  # must be between 1 and 10
+EMAIL_TEMPLATES_CACHE_TTL_SECONDS = 60
+COMPILED_TEMPLATES_CACHE_MAX_SIZE = 100
 
 
 class NotificationsService(SocaService):
@@ -48,7 +51,59 @@ class NotificationsService(SocaService):
         )
         self.jinja2_env = Jinja2Utils.env_using_base_loader()
 
-    def send_email(self, notification: Notification):
+        # templates are re-read from the db after the ttl; compiled templates are keyed by template name and version,
+        # so an updated template is compiled again while unchanged templates are compiled once.
+        self.email_templates_cache = self.context.cache().register_cache('notifications.email_templates', ttl_seconds=EMAIL_TEMPLATES_CACHE_TTL_SECONDS)
+        self.compiled_templates_cache = self.context.cache().register_cache('notifications.compiled_templates', max_size=COMPILED_TEMPLATES_CACHE_MAX_SIZE, eviction_policy='lru')
+
+        # the rate limiter is shared by all executor threads so that the send rate honors cluster.ses.max_sending_rate
+        self.rate_limiter = TokenBucketRateLimiter(rate=1)
+
+        self.ses_enabled = False
+        self.email_notifications_enabled = False
+        self.sender_email: Optional[str] = None
+        self.ses_region: Optional[str] = None
+        self.max_sending_rate = 1
+        self.load_config()
+
+    def load_config(self):
+        self.ses_enabled = self.context.config().get_bool('cluster.ses.enabled', False)
+        self.email_notifications_enabled = self.context.config().get_bool('cluster-manager.notifications.email.enabled', False)
+        self.max_sending_rate = max(1, self.context.config().get_int('cluster.ses.max_sending_rate', 1))
+        self.rate_limiter.set_rate(self.max_sending_rate)
+        if self.ses_enabled:
+            self.sender_email = self.context.config().get_string('cluster.ses.sender_email', required=True)
+            self.ses_region = self.context.config().get_string('cluster.ses.region', required=True)
+
+    def on_reload(self):
+        self.load_config()
+
+    def is_email_enabled(self) -> bool:
+        if not self.ses_enabled:
+            self.logger.debug('ses is disabled. skip.')
+            return False
+        if not self.email_notifications_enabled:
+            self.logger.debug('email notifications are disabled. skip.')
+            return False
+        return True
+
+    def get_compiled_template(self, template_name: str) -> Tuple[jinja2.Template, jinja2.Template]:
+        """
+        :return: compiled subject and body templates for the email template
+        """
+        template = self.email_templates_cache.get_or_load(template_name, lambda: email_templates.get_email_template(email_template_name=template_name))
+        version = Utils.get_value_as_string('updated_on', template, '')
+        cache_key = f'{template_name}:{version}'
+        compiled = self.compiled_templates_cache.get(cache_key)
+        if compiled is None:
+            compiled = (
+                self.jinja2_env.from_string(Utils.get_value_as_string('subject', template, '')),
+                self.jinja2_env.from_string(Utils.get_value_as_string('body', template, ''))
+            )
+            self.compiled_templates_cache.set(cache_key, compiled)
+        return compiled
+
+    def send_email(self, notification: Notification, user: Optional[User] = None):
         """
         send email
 
@@ -58,29 +113,17 @@ class NotificationsService(SocaService):
             template_name: str - the name of the email template
             params: dict - containing all parameters required to render the template
 
+        :param notification: the notification to send
+        :param user: the recipient, if already retrieved as part of a batch. looked up by username otherwise.
         """
         try:
 
-            ses_enabled = self.context.config().get_bool('cluster.ses.enabled', False)
-            if not ses_enabled:
-                self.logger.debug('ses is disabled. skip.')
+            if not self.is_email_enabled():
                 return
 
-            sender_email = self.context.config().get_string('cluster.ses.sender_email', required=True)
-            max_sending_rate = self.context.config().get_int('cluster.ses.max_sending_rate', 1)
-            max_sending_rate = max(1, max_sending_rate)
-
-            email_notifications_enabled = self.context.config().get_bool('cluster-manager.notifications.email.enabled', False)
-            if not email_notifications_enabled:
-                self.logger.debug('email notifications are disabled. skip.')
-                return
-
-            ses_region = self.context.config().get_string('cluster.ses.region', required=True)
-
-            ses = self.context.aws().ses(region_name=ses_region)
-
             username = notification.username
-            user = self.accounts.get_user(username=username)
+            if user is None:
+                user = self.accounts.get_user(username=username)
             if Utils.is_false(user.enabled):
                 self.logger.info(f'user: {username} has been disabled. skip email notification')
                 return
@@ -90,21 +133,15 @@ class NotificationsService(SocaService):
                 self.logger.warning(f'email address not found for user: {username}. skip email notification')
                 return
 
-            template_name = notification.template_name
-            get_template_result = email_templates.get_email_template(email_template_name=template_name)
-            template = get_template_result.template
-            subject_template = template.subject
-            body_template = template.body
+            subject_template, message_template = self.get_compiled_template(notification.template_name)
 
             params = Utils.get_as_dict(notification.params, {})
-
-            subject_template = self.jinja2_env.from_string(subject_template)
-            message_template = self.jinja2_env.from_string(body_template)
             subject = subject_template.render(**params)
             body = message_template.render(**params)
 
-            ses.send_email(
-                Source=sender_email,
+            self.rate_limiter.acquire()
+            self.context.aws().ses(region_name=self.ses_region).send_email(
+                Source=self.sender_email,
                 Destination={
                     'ToAddresses': [email]
                 },
@@ -120,25 +157,56 @@ class NotificationsService(SocaService):
                 }
             )
 
-            delay = float(1 / max_sending_rate)
-            time.sleep(delay)
-
         except Exception as e:
             self.logger.exception(f'failed to send email notification: {e}')
 
-    def execute_notifications(self, sqs_message: Dict):
-        notifications_name = None
+    def get_recipients(self, notifications: List[Notification]) -> Dict[str, User]:
+        usernames = [notification.username for notification in notifications if Utils.is_not_empty(notification.username)]
+        if len(usernames) == 0:
+            return {}
+        try:
+            return self.accounts.get_users(usernames=usernames)
+        except Exception as e:
+            # fall back to the per-user lookup in send_email
+            self.logger.warning(f'failed to batch get users for notifications: {e}')
+            return {}
+
+    def execute_notifications(self, sqs_messages: List[Dict]):
+        """
+        send the notifications received in a single poll and acknowledge them with one delete_message_batch call
+        """
+        notifications = []
+        entries = []
+        for index, sqs_message in enumerate(sqs_messages):
+            try:
+                message_body = Utils.get_value_as_string('Body', sqs_message)
+                notifications.append(Notification(**Utils.from_json(message_body)))
+                entries.append({
+                    'Id': str(index),
+                    'ReceiptHandle': Utils.get_value_as_string('ReceiptHandle', sqs_message)
+                })
+            except Exception as e:
+                self.logger.exception(f'failed to parse notification: {Utils.get_value_as_string("MessageId", sqs_message)} - {e}')
+
+        if len(notifications) > 0 and self.is_email_enabled():
+            users = self.get_recipients(notifications)
+            futures = [
+                self.notifications_executors.submit(self.send_email, notification, users.get(notification.username))
+                for notification in notifications
+            ]
+            wait(futures)
+
+        if len(entries) == 0:
+            return
         try:
-            message_body = Utils.get_value_as_string('Body', sqs_message)
-            receipt_handle = Utils.get_value_as_string('ReceiptHandle', sqs_message)
-            payload = Utils.from_json(message_body)
-            self.send_email(Notification(**payload))
-            self.context.aws().sqs().delete_message(
+            result = self.context.aws().sqs().delete_message_batch(
                 QueueUrl=self.notifications_queue_url,
-                ReceiptHandle=receipt_handle
+                Entries=entries
             )
+            for failed in Utils.get_value_as_list('Failed', result, []):
+                self.logger.error(f'failed to delete notification message: {failed}')
         except Exception as e:
-            self.logger.exception(f'failed to execute notifications: {notifications_name} - {e}')
+            self.logger.exception(f'failed to delete notification messages: {e}')
 
     def notifications_queue_listener(self):
         while not self.exit.is_set():
@@ -152,8 +220,7 @@ class NotificationsService(SocaService):
                 if len(messages) == 0:
                     continue
                 self.logger.info(f'received {len(messages)} messages')
-                for message in messages:
-                    self.notifications_executors.submit(lambda message_: self.execute_notifications(message_), message)
+                self.execute_notifications(messages)
 
             except Exception as e:
                 self.logger.exception(f'failed to poll queue: {e}')
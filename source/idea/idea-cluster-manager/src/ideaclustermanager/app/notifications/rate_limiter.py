@@ -0,0 +1,63 @@
+#  Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance
+#  with the License. A copy of the License is located at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  or in the 'license' file accompanying this file. This file is distributed on an 'AS IS' BASIS, WITHOUT WARRANTIES
+#  OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions
+#  and limitations under the License.
+
+from typing import Callable
+import threading
+import time
+
+
+class TokenBucketRateLimiter:
+    """
+    token bucket rate limiter shared by all threads of a process.
+
+    tokens are added at `rate` per second up to `capacity`. acquire() takes a token and reserves the next one
+    when the bucket is empty, so callers are released one at a time at exactly `rate` per second,
+    irrespective of the number of threads calling acquire().
+    """
+
+    def __init__(self, rate: float, capacity: float = 1, clock: Callable[[], float] = time.monotonic, sleep: Callable[[float], None] = time.sleep):
+        self._lock = threading.Lock()
+        self._clock = clock
+        self._sleep = sleep
+        self._rate = float(max(rate, 0.001))
+        self._capacity = float(max(capacity, 1))
+        self._tokens = self._capacity
+        self._updated_at = clock()
+
+    @property
+    def rate(self) -> float:
+        return self._rate
+
+    def set_rate(self, rate: float, capacity: float = 1):
+        with self._lock:
+            self._refill()
+            self._rate = float(max(rate, 0.001))
+            self._capacity = float(max(capacity, 1))
+            self._tokens = min(self._tokens, self._capacity)
+
+    def _refill(self):
+        now = self._clock()
+        self._tokens = min(self._capacity, self._tokens + (now - self._updated_at) * self._rate)
+        self._updated_at = now
+
+    def acquire(self) -> float:
+        """
+        block until a token is available
+        :return: the time in seconds the caller waited
+        """
+        with self._lock:
+            self._refill()
+            self._tokens -= 1
+            # a negative balance is a reservation for a future token
+            wait = 0.0 if self._tokens >= 0 else -self._tokens / self._rate
+        if wait > 0:
+            self._sleep(wait)
+        return wait
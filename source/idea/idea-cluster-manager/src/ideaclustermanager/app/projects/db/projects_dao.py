@@ -13,6 +13,7 @@ from ideasdk.utils import Utils
 from ideadatamodel import (exceptions, Project, AwsProjectBudget, ListProjectsRequest, ListProjectsResult,
                            SocaPaginator, SocaKeyValue, Scripts, Script, ScriptEvents)
 from ideasdk.context import SocaContext
+from ideasdk.dynamodb.dynamodb_filter_compiler import DynamoDBFilterCompiler, DynamoDBIndex
 from ideasdk.launch_configurations import LaunchScriptsHelper, ScriptEventType, ScriptOSType
 
 from typing import Dict, Optional
@@ -31,6 +32,10 @@ class ProjectsDAO:
         else:
             self.logger = context.logger('projects-dao')
         self.table = None
+        self.filter_compiler = DynamoDBFilterCompiler(
+            hash_key='project_id',
+            indexes=[DynamoDBIndex(hash_key='name', index_name=GSI_PROJECT_NAME)]
+        )
 
     def get_table_name(self) -> str:
         return f'{self.context.cluster_name()}.projects'
@@ -228,48 +233,21 @@ class ProjectsDAO:
         )
 
     def list_projects(self, request: ListProjectsRequest) -> ListProjectsResult:
-        scan_request = {}
-
-        cursor = request.cursor
-        last_evaluated_key = None
-        if Utils.is_not_empty(cursor):
-            last_evaluated_key = Utils.from_json(Utils.base64_decode(cursor))
-        if last_evaluated_key is not None:
-            scan_request['ExclusiveStartKey'] = last_evaluated_key
-
-        scan_filter = None
-        if Utils.is_not_empty(request.filters):
-            scan_filter = {}
-            for filter_ in request.filters:
-                if filter_.eq is not None:
-                    scan_filter[filter_.key] = {
-                        'AttributeValueList': [filter_.eq],
-                        'ComparisonOperator': 'EQ'
-                    }
-                if filter_.like is not None:
-                    scan_filter[filter_.key] = {
-                        'AttributeValueList': [filter_.like],
-                        'ComparisonOperator': 'CONTAINS'
-                    }
-        if scan_filter is not None:
-            scan_request['ScanFilter'] = scan_filter
-
-        scan_result = self.table.scan(**scan_request)
-
-        db_projects = Utils.get_value_as_list('Items', scan_result, [])
+        list_result = self.filter_compiler.list(
+            table=self.table,
+            filters=request.filters,
+            cursor=request.cursor
+        )
+
+        db_projects = list_result.items
         projects = []
         for db_project in db_projects:
             project = self.convert_from_db(db_project)
             projects.append(project)
 
-        response_cursor = None
-        last_evaluated_key = Utils.get_any_value('LastEvaluatedKey', scan_result)
-        if last_evaluated_key is not None:
-            response_cursor = Utils.base64_encode(Utils.to_json(last_evaluated_key))
-
         return ListProjectsResult(
             listing=projects,
             paginator=SocaPaginator(
-                cursor=response_cursor
+                cursor=list_result.cursor
             )
         )
@@ -34,20 +34,22 @@ from ideasdk.utils import Utils, ApiUtils
 from ideasdk.launch_configurations import LaunchScriptsHelper, LaunchRoleHelper
 from ideasdk.context import SocaContext, ArnBuilder
 from ideasdk.client.vdc_client import AbstractVirtualDesktopControllerClient
+from ideasdk.client.evdi_client import EvdiClient
 
 from ideaclustermanager.app.projects.db.projects_dao import ProjectsDAO
 from ideaclustermanager.app.authz.db.role_assignments_dao import RoleAssignmentsDAO
 from ideaclustermanager.app.accounts.accounts_service import AccountsService
 
-from typing import List, Set
+from typing import List, Set, Callable, Optional
 
 
 class ProjectsService:
 
-    def __init__(self, context: SocaContext, accounts_service: AccountsService, vdc_client: AbstractVirtualDesktopControllerClient):
+    def __init__(self, context: SocaContext, accounts_service: AccountsService, vdc_client: AbstractVirtualDesktopControllerClient, evdi_client: Optional[EvdiClient] = None):
         self.context = context
         self.accounts_service = accounts_service
         self.vdc_client = vdc_client
+        self.evdi_client = evdi_client
         self.logger = context.logger('projects')
         self.arn_builder = ArnBuilder(self.context.config())
 
@@ -127,6 +129,8 @@ class ProjectsService:
         enabled_project = self.get_project(
             GetProjectRequest(project_id=created_project.project_id))
 
+        self._publish_project_event(self.evdi_client.publish_project_created_event if self.evdi_client else None, created_project.project_id)
+
         return CreateProjectResult(
             project=enabled_project.project
         )
@@ -168,6 +172,7 @@ class ProjectsService:
                 if role_assignment.actor_type in constants.VALID_ROLE_ASSIGNMENT_ACTOR_TYPES:
                     self.role_assignments_dao.delete_role_assignment(actor_key=role_assignment.actor_key, resource_key=role_assignment.resource_key)
             self.projects_dao.delete_project(project_id)
+            self._publish_project_event(self.evdi_client.publish_project_deleted_event if self.evdi_client else None, project_id)
 
         return DeleteProjectResult()
 
@@ -274,6 +279,8 @@ class ProjectsService:
         db_updated = self.projects_dao.update_project(self.projects_dao.convert_to_db(project))
         updated_project = self.projects_dao.convert_from_db(db_updated)
 
+        self._publish_project_event(self.evdi_client.publish_project_updated_event if self.evdi_client else None, updated_project.project_id)
+
         return UpdateProjectResult(
             project=updated_project
         )
@@ -301,6 +308,7 @@ class ProjectsService:
             'project_id': project['project_id'],
             'enabled': True
         })
+        self._publish_project_event(self.evdi_client.publish_project_updated_event if self.evdi_client else None, project['project_id'])
 
         return EnableProjectResult()
 
@@ -326,12 +334,25 @@ class ProjectsService:
             'project_id': project['project_id'],
             'enabled': False
         })
+        self._publish_project_event(self.evdi_client.publish_project_updated_event if self.evdi_client else None, project['project_id'])
 
         return DisableProjectResult()
 
     def list_projects(self, request: ListProjectsRequest) -> ListProjectsResult:
         return self.projects_dao.list_projects(request)
 
+    def _publish_project_event(self, publish: Optional[Callable[[str], None]], project_id: str):
+        """
+        notify the virtual desktop controller of a project change, so that its project catalog is kept up to date.
+        failures are logged and ignored, as the controller periodically re-loads all projects.
+        """
+        if publish is None:
+            return
+        try:
+            publish(project_id)
+        except Exception as e:
+            self.logger.warning(f'failed to publish project event for project id: {project_id} - {e}')
+
     def remove_projects_from_group(self, project_ids: List[str], group_name: str, force: bool):
         """
         remove multiple projects from a group
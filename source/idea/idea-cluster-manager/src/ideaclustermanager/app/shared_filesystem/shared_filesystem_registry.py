@@ -0,0 +1,99 @@
+#  Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#  SPDX-License-Identifier: Apache-2.0
+
+from typing import Dict, List, Optional, Set
+
+from ideadatamodel import constants
+from ideadatamodel.shared_filesystem import FileSystem
+
+
+class SharedFilesystemRegistry:
+    """
+    In-memory index of the onboarded and global filesystems of the shared-storage config, by name, filesystem id and project.
+
+    A registry is built from a single listing of the config tree at the start of an operation, and is used for all the lookups
+    of the operation instead of listing the filesystems for each lookup. Project changes planned by the operation are applied
+    using set_projects(), so that later lookups of the same operation see them.
+    """
+
+    def __init__(
+        self,
+        onboarded_filesystems: List[FileSystem],
+        global_filesystems: List[FileSystem],
+    ):
+        self._filesystems: Dict[str, FileSystem] = {}
+        self._filesystems_by_id: Dict[str, FileSystem] = {}
+        self._onboarded_filesystem_names: List[str] = []
+        self._filesystem_names_by_project: Dict[str, Set[str]] = {}
+
+        for fs in onboarded_filesystems:
+            self._add(fs)
+            self._onboarded_filesystem_names.append(fs.get_name())
+            for project in fs.get_projects() or []:
+                self._filesystem_names_by_project.setdefault(project, set()).add(
+                    fs.get_name()
+                )
+        for fs in global_filesystems:
+            self._add(fs)
+
+    def _add(self, fs: FileSystem):
+        # the first filesystem listed for a name wins, same as a lookup in the onboarded + global listing
+        if fs.get_name() in self._filesystems:
+            return
+        self._filesystems[fs.get_name()] = fs
+        if isinstance(fs.storage.get(fs.get_provider()), dict):
+            filesystem_id = fs.get_filesystem_id()
+            if filesystem_id is not None:
+                self._filesystems_by_id.setdefault(filesystem_id, fs)
+
+    def is_empty(self) -> bool:
+        return len(self._filesystems) == 0
+
+    def get(self, filesystem_name: str) -> Optional[FileSystem]:
+        return self._filesystems.get(filesystem_name)
+
+    def get_by_filesystem_id(self, filesystem_id: str) -> Optional[FileSystem]:
+        return self._filesystems_by_id.get(filesystem_id)
+
+    def list_filesystems(self) -> List[FileSystem]:
+        return list(self._filesystems.values())
+
+    def list_onboarded_filesystems(self) -> List[FileSystem]:
+        return [self._filesystems[name] for name in self._onboarded_filesystem_names]
+
+    def get_onboarded_filesystem_ids(self) -> Set[str]:
+        return set(
+            fs.get_filesystem_id()
+            for fs in self.list_onboarded_filesystems()
+            if isinstance(fs.storage.get(fs.get_provider()), dict)
+        )
+
+    def list_filesystems_for_project(self, project_name: str) -> List[FileSystem]:
+        names = self._filesystem_names_by_project.get(project_name, set())
+        return [
+            self._filesystems[name]
+            for name in self._onboarded_filesystem_names
+            if name in names
+        ]
+
+    def get_projects(self, filesystem_name: str) -> List[str]:
+        """
+        :return: a copy of the projects of the filesystem, safe to modify
+        """
+        fs = self._filesystems.get(filesystem_name)
+        if fs is None or fs.get_projects() is None:
+            return []
+        return list(fs.get_projects())
+
+    def set_projects(self, filesystem_name: str, projects: List[str]):
+        fs = self._filesystems[filesystem_name]
+        for project in fs.get_projects() or []:
+            self._filesystem_names_by_project.get(project, set()).discard(
+                filesystem_name
+            )
+        fs.storage[constants.FILE_SYSTEM_PROJECTS_KEY] = list(projects)
+        if filesystem_name in self._onboarded_filesystem_names:
+            for project in projects:
+                self._filesystem_names_by_project.setdefault(project, set()).add(
+                    filesystem_name
+                )
@@ -1,9 +1,12 @@
 import time
-from typing import Optional, List, Dict, Set, Union
+from typing import Any, Optional, List, Dict, Set, Union
 
 from ideaclustermanager.app.shared_filesystem.object_storage_service import (
     ObjectStorageService,
 )
+from ideaclustermanager.app.shared_filesystem.shared_filesystem_registry import (
+    SharedFilesystemRegistry,
+)
 from ideasdk.context import SocaContext
 from ideadatamodel import (
     constants,
@@ -84,9 +87,10 @@ class SharedFilesystemService:
 
     def onboard_efs_filesystem(self, request: OnboardEFSFileSystemRequest):
         self._validate_onboard_filesystem_request(request)
-        self._validate_filesystem_does_not_exist(request.filesystem_name)
+        registry = self.get_filesystem_registry()
+        self._validate_filesystem_does_not_exist(request.filesystem_name, registry)
         self._validate_filesystem_present_in_vpc_and_not_onboarded(
-            request.filesystem_id
+            request.filesystem_id, constants.STORAGE_PROVIDER_EFS, registry
         )
 
         config_entries = self.build_config_for_vpc_efs(request)
@@ -232,21 +236,10 @@ class SharedFilesystemService:
     def onboard_s3_bucket(self, request: OnboardS3BucketRequest):
         self._object_storage_service.validate_onboard_object_storage_request(request)
 
-        s3_bucket_filter = [
-            SocaFilter(
-                key=constants.FILE_SYSTEM_PROVIDER_KEY,
-                eq=constants.STORAGE_PROVIDER_S3_BUCKET,
-            )
-        ]
-        onboarded_filesystems = self.list_onboarded_file_systems(
-            ListOnboardedFileSystemsRequest(filters=s3_bucket_filter)
-        ).listing
-        onboarded_filesystem_ids = set(
-            [fs.get_filesystem_id() for fs in onboarded_filesystems]
-        )
+        registry = self.get_filesystem_registry()
 
         # Check if bucket_arn has been onboarded already
-        if request.bucket_arn in onboarded_filesystem_ids:
+        if request.bucket_arn in registry.get_onboarded_filesystem_ids():
             raise exceptions.soca_exception(
                 error_code=errorcodes.FILESYSTEM_ALREADY_ONBOARDED,
                 message=f"{request.bucket_arn} has already been onboarded. Provide a new bucket ARN.",
@@ -255,7 +248,7 @@ class SharedFilesystemService:
         # Check for mount collisions of provided projects and mount directory
         if request.projects:
             self._validate_mount_directory_and_projects_for_mount_point_collisions(
-                request.mount_directory, request.projects
+                request.mount_directory, request.projects, registry
             )
 
         result = self._object_storage_service.build_config_for_s3_bucket(request)
@@ -277,9 +270,10 @@ class SharedFilesystemService:
 
     def onboard_ontap_filesystem(self, request: OnboardONTAPFileSystemRequest):
         self._validate_onboard_filesystem_request(request)
-        self._validate_filesystem_does_not_exist(request.filesystem_name)
+        registry = self.get_filesystem_registry()
+        self._validate_filesystem_does_not_exist(request.filesystem_name, registry)
         self._validate_filesystem_present_in_vpc_and_not_onboarded(
-            request.filesystem_id
+            request.filesystem_id, constants.STORAGE_PROVIDER_FSX_NETAPP_ONTAP, registry
         )
 
         config_entries = self.build_config_for_vpc_ontap(request)
@@ -489,9 +483,10 @@ class SharedFilesystemService:
 
     def onboard_lustre_filesystem(self, request: OnboardLUSTREFileSystemRequest):
         self._validate_onboard_filesystem_request(request)
-        self._validate_filesystem_does_not_exist(request.filesystem_name)
+        registry = self.get_filesystem_registry()
+        self._validate_filesystem_does_not_exist(request.filesystem_name, registry)
         self._validate_filesystem_present_in_vpc_and_not_onboarded(
-            request.filesystem_id
+            request.filesystem_id, constants.STORAGE_PROVIDER_FSX_LUSTRE, registry
         )
 
         config_entries = self.build_config_for_vpc_lustre(request)
@@ -547,7 +542,8 @@ class SharedFilesystemService:
     ) -> UpdateFileSystemResult:
         self._validate_update_filesystem_request(request=request)
         updated_config = {}
-        fs = self.get_filesystem(request.filesystem_name)
+        registry = self.get_filesystem_registry()
+        fs = self.get_filesystem(request.filesystem_name, registry)
         if request.filesystem_title and request.filesystem_title != fs.get_title():
             updated_config[constants.FILE_SYSTEM_TITLE_KEY] = request.filesystem_title
         if request.projects is not None:
@@ -556,7 +552,7 @@ class SharedFilesystemService:
                 new_projects_to_attach -= set(fs.get_projects())
             if new_projects_to_attach:
                 self._validate_mount_directory_and_projects_for_mount_point_collisions(
-                    fs.get_mount_dir(), list(new_projects_to_attach)
+                    fs.get_mount_dir(), list(new_projects_to_attach), registry
                 )
             updated_config[constants.FILE_SYSTEM_PROJECTS_KEY] = request.projects
         if updated_config:
@@ -604,7 +600,7 @@ class SharedFilesystemService:
         self._check_required_parameters(request=request)
 
         fs = self.get_filesystem(filesystem_name)
-        projects = fs.get_projects()
+        projects = list(fs.get_projects() or [])
         if project_name in projects:
             projects.remove(project_name)
             self._update_config_for_filesystem(
@@ -687,18 +683,44 @@ class SharedFilesystemService:
                 return False
         return True
 
+    def get_filesystem_registry(self) -> SharedFilesystemRegistry:
+        """
+        index the onboarded and global filesystems of the current config, for the lookups of a single operation
+        """
+        return SharedFilesystemRegistry(
+            onboarded_filesystems=self.list_onboarded_file_systems(
+                ListOnboardedFileSystemsRequest()
+            ).listing,
+            global_filesystems=self.list_global_filesystems(
+                ListGlobalFileSystemsRequest()
+            ).listing,
+        )
+
     def update_filesystem_to_project_mapping(
         self, filesystem_name: str, project_name: str
     ):
-        fs = self.get_filesystem(filesystem_name)
-        projects = fs.get_projects()
-        if Utils.is_empty(projects):
-            projects = []
-        if project_name not in projects:
-            projects.append(project_name)
-            self._update_config_for_filesystem(
-                fs, {constants.FILE_SYSTEM_PROJECTS_KEY: projects}
+        registry = self.get_filesystem_registry()
+        self._set_config_entries(
+            self._build_filesystem_to_project_mapping_entries(
+                registry, filesystem_name, project_name
             )
+        )
+
+    def _build_filesystem_to_project_mapping_entries(
+        self,
+        registry: SharedFilesystemRegistry,
+        filesystem_name: str,
+        project_name: str,
+    ) -> Dict[str, Any]:
+        fs = self.get_filesystem(filesystem_name, registry)
+        projects = registry.get_projects(filesystem_name)
+        if project_name in projects:
+            return {}
+        projects.append(project_name)
+        registry.set_projects(filesystem_name, projects)
+        return self._build_config_entries_for_filesystem(
+            fs, {constants.FILE_SYSTEM_PROJECTS_KEY: projects}
+        )
 
     def update_filesystems_to_project_mappings(
         self,
@@ -706,31 +728,43 @@ class SharedFilesystemService:
         project_name: str,
         validate_check: bool = True,
     ):
+        """
+        attach the project to filesystem_names and detach it from all other onboarded filesystems.
+        the project mappings of all filesystems are written to the cluster settings table in a single transaction.
+        :return: the filesystems attached to the project
+        """
+        registry = self.get_filesystem_registry()
         if validate_check:
-            self.validate_filesystems(filesystem_names)
-        self._cleanup_filesystems_to_project_mappings(filesystem_names, project_name)
+            self.validate_filesystems(filesystem_names, registry)
+        config_entries = self._build_cleanup_filesystems_to_project_mappings_entries(
+            registry, filesystem_names, project_name
+        )
         filesystems_succeeded = []
         filesystem_name = None
         try:
             for filesystem_name in filesystem_names:
-                self.update_filesystem_to_project_mapping(filesystem_name, project_name)
+                config_entries.update(
+                    self._build_filesystem_to_project_mapping_entries(
+                        registry, filesystem_name, project_name
+                    )
+                )
                 filesystems_succeeded.append(filesystem_name)
         except exceptions.SocaException as e:
             self.logger.error(
                 f"Filesystem {filesystem_name} has failed to attach to {project_name} due to {e.message}."
             )
+        self._set_config_entries(config_entries)
         return filesystems_succeeded
 
-    def validate_filesystems(self, filesystem_names: List[str]):
-        onboarded_filesystems = self.list_onboarded_file_systems(
-            ListOnboardedFileSystemsRequest()
-        ).listing
-        global_filesystems = self.list_global_filesystems(
-            ListGlobalFileSystemsRequest()
-        ).listing
-        all_filesystems = onboarded_filesystems + global_filesystems
+    def validate_filesystems(
+        self,
+        filesystem_names: List[str],
+        registry: Optional[SharedFilesystemRegistry] = None,
+    ):
+        if registry is None:
+            registry = self.get_filesystem_registry()
         all_filesystems_mount_directories = {
-            fs.get_name(): fs.get_mount_dir() for fs in all_filesystems
+            fs.get_name(): fs.get_mount_dir() for fs in registry.list_filesystems()
         }
         mount_directories_used = set()
         for filesystem_name in filesystem_names:
@@ -842,19 +876,26 @@ class SharedFilesystemService:
             raise exceptions.invalid_params("missing filesystem_name")
 
     def _validate_mount_directory_and_projects_for_mount_point_collisions(
-        self, mount_directory: str, projects: list[str]
+        self,
+        mount_directory: str,
+        projects: list[str],
+        registry: Optional[SharedFilesystemRegistry] = None,
     ):
         if Utils.is_empty(mount_directory):
             raise exceptions.invalid_params("missing mount_directory")
         if Utils.is_empty(projects):
             raise exceptions.invalid_params("missing projects")
+        if registry is None:
+            registry = self.get_filesystem_registry()
         for proj in projects:
-            project_filter = [
-                SocaFilter(key=constants.FILE_SYSTEM_PROJECTS_KEY, eq=proj)
-            ]
-            onboarded_filesystems_for_project = self.list_onboarded_file_systems(
-                ListOnboardedFileSystemsRequest(filters=project_filter)
-            ).listing
+            ApiUtils.validate_input(
+                proj,
+                constants.PROJECT_ID_REGEX,
+                constants.PROJECT_ID_ERROR_MESSAGE,
+            )
+            onboarded_filesystems_for_project = registry.list_filesystems_for_project(
+                proj
+            )
             mount_directories_used = set(
                 [fs.get_mount_dir() for fs in onboarded_filesystems_for_project]
             )
@@ -933,9 +974,13 @@ class SharedFilesystemService:
             constants.FILE_SYSTEM_NAME_ERROR_MESSAGE,
         )
 
-    def _validate_filesystem_does_not_exist(self, filesystem_name: str):
+    def _validate_filesystem_does_not_exist(
+        self,
+        filesystem_name: str,
+        registry: Optional[SharedFilesystemRegistry] = None,
+    ):
         try:
-            if Utils.is_not_empty(self.get_filesystem(filesystem_name)):
+            if Utils.is_not_empty(self.get_filesystem(filesystem_name, registry)):
                 raise exceptions.soca_exception(
                     error_code=errorcodes.INVALID_PARAMS,
                     message=f"{filesystem_name} already exists.",
@@ -961,13 +1006,15 @@ class SharedFilesystemService:
                     message=f"{subnet_id} is not a RES private subnet",
                 )
 
-    def _validate_filesystem_present_in_vpc_and_not_onboarded(self, filesystem_id):
-        onboarded_filesystems = self.list_onboarded_file_systems(
-            ListOnboardedFileSystemsRequest()
-        ).listing
-        onboarded_filesystem_ids = set(
-            [fs.get_filesystem_id() for fs in onboarded_filesystems]
-        )
+    def _validate_filesystem_present_in_vpc_and_not_onboarded(
+        self,
+        filesystem_id: str,
+        provider: str,
+        registry: Optional[SharedFilesystemRegistry] = None,
+    ):
+        if registry is None:
+            registry = self.get_filesystem_registry()
+        onboarded_filesystem_ids = registry.get_onboarded_filesystem_ids()
 
         if filesystem_id in onboarded_filesystem_ids:
             raise exceptions.soca_exception(
@@ -975,21 +1022,21 @@ class SharedFilesystemService:
                 message=f"{filesystem_id} has already been onboarded",
             )
 
-        efs_filesystems = self._list_unonboarded_efs_file_systems(
-            onboarded_filesystem_ids
-        )
-        fsx_ontap_filesystems = self._list_unonboarded_ontap_file_systems(
-            onboarded_filesystem_ids
-        )
-        fsx_lustre_filesystems = self._list_unonboarded_lustre_file_systems(
-            onboarded_filesystem_ids
-        )
-
-        filesystems_in_vpc = [
-            *efs_filesystems,
-            *fsx_ontap_filesystems,
-            *fsx_lustre_filesystems,
-        ]
+        # only the filesystems of the onboarded provider are described
+        if provider == constants.STORAGE_PROVIDER_EFS:
+            filesystems_in_vpc = self._list_unonboarded_efs_file_systems(
+                onboarded_filesystem_ids
+            )
+        elif provider == constants.STORAGE_PROVIDER_FSX_NETAPP_ONTAP:
+            filesystems_in_vpc = self._list_unonboarded_ontap_file_systems(
+                onboarded_filesystem_ids
+            )
+        elif provider == constants.STORAGE_PROVIDER_FSX_LUSTRE:
+            filesystems_in_vpc = self._list_unonboarded_lustre_file_systems(
+                onboarded_filesystem_ids
+            )
+        else:
+            raise exceptions.invalid_params(f"provider {provider} is not supported")
 
         for filesystem in filesystems_in_vpc:
             if filesystem_id == filesystem.get_filesystem_id():
@@ -1003,61 +1050,79 @@ class SharedFilesystemService:
     def _update_config_for_filesystem(
         self, filesystem: FileSystem, config: Dict[str, Union[str, List[str]]]
     ):
+        self._set_config_entries(
+            self._build_config_entries_for_filesystem(filesystem, config)
+        )
+
+    @staticmethod
+    def _build_config_entries_for_filesystem(
+        filesystem: FileSystem, config: Dict[str, Union[str, List[str]]]
+    ) -> Dict[str, Any]:
         for key in config.keys():
             if key not in constants.FILE_SYSTEM_ALLOWED_KEYS_TO_UPDATE:
                 raise exceptions.soca_exception(
                     error_code=errorcodes.INVALID_PARAMS,
                     message=f"invalid config key {key} provided",
                 )
-        for key, value in config.items():
-            self.config.db.set_config_entry(
-                f"{constants.MODULE_SHARED_STORAGE}.{filesystem.get_name()}.{key}",  # update entry on cluster settings dynamodb table
-                value,
-            )
-            self.config.put(
-                f"{constants.MODULE_SHARED_STORAGE}.{filesystem.get_name()}.{key}",  # update local config tree
-                value,
-            )
+        return {
+            f"{constants.MODULE_SHARED_STORAGE}.{filesystem.get_name()}.{key}": value
+            for key, value in config.items()
+        }
 
-    def _cleanup_filesystems_to_project_mappings(
-        self, filesystem_names: List[str], project_name: str
-    ):
-        onboarded_filesystems = self.list_onboarded_file_systems(
-            ListOnboardedFileSystemsRequest()
-        ).listing
-        onboarded_filesystems_for_project = [
-            fs
-            for fs in onboarded_filesystems
-            if Utils.is_not_empty(fs.get_projects())
-               and project_name in fs.get_projects()
-        ]
+    def _set_config_entries(self, config_entries: Dict[str, Any]):
+        if Utils.is_empty(config_entries):
+            return
+        # update entries on cluster settings dynamodb table, in a single transaction
+        self.config.db.set_config_entries(config_entries)
+        for key, value in config_entries.items():
+            # update local config tree
+            self.config.put(key, value)
+
+    def _build_cleanup_filesystems_to_project_mappings_entries(
+        self,
+        registry: SharedFilesystemRegistry,
+        filesystem_names: List[str],
+        project_name: str,
+    ) -> Dict[str, Any]:
+        config_entries = {}
         filesystem_names_set = set(filesystem_names)
-        for fs in onboarded_filesystems_for_project:
+        for fs in registry.list_filesystems_for_project(project_name):
             if fs.get_name() not in filesystem_names_set:
-                projects = fs.get_projects()
-                if project_name in projects:
-                    projects.remove(project_name)
-                    self._update_config_for_filesystem(
+                projects = registry.get_projects(fs.get_name())
+                projects.remove(project_name)
+                registry.set_projects(fs.get_name(), projects)
+                config_entries.update(
+                    self._build_config_entries_for_filesystem(
                         fs, {constants.FILE_SYSTEM_PROJECTS_KEY: projects}
                     )
+                )
+        return config_entries
 
-    def get_filesystem(self, filesystem_name: str):
-        onboarded_filesystems = self.list_onboarded_file_systems(
-            ListOnboardedFileSystemsRequest()
-        ).listing
-        global_filesystems = self.list_global_filesystems(
-            ListGlobalFileSystemsRequest()
-        ).listing
-        filesystems = onboarded_filesystems + global_filesystems
-        if Utils.is_empty(filesystems):
+    def _cleanup_filesystems_to_project_mappings(
+        self, filesystem_names: List[str], project_name: str
+    ):
+        self._set_config_entries(
+            self._build_cleanup_filesystems_to_project_mappings_entries(
+                self.get_filesystem_registry(), filesystem_names, project_name
+            )
+        )
+
+    def get_filesystem(
+        self,
+        filesystem_name: str,
+        registry: Optional[SharedFilesystemRegistry] = None,
+    ):
+        if registry is None:
+            registry = self.get_filesystem_registry()
+        if registry.is_empty():
             raise exceptions.soca_exception(
                 error_code=errorcodes.NO_SHARED_FILESYSTEM_FOUND,
                 message="did not find any shared filesystem",
             )
 
-        for fs in filesystems:
-            if fs.get_name() == filesystem_name:
-                return fs
+        fs = registry.get(filesystem_name)
+        if fs is not None:
+            return fs
 
         raise exceptions.soca_exception(
             error_code=errorcodes.FILESYSTEM_NOT_FOUND,
@@ -13,6 +13,7 @@ import logging
 from ideasdk.utils import Utils
 from ideadatamodel import exceptions, Snapshot, SnapshotStatus, ListSnapshotsRequest, ListSnapshotsResult, SocaPaginator
 from ideasdk.context import SocaContext
+from ideasdk.dynamodb.dynamodb_filter_compiler import DynamoDBFilterCompiler
 
 from typing import Dict, Optional
 from boto3.dynamodb.conditions import Attr
@@ -27,6 +28,7 @@ class SnapshotDAO:
         else:
             self.logger = context.logger('snapshot-dao')
         self.table = None
+        self.filter_compiler = DynamoDBFilterCompiler(hash_key='s3_bucket_name', range_key='snapshot_path')
 
     def get_table_name(self) -> str:
         return f'{self.context.cluster_name()}.snapshots'
@@ -106,40 +108,18 @@ class SnapshotDAO:
 
     def list_snapshots(self, request: ListSnapshotsRequest) -> ListSnapshotsResult:
 
-        scan_request = {}
-
-        cursor = request.cursor
-        last_evaluated_key = None
-        if Utils.is_not_empty(cursor):
-            last_evaluated_key = Utils.from_json(Utils.base64_decode(cursor))
-        if last_evaluated_key is not None:
-            scan_request['ExclusiveStartKey'] = last_evaluated_key
-
-        scan_filter = None
-        if Utils.is_not_empty(request.filters):
-            scan_filter = {}
-            for filter_ in request.filters:
-                if filter_.eq is not None:
-                    scan_filter[filter_.key] = {
-                        'AttributeValueList': [filter_.eq],
-                        'ComparisonOperator': 'EQ'
-                    }
-                if filter_.like is not None:
-                    scan_filter[filter_.key] = {
-                        'AttributeValueList': [filter_.like],
-                        'ComparisonOperator': 'CONTAINS'
-                    }
-        if scan_filter is not None:
-            scan_request['ScanFilter'] = scan_filter
-
         _scan_start = Utils.current_time_ms()
-        scan_result = self.table.scan(**scan_request)
+        list_result = self.filter_compiler.list(
+            table=self.table,
+            filters=request.filters,
+            cursor=request.cursor
+        )
         _scan_end = Utils.current_time_ms()
 
-        db_snapshots = Utils.get_value_as_list('Items', scan_result, [])
+        db_snapshots = list_result.items
 
         if self.logger.isEnabledFor(logging.DEBUG):
-            self.logger.debug(f"DDB Table scan took {_scan_end - _scan_start}ms for {len(db_snapshots)} snapshots")
+            self.logger.debug(f"DDB Table listing took {_scan_end - _scan_start}ms for {len(db_snapshots)} snapshots")
 
         snapshots = []
 
@@ -152,14 +132,9 @@ class SnapshotDAO:
         if self.logger.isEnabledFor(logging.DEBUG):
             self.logger.debug(f"convert_from_db took {_idp_end - _idp_start}ms for {len(snapshots)} snapshots")
 
-        response_cursor = None
-        last_evaluated_key = Utils.get_any_value('LastEvaluatedKey', scan_result)
-        if last_evaluated_key is not None:
-            response_cursor = Utils.base64_encode(Utils.to_json(last_evaluated_key))
-
         return ListSnapshotsResult(
             listing=snapshots,
             paginator=SocaPaginator(
-                cursor=response_cursor
+                cursor=list_result.cursor
             )
         )
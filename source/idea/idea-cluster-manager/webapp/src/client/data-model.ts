@@ -2220,6 +2220,7 @@ export interface ListUsersInGroupRequest {
     listing?: (SocaBaseModel | unknown)[];
     filters?: SocaFilter[];
     group_names?: string[];
+    projection?: string[];
 }
 
 export interface ListFileSystemsForProjectRequest {
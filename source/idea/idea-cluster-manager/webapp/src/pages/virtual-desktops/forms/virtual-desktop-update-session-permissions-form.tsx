@@ -412,6 +412,7 @@ class UpdateSessionPermissionModal extends Component<UpdateSessionPermissionModa
             const group_response = await this.getAuthClient()
                 .listUsersInGroup({
                     group_names: groups,
+                    projection: ["username"],
                 });
             group_response.listing?.forEach((user) => {
                 if (username === user.username || userSet.has(user.username!)) {
@@ -9,5 +9,5 @@
 #  OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions
 #  and limitations under the License.
 
-from .app_model import ModuleInfo
+from .app_model import ModuleInfo, CacheInfo
 from .app_api import *
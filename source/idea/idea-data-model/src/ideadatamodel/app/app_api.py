@@ -11,13 +11,17 @@
 
 __all__ = (
     'GetModuleInfoRequest',
-    'GetModuleInfoResult'
+    'GetModuleInfoResult',
+    'ListCachesRequest',
+    'ListCachesResult',
+    'FlushCacheRequest',
+    'FlushCacheResult'
 )
 
 from ideadatamodel import SocaPayload
-from ideadatamodel.app.app_model import ModuleInfo
+from ideadatamodel.app.app_model import ModuleInfo, CacheInfo
 
-from typing import Optional
+from typing import Optional, List
 
 
 class GetModuleInfoRequest(SocaPayload):
@@ -26,3 +30,20 @@ class GetModuleInfoRequest(SocaPayload):
 
 class GetModuleInfoResult(SocaPayload):
     module: Optional[ModuleInfo]
+
+
+class ListCachesRequest(SocaPayload):
+    pass
+
+
+class ListCachesResult(SocaPayload):
+    listing: Optional[List[CacheInfo]]
+
+
+class FlushCacheRequest(SocaPayload):
+    name: Optional[str]
+
+
+class FlushCacheResult(SocaPayload):
+    name: Optional[str]
+    flushed: Optional[int]
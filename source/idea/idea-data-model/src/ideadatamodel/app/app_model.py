@@ -10,7 +10,8 @@
 #  and limitations under the License.
 
 __all__ = (
-    'ModuleInfo'
+    'ModuleInfo',
+    'CacheInfo'
 )
 
 from ideadatamodel import SocaBaseModel
@@ -22,3 +23,17 @@ class ModuleInfo(SocaBaseModel):
     module_name: Optional[str]
     module_version: Optional[str]
     module_id: Optional[str]
+
+
+class CacheInfo(SocaBaseModel):
+    name: Optional[str]
+    eviction_policy: Optional[str]
+    max_size: Optional[int]
+    ttl_seconds: Optional[int]
+    size: Optional[int]
+    hits: Optional[int]
+    misses: Optional[int]
+    evictions: Optional[int]
+    hit_rate: Optional[float]
+    load_count: Optional[int]
+    load_time_ms: Optional[float]
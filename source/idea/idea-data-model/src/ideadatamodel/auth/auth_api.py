@@ -389,6 +389,8 @@ class RemoveUserFromGroupResult(SocaPayload):
 
 class ListUsersInGroupRequest(SocaListingPayload):
     group_names: Optional[List[str]]
+    # user attributes to return. all attributes are returned if not provided.
+    projection: Optional[List[str]]
 
 
 class ListUsersInGroupResult(SocaListingPayload):
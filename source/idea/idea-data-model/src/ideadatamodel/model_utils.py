@@ -14,13 +14,24 @@ from typing import Optional, Union, Any, List, Tuple, Set, Dict, TypeVar, Mappin
 import json
 import hashlib
 from decimal import Decimal
+from enum import Enum
+import orjson
 from pydantic import BaseModel
 from pydantic.generics import GenericModel
+from pydantic.json import pydantic_encoder
 
 T = TypeVar('T')
 TRUE_VALUES = ('true', 'yes', 'y', '1')
 FALSE_VALUES = ('false', 'no', 'n', '0')
 
+JSON_PRIMITIVE_TYPES = (str, int, float, bool)
+
+# models are serialized the way pydantic's .json() would: datetimes as ISO 8601 and enums by value.
+ORJSON_MODEL_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+# plain payloads keep the json.dumps(default=str) semantics, so datetimes, dataclasses and decimals go through str()
+ORJSON_PAYLOAD_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+
 
 def json_serializer(obj):
     if isinstance(obj, Decimal):
@@ -33,6 +44,45 @@ def json_serializer(obj):
         return str(obj)
 
 
+def model_json_default(obj):
+    """
+    orjson default hook for pydantic model payloads.
+    nested models are serialized with the same exclude_none and by_alias settings as the top level model.
+    """
+    if isinstance(obj, BaseModel):
+        return ModelUtils.model_to_dict(obj)
+    return pydantic_encoder(obj)
+
+
+def payload_json_default(obj):
+    """
+    orjson default hook for plain payloads. equivalent to json.dumps(default=str), except for pydantic models
+    and enums, which are serialized as objects and values instead of their str() representation.
+    """
+    if isinstance(obj, BaseModel):
+        return ModelUtils.model_to_dict(obj)
+    if isinstance(obj, Enum):
+        return obj.value
+    return str(obj)
+
+
+def _to_json_key(key: Any) -> str:
+    # same coercion json.dumps applies to non string keys
+    if isinstance(key, str):
+        return str.__str__(key)
+    if key is True:
+        return 'true'
+    if key is False:
+        return 'false'
+    if key is None:
+        return 'null'
+    if isinstance(key, int):
+        return int.__repr__(key)
+    if isinstance(key, float):
+        return float.__repr__(key)
+    return str(key)
+
+
 class ModelUtils:
 
     @staticmethod
@@ -423,23 +473,112 @@ class ModelUtils:
     def to_bytes(value: str) -> bytes:
         return value.encode(constants.DEFAULT_ENCODING)
 
+    @staticmethod
+    def model_to_dict(model: BaseModel) -> Any:
+        """
+        shallow equivalent of model.dict(exclude_none=True, by_alias=True).
+        nested models are returned as is, so orjson can hand them back to the default hook without
+        pydantic building an intermediate dict for the whole tree.
+        """
+        if model.__custom_root_type__:
+            return model.__root__
+        fields = model.__fields__
+        result = {}
+        for name, value in model.__dict__.items():
+            if value is None:
+                continue
+            field = fields.get(name)
+            result[name if field is None else field.alias] = value
+        return result
+
     @staticmethod
     def to_json(payload: Union[BaseModel, Any], indent=False) -> str:
         if isinstance(payload, BaseModel) or isinstance(payload, GenericModel):
             if indent:
                 return payload.json(exclude_none=True, by_alias=True, indent=2)
             else:
-                return payload.json(exclude_none=True, by_alias=True)
+                return ModelUtils.from_bytes(ModelUtils.to_json_bytes(payload))
         else:
             if indent:
                 return json.dumps(payload, default=str, indent=2, separators=(',', ':'))
             else:
-                return json.dumps(payload, default=str, separators=(',', ':'))
+                return ModelUtils.from_bytes(ModelUtils.to_json_bytes(payload))
+
+    @staticmethod
+    def to_json_bytes(payload: Union[BaseModel, Any]) -> bytes:
+        """
+        serialize the payload to compact json bytes using orjson.
+        the output is equivalent to to_json(), without the intermediate str for callers that write bytes to the wire.
+        """
+        try:
+            if isinstance(payload, BaseModel):
+                return orjson.dumps(ModelUtils.model_to_dict(payload), default=model_json_default, option=ORJSON_MODEL_OPTIONS)
+            else:
+                return orjson.dumps(payload, default=payload_json_default, option=ORJSON_PAYLOAD_OPTIONS)
+        except orjson.JSONEncodeError:
+            # orjson does not support integers larger than 64 bits or deeply nested (> 254 levels) payloads
+            if isinstance(payload, BaseModel):
+                return ModelUtils.to_bytes(payload.json(exclude_none=True, by_alias=True))
+            else:
+                return ModelUtils.to_bytes(json.dumps(payload, default=str, separators=(',', ':')))
+
+    @staticmethod
+    def to_jsonable(payload: Union[BaseModel, Any]) -> Any:
+        """
+        convert the payload to plain dicts, lists and primitives in a single pass, without serializing to json and parsing it back.
+        the result is equal to from_json(to_json(payload)) and shares no mutable containers with the payload.
+        """
+        if isinstance(payload, BaseModel):
+            return ModelUtils._to_jsonable(payload, model_json_default)
+        else:
+            return ModelUtils._to_jsonable(payload, payload_json_default)
+
+    @staticmethod
+    def _to_jsonable(value: Any, default) -> Any:
+        value_type = type(value)
+        if value is None or value_type in JSON_PRIMITIVE_TYPES:
+            return value
+        if isinstance(value, BaseModel):
+            if value.__custom_root_type__:
+                return ModelUtils._to_jsonable(value.__root__, model_json_default)
+            fields = value.__fields__
+            result = {}
+            for name, item in value.__dict__.items():
+                if item is None:
+                    continue
+                field = fields.get(name)
+                result[name if field is None else field.alias] = ModelUtils._to_jsonable(item, model_json_default)
+            return result
+        if isinstance(value, dict):
+            result = {}
+            for key, item in value.items():
+                result[_to_json_key(key)] = ModelUtils._to_jsonable(item, default)
+            return result
+        if isinstance(value, (list, tuple)):
+            return [ModelUtils._to_jsonable(item, default) for item in value]
+        if isinstance(value, Enum):
+            return ModelUtils._to_jsonable(value.value, default)
+        if isinstance(value, str):
+            return str.__str__(value)
+        if isinstance(value, bool):
+            return bool(value)
+        if isinstance(value, int):
+            return int(value)
+        if isinstance(value, float):
+            return float(value)
+        return ModelUtils._to_jsonable(default(value), default)
 
     @staticmethod
     def from_json(data: str) -> Union[Dict, List]:
         return json.loads(data)
 
+    @staticmethod
+    def from_json_bytes(data: Union[bytes, bytearray, memoryview, str]) -> Union[Dict, List]:
+        """
+        parse json directly from the utf-8 bytes received on the wire using orjson, without decoding to str first.
+        """
+        return orjson.loads(data)
+
     @staticmethod
     def shake_256(data: str, num_bytes: int = 5) -> str:
         return hashlib.shake_256(data.encode('utf-8')).hexdigest(num_bytes)
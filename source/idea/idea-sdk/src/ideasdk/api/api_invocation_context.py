@@ -62,6 +62,7 @@ class ApiInvocationContext(ApiInvocationContextProtocol):
         self._exception: Optional[BaseException] = None
         self._decoded_token: Optional[Dict] = None
         self._authorization: Optional[ApiAuthorization] = None
+        self._payload_traced: Optional[bool] = None
 
     @property
     def context(self) -> SocaContextProtocolType:
@@ -431,6 +432,16 @@ class ApiInvocationContext(ApiInvocationContextProtocol):
     def is_payload_tracing_enabled(self) -> bool:
         return self._context.config().get_bool('cluster.logging.audit_logs.enable_payload_tracing', default=False)
 
+    def is_payload_traced(self) -> bool:
+        """
+        if payload tracing is enabled, the request and response payloads of the invocation are logged when the
+        namespace is sampled, as per cluster.logging.audit_logs.payload_tracing_sampling.
+        the sampling decision is made once, so that the request and the response of an invocation are both logged.
+        """
+        if self._payload_traced is None:
+            self._payload_traced = self.is_payload_tracing_enabled() and self._context.logging().get_payload_sampler().is_sampled(self.namespace)
+        return self._payload_traced
+
     def get_log_tag(self) -> str:
 
         client_id = None
@@ -474,7 +485,9 @@ class ApiInvocationContext(ApiInvocationContextProtocol):
         return f'{"|".join(tags)}'
 
     def log_request(self, request: Optional[Dict] = None):
-        if self.is_payload_tracing_enabled():
+        if not self._logger.isEnabledFor(logging.INFO):
+            return
+        if self.is_payload_traced():
             if request is None:
                 request = self.request
             self._logger.info(f'(req) [{self.get_log_tag()}] {Utils.to_json(request)}')
@@ -482,17 +495,19 @@ class ApiInvocationContext(ApiInvocationContextProtocol):
             self._logger.info(f'(req) [{self.get_log_tag()}] {self.namespace}')
 
     def log_response(self, response: Optional[Dict] = None):
+        if not self._logger.isEnabledFor(logging.INFO):
+            return
         success = Utils.get_value_as_bool('success', self.response, False)
         if response is None:
             response = self.response
 
         if success:
-            if self.is_payload_tracing_enabled():
+            if self.is_payload_traced():
                 self._logger.info(f'(res) [{self.get_log_tag()}] {Utils.to_json(response)} ({self.get_total_time_ms()} ms)')
             else:
                 self._logger.info(f'(res) [{self.get_log_tag()}] {self.namespace} ({self.get_total_time_ms()} ms) [OK]')
         else:
-            if self.is_payload_tracing_enabled():
+            if self.is_payload_traced():
                 self._logger.info(f'(res) [{self.get_log_tag()}] {Utils.to_json(response)} ({self.get_total_time_ms()} ms)')
             else:
                 error_code = Utils.get_value_as_string('error_code', response)
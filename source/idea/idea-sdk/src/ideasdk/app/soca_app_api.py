@@ -13,10 +13,16 @@ from ideasdk.api import BaseAPI
 from ideasdk.protocols import SocaContextProtocol
 from ideasdk.api import ApiInvocationContext
 
+from ideadatamodel import exceptions
 from ideadatamodel.app import (
     GetModuleInfoResult,
-    ModuleInfo
+    ModuleInfo,
+    ListCachesResult,
+    FlushCacheRequest,
+    FlushCacheResult,
+    CacheInfo
 )
+from ideasdk.utils import Utils
 
 
 class SocaAppAPI(BaseAPI):
@@ -33,6 +39,46 @@ class SocaAppAPI(BaseAPI):
             )
         ))
 
+    def list_caches(self, context: ApiInvocationContext):
+        listing = []
+        for cache in self.context.cache().list_caches():
+            stats = cache.get_stats()
+            listing.append(CacheInfo(
+                name=cache.name,
+                eviction_policy=cache.eviction_policy,
+                max_size=Utils.get_value_as_int('max_size', stats),
+                ttl_seconds=Utils.get_value_as_int('ttl_seconds', stats),
+                size=Utils.get_value_as_int('size', stats),
+                hits=Utils.get_value_as_int('hits', stats),
+                misses=Utils.get_value_as_int('misses', stats),
+                evictions=Utils.get_value_as_int('evictions', stats),
+                hit_rate=Utils.get_value_as_float('hit_rate', stats),
+                load_count=Utils.get_value_as_int('load_count', stats),
+                load_time_ms=Utils.get_value_as_float('load_time_ms', stats)
+            ))
+        context.success(ListCachesResult(
+            listing=listing
+        ))
+
+    def flush_cache(self, context: ApiInvocationContext):
+        request = context.get_request_payload_as(FlushCacheRequest)
+        if Utils.is_empty(request.name):
+            raise exceptions.invalid_params('name is required')
+        flushed = self.context.cache().flush(request.name)
+        context.success(FlushCacheResult(
+            name=request.name,
+            flushed=flushed
+        ))
+
     def invoke(self, context: ApiInvocationContext):
-        if context.namespace == 'App.GetModuleInfo':
+        namespace = context.namespace
+        if namespace == 'App.GetModuleInfo':
             self.get_module_info(context)
+        elif namespace in ('App.ListCaches', 'App.FlushCache'):
+            # cache stats and flush are only available to administrators
+            if not context.is_authorized(elevated_access=True, scopes=[f'{self.context.module_id()}/write']):
+                raise exceptions.unauthorized_access()
+            if namespace == 'App.ListCaches':
+                self.list_caches(context)
+            else:
+                self.flush_cache(context)
@@ -26,10 +26,12 @@ from jwt import PyJWKClient
 import requests
 from threading import RLock
 from enum import Enum
+import time
 
 DEFAULT_JWK_CACHE_KEYS = True
 DEFAULT_JWK_MAX_CACHED_KEYS = 16
 DEFAULT_KEY_ALGORITHM = 'RS256'
+DEFAULT_ACCESS_TOKEN_REFRESH_AHEAD_SECONDS = 300
 
 
 class TokenServiceOptions(SocaBaseModel):
@@ -51,6 +53,10 @@ class TokenServiceOptions(SocaBaseModel):
 
     refresh_token: Optional[str]
 
+    # cached access tokens are renewed this many seconds before they expire (capped at half the token lifetime),
+    # so that a token is never sent to a service just as it expires
+    access_token_refresh_ahead_seconds: Optional[int]
+
     administrators_group_name: Optional[str]
     managers_group_name: Optional[str]
 
@@ -74,9 +80,11 @@ class TokenService(TokenServiceProtocol):
         )
 
         self._client_credentials_grant: Optional[AuthResult] = None
+        self._client_credentials_renew_at: Optional[float] = None
         self._client_credentials_lock = RLock()
 
         self._refresh_token_grant: Optional[AuthResult] = None
+        self._refresh_token_renew_at: Optional[float] = None
         self._refresh_token_lock = RLock()
 
         self._sso_client_id: Optional[str] = None
@@ -100,6 +108,28 @@ class TokenService(TokenServiceProtocol):
     def key_algorithm(self) -> str:
         return Utils.get_as_string(self.options.key_algorithm, DEFAULT_KEY_ALGORITHM)
 
+    @property
+    def access_token_refresh_ahead_seconds(self) -> int:
+        return Utils.get_as_int(self.options.access_token_refresh_ahead_seconds, DEFAULT_ACCESS_TOKEN_REFRESH_AHEAD_SECONDS)
+
+    def get_renew_at(self, auth_result: AuthResult) -> Optional[float]:
+        """
+        compute the monotonic time after which the cached grant must be renewed, based on expires_in of the grant.
+        returns None if the grant does not specify expires_in, in which case the token is decoded to check expiry.
+        """
+        expires_in = Utils.get_as_int(auth_result.expires_in, 0)
+        if expires_in <= 0:
+            return None
+        refresh_ahead = min(self.access_token_refresh_ahead_seconds, expires_in / 2)
+        return time.monotonic() + expires_in - refresh_ahead
+
+    def is_cached_grant_valid(self, auth_result: Optional[AuthResult], renew_at: Optional[float]) -> bool:
+        if auth_result is None or Utils.is_empty(auth_result.access_token):
+            return False
+        if renew_at is not None:
+            return time.monotonic() < renew_at
+        return not self.is_token_expired(auth_result.access_token)
+
     @property
     def client_id(self) -> str:
         return self._client_id
@@ -160,12 +190,10 @@ class TokenService(TokenServiceProtocol):
         def get_cached_grant() -> Optional[AuthResult]:
             if force_renewal:
                 return None
-            if self._client_credentials_grant is None:
+            grant = self._client_credentials_grant
+            if not self.is_cached_grant_valid(grant, self._client_credentials_renew_at):
                 return None
-            access_token_ = self._client_credentials_grant.access_token
-            if self.is_token_expired(access_token_):
-                return None
-            return self._client_credentials_grant
+            return grant
 
         access_token = get_cached_grant()
         if access_token is not None:
@@ -195,12 +223,14 @@ class TokenService(TokenServiceProtocol):
             )
             result = response.json()
 
-            self._client_credentials_grant = AuthResult(
+            grant = AuthResult(
                 access_token=Utils.get_value_as_string('access_token', result),
                 expires_in=Utils.get_value_as_int('expires_in', result),
                 token_type=Utils.get_value_as_string('token_type', result)
             )
-            return self._client_credentials_grant
+            self._client_credentials_renew_at = self.get_renew_at(grant)
+            self._client_credentials_grant = grant
+            return grant
 
     def get_access_token_using_refresh_token(self, force_renewal=True) -> AuthResult:
         """
@@ -217,12 +247,10 @@ class TokenService(TokenServiceProtocol):
         def get_cached_grant() -> Optional[AuthResult]:
             if force_renewal:
                 return None
-            if self._refresh_token_grant is None:
-                return None
-            access_token_ = self._refresh_token_grant.access_token
-            if self.is_token_expired(access_token_):
+            grant = self._refresh_token_grant
+            if not self.is_cached_grant_valid(grant, self._refresh_token_renew_at):
                 return None
-            return self._refresh_token_grant
+            return grant
 
         auth_result = get_cached_grant()
         if auth_result is not None:
@@ -249,12 +277,14 @@ class TokenService(TokenServiceProtocol):
             )
             result = response.json()
 
-            self._refresh_token_grant = AuthResult(
+            grant = AuthResult(
                 access_token=Utils.get_value_as_string('access_token', result),
                 expires_in=Utils.get_value_as_int('expires_in', result),
                 token_type=Utils.get_value_as_string('token_type', result)
             )
-            return self._refresh_token_grant
+            self._refresh_token_renew_at = self.get_renew_at(grant)
+            self._refresh_token_grant = grant
+            return grant
 
     def decode_token(self, token: str, verify_exp: Optional[bool] = True) -> Dict:
         """
@@ -329,8 +359,11 @@ class TokenService(TokenServiceProtocol):
         try:
             self.decode_token(token)
             return False
-        except jwt.ExpiredSignatureError:
-            return True
+        except exceptions.SocaException as e:
+            # decode_token() translates jwt.ExpiredSignatureError to AUTH_TOKEN_EXPIRED
+            if e.error_code == errorcodes.AUTH_TOKEN_EXPIRED:
+                return True
+            raise e
 
     def get_access_token(self, force_renewal=True) -> Optional[str]:
         auth_result = None
@@ -14,5 +14,7 @@ from ideasdk.aws.aws_client_provider import AWSClientProviderOptions, AwsClientP
 from ideasdk.aws.instance_metadata_util import InstanceMetadataUtil
 from ideasdk.aws.iam_permission_util import IamPermissionUtil
 from ideasdk.aws.ec2_instance_types_db import EC2InstanceTypesDB
+from ideasdk.aws.ec2_pricing_catalog import EC2PricingCatalog
 from ideasdk.aws.aws_util import AWSUtil
+from ideasdk.aws.budgets_snapshot_service import BudgetsSnapshotService
 from ideasdk.aws.aws_resources import AwsResources
@@ -22,11 +22,11 @@ from ideadatamodel import (
     SocaJob, SecurityGroup, Policy, AWSTag
 )
 from ideasdk.aws import EC2InstanceTypesDB
+from ideasdk.aws.ec2_pricing_catalog import EC2PricingCatalog, EC2_OFFER_FILE_URL, DEFAULT_OPERATING_SYSTEM, DEFAULT_TENANCY
 
 from typing import Dict, List, Optional, Tuple, Set, Callable, TypeVar
 import botocore.exceptions
-from threading import RLock
-from ast import literal_eval
+from threading import RLock, Thread
 import time
 
 T = TypeVar('T')
@@ -36,6 +36,8 @@ INVALID_SG_CACHE_TTL_SECS = 60
 INVALID_INSTANCE_PROFILE_CACHE_TTL_SECS = 60
 INVALID_S3_BUCKET_HAS_ACCESS_TTL_SECS = 60
 CLOUD_FORMATION_STACK_TTL_SECS = 60
+# a region that failed to ingest is retried after this backoff, instead of on every lookup
+EC2_PRICING_INGEST_RETRY_SECS = 900
 
 
 class AWSUtil(AWSUtilProtocol):
@@ -70,6 +72,10 @@ class AWSUtil(AWSUtilProtocol):
         self._ec2_instance_types_db = EC2InstanceTypesDB(context=self._context)
         self._cluster_config_lock = RLock()
         self._aws = aws
+        self._ec2_pricing_catalog: Optional[EC2PricingCatalog] = None
+        self._ec2_pricing_catalog_lock = RLock()
+        self._ec2_pricing_ingest_threads: Dict[str, Thread] = {}
+        self._ec2_pricing_failed_regions: Dict[str, float] = {}
 
     def aws(self) -> AwsClientProviderProtocol:
         if self._aws is not None:
@@ -728,126 +734,96 @@ class AWSUtil(AWSUtilProtocol):
         self._context.cache().short_term().set(key=cache_key, value=result)
         return result[instance_type]
 
-    def get_ec2_instance_type_unit_price(self, instance_type: str) -> EC2InstanceUnitPrice:
+    def get_ec2_pricing_catalog(self) -> EC2PricingCatalog:
+        if self._ec2_pricing_catalog is not None:
+            return self._ec2_pricing_catalog
+        with self._ec2_pricing_catalog_lock:
+            if self._ec2_pricing_catalog is not None:
+                return self._ec2_pricing_catalog
+            self._ec2_pricing_catalog = EC2PricingCatalog()
+            return self._ec2_pricing_catalog
 
-        cache_key = f'aws.pricing.instance-type.{instance_type}'
+    def _start_ec2_offer_file_ingest(self, catalog: EC2PricingCatalog, region: str):
+        """
+        start ingesting the EC2 offer file for the region in the background, unless it is being ingested or it failed to
+        ingest less than EC2_PRICING_INGEST_RETRY_SECS ago. the regional offer file is hundreds of MB, so it is not
+        ingested on the lookup path.
+        """
+        with self._ec2_pricing_catalog_lock:
+            if catalog.has_region(region) or region in self._ec2_pricing_ingest_threads:
+                return
+            retry_at = self._ec2_pricing_failed_regions.get(region)
+            if retry_at is not None and time.time() < retry_at:
+                return
+            self._ec2_pricing_failed_regions.pop(region, None)
+            thread = Thread(
+                name=f'ec2-pricing-ingest-{region}',
+                target=self._ingest_ec2_offer_file,
+                args=(catalog, region),
+                daemon=True
+            )
+            self._ec2_pricing_ingest_threads[region] = thread
+            thread.start()
 
-        pricing = self._context.cache().long_term().get(key=cache_key)
-        if pricing is not None:
-            return pricing
+    def _ingest_ec2_offer_file(self, catalog: EC2PricingCatalog, region: str):
+        """
+        ingest the EC2 offer file for the region. the offer file can be overridden using cluster.aws.pricing_offer_file
+        (url or local path), for environments without access to the offer file endpoint.
+        """
+        offer_file = self._context.config().get_string('cluster.aws.pricing_offer_file')
+        if Utils.is_empty(offer_file):
+            offer_file = EC2_OFFER_FILE_URL.format(region=region)
 
-        # todo - move external / autodiscovery
-        region_mapping = {
-            "af-south-1": "AFS1-",
-            "ap-east-1": "APE1-",
-            "ap-northeast-1": "APN1-",
-            "ap-northeast-2": "APN2-",
-            "ap-northeast-3": "APN3-",
-            "ap-south-1": "APS3-",
-            "ap-southeast-1": "APS1-",
-            "ap-southeast-2": "APS2-",
-            "ap-southeast-3": "APS4-",
-            "ca-central-1": "CAC1-",
-            "eu-central-1": "EUC1-",
-            "eu-north-1": "EUN1-",
-            "eu-south-1": "EUS1-",
-            "eu-west-1": "EUW1-",
-            "eu-west-2": "EUW2-",
-            "eu-west-3": "EUW3-",
-            "me-central-1": "MEC1-",
-            "me-south-1": "MES1-",
-            "sa-east-1": "SAE1-",
-            "us-east-1": "",
-            "us-east-2": "USE2-",
-            "us-gov-east-1": "UGE1-",
-            "us-gov-west-1": "UGW1-",
-            "us-west-1": "USW1-",
-            "us-west-2": "USW2-"
-        }
+        try:
+            start = time.time()
+            count = catalog.ingest(offer_file, regions={region})
+            self._logger.info(f'ingested {count} EC2 prices for {region} from {offer_file} in {round(time.time() - start, 2)} seconds')
+        except Exception as e:
+            self._logger.warning(f'failed to ingest EC2 offer file for {region} from {offer_file}: {e}')
+        finally:
+            with self._ec2_pricing_catalog_lock:
+                self._ec2_pricing_ingest_threads.pop(region, None)
+                if not catalog.has_region(region):
+                    self._ec2_pricing_failed_regions[region] = time.time() + EC2_PRICING_INGEST_RETRY_SECS
+
+    def get_ec2_instance_type_unit_price(self, instance_type: str, operating_system: str = DEFAULT_OPERATING_SYSTEM, tenancy: str = DEFAULT_TENANCY) -> EC2InstanceUnitPrice:
 
         region = self.aws().aws_region()
-        try:
-            response = self.aws().pricing().get_products(
-                ServiceCode='AmazonEC2',
-                Filters=[
-                    {
-                        'Type': 'TERM_MATCH',
-                        'Field': 'usageType',
-                        'Value': f'{region_mapping[region]}BoxUsage:{instance_type}'
-                    }
-                ]
-            )
-        except Exception as err:
-            # raise exceptions.soca_exception(
-            #   error_code=errorcodes.GETPRODUCTS_FAILURE,
-            #    message=f'GetProducts failure: {region}/{instance_type}: {err}'
-            # )
-            # todo - should this be a param to determine blocking behavior?
-            # If we fail here - newly submitted jobs would fail for something like a pricing API failure.
-            # todo - this also takes place in GovCloud as there is no pricing API endpoint _in_ GovCloud and we may not have commercial region credentials
-            self._logger.warning(f'Failure trying to determine pricing for {region}/{instance_type}: {err}')
-            pricing = EC2InstanceUnitPrice(
-                ondemand=0.0,
-                reserved=0.0
-            )
-            self._context.cache().long_term().set(key=cache_key, value=pricing)
+        catalog = self.get_ec2_pricing_catalog()
+        if not catalog.has_region(region):
+            # prices of the region are zero until its offer file is ingested
+            self._start_ec2_offer_file_ingest(catalog, region)
+
+        pricing = catalog.get_unit_price(
+            region=region,
+            instance_type=instance_type,
+            operating_system=operating_system,
+            tenancy=tenancy
+        )
+        if pricing is not None:
             return pricing
 
-        ondemand = 0.0
-        reserved = 0.0
-        for data in response['PriceList']:
-            data = literal_eval(data)
-            for k, v in data['terms'].items():
-                if k == 'OnDemand':
-                    for skus in v.keys():
-                        for ratecode in v[skus]['priceDimensions'].keys():
-                            instance_data = v[skus]['priceDimensions'][ratecode]
-                            if f'on demand linux {instance_type} instance hour' in instance_data['description'].lower():
-                                ondemand = float(instance_data['pricePerUnit']['USD'])
-                else:
-                    for skus in v.keys():
-                        if v[skus]['termAttributes']['OfferingClass'] == 'standard' and v[skus]['termAttributes']['LeaseContractLength'] == '1yr' and v[skus]['termAttributes']['PurchaseOption'] == 'No Upfront':
-                            for ratecode in v[skus]['priceDimensions'].keys():
-                                instance_data = v[skus]['priceDimensions'][ratecode]
-                                if 'Linux/UNIX (Amazon VPC)' in instance_data['description']:
-                                    reserved = float(instance_data['pricePerUnit']['USD'])
+        # the zero price of an unknown instance type, or of a region that is still being ingested, is cached so that it
+        # is reported once. the catalog is looked up first, so the prices of the region are returned once ingested.
+        cache_key = f'aws.pricing.instance-type.{region}.{instance_type}.{operating_system}.{tenancy}'
+        pricing = self._context.cache().long_term().get(key=cache_key)
+        if pricing is not None:
+            return pricing
 
+        # If we fail here - newly submitted jobs would fail for something like a pricing failure.
+        self._logger.warning(f'Failure trying to determine pricing for {region}/{instance_type}: price not found')
         pricing = EC2InstanceUnitPrice(
-            ondemand=ondemand,
-            reserved=reserved
+            ondemand=0.0,
+            reserved=0.0
         )
         self._context.cache().long_term().set(key=cache_key, value=pricing)
         return pricing
 
-    def budgets_get_budget(self, budget_name: str) -> Optional[AwsProjectBudget]:
+    @staticmethod
+    def to_project_budget(response_budget: Dict) -> AwsProjectBudget:
         """
-        given the name of the budget, find the budget limit and actual spend
-        :param budget_name:
-        :return: ProjectBudget with values. returns None if budget_name is not found.
+        convert a Budget returned by the Budgets API to AwsProjectBudget
         """
-
-        aws_account_id = self._context.config().get_string('cluster.aws.account_id')
-        cache_key = f'aws_budgets.{aws_account_id}.{budget_name}'
-        budget = self._context.cache().short_term().get(key=cache_key)
-        if budget is not None:
-            return budget
-
-        try:
-            response = self.aws().budgets().describe_budget(
-                AccountId=aws_account_id,
-                BudgetName=budget_name
-            )
-        except botocore.exceptions.ClientError as e:
-            if e.response['Error']['Code'] == 'NotFoundException':
-                raise exceptions.soca_exception(
-                    error_code=errorcodes.BUDGET_NOT_FOUND,
-                    message=f'Budget not found: {budget_name}'
-                )
-            else:
-                raise e
-
-        response_budget = Utils.get_value_as_dict('Budget', response)
-
         actual_spend_result = None
         forecasted_spend_result = None
 
@@ -869,13 +845,70 @@ class AWSUtil(AWSUtilProtocol):
             forecasted_spend_unit = Utils.get_value_as_string('Unit', forecasted_spend)
             forecasted_spend_result = SocaAmount(amount=forecasted_spend_amount, unit=forecasted_spend_unit)
 
-        budget = AwsProjectBudget(
-            budget_name=budget_name,
+        return AwsProjectBudget(
+            budget_name=Utils.get_value_as_string('BudgetName', response_budget),
             budget_limit=budget_limit_result,
             actual_spend=actual_spend_result,
             forecasted_spend=forecasted_spend_result
         )
 
+    def budgets_describe_budgets(self) -> List[AwsProjectBudget]:
+        """
+        read all budgets of the account, using the paginated DescribeBudgets API
+        """
+        aws_account_id = self._context.config().get_string('cluster.aws.account_id')
+        budgets = []
+        next_token = None
+        while True:
+            request = {
+                'AccountId': aws_account_id,
+                'MaxResults': 100
+            }
+            if next_token is not None:
+                request['NextToken'] = next_token
+            try:
+                response = self.aws().budgets().describe_budgets(**request)
+            except botocore.exceptions.ClientError as e:
+                # returned when the account does not have any budget
+                if e.response['Error']['Code'] == 'NotFoundException':
+                    break
+                raise e
+            for response_budget in Utils.get_value_as_list('Budgets', response, []):
+                budgets.append(self.to_project_budget(response_budget))
+            next_token = Utils.get_value_as_string('NextToken', response)
+            if Utils.is_empty(next_token):
+                break
+        return budgets
+
+    def budgets_get_budget(self, budget_name: str) -> Optional[AwsProjectBudget]:
+        """
+        given the name of the budget, find the budget limit and actual spend
+        :param budget_name:
+        :return: ProjectBudget with values. returns None if budget_name is not found.
+        """
+
+        aws_account_id = self._context.config().get_string('cluster.aws.account_id')
+        cache_key = f'aws_budgets.{aws_account_id}.{budget_name}'
+        budget = self._context.cache().short_term().get(key=cache_key)
+        if budget is not None:
+            return budget
+
+        try:
+            response = self.aws().budgets().describe_budget(
+                AccountId=aws_account_id,
+                BudgetName=budget_name
+            )
+        except botocore.exceptions.ClientError as e:
+            if e.response['Error']['Code'] == 'NotFoundException':
+                raise exceptions.soca_exception(
+                    error_code=errorcodes.BUDGET_NOT_FOUND,
+                    message=f'Budget not found: {budget_name}'
+                )
+            else:
+                raise e
+
+        budget = self.to_project_budget(Utils.get_value_as_dict('Budget', response))
+
         self._context.cache().short_term().set(key=cache_key, value=budget)
 
         return budget
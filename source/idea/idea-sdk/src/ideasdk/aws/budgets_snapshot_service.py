@@ -0,0 +1,160 @@
+#  Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance
+#  with the License. A copy of the License is located at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  or in the 'license' file accompanying this file. This file is distributed on an 'AS IS' BASIS, WITHOUT WARRANTIES
+#  OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions
+#  and limitations under the License.
+
+from ideadatamodel import AwsProjectBudget
+from ideasdk.protocols import SocaContextProtocol, AWSUtilProtocol
+from ideasdk.service import SocaService
+from ideasdk.utils import Utils
+
+from typing import Dict, Optional
+from threading import Thread, Event, Lock, RLock
+import time
+
+DEFAULT_REFRESH_INTERVAL_SECONDS = 300
+DEFAULT_MAX_STALENESS_SECONDS = 900
+DEFAULT_SOFT_THRESHOLD_PERCENT = 100.0
+
+
+class BudgetsSnapshotService(SocaService):
+    """
+    in-memory snapshot of all budgets of the account, shared by the project budget checks.
+
+    all budgets are read in one paginated DescribeBudgets sweep every refresh_interval_seconds, so that reading a project
+    budget does not call the Budgets API. concurrent readers of a missing or stale snapshot wait for a single sweep instead of
+    issuing one call each.
+
+    budgets missing from the snapshot (e.g. created after the last sweep) are read using AWSUtil.budgets_get_budget.
+    """
+
+    def __init__(self, context: SocaContextProtocol, aws_util: Optional[AWSUtilProtocol] = None):
+        super().__init__(context)
+        self.context = context
+        self._logger = context.logger('budgets-snapshot')
+        self._aws_util = aws_util
+
+        self._budgets: Dict[str, AwsProjectBudget] = {}
+        self._lock = RLock()
+        self._refresh_lock = Lock()
+        self._refreshed_at: Optional[float] = None
+        self._attempted_at: Optional[float] = None
+        self._attempts = 0
+
+        self._is_running = False
+        self._service_thread: Optional[Thread] = None
+        self._exit = Event()
+
+        self.refresh_interval_seconds = context.config().get_int('cluster.budgets.refresh_interval_seconds', default=DEFAULT_REFRESH_INTERVAL_SECONDS)
+        self.max_staleness_seconds = context.config().get_int('cluster.budgets.max_staleness_seconds', default=DEFAULT_MAX_STALENESS_SECONDS)
+        self.soft_threshold_percent = context.config().get_float('cluster.budgets.soft_threshold_percent', default=DEFAULT_SOFT_THRESHOLD_PERCENT)
+
+    @property
+    def aws_util(self) -> AWSUtilProtocol:
+        if self._aws_util is None:
+            return self.context.aws_util()
+        return self._aws_util
+
+    def refresh(self, force: bool = True):
+        """
+        replace the snapshot with the budgets read in one DescribeBudgets sweep.
+        callers waiting for a sweep in progress use the result of that sweep, whether it succeeded or not.
+        :param force: if False, the sweep is skipped if the last attempt was less than refresh_interval_seconds ago, so that
+        a failing sweep is not retried on every read
+        """
+        attempts = self._attempts
+        with self._refresh_lock:
+            if self._attempts != attempts:
+                return
+            if not force and self._attempted_at is not None and time.time() - self._attempted_at < self.refresh_interval_seconds:
+                return
+            self._attempts += 1
+            self._attempted_at = time.time()
+            budgets = {}
+            for budget in self.aws_util.budgets_describe_budgets():
+                budgets[budget.budget_name] = budget
+            with self._lock:
+                self._budgets = budgets
+                self._refreshed_at = time.time()
+        self._logger.debug(f'refreshed {len(budgets)} budgets')
+
+    def get_staleness_seconds(self) -> Optional[float]:
+        """
+        :return: seconds since the last successful sweep, or None if the snapshot was never loaded
+        """
+        refreshed_at = self._refreshed_at
+        if refreshed_at is None:
+            return None
+        return max(0.0, time.time() - refreshed_at)
+
+    def is_stale(self) -> bool:
+        staleness = self.get_staleness_seconds()
+        return staleness is None or staleness > self.max_staleness_seconds
+
+    def _refresh_if_stale(self):
+        if not self.is_stale():
+            return
+        try:
+            self.refresh(force=False)
+        except Exception as e:
+            self._logger.warning(f'failed to refresh budgets snapshot: {e}')
+
+    def get_budget(self, budget_name: str) -> Optional[AwsProjectBudget]:
+        """
+        get the budget from the snapshot, or from the Budgets API if the budget is not in the snapshot
+        :raises BUDGET_NOT_FOUND if the budget does not exist
+        """
+        if Utils.is_empty(budget_name):
+            return None
+        self._refresh_if_stale()
+        with self._lock:
+            budget = self._budgets.get(budget_name)
+        if budget is not None:
+            return budget
+        return self.aws_util.budgets_get_budget(budget_name=budget_name)
+
+    def is_over_soft_threshold(self, budget: AwsProjectBudget, threshold_percent: Optional[float] = None) -> bool:
+        """
+        check if the actual spend of the budget exceeds threshold_percent of the budget limit.
+        the check does not call the Budgets API.
+        """
+        if threshold_percent is None:
+            threshold_percent = self.soft_threshold_percent
+        if budget is None or budget.budget_limit is None or budget.actual_spend is None:
+            return False
+        return budget.actual_spend.amount > budget.budget_limit.amount * threshold_percent / 100.0
+
+    def _refresh_loop(self):
+        while not self._exit.wait(self.refresh_interval_seconds):
+            try:
+                self.refresh()
+            except Exception as e:
+                self._logger.exception(f'failed to refresh budgets snapshot: {e}')
+
+    def start(self):
+        if self._is_running:
+            return
+        try:
+            self.refresh()
+        except Exception as e:
+            # budgets are read using AWSUtil until the next sweep succeeds
+            self._logger.exception(f'failed to load budgets snapshot: {e}')
+        self._service_thread = Thread(
+            name='budgets-snapshot-thread',
+            target=self._refresh_loop
+        )
+        self._service_thread.start()
+        self._is_running = True
+
+    def stop(self):
+        self._logger.info('stopping budgets-snapshot ...')
+        self._exit.set()
+        self._is_running = False
+        if self._service_thread is not None:
+            self._service_thread.join()
@@ -0,0 +1,258 @@
+#  Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance
+#  with the License. A copy of the License is located at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  or in the 'license' file accompanying this file. This file is distributed on an 'AS IS' BASIS, WITHOUT WARRANTIES
+#  OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions
+#  and limitations under the License.
+
+from ideadatamodel import exceptions, errorcodes, EC2InstanceUnitPrice
+from ideasdk.utils import Utils
+
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from threading import RLock
+import csv
+
+import requests
+
+EC2_OFFER_FILE_URL = 'https://pricing.us-east-1.amazonaws.com/offers/v1.0/aws/AmazonEC2/current/{region}/index.csv'
+
+DEFAULT_OPERATING_SYSTEM = 'Linux'
+DEFAULT_TENANCY = 'Shared'
+
+COMPUTE_INSTANCE_PRODUCT_FAMILIES = {'Compute Instance', 'Compute Instance (bare metal)'}
+RESERVED_LEASE_CONTRACT_LENGTH = '1yr'
+RESERVED_OFFERING_CLASS = 'standard'
+RESERVED_PURCHASE_OPTION = 'No Upfront'
+
+# index of the on-demand and reserved prices in the catalog entries
+ONDEMAND = 0
+RESERVED = 1
+
+PricingKey = Tuple[str, str, str, str]
+
+
+class EC2PricingCatalog:
+    """
+    EC2 instance prices indexed by (region, instance type, operating system, tenancy).
+
+    the catalog is built from the EC2 bulk offer files (https://docs.aws.amazon.com/awsaccountbilling/latest/aboutv2/using-ppslong.html),
+    which are read once instead of calling the Pricing API for every instance type. the csv offer file is streamed, so that
+    only the prices of compute instances are held in memory. a local copy of the offer file (csv or json) can be ingested
+    for regions without access to the offer file endpoint.
+
+    prices are the hourly on-demand price and the hourly price of the 1 year, standard, no upfront reserved instance in USD,
+    for instances without pre-installed software.
+    """
+
+    def __init__(self):
+        self._prices: Dict[PricingKey, List[float]] = {}
+        self._regions: Set[str] = set()
+        self._lock = RLock()
+
+    # Begin: Private Methods
+
+    @staticmethod
+    def _is_compute_instance(product_family: Optional[str], pre_installed_sw: Optional[str], capacity_status: Optional[str], license_model: Optional[str]) -> bool:
+        if product_family not in COMPUTE_INSTANCE_PRODUCT_FAMILIES:
+            return False
+        if pre_installed_sw not in (None, '', 'NA'):
+            return False
+        if capacity_status not in (None, '', 'Used'):
+            return False
+        if license_model == 'Bring your own license':
+            return False
+        return True
+
+    @staticmethod
+    def _is_reserved_term(lease_contract_length: Optional[str], offering_class: Optional[str], purchase_option: Optional[str]) -> bool:
+        return lease_contract_length == RESERVED_LEASE_CONTRACT_LENGTH and offering_class == RESERVED_OFFERING_CLASS and purchase_option == RESERVED_PURCHASE_OPTION
+
+    def _set_price(self, prices: Dict[PricingKey, List[float]], key: PricingKey, index: int, price: float):
+        entry = prices.get(key)
+        if entry is None:
+            entry = [0.0, 0.0]
+            prices[key] = entry
+        entry[index] = price
+
+    def _merge(self, prices: Dict[PricingKey, List[float]], regions: Set[str]):
+        with self._lock:
+            self._prices.update(prices)
+            self._regions.update(regions)
+
+    # Begin: Public Methods
+
+    def get_regions(self) -> Set[str]:
+        with self._lock:
+            return set(self._regions)
+
+    def has_region(self, region: str) -> bool:
+        with self._lock:
+            return region in self._regions
+
+    def size(self) -> int:
+        with self._lock:
+            return len(self._prices)
+
+    def get_unit_price(self, region: str, instance_type: str, operating_system: str = DEFAULT_OPERATING_SYSTEM, tenancy: str = DEFAULT_TENANCY) -> Optional[EC2InstanceUnitPrice]:
+        """
+        :return: the hourly unit price of the instance type, or None if the instance type is not in the catalog
+        """
+        entry = self._prices.get((region, instance_type, operating_system, tenancy))
+        if entry is None:
+            return None
+        return EC2InstanceUnitPrice(
+            ondemand=entry[ONDEMAND],
+            reserved=entry[RESERVED]
+        )
+
+    def ingest_csv(self, lines: Iterable[str], regions: Optional[Set[str]] = None) -> int:
+        """
+        ingest a csv offer file, streamed line by line
+        :param lines: lines of the offer file, including the metadata lines before the header
+        :param regions: if provided, only the prices of these regions are ingested
+        :return: number of prices ingested
+        """
+        lines = iter(lines)
+        header = None
+        for row in csv.reader(lines):
+            # the offer file starts with metadata lines (FormatVersion, Disclaimer, Publication Date ...)
+            if len(row) > 0 and row[0] == 'SKU':
+                header = row
+                break
+        if header is None:
+            raise exceptions.soca_exception(
+                error_code=errorcodes.INVALID_PARAMS,
+                message='invalid EC2 offer file: header not found'
+            )
+
+        columns = {name: index for index, name in enumerate(header)}
+
+        def column(name: str) -> int:
+            if name not in columns:
+                raise exceptions.soca_exception(
+                    error_code=errorcodes.INVALID_PARAMS,
+                    message=f'invalid EC2 offer file: column not found: {name}'
+                )
+            return columns[name]
+
+        term_type_index = column('TermType')
+        unit_index = column('Unit')
+        price_index = column('PricePerUnit')
+        currency_index = column('Currency')
+        lease_contract_length_index = column('LeaseContractLength')
+        purchase_option_index = column('PurchaseOption')
+        offering_class_index = column('OfferingClass')
+        product_family_index = column('Product Family')
+        instance_type_index = column('Instance Type')
+        tenancy_index = column('Tenancy')
+        operating_system_index = column('Operating System')
+        license_model_index = column('License Model')
+        pre_installed_sw_index = column('Pre Installed S/W')
+        capacity_status_index = column('CapacityStatus')
+        region_index = column('Region Code')
+
+        prices: Dict[PricingKey, List[float]] = {}
+        ingested_regions = set()
+        for row in csv.reader(lines):
+            if len(row) < len(header):
+                continue
+            region = row[region_index]
+            if regions is not None and region not in regions:
+                continue
+            if row[unit_index] != 'Hrs' or row[currency_index] != 'USD':
+                continue
+            if not self._is_compute_instance(row[product_family_index], row[pre_installed_sw_index], row[capacity_status_index], row[license_model_index]):
+                continue
+
+            term_type = row[term_type_index]
+            if term_type == 'OnDemand':
+                index = ONDEMAND
+            elif term_type == 'Reserved' and self._is_reserved_term(row[lease_contract_length_index], row[offering_class_index], row[purchase_option_index]):
+                index = RESERVED
+            else:
+                continue
+
+            key = (region, row[instance_type_index], row[operating_system_index], row[tenancy_index])
+            self._set_price(prices, key, index, float(row[price_index]))
+            ingested_regions.add(region)
+
+        self._merge(prices, ingested_regions)
+        return len(prices)
+
+    def ingest_offer(self, offer: Dict, regions: Optional[Set[str]] = None) -> int:
+        """
+        ingest a json offer file
+        :param offer: the parsed offer file
+        :param regions: if provided, only the prices of these regions are ingested
+        :return: number of prices ingested
+        """
+        keys: Dict[str, PricingKey] = {}
+        for sku, product in Utils.get_value_as_dict('products', offer, {}).items():
+            attributes = Utils.get_value_as_dict('attributes', product, {})
+            region = Utils.get_value_as_string('regionCode', attributes)
+            if regions is not None and region not in regions:
+                continue
+            if not self._is_compute_instance(
+                Utils.get_value_as_string('productFamily', product),
+                Utils.get_value_as_string('preInstalledSw', attributes),
+                Utils.get_value_as_string('capacitystatus', attributes),
+                Utils.get_value_as_string('licenseModel', attributes)
+            ):
+                continue
+            keys[sku] = (
+                region,
+                Utils.get_value_as_string('instanceType', attributes),
+                Utils.get_value_as_string('operatingSystem', attributes),
+                Utils.get_value_as_string('tenancy', attributes)
+            )
+
+        prices: Dict[PricingKey, List[float]] = {}
+        terms = Utils.get_value_as_dict('terms', offer, {})
+        for term_type, index in (('OnDemand', ONDEMAND), ('Reserved', RESERVED)):
+            for sku, offer_terms in Utils.get_value_as_dict(term_type, terms, {}).items():
+                key = keys.get(sku)
+                if key is None:
+                    continue
+                for offer_term in offer_terms.values():
+                    if index == RESERVED:
+                        term_attributes = Utils.get_value_as_dict('termAttributes', offer_term, {})
+                        if not self._is_reserved_term(
+                            Utils.get_value_as_string('LeaseContractLength', term_attributes),
+                            Utils.get_value_as_string('OfferingClass', term_attributes),
+                            Utils.get_value_as_string('PurchaseOption', term_attributes)
+                        ):
+                            continue
+                    for price_dimension in Utils.get_value_as_dict('priceDimensions', offer_term, {}).values():
+                        if Utils.get_value_as_string('unit', price_dimension) != 'Hrs':
+                            continue
+                        usd = Utils.get_value_as_dict('pricePerUnit', price_dimension, {}).get('USD')
+                        if usd is None:
+                            continue
+                        self._set_price(prices, key, index, float(usd))
+
+        self._merge(prices, {key[0] for key in prices.keys()})
+        return len(prices)
+
+    def ingest(self, source: str, regions: Optional[Set[str]] = None, timeout: int = 300) -> int:
+        """
+        ingest an offer file from a url or a local path. csv offer files are streamed, json offer files are read at once.
+        :return: number of prices ingested
+        """
+        is_json = source.lower().endswith('.json')
+        if source.startswith('https://') or source.startswith('http://'):
+            with requests.get(source, stream=True, timeout=timeout) as response:
+                response.raise_for_status()
+                if is_json:
+                    return self.ingest_offer(Utils.from_json_bytes(response.content), regions=regions)
+                response.encoding = 'utf-8'
+                return self.ingest_csv(response.iter_lines(decode_unicode=True), regions=regions)
+
+        if is_json:
+            with open(source, 'rb') as f:
+                return self.ingest_offer(Utils.from_json_bytes(f.read()), regions=regions)
+        with open(source, 'r', encoding='utf-8', newline='') as f:
+            return self.ingest_csv(f, regions=regions)
@@ -15,12 +15,15 @@ from ideasdk.context import BootstrapContext
 from ideasdk.utils import Utils, Jinja2Utils
 from ideadatamodel import BaseOS, exceptions
 
-from typing import List
+from typing import List, Optional
 import os
 import tempfile
 
 _BOOTSTRAP_BUILDER_LOCK = RLock()
 
+# session expressions on the context vars, excluded from the render key of the bootstrap context
+SESSION_VARS_PREFIX = 'context.vars.'
+
 
 class BootstrapPackageBuilder:
     """
@@ -36,7 +39,8 @@ class BootstrapPackageBuilder:
                  tmp_dir: str = None,
                  force_build: bool = False,
                  build_only_install_scripts: bool = False, 
-                 logger=None):
+                 logger=None,
+                 session_expressions: Optional[List[str]] = None):
         """
         :param bootstrap_context: template rendering context.
 
@@ -54,6 +58,11 @@ class BootstrapPackageBuilder:
         :param build_only_install_scripts: if build_only_install_scripts is True, then configure scripts will be excluded from bootstrap package.
         if build_only_install_scripts is False, then install and configure scripts will be included. this allows simplification of bootstrap package
         with only installation of dependencies scripts.
+
+        :param session_expressions: optional template expressions that differ for each package, eg. context.vars.idea_session_id.
+        if provided, the templates are rendered once per bootstrap context values, with the session expressions rendered
+        for each package. the session expressions must only be used as output in the templates, and non-deterministic
+        expressions such as generated passwords must be session expressions.
         """
 
         if Utils.is_empty(components):
@@ -71,6 +80,7 @@ class BootstrapPackageBuilder:
         self.logger = logger
         self.tmp_dir = tmp_dir
         self.build_only_install_scripts = build_only_install_scripts
+        self.session_expressions = session_expressions
 
     def log(self, message: str):
         if self.logger is not None:
@@ -100,7 +110,11 @@ class BootstrapPackageBuilder:
                     shutil.make_archive(target_dir, 'gztar', target_dir)
                     return target_archive
 
-            env = Jinja2Utils.env_using_file_system_loader(self.source_directory)
+            registry = Jinja2Utils.template_registry()
+            render_key = None
+            if Utils.is_not_empty(self.session_expressions):
+                session_vars = [expression[len(SESSION_VARS_PREFIX):] for expression in self.session_expressions if expression.startswith(SESSION_VARS_PREFIX)]
+                render_key = self.bootstrap_context.get_render_key(session_vars=session_vars)
 
             components = os.listdir(self.source_directory)
             for component in components:
@@ -119,8 +133,17 @@ class BootstrapPackageBuilder:
                     if self.build_only_install_scripts and file.lower().startswith('configure'):
                         continue
                     if file.endswith('.jinja2'):
-                        template = env.get_template(f'{component}/{file}')
-                        content = template.render(context=self.bootstrap_context)
+                        template_name = f'{component}/{file}'
+                        if render_key is not None:
+                            content = registry.render_fragments(
+                                search_path=self.source_directory,
+                                template_name=template_name,
+                                session_expressions=self.session_expressions,
+                                static_key=render_key,
+                                context=self.bootstrap_context
+                            )
+                        else:
+                            content = registry.render(self.source_directory, template_name, context=self.bootstrap_context)
                         target_file = os.path.join(target_component_dir, file.replace('.jinja2', ''))
                         self.log(f'rendered template: {target_file}')
                         with open(target_file, 'w') as f:
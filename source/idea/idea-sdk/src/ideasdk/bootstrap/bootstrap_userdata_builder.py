@@ -33,7 +33,7 @@ class BootstrapUserDataBuilder:
         self.proxy_config = proxy_config
         self.substitution_support = substitution_support
 
-        self.jinja_env = Jinja2Utils.env_using_file_system_loader(bootstrap_source_dir_path)
+        self.jinja_env = Jinja2Utils.template_registry().get_environment(bootstrap_source_dir_path)
 
     def build(self):
         if self.base_os.lower() == 'windows':
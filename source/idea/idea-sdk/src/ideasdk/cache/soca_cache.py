@@ -15,15 +15,29 @@ from ideasdk.protocols import \
     SocaCacheProtocol, \
     CacheProviderProtocol, \
     CacheTTL
+from ideasdk.metrics.base_metrics import BaseMetrics
+from ideadatamodel import exceptions
 
 import typing as t
-from cacheout import CacheManager, LRUCache
+from cacheout import CacheManager, Cache, LRUCache, LFUCache, FIFOCache
+from threading import RLock
 import sys
+import time
 import logging
 
 CACHE_LONG_TERM = 'long_term'
 CACHE_SHORT_TERM = 'short_term'
 
+DEFAULT_CACHE_MAX_SIZE = 1000
+DEFAULT_CACHE_TTL_SECONDS = 600
+DEFAULT_CACHE_EVICTION_POLICY = 'lru'
+
+CACHE_EVICTION_POLICIES = {
+    'lru': LRUCache,
+    'lfu': LFUCache,
+    'fifo': FIFOCache
+}
+
 
 class SocaCache(SocaCacheProtocol):
     """
@@ -40,20 +54,30 @@ class SocaCache(SocaCacheProtocol):
     """
 
     def __init__(self, context: SocaContextProtocol, logger: logging.Logger, name,
-                 cache: LRUCache = None):
+                 cache: Cache = None, eviction_policy: str = DEFAULT_CACHE_EVICTION_POLICY):
         self._name = name
         self._context = context
         self._logger = logger
         self._cache = cache
+        self._eviction_policy = eviction_policy
+
+        self._stats_lock = RLock()
+        self._load_count = 0
+        self._load_time_ms = 0.0
+        self._published_stats: t.Dict[str, float] = {}
 
     @property
-    def cache_backend(self) -> t.Optional[LRUCache]:
+    def cache_backend(self) -> t.Optional[Cache]:
         return self._cache
 
     @property
     def name(self) -> str:
         return self._name
 
+    @property
+    def eviction_policy(self) -> str:
+        return self._eviction_policy
+
     @property
     def size_in_bytes(self) -> int:
         if not self._cache:
@@ -66,6 +90,18 @@ class SocaCache(SocaCacheProtocol):
             return 0
         return self._cache.size()
 
+    @property
+    def max_size(self) -> int:
+        if self._cache is None:
+            return 0
+        return self._cache.maxsize
+
+    @property
+    def ttl_seconds(self) -> int:
+        if self._cache is None:
+            return 0
+        return self._cache.ttl
+
     def get(self, key: t.Hashable, default: t.Any = None) -> t.Any:
         if self._cache is None:
             return None
@@ -75,6 +111,26 @@ class SocaCache(SocaCacheProtocol):
                 self._logger.debug(f'({self._name}) miss -> {key}')
         return value
 
+    def get_or_load(self, key: t.Hashable, loader: t.Callable[[], t.Any], ttl: t.Optional[CacheTTL] = None) -> t.Any:
+        """
+        return the cached value for key, or call loader and cache the result on a miss.
+        the time spent in loader is recorded in the cache stats. None values are not cached.
+        """
+        value = self.get(key)
+        if value is not None:
+            return value
+        start = time.perf_counter()
+        value = loader()
+        self.record_load_time((time.perf_counter() - start) * 1000)
+        if value is not None:
+            self.set(key, value, ttl)
+        return value
+
+    def record_load_time(self, load_time_ms: float):
+        with self._stats_lock:
+            self._load_count += 1
+            self._load_time_ms += load_time_ms
+
     def set(self, key: t.Hashable, value: t.Any, ttl: t.Optional[CacheTTL] = None) -> None:
         if self._cache is None:
             return None
@@ -89,10 +145,57 @@ class SocaCache(SocaCacheProtocol):
             self._logger.debug(f'({self._name}) delete -> {key}')
         return self._cache.delete(key)
 
+    def flush(self) -> int:
+        """
+        remove all entries from the cache
+        :return: the number of entries removed
+        """
+        if self._cache is None:
+            return 0
+        size = self._cache.size()
+        self._cache.clear()
+        self._logger.info(f'({self._name}) flushed {size} entries')
+        return size
+
+    def get_stats(self) -> t.Dict[str, t.Any]:
+        if self._cache is None:
+            return {}
+        info = self._cache.stats.info()
+        with self._stats_lock:
+            load_count = self._load_count
+            load_time_ms = self._load_time_ms
+        return {
+            'hits': info.hit_count,
+            'misses': info.miss_count,
+            'evictions': info.eviction_count,
+            'hit_rate': info.hit_rate,
+            'size': self._cache.size(),
+            'max_size': self._cache.maxsize,
+            'ttl_seconds': self._cache.ttl,
+            'load_count': load_count,
+            'load_time_ms': load_time_ms
+        }
+
     def publish_metrics(self):
         if self._cache is None:
             return
 
+        stats = self.get_stats()
+        previous = self._published_stats
+        self._published_stats = stats
+
+        def delta(key: str) -> float:
+            return stats[key] - previous.get(key, 0)
+
+        metrics = BaseMetrics(context=self._context).with_required_dimension(name='cache', value=self._name)
+        metrics.count(MetricName='cache_hits', Value=delta('hits'))
+        metrics.count(MetricName='cache_misses', Value=delta('misses'))
+        metrics.count(MetricName='cache_evictions', Value=delta('evictions'))
+        metrics.gauge(MetricName='cache_size', Value=stats['size'])
+        load_count = delta('load_count')
+        if load_count > 0:
+            metrics.milliseconds(MetricName='cache_load_time', Value=delta('load_time_ms') / load_count)
+
 
 class CacheProvider(CacheProviderProtocol):
     def __init__(self, context: SocaContextProtocol, module_id: str):
@@ -101,6 +204,8 @@ class CacheProvider(CacheProviderProtocol):
         self.module_id = module_id
         self._cache_manager: t.Optional[CacheManager] = None
         self._soca_cache_clients: t.Dict[str, SocaCache] = {}
+        self._named_cache_defaults: t.Dict[str, t.Dict[str, t.Any]] = {}
+        self._lock = RLock()
         self._initialize()
 
     def _config(self) -> SocaConfig:
@@ -110,22 +215,44 @@ class CacheProvider(CacheProviderProtocol):
         cache = self._get_cache(key=key)
         return cache is not None
 
-    def _get_cache(self, key) -> t.Optional[LRUCache]:
+    def _get_cache(self, key) -> t.Optional[Cache]:
         if self._cache_manager is None:
             return None
         if key not in self._cache_manager:
             return None
         return self._cache_manager[key]
 
-    def _init_client(self, key):
+    def _init_client(self, key, eviction_policy: str = DEFAULT_CACHE_EVICTION_POLICY):
         cache = self._cache_manager[key]
         self._soca_cache_clients[key] = SocaCache(
             context=self._context,
             logger=self._logger,
             name=key,
-            cache=cache
+            cache=cache,
+            eviction_policy=eviction_policy
         )
 
+    def _build_or_configure(self, key: str, max_size: int = DEFAULT_CACHE_MAX_SIZE, ttl_seconds: int = DEFAULT_CACHE_TTL_SECONDS, eviction_policy: str = DEFAULT_CACHE_EVICTION_POLICY):
+        """
+        create the cache if it does not exist, or reconfigure the cache ttl and max size parameters if changed at runtime.
+        settings in <module_id>.cache.<key>.* take precedence over the defaults provided by the caller.
+        the eviction policy cannot be changed for an existing cache.
+        """
+        cache_settings_prefix = f'{self.module_id}.cache.{key}'
+        config = self._context.config()
+        maxsize = config.get_int(f'{cache_settings_prefix}.max_size', default=max_size)
+        ttl = config.get_int(f'{cache_settings_prefix}.ttl_seconds', default=ttl_seconds)
+        eviction_policy = config.get_string(f'{cache_settings_prefix}.eviction_policy', default=eviction_policy)
+        if eviction_policy not in CACHE_EVICTION_POLICIES:
+            raise exceptions.invalid_params(f'{cache_settings_prefix}.eviction_policy must be one of: {list(CACHE_EVICTION_POLICIES.keys())}')
+
+        cache = self._get_cache(key=key)
+        if cache is None:
+            self._cache_manager.configure(key, cache_class=CACHE_EVICTION_POLICIES[eviction_policy], maxsize=maxsize, ttl=ttl, enable_stats=True)
+            self._init_client(key, eviction_policy=eviction_policy)
+        else:
+            cache.configure(maxsize=maxsize, ttl=ttl)
+
     def _initialize(self):
         """
         this method initializes the cache manager and builds the _soca_cache_clients dict
@@ -134,36 +261,16 @@ class CacheProvider(CacheProviderProtocol):
             * during hot reload
 
         special handling is required for supporting hot reload and hence the complexity
-        we do not supporting adding new caches at runtime. new caches need new configuration entries,
-            and updates to soca-sdk
+        named caches registered by modules via register_cache() are reconfigured on hot reload.
         """
+        with self._lock:
+            if self._cache_manager is None:
+                self._cache_manager = CacheManager(cache_class=LRUCache)
 
-        settings = {}
-
-        def build_or_configure(key: str, cache_settings_prefix: str):
-            cache = self._get_cache(key=key)
-            maxsize = self._context.config().get_int(f'{cache_settings_prefix}.max_size', default=1000)
-            ttl = self._context.config().get_int(f'{cache_settings_prefix}.ttl_seconds', default=600)
-            if cache is None:
-                # initialize settings for brand new cache
-                settings[key] = {
-                    'maxsize': maxsize,
-                    'ttl': ttl
-                }
-            else:
-                # reconfigure the cache ttl and max size parameters if changed at runtime
-                cache.configure(maxsize=maxsize, ttl=ttl)
-
-        build_or_configure(key=CACHE_LONG_TERM, cache_settings_prefix=f'{self.module_id}.cache.long_term')
-        build_or_configure(key=CACHE_SHORT_TERM, cache_settings_prefix=f'{self.module_id}.cache.short_term')
-
-        if self._cache_manager is None and len(settings.keys()) > 0:
-            self._cache_manager = CacheManager(
-                settings=settings,
-                cache_class=LRUCache
-            )
-            self._init_client(CACHE_LONG_TERM)
-            self._init_client(CACHE_SHORT_TERM)
+            self._build_or_configure(key=CACHE_LONG_TERM)
+            self._build_or_configure(key=CACHE_SHORT_TERM)
+            for name, defaults in self._named_cache_defaults.items():
+                self._build_or_configure(key=name, **defaults)
 
     def long_term(self) -> SocaCache:
         """
@@ -176,12 +283,45 @@ class CacheProvider(CacheProviderProtocol):
     def short_term(self) -> SocaCache:
         return self._soca_cache_clients[CACHE_SHORT_TERM]
 
+    def register_cache(self, name: str, max_size: int = DEFAULT_CACHE_MAX_SIZE, ttl_seconds: int = DEFAULT_CACHE_TTL_SECONDS, eviction_policy: str = DEFAULT_CACHE_EVICTION_POLICY) -> SocaCache:
+        """
+        register a named cache owned by a module component. eg. auth.roles, accounts.users, vdc.instance_types
+        the arguments are defaults, and can be overridden using <module_id>.cache.<name>.max_size, ttl_seconds and eviction_policy
+        registering an existing name returns the existing cache.
+        """
+        if name in (CACHE_LONG_TERM, CACHE_SHORT_TERM):
+            raise exceptions.invalid_params(f'cache name: {name} is reserved')
+        with self._lock:
+            cache = self._soca_cache_clients.get(name)
+            if cache is not None:
+                return cache
+            defaults = {
+                'max_size': max_size,
+                'ttl_seconds': ttl_seconds,
+                'eviction_policy': eviction_policy
+            }
+            self._build_or_configure(key=name, **defaults)
+            self._named_cache_defaults[name] = defaults
+            return self._soca_cache_clients[name]
+
+    def get_cache(self, name: str) -> t.Optional[SocaCache]:
+        return self._soca_cache_clients.get(name)
+
+    def list_caches(self) -> t.List[SocaCache]:
+        return [self._soca_cache_clients[name] for name in sorted(self._soca_cache_clients.keys())]
+
+    def flush(self, name: str) -> int:
+        cache = self.get_cache(name)
+        if cache is None:
+            raise exceptions.invalid_params(f'cache not found: {name}')
+        return cache.flush()
+
     @property
     def accumulator_id(self):
         return 'cache-metrics'
 
     def publish_metrics(self):
-        for cache in self._soca_cache_clients.values():
+        for cache in list(self._soca_cache_clients.values()):
             cache.publish_metrics()
 
     def _clear_all(self):
@@ -50,7 +50,7 @@ class AccountsClient:
     def get_access_token(self) -> Optional[str]:
         if self.token_service is None:
             return None
-        return self.token_service.get_access_token()
+        return self.token_service.get_access_token(force_renewal=False)
 
     def list_users_in_group(self, request: ListUsersInGroupRequest) -> ListUsersInGroupResult:
         return self.client.invoke_alt(
@@ -65,7 +65,8 @@ class AccountsClient:
             namespace='Accounts.GetUser',
             payload=request,
             result_as=GetUserResult,
-            access_token=self.get_access_token()
+            access_token=self.get_access_token(),
+            coalesce=True
         )
 
     def get_user_by_email(self, request: GetUserByEmailRequest) -> GetUserByEmailResult:
@@ -23,7 +23,7 @@ class EvdiClient:
         self.context = context
         self._logger = context.logger('evdi-client')
 
-    def publish_user_disabled_event(self, username: str):
+    def _publish_event(self, namespace: str, payload: dict):
         controller_sqs_queue_url = self.context.config().get_string('virtual-desktop-controller.controller_sqs_queue_url', default=None)
         if Utils.is_empty(controller_sqs_queue_url):
             # if the queue is empty then either vdc is not yet deployed or it is not enabled
@@ -32,14 +32,44 @@ class EvdiClient:
 
         message = SocaEnvelope(
             header=SocaHeader(
-                namespace='Accounts.UserDisabledEvent',
+                namespace=namespace,
                 request_id=Utils.uuid()
             ),
-            payload={
-                'username': username
-            }
+            payload=payload
         )
         self.context.aws().sqs().send_message(
             QueueUrl=controller_sqs_queue_url,
             MessageBody=Utils.to_json(message)
         )
+
+    def publish_user_disabled_event(self, username: str):
+        self._publish_event(
+            namespace='Accounts.UserDisabledEvent',
+            payload={
+                'username': username
+            }
+        )
+
+    def publish_project_created_event(self, project_id: str):
+        self._publish_event(
+            namespace='Projects.ProjectCreatedEvent',
+            payload={
+                'project_id': project_id
+            }
+        )
+
+    def publish_project_updated_event(self, project_id: str):
+        self._publish_event(
+            namespace='Projects.ProjectUpdatedEvent',
+            payload={
+                'project_id': project_id
+            }
+        )
+
+    def publish_project_deleted_event(self, project_id: str):
+        self._publish_event(
+            namespace='Projects.ProjectDeletedEvent',
+            payload={
+                'project_id': project_id
+            }
+        )
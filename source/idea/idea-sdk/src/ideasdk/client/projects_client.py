@@ -20,7 +20,9 @@ from ideadatamodel.projects import (
     Project,
     GetProjectResult,
     GetUserProjectsRequest,
-    GetUserProjectsResult
+    GetUserProjectsResult,
+    ListProjectsRequest,
+    ListProjectsResult
 )
 
 from typing import Optional, List
@@ -53,7 +55,7 @@ class ProjectsClient:
     def get_access_token(self) -> Optional[str]:
         if self.token_service is None:
             return None
-        return self.token_service.get_access_token()
+        return self.token_service.get_access_token(force_renewal=False)
 
     def get_project_by_id(self, project_id: str) -> Project:
         if Utils.is_empty(project_id):
@@ -72,7 +74,7 @@ class ProjectsClient:
             project_name='default'
         ))
 
-    def get_project(self, request: GetProjectRequest) -> GetProjectResult:
+    def get_project(self, request: GetProjectRequest, use_cache: bool = True) -> GetProjectResult:
 
         if Utils.are_empty(request.project_id, request.project_name):
             raise exceptions.invalid_params('either project_id or project_name is required')
@@ -82,15 +84,17 @@ class ProjectsClient:
         else:
             cache_key = f'Projects.GetProject.project_name.{request.project_name}'
 
-        result = self.cache.get(key=cache_key)
-        if result is not None:
-            return result
+        if use_cache:
+            result = self.cache.get(key=cache_key)
+            if result is not None:
+                return result
 
         result = self.client.invoke_alt(
             namespace='Projects.GetProject',
             payload=request,
             result_as=GetProjectResult,
-            access_token=self.get_access_token()
+            access_token=self.get_access_token(),
+            coalesce=True
         )
 
         self.cache.set(cache_key, result)
@@ -111,11 +115,20 @@ class ProjectsClient:
             namespace='Projects.GetUserProjects',
             payload=GetUserProjectsRequest(username=username),
             result_as=GetUserProjectsResult,
-            access_token=self.get_access_token()
+            access_token=self.get_access_token(),
+            coalesce=True
         )
 
         self.cache.set(cache_key, result.projects)
         return result.projects
 
+    def list_projects(self, request: ListProjectsRequest) -> ListProjectsResult:
+        return self.client.invoke_alt(
+            namespace='Projects.ListProjects',
+            payload=request,
+            result_as=ListProjectsResult,
+            access_token=self.get_access_token()
+        )
+
     def destroy(self):
         self.client.close()
@@ -44,7 +44,7 @@ class RoleAssignmentsClient:
     def get_access_token(self) -> Optional[str]:
         if self.token_service is None:
             return None
-        return self.token_service.get_access_token()
+        return self.token_service.get_access_token(force_renewal=False)
 
     def list_role_assignments(self, request: ListRoleAssignmentsRequest) -> ListRoleAssignmentsResponse:
         return self.client.invoke_alt(
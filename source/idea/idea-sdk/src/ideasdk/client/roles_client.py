@@ -46,7 +46,7 @@ class RolesClient:
     def get_access_token(self) -> Optional[str]:
         if self.token_service is None:
             return None
-        return self.token_service.get_access_token()
+        return self.token_service.get_access_token(force_renewal=False)
 
     def get_role(self, request: GetRoleRequest) -> GetRoleResponse:
         return self.client.invoke_alt(
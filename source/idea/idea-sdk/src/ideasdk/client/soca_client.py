@@ -11,15 +11,18 @@
 
 from ideasdk.protocols import SocaContextProtocol
 from ideasdk.utils import Utils
+from ideasdk.logging.payload_sampler import PayloadLogSampler
 from ideadatamodel import exceptions, errorcodes, SocaBaseModel, SocaEnvelope, SocaHeader, SocaAnyPayload
 
-from typing import Optional, TypeVar, Type, Any, Union
+from typing import Optional, TypeVar, Type, Any, Union, Dict, Tuple
+import threading
 import requests
 import requests.adapters
 import requests_unixsocket.adapters
 import urllib.parse
 import requests.exceptions
 import warnings
+import logging
 import urllib3.exceptions
 
 T = TypeVar('T')
@@ -32,6 +35,7 @@ DEFAULT_POOL_BLOCK = False
 DEFAULT_POOL_TIMEOUT = None
 DEFAULT_MAX_RETRIES = 0
 DEFAULT_TIMEOUT_SECONDS = 10
+DEFAULT_LOG_SAMPLE_RATE = 0.01
 
 SCHEME_HTTP = 'http://'  # noqa
 SCHEME_HTTPS = 'https://'
@@ -41,6 +45,11 @@ SCHEME_UNIX_HTTPS = 'unix+https://'
 
 class SocaClientOptions(SocaBaseModel):
     enable_logging: Optional[bool]
+    # fraction of requests for which the request and response bodies are logged at INFO level when enable_logging is true.
+    # bodies of all other requests are logged at DEBUG level.
+    log_sample_rate: Optional[float]
+    # sample rates overriding log_sample_rate for a namespace (eg. Projects.GetProject) or a namespace prefix (eg. Projects.*)
+    log_sample_rates: Optional[Dict[str, float]]
     endpoint: Optional[str]
     unix_socket: Optional[str]
     timeout: Optional[float]
@@ -51,6 +60,17 @@ class SocaClientOptions(SocaBaseModel):
     verify_ssl: Optional[bool]
 
 
+class InFlightRequest:
+    """
+    a request being executed on behalf of all callers that issued an identical coalesced request
+    """
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Optional[Any] = None
+        self.error: Optional[BaseException] = None
+
+
 class SocaClient:
 
     def __init__(self, context: SocaContextProtocol, options: SocaClientOptions, logger=None):
@@ -88,6 +108,14 @@ class SocaClient:
         session.mount(self.get_scheme(), adapter)
         self.session = session
 
+        self._in_flight: Dict[Tuple, InFlightRequest] = {}
+        self._in_flight_lock = threading.Lock()
+
+        self._log_sampler = PayloadLogSampler(
+            default_rate=self.log_sample_rate,
+            namespace_rates=options.log_sample_rates
+        )
+
     def is_unix_socket(self) -> bool:
         return Utils.is_not_empty(self.options.unix_socket)
 
@@ -123,21 +151,79 @@ class SocaClient:
     def is_enable_logging(self) -> bool:
         return Utils.get_as_bool(self.options.enable_logging, True)
 
+    @property
+    def log_sample_rate(self) -> float:
+        return Utils.get_as_float(self.options.log_sample_rate, DEFAULT_LOG_SAMPLE_RATE)
+
+    def is_log_sampled(self, namespace: Optional[str] = None) -> bool:
+        return self._log_sampler.is_sampled(namespace)
+
     @property
     def timeout(self) -> float:
         return Utils.get_as_float(self.options.timeout, DEFAULT_TIMEOUT_SECONDS)
 
-    def invoke(self, request: SocaEnvelope, result_as: Optional[Type[T]] = SocaAnyPayload, access_token: Optional[str] = None) -> T:
+    def invoke(self, request: SocaEnvelope, result_as: Optional[Type[T]] = SocaAnyPayload, access_token: Optional[str] = None, coalesce: bool = False) -> T:
+        """
+        invoke the API and return the response payload as result_as
+        :param request: the request envelope
+        :param result_as: the type of the response payload
+        :param access_token: the bearer token sent in the Authorization header
+        :param coalesce: identical requests (namespace, payload, result type and access token) issued concurrently while a request is
+        in flight wait for and share the result of the in-flight request instead of calling the API again.
+        only use for read requests, and do not modify the returned result.
+        """
+        if not coalesce:
+            return self._invoke(request, result_as, access_token)
+
+        key = (
+            request.header.namespace,
+            Utils.to_json_bytes(request.payload),
+            result_as,
+            access_token
+        )
+
+        with self._in_flight_lock:
+            in_flight = self._in_flight.get(key)
+            leader = in_flight is None
+            if leader:
+                in_flight = InFlightRequest()
+                self._in_flight[key] = in_flight
+
+        if not leader:
+            in_flight.done.wait()
+            if in_flight.error is not None:
+                raise in_flight.error
+            return in_flight.result
+
+        try:
+            in_flight.result = self._invoke(request, result_as, access_token)
+            return in_flight.result
+        except BaseException as e:
+            in_flight.error = e
+            raise e
+        finally:
+            with self._in_flight_lock:
+                self._in_flight.pop(key, None)
+            in_flight.done.set()
+
+    def _invoke(self, request: SocaEnvelope, result_as: Optional[Type[T]] = SocaAnyPayload, access_token: Optional[str] = None) -> T:
         try:
             header = request.header
             request_id = header.request_id
             if Utils.is_empty(request_id):
                 header.request_id = Utils.uuid()
 
-            request_data = Utils.to_json(request)
+            request_data = Utils.to_json_bytes(request)
 
+            log_body = False
             if self.is_enable_logging:
-                self._logger.info(f'(req) {request_data}')
+                log_body = self.is_log_sampled(header.namespace)
+                if log_body:
+                    self._logger.info(f'(req) {request_data.decode("utf-8")}')
+                else:
+                    self._logger.info(f'(req) namespace: {header.namespace}, request_id: {header.request_id}')
+                    if self._logger.isEnabledFor(logging.DEBUG):
+                        self._logger.debug(f'(req) {request_data.decode("utf-8")}')
 
             headers = {
                 'Content-Type': 'application/json'
@@ -155,11 +241,18 @@ class SocaClient:
                     verify=self.options.verify_ssl
                 )
 
-            response_data = http_response.text
+            # parse the response bytes as received. http_response.text decodes the full body to str and, in the absence of a charset
+            # in the Content-Type header, runs character set detection on the body before it can be parsed.
+            response_data = http_response.content
             if self.is_enable_logging:
-                self._logger.info(f'(res) {response_data}')
+                if log_body:
+                    self._logger.info(f'(res) {response_data.decode("utf-8", errors="replace")}')
+                else:
+                    self._logger.info(f'(res) namespace: {header.namespace}, request_id: {header.request_id}, status: {http_response.status_code}, bytes: {len(response_data)}')
+                    if self._logger.isEnabledFor(logging.DEBUG):
+                        self._logger.debug(f'(res) {response_data.decode("utf-8", errors="replace")}')
 
-            response = Utils.from_json(response_data)
+            response = Utils.from_json_bytes(response_data)
 
             success = Utils.get_value_as_bool('success', response, False)
             if not success:
@@ -192,7 +285,8 @@ class SocaClient:
 
     def invoke_alt(self, namespace: str, payload: Optional[Any],
                    result_as: Optional[Type[T]] = SocaAnyPayload,
-                   access_token: Optional[str] = None) -> T:
+                   access_token: Optional[str] = None,
+                   coalesce: bool = False) -> T:
         request = SocaEnvelope(
             header=SocaHeader(
                 namespace=namespace,
@@ -200,7 +294,7 @@ class SocaClient:
             ),
             payload=payload
         )
-        return self.invoke(request, result_as, access_token)
+        return self.invoke(request, result_as, access_token, coalesce)
 
     def invoke_json(self, json_request: str,
                     result_as: Optional[Type[T]] = SocaAnyPayload,
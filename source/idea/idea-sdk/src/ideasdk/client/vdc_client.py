@@ -100,7 +100,7 @@ class VirtualDesktopControllerClient(AbstractVirtualDesktopControllerClient):
     def get_access_token(self) -> Optional[str]:
         if self.token_service is None:
             return None
-        return self.token_service.get_access_token()
+        return self.token_service.get_access_token(force_renewal=False)
 
     def list_sessions_by_project_id(self, project_id: str) -> list[VirtualDesktopSession]:
         result = self.client.invoke_alt(
@@ -31,6 +31,7 @@ SUPPORTED_MODULE_TYPES = ('app', 'stack', 'config')
 SHARD_ITERATOR_INITIALIZER_INTERVAL = (10, 30)
 SHARD_PROCESSOR_INTERVAL = (10, 30)
 MAX_WAIT_TIME_FOR_RESOURCE_ACTIVATION = 300
+MAX_TRANSACT_WRITE_ITEMS = 100
 
 
 class ClusterConfigDB(DynamoDBStreamSubscriber):
@@ -312,6 +313,10 @@ class ClusterConfigDB(DynamoDBStreamSubscriber):
     def sync_cluster_settings_in_db(self, config_entries: List[Dict], overwrite: bool = False):
         self.log_info(f'sync config entries to db. overwrite: {overwrite}')
 
+        if overwrite:
+            self.set_config_entries({entry['key']: entry['value'] for entry in config_entries})
+            return
+
         for entry in config_entries:
             key = entry['key']
             value = entry['value']
@@ -321,11 +326,9 @@ class ClusterConfigDB(DynamoDBStreamSubscriber):
                 }
             )
             db_item = Utils.get_value_as_dict('Item', db_result)
-
-            if not overwrite:
-                if db_item is not None:
-                    self.log_info(f'entry already exists for key: {key}, skip.')
-                    continue
+            if db_item is not None:
+                self.log_info(f'entry already exists for key: {key}, skip.')
+                continue
 
             self.set_config_entry(key, value)
 
@@ -542,10 +545,8 @@ class ClusterConfigDB(DynamoDBStreamSubscriber):
         else:
             self.log_info(f'no config entries found matching config prefix: {config_key_prefix}')
 
-    def set_config_entry(self, key: str, value: Any):
-
-        self.log_info(f'updating config: {key} = {value}')
-
+    @staticmethod
+    def _to_db_value(value: Any) -> Any:
         # ddb does not support float. convert Decimal before updating ...
         if value is not None:
             if isinstance(value, float):
@@ -553,6 +554,11 @@ class ClusterConfigDB(DynamoDBStreamSubscriber):
             elif isinstance(value, list) and len(value) > 0:
                 if isinstance(value[0], float):
                     value = [Decimal(str(x)) for x in value]
+        return value
+
+    def set_config_entry(self, key: str, value: Any):
+
+        self.log_info(f'updating config: {key} = {value}')
 
         self.cluster_settings_table.update_item(
             Key={
@@ -564,11 +570,47 @@ class ClusterConfigDB(DynamoDBStreamSubscriber):
                 '#version': 'version'
             },
             ExpressionAttributeValues={
-                ':value': value,
+                ':value': self._to_db_value(value),
                 ':version': 1
             }
         )
 
+    def set_config_entries(self, config_entries: Dict[str, Any]):
+        """
+        update multiple config entries using TransactWriteItems, instead of one UpdateItem call per entry.
+        entries are written in transactions of up to MAX_TRANSACT_WRITE_ITEMS entries, all entries of a transaction are
+        updated or none of them.
+        """
+        if Utils.is_empty(config_entries):
+            return
+
+        table_name = self.get_cluster_settings_table_name()
+        items = []
+        for key, value in config_entries.items():
+            self.log_info(f'updating config: {key} = {value}')
+            items.append({
+                'Update': {
+                    'TableName': table_name,
+                    'Key': {
+                        'key': key
+                    },
+                    'UpdateExpression': 'SET #value=:value ADD #version :version',
+                    'ExpressionAttributeNames': {
+                        '#value': 'value',
+                        '#version': 'version'
+                    },
+                    'ExpressionAttributeValues': {
+                        ':value': self._to_db_value(value),
+                        ':version': 1
+                    }
+                }
+            })
+
+        # the client of the table resource accepts python types, same as update_item
+        client = self.cluster_settings_table.meta.client
+        for index in range(0, len(items), MAX_TRANSACT_WRITE_ITEMS):
+            client.transact_write_items(TransactItems=items[index:index + MAX_TRANSACT_WRITE_ITEMS])
+
     def convert_to_dynamodb_type(self, value):
         """
         Converts a value to the appropriate DynamoDB type.
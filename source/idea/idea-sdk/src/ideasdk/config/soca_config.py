@@ -14,22 +14,36 @@ from ideadatamodel.model_utils import ModelUtils as Utils
 
 from pyhocon import ConfigTree, tool, ConfigException, ConfigFactory
 from typing import Optional, List, Dict, Any
+import itertools
+
+# versions are unique across the config instances of the process
+_CONFIG_VERSIONS = itertools.count(1)
 
 
 class SocaConfig:
     def __init__(self, config: Dict):
         self._config = ConfigFactory.from_dict(config)
+        self._version = next(_CONFIG_VERSIONS)
+
+    @property
+    def version(self) -> int:
+        """
+        changes each time the config is modified
+        """
+        return self._version
 
     def pop(self, key, default=None, required=False):
         if required:
             self._config.pop(key)
         else:
             self._config.pop(key, default=default)
+        self._version = next(_CONFIG_VERSIONS)
 
     def put(self, key, value):
         if Utils.is_empty(value):
             value = None
         self._config.put(key, value)
+        self._version = next(_CONFIG_VERSIONS)
 
     @staticmethod
     def handle_exception(e: Exception, key: str):
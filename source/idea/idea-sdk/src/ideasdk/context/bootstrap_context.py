@@ -18,6 +18,9 @@ from typing import List, Dict, Optional
 
 DEFAULT_APP_DEPLOY_DIR = '/opt/idea/app'
 
+# vars read by the context methods called from the templates, which cannot be rendered as per-session fragments
+CONTEXT_METHOD_VARS = ('project', 'queue_profile', 'session_owner', 'cloudwatch_agent_config')
+
 
 class BootstrapContext:
     """
@@ -282,3 +285,23 @@ class BootstrapContext:
         if prefix:
             prefix = f"{prefix.lstrip('/').rstrip('/')}/"
         return prefix
+
+    def get_render_key(self, session_vars: Optional[List[str]] = None) -> str:
+        """
+        identifies the values used to render the bootstrap templates with this context: the config version, the context
+        attributes and the vars, except the session_vars, which are rendered as per-session fragments.
+        """
+        session_vars = Utils.get_as_list(session_vars, [])
+        for name in session_vars:
+            if name in CONTEXT_METHOD_VARS:
+                raise exceptions.invalid_params(f'context var: {name} is used by the bootstrap context and cannot be a session var')
+        context_vars = {name: value for name, value in vars(self.vars).items() if name not in session_vars}
+        return Utils.sha256(Utils.to_json({
+            'config_version': self.config.version,
+            'module_name': self.module_name,
+            'module_id': self.module_id,
+            'module_set': self.module_set,
+            'base_os': self.base_os,
+            'instance_type': self.instance_type,
+            'vars': context_vars
+        }))
@@ -215,6 +215,7 @@ class SocaContext(SocaContextProtocol):
             # metrics
             if options.enable_metrics:
                 self._metrics_service = MetricsService(context=self, default_namespace=options.metrics_namespace)
+                self._metrics_service.register_accumulator(self._cache_provider)
 
         except BaseException as e:
             if self._distributed_lock is not None:
@@ -0,0 +1,322 @@
+#  Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance
+#  with the License. A copy of the License is located at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  or in the 'license' file accompanying this file. This file is distributed on an 'AS IS' BASIS, WITHOUT WARRANTIES
+#  OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions
+#  and limitations under the License.
+
+from ideasdk.utils import Utils
+from ideadatamodel import exceptions, SocaFilter
+
+from boto3.dynamodb.conditions import Key, Attr, ConditionBase
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, List, Dict, Any
+
+# the cursor of a segmented scan. the cursor of a query or a single segment scan is the LastEvaluatedKey.
+SEGMENTS_CURSOR_KEY = '$segments'
+
+
+class DynamoDBIndex:
+    """
+    key schema of a table or of a global secondary index
+    """
+
+    def __init__(self, hash_key: str, range_key: Optional[str] = None, index_name: Optional[str] = None):
+        self.hash_key = hash_key
+        self.range_key = range_key
+        self.index_name = index_name
+
+
+class DynamoDBListRequest:
+    """
+    a compiled listing request: the key condition of the access path (None for a scan), and the filter expression of
+    the filters not covered by the key condition
+    """
+
+    def __init__(self, key_condition: Optional[ConditionBase] = None, index_name: Optional[str] = None, filter_expression: Optional[ConditionBase] = None):
+        self.key_condition = key_condition
+        self.index_name = index_name
+        self.filter_expression = filter_expression
+
+    def is_query(self) -> bool:
+        return self.key_condition is not None
+
+    def build(self) -> Dict[str, Any]:
+        request = {}
+        if self.key_condition is not None:
+            request['KeyConditionExpression'] = self.key_condition
+        if self.index_name is not None:
+            request['IndexName'] = self.index_name
+        if self.filter_expression is not None:
+            request['FilterExpression'] = self.filter_expression
+        return request
+
+
+class DynamoDBListResult:
+
+    def __init__(self, items: List[Dict], cursor: Optional[str] = None, last_evaluated_key: Optional[Dict] = None):
+        self.items = items
+        self.cursor = cursor
+        self.last_evaluated_key = last_evaluated_key
+
+
+class DynamoDBFilterCompiler:
+    """
+    compiles listing filters (SocaFilter) into a DynamoDB Query or Scan, and lists the matching items.
+
+    * an eq filter on the hash key of the table, or else of a global secondary index, queries the table or the index.
+      an eq or starts_with filter on the range key of the same key schema is added to the key condition.
+    * all other filters are compiled into a FilterExpression: eq, value and like (contains), in, starts_with
+      (begins_with) and nested and/or filters. filters with a '$all' value are ignored.
+
+    pagination: without a page_size, a single Query or Scan request is made and its page is returned, as the listing
+    APIs return a single DynamoDB page. with a page_size, DynamoDB is read until page_size items match or the end of
+    the results is reached, so a page is never empty while more results exist. scans can be read in parallel
+    segments (total_segments), each filling its share of the page.
+
+    cursors are opaque to the callers: the LastEvaluatedKey of a query or a scan, or the positions of the segments.
+    """
+
+    def __init__(self, hash_key: Optional[str] = None, range_key: Optional[str] = None, indexes: Optional[List[DynamoDBIndex]] = None):
+        """
+        :param hash_key: the hash key of the table. without a hash key, the filters are only used for scans.
+        :param range_key: the range key of the table
+        :param indexes: the global secondary indexes of the table
+        """
+        self.indexes = Utils.get_as_list(indexes, [])
+        if hash_key is not None:
+            self.indexes = [DynamoDBIndex(hash_key=hash_key, range_key=range_key)] + self.indexes
+
+    # begin: compile
+
+    @staticmethod
+    def _is_ignored(filter_: SocaFilter) -> bool:
+        return filter_.value == '$all'
+
+    def _compile_filter(self, filter_: SocaFilter, exclude_eq: bool = False, exclude_starts_with: bool = False) -> Optional[ConditionBase]:
+        conditions = []
+        if Utils.is_not_empty(filter_.and_):
+            condition = self.compile_filter_expression(filter_.and_)
+            if condition is not None:
+                conditions.append(condition)
+        if Utils.is_not_empty(filter_.or_):
+            or_conditions = [self._compile_filter(child) for child in filter_.or_ if not self._is_ignored(child)]
+            or_conditions = [condition for condition in or_conditions if condition is not None]
+            if len(or_conditions) > 0:
+                condition = or_conditions[0]
+                for or_condition in or_conditions[1:]:
+                    condition = condition | or_condition
+                conditions.append(condition)
+
+        if Utils.is_not_empty(filter_.key) and not self._is_ignored(filter_):
+            attr = Attr(filter_.key)
+            if filter_.eq is not None and not exclude_eq:
+                conditions.append(attr.eq(filter_.eq))
+            if filter_.value is not None:
+                conditions.append(attr.contains(filter_.value))
+            if filter_.like is not None:
+                conditions.append(attr.contains(filter_.like))
+            if filter_.in_ is not None:
+                values = filter_.in_ if isinstance(filter_.in_, list) else [filter_.in_]
+                conditions.append(attr.is_in(values))
+            if filter_.starts_with is not None and not exclude_starts_with:
+                conditions.append(attr.begins_with(filter_.starts_with))
+            if filter_.ends_with is not None:
+                raise exceptions.invalid_params(f'filter: ends_with is not supported for key: {filter_.key}')
+
+        if len(conditions) == 0:
+            return None
+        condition = conditions[0]
+        for other in conditions[1:]:
+            condition = condition & other
+        return condition
+
+    def compile_filter_expression(self, filters: Optional[List[SocaFilter]]) -> Optional[ConditionBase]:
+        """
+        the FilterExpression of all the filters, for a Scan
+        """
+        return self.compile(filters, scan=True).filter_expression
+
+    def compile(self, filters: Optional[List[SocaFilter]], scan: bool = False) -> DynamoDBListRequest:
+        """
+        compile the filters into the key condition of the cheapest access path and a filter expression for the
+        remaining filters
+        :param filters: the listing filters, combined with AND
+        :param scan: if True, the filters are not used as key conditions
+        """
+        filters = [filter_ for filter_ in Utils.get_as_list(filters, []) if filter_ is not None and not self._is_ignored(filter_)]
+
+        eq_filters: Dict[str, SocaFilter] = {}
+        starts_with_filters: Dict[str, SocaFilter] = {}
+        for filter_ in filters:
+            if Utils.is_empty(filter_.key):
+                continue
+            if filter_.eq is not None and filter_.key not in eq_filters:
+                eq_filters[filter_.key] = filter_
+            if filter_.starts_with is not None and filter_.key not in starts_with_filters:
+                starts_with_filters[filter_.key] = filter_
+
+        access_path = None
+        if not scan:
+            for index in self.indexes:
+                if index.hash_key in eq_filters:
+                    access_path = index
+                    break
+
+        key_condition = None
+        eq_keys = set()
+        starts_with_keys = set()
+        if access_path is not None:
+            key_condition = Key(access_path.hash_key).eq(eq_filters[access_path.hash_key].eq)
+            eq_keys.add(access_path.hash_key)
+            range_key = access_path.range_key
+            if range_key is not None and range_key in eq_filters:
+                key_condition = key_condition & Key(range_key).eq(eq_filters[range_key].eq)
+                eq_keys.add(range_key)
+            elif range_key is not None and range_key in starts_with_filters:
+                key_condition = key_condition & Key(range_key).begins_with(starts_with_filters[range_key].starts_with)
+                starts_with_keys.add(range_key)
+
+        filter_expression = None
+        for filter_ in filters:
+            # the first eq (or starts_with) filter on a key attribute is covered by the key condition
+            condition = self._compile_filter(
+                filter_,
+                exclude_eq=filter_.key in eq_keys and eq_filters[filter_.key] is filter_,
+                exclude_starts_with=filter_.key in starts_with_keys and starts_with_filters[filter_.key] is filter_
+            )
+            if condition is None:
+                continue
+            filter_expression = condition if filter_expression is None else filter_expression & condition
+
+        return DynamoDBListRequest(
+            key_condition=key_condition,
+            index_name=access_path.index_name if access_path is not None else None,
+            filter_expression=filter_expression
+        )
+
+    # begin: cursors
+
+    @staticmethod
+    def encode_cursor(position: Optional[Any]) -> Optional[str]:
+        if position is None:
+            return None
+        return Utils.base64_encode(Utils.to_json(position))
+
+    @staticmethod
+    def decode_cursor(cursor: Optional[str]) -> Optional[Any]:
+        if Utils.is_empty(cursor):
+            return None
+        try:
+            return Utils.from_json(Utils.base64_decode(cursor))
+        except Exception as e:
+            raise exceptions.invalid_params(f'invalid cursor: {e}')
+
+    # begin: listing
+
+    def list(self, table, filters: Optional[List[SocaFilter]] = None, cursor: Optional[str] = None, page_size: Optional[int] = None, total_segments: int = 1) -> DynamoDBListResult:
+        """
+        list the items of the table matching the filters
+        :param table: boto3 dynamodb Table
+        :param filters: the listing filters
+        :param cursor: the cursor of the previous page
+        :param page_size: the maximum number of items of the page. without a page_size, a single page is read.
+        :param total_segments: number of parallel segments of a scan, when a page_size is provided
+        """
+        if page_size is not None and page_size <= 0:
+            raise exceptions.invalid_params('paginator.page_size must be greater than 0')
+
+        list_request = self.compile(filters)
+        position = self.decode_cursor(cursor)
+
+        if Utils.get_value_as_dict(SEGMENTS_CURSOR_KEY, position) is not None or (
+                not list_request.is_query() and page_size is not None and total_segments > 1 and position is None):
+            return self._list_segments(table, list_request, position, page_size, total_segments)
+
+        request = list_request.build()
+        if position is not None:
+            request['ExclusiveStartKey'] = position
+
+        items = []
+        while True:
+            if page_size is not None:
+                request['Limit'] = page_size - len(items)
+            if list_request.is_query():
+                result = table.query(**request)
+            else:
+                result = table.scan(**request)
+
+            items.extend(Utils.get_value_as_list('Items', result, []))
+            last_evaluated_key = Utils.get_any_value('LastEvaluatedKey', result)
+            if last_evaluated_key is None or page_size is None or len(items) >= page_size:
+                break
+            request['ExclusiveStartKey'] = last_evaluated_key
+
+        return DynamoDBListResult(
+            items=items,
+            cursor=self.encode_cursor(last_evaluated_key),
+            last_evaluated_key=last_evaluated_key
+        )
+
+    def _list_segments(self, table, list_request: DynamoDBListRequest, position: Optional[Dict], page_size: Optional[int], total_segments: int) -> DynamoDBListResult:
+        """
+        scan the table in parallel segments. each round reads the segments not completed yet, with a Limit of an equal
+        share of the items missing from the page, so that a page never has more than page_size items.
+
+        the segment positions are: {} if the segment is not started, the LastEvaluatedKey of the segment,
+        or None once the segment is completed.
+        """
+        if position is None:
+            segments = [{} for _ in range(total_segments)]
+        else:
+            segments = Utils.get_value_as_list('positions', Utils.get_value_as_dict(SEGMENTS_CURSOR_KEY, position), [])
+            if len(segments) == 0:
+                raise exceptions.invalid_params('invalid cursor: no segments')
+        total_segments = len(segments)
+        base_request = list_request.build()
+
+        def scan_segment(segment: int, limit: Optional[int]) -> Dict:
+            request = {
+                **base_request,
+                'Segment': segment,
+                'TotalSegments': total_segments
+            }
+            if limit is not None:
+                request['Limit'] = limit
+            if Utils.is_not_empty(segments[segment]):
+                request['ExclusiveStartKey'] = segments[segment]
+            return table.scan(**request)
+
+        items = []
+        with ThreadPoolExecutor(max_workers=total_segments) as executor:
+            while True:
+                active = [segment for segment in range(total_segments) if segments[segment] is not None]
+                if len(active) == 0:
+                    break
+                if page_size is None:
+                    limits = [None] * len(active)
+                else:
+                    missing = page_size - len(items)
+                    if missing <= 0:
+                        break
+                    active = active[:missing]
+                    limits = [max(missing // len(active), 1)] * len(active)
+
+                results = list(executor.map(scan_segment, active, limits))
+                for segment, result in zip(active, results):
+                    items.extend(Utils.get_value_as_list('Items', result, []))
+                    segments[segment] = Utils.get_any_value('LastEvaluatedKey', result)
+
+                if page_size is None:
+                    break
+
+        if all(segment is None for segment in segments):
+            cursor = None
+        else:
+            cursor = self.encode_cursor({SEGMENTS_CURSOR_KEY: {'positions': segments}})
+
+        return DynamoDBListResult(items=items, cursor=cursor)
@@ -11,4 +11,7 @@
 
 from ideasdk.logging.soca_logging import SocaLogging
 from ideasdk.logging.console_logger import ConsoleLogger
+from ideasdk.logging.queue_handler import BoundedQueueHandler
+from ideasdk.logging.json_formatter import SocaJsonFormatter
+from ideasdk.logging.payload_sampler import PayloadLogSampler
 
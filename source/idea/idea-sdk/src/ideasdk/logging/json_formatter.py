@@ -0,0 +1,45 @@
+#  Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance
+#  with the License. A copy of the License is located at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  or in the 'license' file accompanying this file. This file is distributed on an 'AS IS' BASIS, WITHOUT WARRANTIES
+#  OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions
+#  and limitations under the License.
+
+import json
+import logging
+import time
+
+
+class SocaJsonFormatter(logging.Formatter):
+    """
+    structured log formatter. each record is formatted as a single line JSON document, eg:
+    {"timestamp": "2023-01-01T00:00:00.000Z", "level": "INFO", "logger": "app", "thread": "MainThread", "message": "..."}
+    """
+
+    # timestamps are in UTC
+    converter = time.gmtime
+
+    def formatTime(self, record: logging.LogRecord, datefmt=None) -> str:
+        if datefmt is not None:
+            return super().formatTime(record, datefmt)
+        return super().formatTime(record, '%Y-%m-%dT%H:%M:%S') + '.%03dZ' % record.msecs
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'timestamp': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'thread': record.threadName,
+            'message': record.getMessage()
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+        if record.stack_info:
+            entry['stack_info'] = self.formatStack(record.stack_info)
+        return json.dumps(entry, default=str)
@@ -0,0 +1,81 @@
+#  Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance
+#  with the License. A copy of the License is located at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  or in the 'license' file accompanying this file. This file is distributed on an 'AS IS' BASIS, WITHOUT WARRANTIES
+#  OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions
+#  and limitations under the License.
+
+from ideasdk.utils import Utils
+
+from typing import Optional, Dict, List
+import random
+
+
+class PayloadLogSampler:
+    """
+    decides if the request and response payloads of an API invocation are logged, with a sample rate per namespace.
+
+    the rate of a namespace is the rate of the namespace (eg. VirtualDesktop.ListSessions) if configured, else the rate
+    of the longest matching namespace prefix (eg. VirtualDesktop.*), else the default rate.
+    a rate of 1 logs all payloads, a rate of 0 logs none.
+    """
+
+    def __init__(self, default_rate: float = 1.0, namespace_rates: Optional[Dict[str, float]] = None):
+        self.default_rate = default_rate
+        self._namespace_rates: Dict[str, float] = {}
+        self._prefix_rates: List = []
+        for namespace, rate in (namespace_rates or {}).items():
+            if namespace.endswith('*'):
+                self._prefix_rates.append((namespace[:-1], rate))
+            else:
+                self._namespace_rates[namespace] = rate
+        self._prefix_rates.sort(key=lambda prefix_rate: len(prefix_rate[0]), reverse=True)
+        self._resolved_rates: Dict[str, float] = {}
+
+    @staticmethod
+    def from_config(sampling_config: Optional[Dict], default_rate: float = 1.0) -> 'PayloadLogSampler':
+        """
+        :param sampling_config: eg. {'default_rate': 1.0, 'namespaces': [{'namespace': 'VirtualDesktop.*', 'rate': 0.1}]}
+        :param default_rate: the rate of the namespaces, if sampling_config does not provide a default_rate
+        """
+        if sampling_config is None:
+            sampling_config = {}
+        namespace_rates = {}
+        for entry in Utils.get_value_as_list('namespaces', sampling_config, []):
+            namespace = Utils.get_value_as_string('namespace', entry)
+            rate = Utils.get_value_as_float('rate', entry)
+            if Utils.is_empty(namespace) or rate is None:
+                continue
+            namespace_rates[namespace] = rate
+        return PayloadLogSampler(
+            default_rate=Utils.get_value_as_float('default_rate', sampling_config, default_rate),
+            namespace_rates=namespace_rates
+        )
+
+    def get_rate(self, namespace: Optional[str]) -> float:
+        if namespace is None:
+            return self.default_rate
+        rate = self._resolved_rates.get(namespace)
+        if rate is not None:
+            return rate
+        rate = self._namespace_rates.get(namespace)
+        if rate is None:
+            rate = self.default_rate
+            for prefix, prefix_rate in self._prefix_rates:
+                if namespace.startswith(prefix):
+                    rate = prefix_rate
+                    break
+        self._resolved_rates[namespace] = rate
+        return rate
+
+    def is_sampled(self, namespace: Optional[str]) -> bool:
+        rate = self.get_rate(namespace)
+        if rate >= 1:
+            return True
+        if rate <= 0:
+            return False
+        return random.random() < rate
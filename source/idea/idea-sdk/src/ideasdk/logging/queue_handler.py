@@ -0,0 +1,110 @@
+#  Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance
+#  with the License. A copy of the License is located at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  or in the 'license' file accompanying this file. This file is distributed on an 'AS IS' BASIS, WITHOUT WARRANTIES
+#  OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions
+#  and limitations under the License.
+
+import copy
+import logging
+import logging.handlers
+import queue
+import threading
+from typing import Optional
+
+DEFAULT_QUEUE_MAX_SIZE = 10000
+
+
+class BoundedQueueListener(logging.handlers.QueueListener):
+
+    def enqueue_sentinel(self):
+        # the queue may be full when the listener is stopped. wait for the queued records to be written.
+        self.queue.put(self._sentinel)
+
+
+class BoundedQueueHandler(logging.handlers.QueueHandler):
+    """
+    non-blocking log handler. records are queued by the application threads, and formatted and written by
+    the target handler on a background QueueListener thread.
+
+    the queue is bounded: when the target handler cannot keep up, new records are dropped and counted instead of
+    blocking the application thread or growing the memory without limit. the number of dropped records is logged
+    with the next record that fits in the queue.
+    """
+
+    def __init__(self, target: logging.Handler, max_size: int = DEFAULT_QUEUE_MAX_SIZE):
+        super().__init__(queue.Queue(maxsize=max(int(max_size), 1)))
+        self.target = target
+        self.dropped_count = 0
+        self._unreported_count = 0
+        self._dropped_lock = threading.Lock()
+        self.listener = BoundedQueueListener(self.queue, target, respect_handler_level=True)
+        self.listener.start()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """
+        freeze the message arguments and the exception of the record, which may change or go out of scope once the
+        log call returns. all other formatting is left to the target handler, on the listener thread.
+        """
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._dropped_lock:
+                self.dropped_count += 1
+                self._unreported_count += 1
+            return
+
+        if self._unreported_count > 0:
+            warning = self._build_dropped_record(name=record.name)
+            if warning is None:
+                return
+            try:
+                self.queue.put_nowait(warning)
+            except queue.Full:
+                with self._dropped_lock:
+                    self._unreported_count += warning.dropped_count
+
+    def _build_dropped_record(self, name: str) -> Optional[logging.LogRecord]:
+        with self._dropped_lock:
+            unreported_count = self._unreported_count
+            self._unreported_count = 0
+        if unreported_count == 0:
+            return None
+        warning = logging.LogRecord(
+            name=name,
+            level=logging.WARNING,
+            pathname=__file__,
+            lineno=0,
+            msg=f'log queue is full. dropped {unreported_count} log records',
+            args=None,
+            exc_info=None
+        )
+        warning.dropped_count = unreported_count
+        return warning
+
+    def close(self):
+        """
+        stop the listener after all queued records have been written, and close the target handler
+        """
+        if self.listener is not None:
+            warning = self._build_dropped_record(name=__name__)
+            if warning is not None:
+                self.queue.put(warning)
+            self.listener.stop()
+            self.listener = None
+        self.target.close()
+        super().close()
@@ -14,11 +14,15 @@ from ideasdk.config.soca_config import SocaConfig
 from ideadatamodel import exceptions, errorcodes, constants, CustomFileLoggerParams
 from ideasdk.utils import Utils, EnvironmentUtils
 from ideasdk.protocols import SocaLoggingProtocol
+from ideasdk.logging.queue_handler import BoundedQueueHandler, DEFAULT_QUEUE_MAX_SIZE
+from ideasdk.logging.json_formatter import SocaJsonFormatter
+from ideasdk.logging.payload_sampler import PayloadLogSampler
 
+import atexit
 import logging
 import logging.handlers
 import os
-from typing import Optional
+from typing import Optional, Dict
 
 
 def get_default_logging_config(profile: str = 'default'):
@@ -93,8 +97,11 @@ class SocaLogging(SocaLoggingProtocol):
                 self.module_id = 'default'
                 self._config = SocaConfig(get_default_logging_config(profile=default_logging_profile))
         self._file_handlers = {}
+        self._queue_handlers: Dict[str, BoundedQueueHandler] = {}
+        self._payload_sampler: Optional[PayloadLogSampler] = None
         self._initialize_root_logger()
         logging.captureWarnings(True)
+        atexit.register(self.close)
 
     def _initialize_root_logger(self):
         root = logging.getLogger()
@@ -116,9 +123,58 @@ class SocaLogging(SocaLoggingProtocol):
         return self._config.get_string(f'{self.module_id}.logging.default_log_file_name', required=True)
 
     def _build_formatter(self, name):
+        formatter_type = self._config.get_string(f'cluster.logging.formatters.{name}.type')
+        if formatter_type == 'json':
+            return SocaJsonFormatter()
         log_format = self._config.get_string(f'cluster.logging.formatters.{name}.format')
         return logging.Formatter(fmt=log_format)
 
+    def _get_queue_handler(self, handler_name: str, handler: logging.Handler, level, settings) -> BoundedQueueHandler:
+        """
+        the non-blocking handler writing to the target handler. loggers writing to the same console or log file share
+        the queue and the background listener thread of the target.
+        """
+        handler_key = getattr(handler, 'baseFilename', handler_name)
+        queue_handler = self._queue_handlers.get(handler_key)
+        if queue_handler is None:
+            handler.setLevel(level)
+            max_size = Utils.get_as_int(settings.get('queue.max_size', None), default=DEFAULT_QUEUE_MAX_SIZE)
+            queue_handler = BoundedQueueHandler(target=handler, max_size=max_size)
+            self._queue_handlers[handler_key] = queue_handler
+            return queue_handler
+
+        target = queue_handler.target
+        if target is not handler:
+            handler.close()
+        # each logger filters the records by its own level. the shared target writes the records of all its loggers.
+        current_level = target.level
+        target.setLevel(level)
+        target.setLevel(min(current_level, target.level))
+        return queue_handler
+
+    def get_dropped_log_count(self) -> int:
+        """
+        number of log records dropped by the non-blocking handlers, when their queue was full
+        """
+        return sum([queue_handler.dropped_count for queue_handler in self._queue_handlers.values()])
+
+    def close(self):
+        """
+        write the queued log records and stop the background listener threads
+        """
+        queue_handlers = list(self._queue_handlers.values())
+        self._queue_handlers = {}
+        for queue_handler in queue_handlers:
+            queue_handler.close()
+
+    def get_payload_sampler(self) -> PayloadLogSampler:
+        """
+        sampling of the API request and response payloads logged when payload tracing is enabled
+        """
+        if self._payload_sampler is None:
+            self._payload_sampler = PayloadLogSampler.from_config(self._config.get('cluster.logging.audit_logs.payload_tracing_sampling'))
+        return self._payload_sampler
+
     def _build_handler(self, handler_name, logger_name: Optional[str]):
         handler_config = self._config.get(f'cluster.logging.handlers.{handler_name}')
 
@@ -180,10 +236,10 @@ class SocaLogging(SocaLoggingProtocol):
 
     @staticmethod
     def _reset_logger(logger: logging.Logger):
-        for handler in logger.handlers:
+        for handler in list(logger.handlers):
             logger.removeHandler(handler)
 
-        for log_filter in logger.filters:
+        for log_filter in list(logger.filters):
             logger.removeFilter(log_filter)
 
     @staticmethod
@@ -226,13 +282,18 @@ class SocaLogging(SocaLoggingProtocol):
 
         logger.setLevel(level)
 
+        queue_enabled = Utils.get_as_bool(settings.get('queue.enabled', None), default=False)
+
         for handler_name in settings[f'loggers.{logger_template}.handlers']:
             handler = self._build_handler(
                 handler_name=handler_name,
                 logger_name=logger_name
             )
-            handler.setLevel(level)
             handler.setFormatter(self._build_formatter(name=settings['formatter']))
+            if queue_enabled:
+                handler = self._get_queue_handler(handler_name=handler_name, handler=handler, level=level, settings=settings)
+            else:
+                handler.setLevel(level)
             logger.addHandler(handler)
 
         logger.propagate = False
@@ -175,6 +175,13 @@ class BaseMetrics:
     def count(self, **kwargs):
         return self._log(**kwargs, MetricType='Counter', Unit='Count')
 
+    def gauge(self, **kwargs):
+        """
+        point in time value, such as the number of entries in a cache.
+        cloudwatch metrics do not have a metric type, so the value is published as is.
+        """
+        return self._log(**kwargs, MetricType='Gauge', Unit='Count')
+
     def invocation(self, **kwargs):
         """
         there is no better way to represent a Prometheus Summary in CloudWatch Metrics.
@@ -13,7 +13,7 @@ from ideasdk.protocols import MetricsProviderProtocol, SocaContextProtocol
 from ideasdk.utils import Utils
 
 from typing import List, Dict
-from prometheus_client import Counter, Summary
+from prometheus_client import Counter, Summary, Gauge
 from threading import RLock
 
 
@@ -88,7 +88,7 @@ class PrometheusMetrics(MetricsProviderProtocol):
         unit = Utils.get_value_as_string('Unit', entry, '')
         unit = unit.lower()
         if unit == 'count':
-            unit = 'total'
+            unit = 'total' if metric_type == 'Counter' else 'count'
 
         prometheus_metric_name = f'{metric_name}_{unit}'
 
@@ -104,6 +104,12 @@ class PrometheusMetrics(MetricsProviderProtocol):
                 documentation=documentation,
                 labelnames=labels
             )
+        elif metric_type == 'Gauge':
+            metric = Gauge(
+                name=prometheus_metric_name,
+                documentation=documentation,
+                labelnames=labels
+            )
 
         if metric is not None:
             with self._lock:
@@ -142,6 +148,8 @@ class PrometheusMetrics(MetricsProviderProtocol):
             metric.labels(*labels).inc(value)
         elif isinstance(metric, Summary):
             metric.labels(*labels).observe(value)
+        elif isinstance(metric, Gauge):
+            metric.labels(*labels).set(value)
 
     def log(self, metric_data: List[Dict]):
         for entry in metric_data:
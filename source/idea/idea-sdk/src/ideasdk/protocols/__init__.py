@@ -256,6 +256,18 @@ class SocaCacheProtocol(SocaBaseProtocol):
     def delete(self, key: Hashable) -> int:
         ...
 
+    @abstractmethod
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any], ttl: Optional[CacheTTL] = None) -> Any:
+        ...
+
+    @abstractmethod
+    def flush(self) -> int:
+        ...
+
+    @abstractmethod
+    def get_stats(self) -> Dict[str, Any]:
+        ...
+
 
 class CacheProviderProtocol(SocaBaseProtocol):
 
@@ -267,6 +279,22 @@ class CacheProviderProtocol(SocaBaseProtocol):
     def short_term(self) -> SocaCacheProtocol:
         ...
 
+    @abstractmethod
+    def register_cache(self, name: str, max_size: int = 1000, ttl_seconds: int = 600, eviction_policy: str = 'lru') -> SocaCacheProtocol:
+        ...
+
+    @abstractmethod
+    def get_cache(self, name: str) -> Optional[SocaCacheProtocol]:
+        ...
+
+    @abstractmethod
+    def list_caches(self) -> List[SocaCacheProtocol]:
+        ...
+
+    @abstractmethod
+    def flush(self, name: str) -> int:
+        ...
+
     @abstractmethod
     def reload(self, name: str = None) -> SocaCacheProtocol:
         ...
@@ -283,6 +311,9 @@ class SocaLoggingProtocol(SocaBaseProtocol):
     def get_custom_file_logger(self, params: CustomFileLoggerParams) -> Logger:
         ...
 
+    def get_payload_sampler(self):
+        ...
+
 
 class MetricsAccumulatorProtocol(SocaBaseProtocol):
 
@@ -458,7 +489,11 @@ class AWSUtilProtocol(SocaBaseProtocol):
         ...
 
     @abstractmethod
-    def get_ec2_instance_type_unit_price(self, instance_type: str) -> EC2InstanceUnitPrice:
+    def get_ec2_instance_type_unit_price(self, instance_type: str, operating_system: str = 'Linux', tenancy: str = 'Shared') -> EC2InstanceUnitPrice:
+        ...
+
+    @abstractmethod
+    def budgets_describe_budgets(self) -> List[AwsProjectBudget]:
         ...
 
     @abstractmethod
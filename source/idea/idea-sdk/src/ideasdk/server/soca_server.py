@@ -521,20 +521,34 @@ class ApiInvocationHandler:
 
         return invocation_context.response
 
+    def critical_error_response(self, e: BaseException) -> Dict:
+        message = f'Critical exception: {e}'
+        self.logger.exception(message)
+        return {
+            'header': {
+                'namespace': 'ErrorResponse',
+                'request_id': Utils.uuid()
+            },
+            'success': False,
+            'message': message
+        }
+
     def invoke(self, http_request) -> Dict:
         try:
             return self._invoke(http_request)
         except BaseException as e:
-            message = f'Critical exception: {e}'
-            self.logger.exception(message)
-            return {
-                'header': {
-                    'namespace': 'ErrorResponse',
-                    'request_id': Utils.uuid()
-                },
-                'success': False,
-                'message': message
-            }
+            return self.critical_error_response(e)
+
+    def invoke_as_bytes(self, http_request) -> bytes:
+        """
+        invoke the api and serialize the response to json bytes.
+        serialization happens on the worker thread, so the event loop only writes the response body.
+        """
+        response = self.invoke(http_request)
+        try:
+            return Utils.to_json_bytes(response)
+        except BaseException as e:
+            return Utils.to_json_bytes(self.critical_error_response(e))
 
 
 class SocaServer(SocaService):
@@ -684,7 +698,7 @@ class SocaServer(SocaService):
 
     async def invoke_api_task(self, http_request):
         result = self._executor.submit(
-            lambda http_request_: self._api_invocation_handler.invoke(http_request_),
+            lambda http_request_: self._api_invocation_handler.invoke_as_bytes(http_request_),
             http_request
         )
         return await asyncio.wrap_future(result)
@@ -720,7 +734,7 @@ class SocaServer(SocaService):
 
     async def api_route(self, http_request, **_):
         response = await self.invoke_api_task(http_request)
-        return sanic.response.json(response, dumps=Utils.to_json)
+        return sanic.response.raw(response, content_type='application/json')
 
     async def openapi_spec_route(self, _):
         openapi_spec_file = pathlib.Path(self.options.openapi_spec_file)
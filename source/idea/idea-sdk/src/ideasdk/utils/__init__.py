@@ -17,5 +17,6 @@ from ideasdk.utils.api_utils import ApiUtils
 from ideasdk.utils.datetime_utils import DateTimeUtils
 from ideasdk.utils.group_name_helper import GroupNameHelper
 from ideasdk.utils.jinja2_utils import Jinja2Utils
+from ideasdk.utils.jinja2_template_registry import Jinja2TemplateRegistry
 from ideasdk.utils.module_metadata import *
 from ideasdk.utils.fetch_records_from_db_util import *
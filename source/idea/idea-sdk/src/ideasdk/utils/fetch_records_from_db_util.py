@@ -1,43 +1,28 @@
 from ideasdk.utils import Utils
-from typing import Dict, TypeVar
+from typing import Dict, TypeVar, Optional
 
 TRequest = TypeVar('TRequest')
 
-def scan_db_records(request: TRequest, table) -> Dict:
-    scan_request = {}
+def scan_db_records(request: TRequest, table, compiler: Optional['DynamoDBFilterCompiler'] = None) -> Dict:
+    """
+    list a single page of the table matching the request filters and cursor.
+    the result has the Items and the LastEvaluatedKey of the page, as a Scan response.
+    :param compiler: the filter compiler of the table key schema, to query the table when the filters match a key.
+    without a compiler, the table is scanned.
+    """
+    from ideasdk.dynamodb.dynamodb_filter_compiler import DynamoDBFilterCompiler
+    if compiler is None:
+        compiler = DynamoDBFilterCompiler()
 
-    cursor = request.cursor
-    last_evaluated_key = None
-    if Utils.is_not_empty(cursor):
-        last_evaluated_key = Utils.from_json(Utils.base64_decode(cursor))
-    if last_evaluated_key is not None:
-        scan_request['ExclusiveStartKey'] = last_evaluated_key
+    list_result = compiler.list(
+        table=table,
+        filters=request.filters,
+        cursor=request.cursor
+    )
 
-    scan_filter = None
-    if Utils.is_not_empty(request.filters):
-        scan_filter = {}
-        for filter_ in request.filters:
-            if filter_.value == '$all':
-                continue
-            
-            if filter_.eq is not None:
-                scan_filter[filter_.key] = {
-                    'AttributeValueList': [filter_.eq],
-                    'ComparisonOperator': 'EQ'
-                }
-            if filter_.value is not None:
-                scan_filter[filter_.key] = {
-                    'AttributeValueList': [filter_.value],
-                    'ComparisonOperator': 'CONTAINS'
-                }
-            if filter_.like is not None:
-                scan_filter[filter_.key] = {
-                    'AttributeValueList': [filter_.like],
-                    'ComparisonOperator': 'CONTAINS'
-                }
-    if scan_filter is not None:
-        scan_request['ScanFilter'] = scan_filter
-
-    scan_result = table.scan(**scan_request)
-
-    return scan_result
\ No newline at end of file
+    result = {
+        'Items': list_result.items
+    }
+    if list_result.last_evaluated_key is not None:
+        result['LastEvaluatedKey'] = list_result.last_evaluated_key
+    return result
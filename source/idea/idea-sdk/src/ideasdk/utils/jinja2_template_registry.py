@@ -0,0 +1,265 @@
+#  Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance
+#  with the License. A copy of the License is located at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  or in the 'license' file accompanying this file. This file is distributed on an 'AS IS' BASIS, WITHOUT WARRANTIES
+#  OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions
+#  and limitations under the License.
+
+from ideadatamodel import exceptions
+from ideasdk.utils.utils import Utils
+
+from jinja2 import Environment, FileSystemLoader, FileSystemBytecodeCache, BytecodeCache, Template, nodes
+from cacheout import LRUCache
+from threading import RLock
+from typing import Optional, Dict, List, Tuple, Callable, Any
+import os
+
+# delimits the index of a per-session fragment in the output of the static render
+FRAGMENT_DELIMITER = '\x00'
+DEFAULT_MAX_STATIC_RENDERS = 256
+
+
+class UnsupportedSessionFragment(Exception):
+    """
+    raised when a template uses a per-session expression other than as output, eg. in a condition or a filter.
+    such a template cannot be split into static and per-session fragments and is rendered for each session.
+    """
+    pass
+
+
+class _RecordingFileSystemLoader(FileSystemLoader):
+    """
+    file system loader recording the modification time check of each loaded template
+    """
+
+    def __init__(self, search_path: str):
+        super().__init__(searchpath=search_path, followlinks=False)
+        self.uptodate: Dict[str, Callable[[], bool]] = {}
+
+    def get_source(self, environment: Environment, template: str) -> Tuple[str, str, Callable[[], bool]]:
+        source, filename, uptodate = super().get_source(environment, template)
+        self.uptodate[template] = uptodate
+        return source, filename, uptodate
+
+    def is_up_to_date(self) -> bool:
+        return all(uptodate() for uptodate in list(self.uptodate.values()))
+
+
+class _SessionFragmentsEnvironment(Environment):
+    """
+    environment compiling the templates with the outputs of the per-session expressions replaced by delimited
+    fragment indexes, so that rendering a template only renders its static parts.
+    """
+
+    def __init__(self, search_path: str, session_expressions: List[str]):
+        super().__init__(
+            loader=_RecordingFileSystemLoader(search_path),
+            autoescape=False,  # nosec B701
+            auto_reload=True
+        )
+        self.session_expressions = session_expressions
+        self.session_nodes = [super(_SessionFragmentsEnvironment, self)._parse('{{ ' + expression + ' }}', None, None).body[0].nodes[0] for expression in session_expressions]
+        self.evaluators = [self.compile_expression(expression, undefined_to_none=False) for expression in session_expressions]
+
+    def _replace(self, node: nodes.Expr) -> nodes.Expr:
+        for index, session_node in enumerate(self.session_nodes):
+            if node == session_node:
+                return nodes.TemplateData(f'{FRAGMENT_DELIMITER}{index}{FRAGMENT_DELIMITER}', lineno=node.lineno)
+        return node
+
+    def _parse(self, source: str, name: Optional[str], filename: Optional[str]) -> nodes.Template:
+        if FRAGMENT_DELIMITER in source:
+            raise UnsupportedSessionFragment(f'template: {name} contains the fragment delimiter')
+        template = super()._parse(source, name, filename)
+        for output in template.find_all(nodes.Output):
+            output.nodes = [self._replace(node) for node in output.nodes]
+        for index, session_node in enumerate(self.session_nodes):
+            for node in template.find_all(type(session_node)):
+                if node == session_node:
+                    raise UnsupportedSessionFragment(f'template: {name}, line: {node.lineno}, expression: {self.session_expressions[index]} is not only used as output')
+        return template
+
+
+class SessionFragments:
+    """
+    a template rendered with its static variables, and the per-session expressions left to render for each session
+    """
+
+    def __init__(self, parts: Optional[List[str]], evaluators: List[Callable], is_up_to_date: Callable[[], bool]):
+        # static parts at even positions, fragment indexes at odd positions.
+        # None if the template cannot be split, until the template is modified.
+        self.parts = parts
+        self.evaluators = evaluators
+        self.is_up_to_date = is_up_to_date
+
+    def render(self, **variables) -> str:
+        output = []
+        for position, part in enumerate(self.parts):
+            if position % 2 == 0:
+                output.append(part)
+            else:
+                output.append(str(self.evaluators[int(part)](**variables)))
+        return ''.join(output)
+
+
+class Jinja2TemplateRegistry:
+    """
+    process-wide registry of compiled jinja2 templates
+
+    * a single Environment is shared for each search path, so each template is read and compiled once per process,
+      instead of once per Environment.
+    * templates are invalidated by the modification time of their file: the Environment checks the template file for
+      each get_template() (auto_reload), and reloads the template and its includes when they are modified.
+    * compiled templates are stored in a bytecode cache in the temp directory of the user, so that a new process
+      does not compile the templates again. entries are invalidated by the checksum of the template source.
+
+    templates can optionally be split into static and per-session fragments with render_fragments(): the template is
+    rendered once for a static key, with the per-session expressions left as fragments, and each session only renders
+    its fragments.
+    """
+
+    def __init__(self, max_static_renders: int = DEFAULT_MAX_STATIC_RENDERS, bytecode_cache: bool = True, bytecode_cache_dir: Optional[str] = None):
+        """
+        :param max_static_renders: the number of static renders of render_fragments() kept in memory
+        :param bytecode_cache: if True, compiled templates are stored in a bytecode cache on the file system
+        :param bytecode_cache_dir: the directory of the bytecode cache. defaults to a directory in the temp directory,
+        only accessible by the current user.
+        """
+        self._lock = RLock()
+        self._environments: Dict[Tuple[str, bool], Environment] = {}
+        self._fragment_environments: Dict[Tuple[str, Tuple[str, ...]], _SessionFragmentsEnvironment] = {}
+        self._static_renders = LRUCache(maxsize=max_static_renders)
+        self._bytecode_cache_enabled = bytecode_cache
+        self._bytecode_cache_dir = bytecode_cache_dir
+        self._bytecode_caches: Dict[bool, Optional[BytecodeCache]] = {}
+
+    def _get_bytecode_cache(self, auto_escape: bool) -> Optional[BytecodeCache]:
+        if not self._bytecode_cache_enabled:
+            return None
+        if auto_escape not in self._bytecode_caches:
+            # the compiled code depends on auto escape, which is not part of the cache keys
+            pattern = '__idea_jinja2_escape_%s.cache' if auto_escape else '__idea_jinja2_%s.cache'
+            try:
+                if self._bytecode_cache_dir is not None:
+                    os.makedirs(self._bytecode_cache_dir, mode=0o700, exist_ok=True)
+                self._bytecode_caches[auto_escape] = FileSystemBytecodeCache(directory=self._bytecode_cache_dir, pattern=pattern)
+            except (OSError, RuntimeError):
+                # no writable temp directory. templates are compiled once per process.
+                self._bytecode_caches[auto_escape] = None
+        return self._bytecode_caches[auto_escape]
+
+    def get_environment(self, search_path: str, auto_escape: bool = False) -> Environment:
+        """
+        the shared Environment of the search path
+        """
+        key = (os.path.abspath(search_path), auto_escape)
+        environment = self._environments.get(key)
+        if environment is not None:
+            return environment
+        with self._lock:
+            environment = self._environments.get(key)
+            if environment is None:
+                environment = Environment(
+                    loader=FileSystemLoader(
+                        searchpath=key[0],
+                        followlinks=False
+                    ),
+                    autoescape=auto_escape,  # nosec B701
+                    auto_reload=True,
+                    bytecode_cache=self._get_bytecode_cache(auto_escape)
+                )
+                self._environments[key] = environment
+            return environment
+
+    def get_template(self, search_path: str, template_name: str, auto_escape: bool = False) -> Template:
+        return self.get_environment(search_path, auto_escape).get_template(template_name)
+
+    def render(self, search_path: str, template_name: str, **variables) -> str:
+        return self.get_template(search_path, template_name).render(**variables)
+
+    def _get_fragments_environment(self, search_path: str, session_expressions: List[str]) -> _SessionFragmentsEnvironment:
+        key = (os.path.abspath(search_path), tuple(session_expressions))
+        environment = self._fragment_environments.get(key)
+        if environment is not None:
+            return environment
+        with self._lock:
+            environment = self._fragment_environments.get(key)
+            if environment is None:
+                environment = _SessionFragmentsEnvironment(search_path=key[0], session_expressions=session_expressions)
+                self._fragment_environments[key] = environment
+            return environment
+
+    @staticmethod
+    def _is_plain_data(value: Any) -> bool:
+        if value is None or isinstance(value, (str, int, float, bool)):
+            return True
+        if isinstance(value, (list, tuple)):
+            return all(Jinja2TemplateRegistry._is_plain_data(item) for item in value)
+        if isinstance(value, dict):
+            return all(isinstance(key, str) and Jinja2TemplateRegistry._is_plain_data(item) for key, item in value.items())
+        return False
+
+    def render_fragments(self, search_path: str, template_name: str, session_expressions: List[str], static_key: Optional[str] = None, **variables) -> str:
+        """
+        render the template in static and per-session fragments.
+
+        the template is rendered once for each static key, with the output of the session expressions
+        (eg. {{ bootstrap_package_uri }} or {{ context.vars.idea_session_id }}) left as fragments. each call then
+        only evaluates the session expressions. the result is identical to render(), provided that:
+
+        * the session expressions are only used as output in the template and its includes. templates using them in
+          conditions, loops or filters are rendered with render().
+        * the static key identifies all the other values used by the template. expressions that are not
+          deterministic, such as generated passwords, must be session expressions.
+
+        :param search_path: the search path of the templates
+        :param template_name: the name of the template
+        :param session_expressions: the expressions of the template that differ for each session
+        :param static_key: identifies the values of the static variables. required if the variables are not plain
+        data (dict, list, str, int, float, bool). when not provided, the static key is derived from the variables,
+        except the variables used as session expressions.
+        :param variables: the template variables
+        """
+        if Utils.is_empty(session_expressions):
+            return self.render(search_path, template_name, **variables)
+
+        if static_key is None:
+            static_variables = {name: value for name, value in variables.items() if name not in session_expressions}
+            if not self._is_plain_data(static_variables):
+                raise exceptions.invalid_params('static_key is required when the template variables are not plain data')
+            static_key = Utils.sha256(Utils.to_json(dict(sorted(static_variables.items()))))
+
+        environment = self._get_fragments_environment(search_path, session_expressions)
+        cache_key = (environment.loader.searchpath[0], tuple(session_expressions), template_name, static_key)
+        fragments = self._static_renders.get(cache_key)
+        if fragments is not None and not fragments.is_up_to_date():
+            fragments = None
+
+        if fragments is None:
+            try:
+                parts = environment.get_template(template_name).render(**variables).split(FRAGMENT_DELIMITER)
+            except UnsupportedSessionFragment:
+                parts = None
+            fragments = SessionFragments(
+                parts=parts,
+                evaluators=environment.evaluators,
+                is_up_to_date=environment.loader.is_up_to_date
+            )
+            self._static_renders.set(cache_key, fragments)
+
+        if fragments.parts is None:
+            return self.render(search_path, template_name, **variables)
+        return fragments.render(**variables)
+
+    def clear(self):
+        """
+        remove the compiled templates and the static renders from the registry. bytecode cache entries are kept.
+        """
+        with self._lock:
+            self._environments.clear()
+            self._fragment_environments.clear()
+            self._static_renders.clear()
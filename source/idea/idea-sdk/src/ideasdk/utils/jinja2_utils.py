@@ -9,11 +9,22 @@
 #  OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions
 #  and limitations under the License.
 
+from ideasdk.utils.jinja2_template_registry import Jinja2TemplateRegistry
+
 from jinja2 import Environment, FileSystemLoader, PackageLoader, BaseLoader
 
+_TEMPLATE_REGISTRY = Jinja2TemplateRegistry()
+
 
 class Jinja2Utils:
 
+    @staticmethod
+    def template_registry() -> Jinja2TemplateRegistry:
+        """
+        the process-wide registry of compiled templates
+        """
+        return _TEMPLATE_REGISTRY
+
     @staticmethod
     def env_using_file_system_loader(search_path: str, auto_escape: bool = False) -> Environment:
         return Environment(
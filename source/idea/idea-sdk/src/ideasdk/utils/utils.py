@@ -196,19 +196,25 @@ class Utils:
     def to_json(payload: Union[BaseModel, Any], indent=False) -> str:
         return ModelUtils.to_json(payload, indent)
 
+    @staticmethod
+    def to_json_bytes(payload: Union[BaseModel, Any]) -> bytes:
+        return ModelUtils.to_json_bytes(payload)
+
     @staticmethod
     def from_json(data: str) -> Union[Dict, List]:
         return ModelUtils.from_json(data)
 
+    @staticmethod
+    def from_json_bytes(data: Union[bytes, bytearray, memoryview, str]) -> Union[Dict, List]:
+        return ModelUtils.from_json_bytes(data)
+
     @staticmethod
     def deep_copy(payload: Union[BaseModel, Dict]) -> Dict:
-        json_string = ModelUtils.to_json(payload)
-        return Utils.from_json(json_string)
+        return ModelUtils.to_jsonable(payload)
 
     @staticmethod
     def to_yaml(payload: Union[BaseModel, Any], sort_keys=False, width=140) -> str:
-        json_string = Utils.to_json(payload)
-        json_dict = Utils.from_json(json_string)
+        json_dict = ModelUtils.to_jsonable(payload)
         return yaml.dump(json_dict, sort_keys=sort_keys, width=width)
 
     @staticmethod
@@ -510,8 +516,7 @@ class Utils:
     def to_dict(obj: Optional[BaseModel], default=None) -> Dict:
         if obj is None:
             return default
-        json_str = Utils.to_json(obj)
-        return Utils.from_json(json_str)
+        return ModelUtils.to_jsonable(obj)
 
     @staticmethod
     def is_binary_file(file: str) -> bool:
@@ -543,10 +543,7 @@ class VirtualDesktopAdminAPI(VirtualDesktopAPI):
         old_software_stack.projects = new_software_stack.projects
 
         new_software_stack = self.software_stack_db.update(old_software_stack)
-        ss_projects = []
-        for project in new_software_stack.projects:
-            ss_projects.append(self.context.projects_client.get_project(GetProjectRequest(project_id=project.project_id)).project)
-        new_software_stack.projects = ss_projects
+        new_software_stack.projects = self.software_stack_db.get_projects([project.project_id for project in new_software_stack.projects])
         context.success(UpdateSoftwareStackResponse(
             software_stack=new_software_stack
         ))
@@ -317,12 +317,15 @@ class VirtualDesktopAPI(BaseAPI):
 
                 if project_budget_name:
                     self._logger.debug(f"Found Budget name: {project_budget_name}")
-                    project_budget = self.context.aws_util().budgets_get_budget(budget_name=project_budget_name)
+                    budgets_snapshot = self.context.budgets_snapshot
+                    project_budget = budgets_snapshot.get_budget(budget_name=project_budget_name)
+                    if budgets_snapshot.is_stale():
+                        self._logger.warning(f"Budgets snapshot is stale ({budgets_snapshot.get_staleness_seconds()} seconds). Checking budget with the last known spend.")
 
                     if Utils.is_not_empty(project_budget):
                         self._logger.debug(f"Budget details: {project_budget}")
 
-                        if project_budget.actual_spend > project_budget.budget_limit:
+                        if budgets_snapshot.is_over_soft_threshold(project_budget):
                             self._logger.error(f"Budget exceeded. Denying session request")
                             session.failure_reason = f"Project {project_budget_name} budget has been exceeded. Unable to start session. Contact your Administrator."
                             return session, False
@@ -645,7 +648,7 @@ class VirtualDesktopAPI(BaseAPI):
         if Utils.is_empty(sessions):
             return [], []
         sessions_list = [session.dict() for session in sessions]
-        success_response_list, failure_response_list =  vdi_management.stop_sessions(sessions_list)
+        success_response_list, failure_response_list =  vdi_management.bulk_stop_sessions(sessions_list)
         success_list = []
         failure_list = []
         for session in success_response_list:
@@ -659,7 +662,7 @@ class VirtualDesktopAPI(BaseAPI):
         if not sessions:
             return [], []
         sessions_list = [session.dict() for session in sessions]
-        success_response_list, failure_response_list =  vdi_management.terminate_sessions(sessions_list)
+        success_response_list, failure_response_list =  vdi_management.bulk_terminate_sessions(sessions_list)
         success_list = []
         failure_list = []
         for session in success_response_list:
@@ -748,13 +751,16 @@ class VirtualDesktopAPI(BaseAPI):
 
         for listing_filter in request.filters:
             if listing_filter.key == SESSION_PERMISSIONS_FILTER_SESSION_ID_KEY:
-                listing_filter.value = idea_session_id
+                # exact match on the table hash key, so that the permissions are queried instead of scanned
+                listing_filter.eq = idea_session_id
+                listing_filter.value = None
+                listing_filter.like = None
                 session_filter_found = True
 
         if not session_filter_found:
             request.add_filter(SocaFilter(
                 key=SESSION_PERMISSIONS_FILTER_SESSION_ID_KEY,
-                value=idea_session_id
+                eq=idea_session_id
             ))
 
         return self.session_permissions_db.list_session_permissions(request)
@@ -766,13 +772,16 @@ class VirtualDesktopAPI(BaseAPI):
 
         for listing_filter in request.filters:
             if listing_filter.key == SESSION_PERMISSIONS_FILTER_ACTOR_KEY:
-                listing_filter.value = username
+                # exact match on the actor index hash key, so that the permissions are queried instead of scanned
+                listing_filter.eq = username
+                listing_filter.value = None
+                listing_filter.like = None
                 actor_filter_found = True
 
         if not actor_filter_found:
             request.add_filter(SocaFilter(
                 key=SESSION_PERMISSIONS_FILTER_ACTOR_KEY,
-                value=username
+                eq=username
             ))
 
         return self.session_permissions_db.list_session_permissions(request)
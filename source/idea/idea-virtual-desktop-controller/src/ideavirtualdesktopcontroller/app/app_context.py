@@ -14,6 +14,7 @@ from typing import Optional
 
 from ideadatamodel import constants
 from ideasdk.auth import TokenService, ApiAuthorizationServiceBase
+from ideasdk.aws import BudgetsSnapshotService
 from ideasdk.client import NotificationsAsyncClient, ProjectsClient, AccountsClient, RolesClient, RoleAssignmentsClient
 from ideasdk.context import SocaContext, SocaContextOptions
 from ideasdk.service import SocaService
@@ -34,6 +35,9 @@ class VirtualDesktopControllerAppContext(SocaContext):
         self.dcv_broker_client: Optional[DCVClientProtocol] = None
         self.event_queue_monitor_service: Optional[SocaService] = None
         self.controller_queue_monitor_service: Optional[SocaService] = None
+        self.session_reconciler: Optional[SocaService] = None
+        self.project_catalog: Optional[SocaService] = None
+        self.budgets_snapshot: Optional[BudgetsSnapshotService] = None
         self.projects_client: Optional[ProjectsClient] = None
         self.roles_client: Optional[RolesClient] = None
         self.role_assignments_client: Optional[RoleAssignmentsClient] = None
@@ -134,10 +134,16 @@ class DCVBrokerClient(DCVClientProtocol):
         if Utils.is_empty(session_ids):
             session_ids = None
 
+        # follow next_token so that a single call covers all requested sessions
         response = self._describe_sessions(session_ids=session_ids)
         sessions = {}
-        for session in Utils.get_value_as_list("sessions", response, []):
-            sessions[session["id"]] = session
+        while True:
+            for session in Utils.get_value_as_list("sessions", response, []):
+                sessions[session["id"]] = session
+            next_token = Utils.get_value_as_string("next_token", response, None)
+            if Utils.is_empty(next_token):
+                break
+            response = self._describe_sessions(session_ids=session_ids, next_token=next_token)
         response["sessions"] = sessions
         return response
 
@@ -8,10 +8,10 @@
 #  or in the 'license' file accompanying this file. This file is distributed on an 'AS IS' BASIS, WITHOUT WARRANTIES
 #  OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions
 #  and limitations under the License.
-from typing import Optional
+from typing import List, Optional
 
 import ideavirtualdesktopcontroller
-from ideadatamodel import DayOfWeek
+from ideadatamodel import DayOfWeek, VirtualDesktopSchedule, VirtualDesktopSession, VirtualDesktopSessionState
 
 from ideasdk.utils import DateTimeUtils, Utils
 from ideavirtualdesktopcontroller.app.clients.events_client.events_client import VirtualDesktopEvent
@@ -39,9 +39,14 @@ class ScheduledEventHandler(BaseVirtualDesktopControllerEventHandler):
         self.log_info(message_id=message_id, message=f'Handling scheduled event at time {event_time} in {self.context.cluster_timezone()}')
         day_of_week = self.DAY_OF_WEEKS[event_time.weekday()]
         schedule_db_entries = self.schedule_db.get_schedules_for_day_of_week(day_of_week)
+        schedules_to_stop: List[VirtualDesktopSchedule] = []
         for schedule_db_entry in schedule_db_entries:
+            if self.schedule_utils.is_shut_down_due(event_time.time(), schedule_db_entry):
+                schedules_to_stop.append(schedule_db_entry)
+                continue
             self.log_info(message_id=message_id, message=f'Triggering schedule {schedule_db_entry.schedule_id}')
             self.schedule_utils.trigger_schedule(event_time.time(), schedule_db_entry)
+        self._stop_scheduled_sessions(message_id, schedules_to_stop)
 
         cursor: Optional[str] = None
         loop_break = False
@@ -61,3 +66,34 @@ class ScheduledEventHandler(BaseVirtualDesktopControllerEventHandler):
                 idea_session_id=session_info[0],
                 idea_session_owner=session_info[1],
             )
+
+    def _stop_scheduled_sessions(self, message_id: str, schedules: List[VirtualDesktopSchedule]):
+        """
+        check the CPU utilization of the sessions to stop using multi-instance SSM commands, instead of one command per session.
+        the sessions which can not be checked in bulk are stopped using a scheduled stop event, as for a single schedule.
+        """
+        sessions_to_check: List[VirtualDesktopSession] = []
+        schedules_to_publish: List[VirtualDesktopSchedule] = []
+        for schedule in schedules:
+            self.log_info(message_id=message_id, message=f'Triggering schedule {schedule.schedule_id}')
+            session = self.session_db.get_from_db(idea_session_id=schedule.idea_session_id, idea_session_owner=schedule.idea_session_owner)
+            if Utils.is_empty(session) or session.state != VirtualDesktopSessionState.READY:
+                schedules_to_publish.append(schedule)
+                continue
+            sessions_to_check.append(session)
+
+        if Utils.is_not_empty(sessions_to_check):
+            _, failed = self.ssm_commands_utils.submit_ssm_commands_to_get_cpu_utilization(sessions_to_check)
+            for session in sessions_to_check:
+                if session.server.instance_id in failed:
+                    self.log_error(message_id=message_id, message=f'Failed to check CPU Utilization for RES Session ID: {session.idea_session_id}: {failed[session.server.instance_id]}')
+                    self.events_utils.publish_idea_session_scheduled_stop_event(
+                        idea_session_id=session.idea_session_id,
+                        idea_session_owner=session.owner
+                    )
+
+        for schedule in schedules_to_publish:
+            self.events_utils.publish_idea_session_scheduled_stop_event(
+                idea_session_id=schedule.idea_session_id,
+                idea_session_owner=schedule.idea_session_owner
+            )
@@ -16,12 +16,9 @@ from ideadatamodel import (
 from ideasdk.utils import Utils
 from ideavirtualdesktopcontroller.app.clients.events_client.events_client import VirtualDesktopEvent
 from ideavirtualdesktopcontroller.app.events.handlers.base_event_handler import BaseVirtualDesktopControllerEventHandler
-from ideavirtualdesktopcontroller.app.sessions.virtual_desktop_session_counters_db import VirtualDesktopSessionCounterType
 
 
 class ValidateDCVSessionCreationEventHandler(BaseVirtualDesktopControllerEventHandler):
-    VALIDATION_REQUEST_THRESHOLD = 30
-    SESSION_DELETED_THRESHOLD = 4
 
     def __init__(self, context: ideavirtualdesktopcontroller.AppContext):
         super().__init__(context, 'validate-session-creation-handler')
@@ -43,46 +40,10 @@ class ValidateDCVSessionCreationEventHandler(BaseVirtualDesktopControllerEventHa
             self.log_error(message_id=message_id, message='Invalid RES Session ID.')
             return
 
-        counter_db_entry = self.session_counter_db.get(session.idea_session_id, VirtualDesktopSessionCounterType.VALIDATE_DCV_SESSION_CREATED_COUNTER)
         if session.state in {VirtualDesktopSessionState.DELETING, VirtualDesktopSessionState.DELETED}:
             # session is being deleted, stop validation.
             self.log_info(message_id=message_id, message=f'RES Session ID: {session.idea_session_id}:{session.name} is being deleted; state: {session.state}. Ignoring Validation.')
-            self.session_counter_db.delete(counter_db_entry)
             return
 
-        response = self.context.dcv_broker_client.describe_sessions([session])
-        current_session_info = Utils.get_value_as_dict(session.dcv_session_id, Utils.get_value_as_dict("sessions", response, {}), {})
-        state = Utils.get_value_as_string("state", current_session_info, None)
-
-        should_delete_message = True
-        should_not_delete_message_text = ''
-
-        if state == 'READY':
-            # session is stable.
-            self.log_info(message_id=message_id, message=f'RES Session ID: {session.idea_session_id}:{session.name} is stable with state: {state}. Validation complete. Moving to ready state')
-            session.state = VirtualDesktopSessionState.READY
-            _ = self.session_db.update(session)
-            self.session_counter_db.delete(counter_db_entry)
-        elif counter_db_entry.counter > self.SESSION_DELETED_THRESHOLD and state == 'DELETED':
-            # session creation failed. Error state.
-            session.state = VirtualDesktopSessionState.ERROR
-            session = self.session_db.update(session)
-            self.log_error(message_id=message_id, message=f'RES Session ID: creation failed {session.idea_session_id}:{session.name} Validation ERROR. count: {counter_db_entry.counter}')
-        elif state == 'UNKNOWN' or counter_db_entry.counter > self.VALIDATION_REQUEST_THRESHOLD:
-            # error
-            session.state = VirtualDesktopSessionState.ERROR
-            session = self.session_db.update(session)
-            self.log_error(message_id=message_id, message=f'RES Session ID: {session.idea_session_id}:{session.name} is not stable with state: {state}. Validation ERROR. count: {counter_db_entry.counter}')
-        elif session.state is VirtualDesktopSessionState.STOPPING:
-            self.log_error(message_id=message_id, message=f'RES Session ID: {session.idea_session_id}:{session.name} is currently stopping. IGNORING the validation')
-        else:
-            counter_db_entry.counter = counter_db_entry.counter + 1
-            if session.state != VirtualDesktopSessionState.INITIALIZING:
-                session.state = VirtualDesktopSessionState.INITIALIZING
-                _ = self.session_db.update(session)
-            self.session_counter_db.create_or_update(counter_db_entry)
-            should_delete_message = False
-            should_not_delete_message_text = f'RES Session ID: {session.idea_session_id}:{session.name} is not stable with state: {state}. {counter_db_entry.counter} times already validated. Will continue to validate'
-
-        if not should_delete_message:
-            raise self.do_not_delete_message_exception(should_not_delete_message_text)
+        # the broker state is polled for all sessions being validated in a single call by the session reconciler
+        self.context.session_reconciler.track_creation(session)
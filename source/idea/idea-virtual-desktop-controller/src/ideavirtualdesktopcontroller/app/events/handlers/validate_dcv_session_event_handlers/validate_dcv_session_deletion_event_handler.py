@@ -11,38 +11,18 @@
 
 import ideavirtualdesktopcontroller
 from ideadatamodel import (
-    VirtualDesktopSessionState,
-    VirtualDesktopSession
+    VirtualDesktopSessionState
 )
 from ideasdk.utils import Utils
 
 from ideavirtualdesktopcontroller.app.clients.events_client.events_client import VirtualDesktopEvent
 from ideavirtualdesktopcontroller.app.events.handlers.base_event_handler import BaseVirtualDesktopControllerEventHandler
-from res.resources import vdi_management, session_permissions
-from res.resources import sessions as user_sessions
 
 class ValidateDCVSessionDeletionEventHandler(BaseVirtualDesktopControllerEventHandler):
 
     def __init__(self, context: ideavirtualdesktopcontroller.AppContext):
         super().__init__(context, 'validate-dcv-session-deletion-handler')
 
-    def _continue_stop_session(self, message_id: str, session: VirtualDesktopSession):
-        session.server.is_idle = session.is_idle if session.is_idle else False
-        if session.hibernation_enabled:
-            self.log_debug(message_id=message_id, message=f'Continuing to hibernate session... {session.idea_session_id}:{session.name}')
-            vdi_management.hibernate_servers(servers=[session.server.dict()])
-        else:
-            self.log_debug(message_id=message_id, message=f'Continuing to stop session... {session.idea_session_id}:{session.name}')
-            vdi_management.stop_servers(servers=[session.server.dict()])
-
-    def _continue_delete_session(self, message_id: str, session: VirtualDesktopSession):
-        self.log_info(message_id=message_id, message=f'Continuing to delete session... {session.idea_session_id}:{session.name}')
-        vdi_management.delete_schedule_for_session(session=session.dict())
-        session_permissions.delete_session_permission_by_id(session_id=session.idea_session_id)
-        # delete session entry
-        user_sessions.delete_session(session=session.dict())
-        vdi_management.terminate_servers([session.server.dict()])
-
     def handle_event(self, message_id: str, sender_id: str, event: VirtualDesktopEvent):
         if not self.is_sender_controller_role(sender_id) and not self.is_sender_vdi_helper_lambda(sender_id):
             raise self.message_source_validation_failed(f'Corrupted sender_id: {sender_id}. Ignoring message')
@@ -64,18 +44,5 @@ class ValidateDCVSessionDeletionEventHandler(BaseVirtualDesktopControllerEventHa
             self.log_info(message_id=message_id, message=f'RES Session ID: {session.idea_session_id} in state {session.state}. NO=OP. Returning.')
             return
 
-        response = self.context.dcv_broker_client.describe_sessions([session])
-        current_session_info = Utils.get_value_as_dict(session.dcv_session_id, Utils.get_value_as_dict("sessions", response, {}), {})
-        state = Utils.get_value_as_string("state", current_session_info, None)
-
-        if Utils.is_empty(state) or state == 'DELETED' or state == 'UNKNOWN':
-            # session is deleted. We can continue.
-            self.log_info(message_id=message_id, message=f'RES Session ID: {session.idea_session_id}:{session.name} is deleted with state: {state}. Validation complete.')
-            if session.state is VirtualDesktopSessionState.DELETING:
-                self._continue_delete_session(message_id, session)
-            elif session.state is VirtualDesktopSessionState.STOPPING:
-                self._continue_stop_session(message_id, session)
-            else:
-                self.log_info(message_id=message_id, message=f'State not being handled: {session.state}. Will not handle.')
-        else:
-            raise self.do_not_delete_message_exception(f'RES Session ID: {session.idea_session_id}:{session.name} is not deleted with state: {state}. Not doing anything will try again.')
+        # the broker state is polled for all sessions being validated in a single call by the session reconciler
+        self.context.session_reconciler.track_deletion(session)
@@ -17,6 +17,7 @@ from ideasdk.service import SocaService
 from ideasdk.utils import Utils
 from ideavirtualdesktopcontroller.app.events.events_utils import EventsUtils
 from ideavirtualdesktopcontroller.app.servers.virtual_desktop_server_db import VirtualDesktopServerDB
+from ideavirtualdesktopcontroller.app.ssm_commands import constants as ssm_commands_constants
 from ideavirtualdesktopcontroller.app.ssm_commands.virtual_desktop_ssm_commands_db import VirtualDesktopSSMCommandsDB, VirtualDesktopSSMCommandType
 
 
@@ -53,6 +54,22 @@ class ControllerQueueMonitorService(SocaService):
             return
         self._events_utils.publish_user_disabled_event(username=username)
 
+    def _handle_project_event(self, message_id: str, message: SocaEnvelope):
+        project_id = Utils.get_value_as_string('project_id', message.payload, None)
+        if Utils.is_empty(project_id):
+            return
+        project_catalog = self.context.project_catalog
+        if project_catalog is None:
+            return
+        try:
+            if message.header.namespace == 'Projects.ProjectDeletedEvent':
+                project_catalog.remove_project(project_id)
+            else:
+                project_catalog.refresh_project(project_id)
+        except Exception as e:
+            # the project is picked up by the next refresh of the catalog
+            self._logger.warning(f'[msg-id: {message_id}] failed to refresh project catalog for project id: {project_id} - {e}')
+
     def _handle_scheduled_event(self, message_id: str, message_body: dict):
         detail_type = Utils.get_value_as_string('detail-type', message_body, None)
         if detail_type != 'Scheduled Event':
@@ -78,6 +95,8 @@ class ControllerQueueMonitorService(SocaService):
                 event = SocaEnvelope(**message_body)
                 if event.header.namespace == 'Accounts.UserDisabledEvent':
                     self._handle_user_disabled_event(message_id, event)
+                elif event.header.namespace in ('Projects.ProjectCreatedEvent', 'Projects.ProjectUpdatedEvent', 'Projects.ProjectDeletedEvent'):
+                    self._handle_project_event(message_id, event)
                 else:
                     self._logger.error(f'Invalid message with header: {event.header} received. Not handling. NP=OP')
             else:
@@ -138,37 +157,48 @@ class ControllerQueueMonitorService(SocaService):
 
         self._logger.info(f'[msg-id: {message_id}] Handling SSM Command message for command id {command_id}')
 
+        payload = ssm_command.additional_payload
+        instances = Utils.get_value_as_dict(ssm_commands_constants.SSM_COMMANDS_DB_COMMAND_INSTANCES_KEY, payload)
+        if instances is not None:
+            # command sent to multiple instances. the notification is for the invocation of a single instance.
+            instance_id = Utils.get_value_as_string('instanceId', message, None)
+            payload = Utils.get_value_as_dict(instance_id, instances) if Utils.is_not_empty(instance_id) else None
+            if Utils.is_empty(payload):
+                self._logger.error(f'[msg-id: {message_id}] Invalid instance id: {instance_id} for SSM Command ID: {command_id}')
+                return
+            self._ssm_commands_db.update_instance_status(command_id=command_id, instance_id=instance_id, status=status)
+
         if ssm_command.command_type == VirtualDesktopSSMCommandType.RESUME_SESSION:
             self._events_utils.publish_resume_session_command_status_event(
-                idea_session_id=Utils.get_value_as_string('idea_session_id', ssm_command.additional_payload, ''),
-                idea_session_owner=Utils.get_value_as_string('idea_session_owner', ssm_command.additional_payload, ''),
+                idea_session_id=Utils.get_value_as_string('idea_session_id', payload, ''),
+                idea_session_owner=Utils.get_value_as_string('idea_session_owner', payload, ''),
                 command_id=command_id,
-                instance_id=Utils.get_value_as_string('instance_id', ssm_command.additional_payload, ''),
+                instance_id=Utils.get_value_as_string('instance_id', payload, ''),
                 status=status
             )
         elif ssm_command.command_type == VirtualDesktopSSMCommandType.WINDOWS_ENABLE_USERDATA_EXECUTION:
             self._events_utils.publish_enable_userdata_windows_status_event(
-                idea_session_id=Utils.get_value_as_string('idea_session_id', ssm_command.additional_payload, ''),
-                idea_session_owner=Utils.get_value_as_string('idea_session_owner', ssm_command.additional_payload, ''),
+                idea_session_id=Utils.get_value_as_string('idea_session_id', payload, ''),
+                idea_session_owner=Utils.get_value_as_string('idea_session_owner', payload, ''),
                 command_id=command_id,
-                instance_id=Utils.get_value_as_string('instance_id', ssm_command.additional_payload, ''),
+                instance_id=Utils.get_value_as_string('instance_id', payload, ''),
                 status=status,
-                software_stack_id=Utils.get_value_as_string('software_stack_id', ssm_command.additional_payload, ''),
+                software_stack_id=Utils.get_value_as_string('software_stack_id', payload, ''),
             )
         elif ssm_command.command_type == VirtualDesktopSSMCommandType.WINDOWS_DISABLE_USERDATA_EXECUTION:
             self._events_utils.publish_disable_userdata_windows_status_event(
-                idea_session_id=Utils.get_value_as_string('idea_session_id', ssm_command.additional_payload, ''),
-                idea_session_owner=Utils.get_value_as_string('idea_session_owner', ssm_command.additional_payload, ''),
+                idea_session_id=Utils.get_value_as_string('idea_session_id', payload, ''),
+                idea_session_owner=Utils.get_value_as_string('idea_session_owner', payload, ''),
                 command_id=command_id,
-                instance_id=Utils.get_value_as_string('instance_id', ssm_command.additional_payload, ''),
+                instance_id=Utils.get_value_as_string('instance_id', payload, ''),
                 status=status
             )
         elif ssm_command.command_type == VirtualDesktopSSMCommandType.CPU_UTILIZATION_CHECK_STOP_SCHEDULED_SESSION:
             self._events_utils.publish_idea_session_cpu_utilization_command_status_event(
-                idea_session_id=Utils.get_value_as_string('idea_session_id', ssm_command.additional_payload, ''),
-                idea_session_owner=Utils.get_value_as_string('idea_session_owner', ssm_command.additional_payload, ''),
+                idea_session_id=Utils.get_value_as_string('idea_session_id', payload, ''),
+                idea_session_owner=Utils.get_value_as_string('idea_session_owner', payload, ''),
                 command_id=command_id,
-                instance_id=Utils.get_value_as_string('instance_id', ssm_command.additional_payload, ''),
+                instance_id=Utils.get_value_as_string('instance_id', payload, ''),
                 status=status
             )
         else:
@@ -15,11 +15,13 @@ import yaml
 import ideavirtualdesktopcontroller
 from ideadatamodel import exceptions, VirtualDesktopPermissionProfile, ListPermissionProfilesRequest, ListPermissionProfilesResponse, SocaPaginator, VirtualDesktopPermission
 from ideasdk.utils import Utils
+from ideasdk.dynamodb.dynamodb_filter_compiler import DynamoDBFilterCompiler
 from ideavirtualdesktopcontroller.app.permission_profiles import constants as permission_profiles_constants
 from ideavirtualdesktopcontroller.app.virtual_desktop_notifiable_db import VirtualDesktopNotifiableDB
 
 
 class VirtualDesktopPermissionProfileDB(VirtualDesktopNotifiableDB):
+    filter_compiler = DynamoDBFilterCompiler(hash_key=permission_profiles_constants.PERMISSION_PROFILE_DB_HASH_KEY)
 
     def __init__(self, context: ideavirtualdesktopcontroller.AppContext):
         self.context = context
@@ -132,38 +134,20 @@ class VirtualDesktopPermissionProfileDB(VirtualDesktopNotifiableDB):
         return self.convert_db_dict_to_permission_profile_object(db_entry)
 
     def list(self, request: ListPermissionProfilesRequest) -> ListPermissionProfilesResponse:
-        list_request = {}
-        if Utils.is_not_empty(request.cursor):
-            last_evaluated_key = Utils.from_json(Utils.base64_decode(request.cursor))
-            if Utils.is_not_empty(last_evaluated_key):
-                list_request['ExclusiveStartKey'] = last_evaluated_key
-
-        list_filter = None
-        if Utils.is_not_empty(request.filters):
-            list_filter = {}
-            for filter_ in request.filters:
-                if filter_.eq is not None:
-                    list_filter[filter_.key] = {'AttributeValueList': [filter_.eq], 'ComparisonOperator': 'EQ'}
-                if filter_.like is not None:
-                    list_filter[filter_.key] = {'AttributeValueList': [filter_.like], 'ComparisonOperator': 'CONTAINS'}
-        if list_filter is not None:
-            list_request['ScanFilter'] = list_filter
-
-        list_result = self._table.scan(**list_request)
-        profile_entries = Utils.get_value_as_list('Items', list_result, [])
+        list_result = self.filter_compiler.list(
+            table=self._table,
+            filters=request.filters,
+            cursor=request.cursor
+        )
+        profile_entries = list_result.items
         result = []
         for profile in profile_entries:
             result.append(self.convert_db_dict_to_permission_profile_object(profile))
 
-        response_cursor = None
-        last_evaluated_key = Utils.get_any_value('LastEvaluatedKey', list_result)
-        if last_evaluated_key is not None:
-            response_cursor = Utils.base64_encode(Utils.to_json(last_evaluated_key))
-
         return ListPermissionProfilesResponse(
             listing=result,
             paginator=SocaPaginator(
-                cursor=response_cursor
+                cursor=list_result.cursor
             )
         )
 
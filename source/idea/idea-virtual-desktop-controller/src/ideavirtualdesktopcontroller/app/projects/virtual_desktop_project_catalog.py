@@ -0,0 +1,179 @@
+#  Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance
+#  with the License. A copy of the License is located at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  or in the 'license' file accompanying this file. This file is distributed on an 'AS IS' BASIS, WITHOUT WARRANTIES
+#  OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions
+#  and limitations under the License.
+
+from threading import Thread, Event, RLock
+from typing import Optional, Dict, List
+
+import ideavirtualdesktopcontroller
+from ideadatamodel import (
+    errorcodes,
+    exceptions,
+    GetProjectRequest,
+    ListProjectsRequest,
+    Project,
+    SocaPaginator
+)
+from ideasdk.client import ProjectsClient
+from ideasdk.service import SocaService
+from ideasdk.utils import Utils
+
+DEFAULT_REFRESH_INTERVAL_SECONDS = 900
+LIST_PROJECTS_PAGE_SIZE = 100
+
+
+class VirtualDesktopProjectCatalog(SocaService):
+    """
+    in-memory catalog of all projects, used to resolve the projects attached to software stacks without calling
+    the cluster manager for every project.
+
+    the catalog is loaded at startup and kept fresh by the project created, updated and deleted events published by the
+    cluster manager to the controller queue. the full catalog is re-loaded every refresh_interval_seconds, to pick up changes
+    missed by this controller instance (events are delivered to one instance only).
+    a project missing from the catalog is read from the cluster manager and added to the catalog.
+    """
+
+    def __init__(self, context: ideavirtualdesktopcontroller.AppContext, projects_client: Optional[ProjectsClient] = None):
+        super().__init__(context)
+        self.context = context
+        self._logger = context.logger('virtual-desktop-project-catalog')
+        self._projects_client = projects_client
+
+        self._projects: Dict[str, Project] = {}
+        self._lock = RLock()
+        self._loaded = False
+
+        self._is_running = False
+        self._service_thread: Optional[Thread] = None
+        self._exit = Event()
+
+        self.refresh_interval_seconds = context.config().get_int('virtual-desktop-controller.controller.project_catalog.refresh_interval_seconds', default=DEFAULT_REFRESH_INTERVAL_SECONDS)
+
+    @property
+    def projects_client(self) -> ProjectsClient:
+        if self._projects_client is None:
+            return self.context.projects_client
+        return self._projects_client
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._loaded
+
+    def load(self):
+        """
+        load all projects from the cluster manager and replace the contents of the catalog
+        """
+        projects: Dict[str, Project] = {}
+        cursor = None
+        while True:
+            result = self.projects_client.list_projects(ListProjectsRequest(
+                paginator=SocaPaginator(page_size=LIST_PROJECTS_PAGE_SIZE, cursor=cursor)
+            ))
+            for project in Utils.get_as_list(result.listing, []):
+                projects[project.project_id] = project
+            cursor = result.paginator.cursor if result.paginator is not None else None
+            if Utils.is_empty(cursor):
+                break
+
+        with self._lock:
+            self._projects = projects
+            self._loaded = True
+        self._logger.info(f'loaded {len(projects)} projects')
+
+    def get_project(self, project_id: str) -> Optional[Project]:
+        """
+        get the project from the catalog, or from the cluster manager if the project is not in the catalog
+        :return: the project, or None if the project does not exist
+        """
+        if Utils.is_empty(project_id):
+            return None
+        with self._lock:
+            project = self._projects.get(project_id)
+        if project is not None:
+            return project
+        return self.refresh_project(project_id)
+
+    def get_projects(self, project_ids: List[str]) -> List[Project]:
+        """
+        resolve the projects for the given project ids, preserving the order of project_ids.
+        projects that do not exist are skipped.
+        """
+        result = []
+        missing = []
+        with self._lock:
+            for project_id in project_ids:
+                project = self._projects.get(project_id)
+                if project is None:
+                    missing.append(project_id)
+                result.append(project)
+
+        if len(missing) > 0:
+            for project_id in missing:
+                self.refresh_project(project_id)
+            with self._lock:
+                result = [self._projects.get(project_id) for project_id in project_ids]
+
+        return [project for project in result if project is not None]
+
+    def refresh_project(self, project_id: str) -> Optional[Project]:
+        """
+        read the project from the cluster manager and update the catalog. the project is removed from the catalog if it does
+        not exist anymore.
+        """
+        if Utils.is_empty(project_id):
+            return None
+        try:
+            project = self.projects_client.get_project(GetProjectRequest(project_id=project_id), use_cache=False).project
+        except exceptions.SocaException as e:
+            if e.error_code == errorcodes.PROJECT_NOT_FOUND:
+                self.remove_project(project_id)
+                return None
+            raise e
+
+        with self._lock:
+            self._projects[project_id] = project
+        return project
+
+    def remove_project(self, project_id: str):
+        with self._lock:
+            self._projects.pop(project_id, None)
+
+    def get_project_count(self) -> int:
+        with self._lock:
+            return len(self._projects)
+
+    def _refresh_loop(self):
+        while not self._exit.wait(self.refresh_interval_seconds):
+            try:
+                self.load()
+            except Exception as e:
+                self._logger.exception(f'failed to refresh project catalog: {e}')
+
+    def start(self):
+        if self._is_running:
+            return
+        try:
+            self.load()
+        except Exception as e:
+            # the catalog is filled on demand until the next refresh succeeds
+            self._logger.exception(f'failed to load project catalog: {e}')
+        self._service_thread = Thread(
+            name='project-catalog-thread',
+            target=self._refresh_loop
+        )
+        self._service_thread.start()
+        self._is_running = True
+
+    def stop(self):
+        self._logger.info('stopping virtual-desktop-project-catalog ...')
+        self._exit.set()
+        self._is_running = False
+        if self._service_thread is not None:
+            self._service_thread.join()
@@ -10,6 +10,7 @@
 #  and limitations under the License.
 
 from datetime import date, datetime, time, timedelta
+from typing import Tuple
 
 import ideavirtualdesktopcontroller
 from ideadatamodel import VirtualDesktopSession, DayOfWeek, VirtualDesktopSchedule, VirtualDesktopScheduleType, VirtualDesktopWeekSchedule
@@ -219,7 +220,12 @@ class VirtualDesktopScheduleUtils:
         self._delete_schedule(schedule=session.schedule.saturday)
         self._delete_schedule(schedule=session.schedule.sunday)
 
-    def trigger_schedule(self, event_time: time, schedule: VirtualDesktopSchedule):
+    def is_shut_down_due(self, event_time: time, schedule: VirtualDesktopSchedule) -> bool:
+        _, should_stop = self._get_schedule_transition(event_time, schedule)
+        return should_stop
+
+    @staticmethod
+    def _get_schedule_transition(event_time: time, schedule: VirtualDesktopSchedule) -> Tuple[bool, bool]:
         if schedule.schedule_type == VirtualDesktopScheduleType.NO_SCHEDULE:
             pass
 
@@ -247,6 +253,11 @@ class VirtualDesktopScheduleUtils:
         else:
             pass
 
+        return should_resume, should_stop
+
+    def trigger_schedule(self, event_time: time, schedule: VirtualDesktopSchedule):
+        should_resume, should_stop = self._get_schedule_transition(event_time, schedule)
+
         if not should_resume and not should_stop:
             # No Action to take.
             return
@@ -13,6 +13,9 @@ SESSION_PERMISSIONS_DB_ACTOR_TYPE_KEY = 'actor_type'
 SESSION_PERMISSIONS_DB_EXPIRY_DATE_KEY = 'expiry_date'
 SESSION_PERMISSIONS_DB_CREATED_ON_KEY = 'created_on'
 SESSION_PERMISSIONS_DB_UPDATED_ON_KEY = 'updated_on'
+SESSION_PERMISSIONS_DB_GSI_ACTOR = 'actor-index'
+SESSION_PERMISSIONS_DB_GSI_ACTOR_HASH_KEY = SESSION_PERMISSIONS_DB_RANGE_KEY
+SESSION_PERMISSIONS_DB_GSI_ACTOR_RANGE_KEY = SESSION_PERMISSIONS_DB_HASH_KEY
 
 SESSION_PERMISSIONS_FILTER_ACTOR_KEY = SESSION_PERMISSIONS_DB_RANGE_KEY
 SESSION_PERMISSIONS_FILTER_SESSION_ID_KEY = SESSION_PERMISSIONS_DB_HASH_KEY
@@ -9,7 +9,7 @@
 #  OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions
 #  and limitations under the License.
 
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 from boto3.dynamodb.conditions import Key
 
 import ideavirtualdesktopcontroller
@@ -27,6 +27,7 @@ from ideadatamodel import (
 )
 
 from ideasdk.utils import Utils
+from ideasdk.dynamodb.dynamodb_filter_compiler import DynamoDBFilterCompiler, DynamoDBIndex
 from ideavirtualdesktopcontroller.app.session_permissions import constants as session_permissions_constants
 from ideavirtualdesktopcontroller.app.virtual_desktop_notifiable_db import VirtualDesktopNotifiableDB
 
@@ -34,6 +35,19 @@ from ideavirtualdesktopcontroller.app.virtual_desktop_notifiable_db import Virtu
 class VirtualDesktopSessionPermissionDB(VirtualDesktopNotifiableDB):
     DEFAULT_PAGE_SIZE = 10
 
+    # an eq filter on idea_session_id queries the table, an eq filter on actor_name queries the actor index
+    filter_compiler = DynamoDBFilterCompiler(
+        hash_key=session_permissions_constants.SESSION_PERMISSIONS_DB_HASH_KEY,
+        range_key=session_permissions_constants.SESSION_PERMISSIONS_DB_RANGE_KEY,
+        indexes=[
+            DynamoDBIndex(
+                hash_key=session_permissions_constants.SESSION_PERMISSIONS_DB_GSI_ACTOR_HASH_KEY,
+                range_key=session_permissions_constants.SESSION_PERMISSIONS_DB_GSI_ACTOR_RANGE_KEY,
+                index_name=session_permissions_constants.SESSION_PERMISSIONS_DB_GSI_ACTOR
+            )
+        ]
+    )
+
     def __init__(self, context: ideavirtualdesktopcontroller.AppContext):
         self.context = context
         self._logger = self.context.logger('virtual-desktop-session-permissions-db')
@@ -189,7 +203,7 @@ class VirtualDesktopSessionPermissionDB(VirtualDesktopNotifiableDB):
 
         return self.convert_db_dict_to_session_permission_object(db_entry)
 
-    def list_all_from_db(self, cursor: str) -> (List[VirtualDesktopSessionPermission], Optional[str]):
+    def list_all_from_db(self, cursor: str) -> Tuple[List[VirtualDesktopSessionPermission], Optional[str]]:
         scan_request = {}
         if Utils.is_not_empty(cursor):
             scan_request = {
@@ -215,47 +229,34 @@ class VirtualDesktopSessionPermissionDB(VirtualDesktopNotifiableDB):
             return permissions, response_cursor
         
     def list_session_permissions(self, request: ListPermissionsRequest) -> ListPermissionsResponse:
-        list_request = {}
-  
-        exclusive_start_key = None
-        if Utils.is_not_empty(request.cursor):
-            exclusive_start_key = Utils.from_json(Utils.base64_decode(request.cursor))
-        if exclusive_start_key is not None:
-             list_request['ExclusiveStartKey'] = exclusive_start_key
-             
-        scan_filter = None
-        if Utils.is_not_empty(request.filters):
-            scan_filter = {}
-            for filter_ in request.filters:
-                if filter_.eq is not None:
-                    scan_filter[filter_.key] = {
-                        'AttributeValueList': [filter_.eq],
-                        'ComparisonOperator': 'EQ'
-                    }
-                if filter_.value is not None:
-                    scan_filter[filter_.key] = {
-                        'AttributeValueList': [filter_.value],
-                        'ComparisonOperator': 'CONTAINS'
-                    }
-                if filter_.like is not None:
-                    scan_filter[filter_.key] = {
-                        'AttributeValueList': [filter_.like],
-                        'ComparisonOperator': 'CONTAINS'
-                    }
-        if scan_filter is not None:
-            list_request['ScanFilter'] = scan_filter
-             
-        list_result = self._table.scan(**list_request)
-        
-        session_permissions_entries = list_result.get('Items', [])
-        result = [self.convert_db_dict_to_session_permission_object(session_permission) for session_permission in session_permissions_entries]
-        
-        exclusive_start_key = list_result.get("LastEvaluatedKey")
-        response_cursor = Utils.base64_encode(Utils.to_json(exclusive_start_key)) if exclusive_start_key else None
-  
+        """
+        list session permissions matching the request filters.
+
+        the table (or the actor index) is queried when the filters include an eq filter on idea_session_id (or actor_name),
+        and scanned otherwise.
+
+        pagination: when a page_size is provided, at most page_size entries are returned. DynamoDB is read until page_size
+        entries are found or the end of the results is reached, so a page is never empty while more results exist.
+        the cursor is returned as long as there may be more results, and is resumed from the last entry of the page.
+        without a page_size, a single DynamoDB page is returned.
+        """
+        page_size = None
+        if request.paginator is not None and Utils.is_not_empty(request.paginator.page_size):
+            page_size = Utils.get_as_int(request.paginator.page_size)
+
+        list_result = self.filter_compiler.list(
+            table=self._table,
+            filters=request.filters,
+            cursor=request.cursor,
+            page_size=page_size
+        )
+
+        result = [self.convert_db_dict_to_session_permission_object(session_permission) for session_permission in list_result.items]
+
         return ListPermissionsResponse(
             listing=result,
             paginator=SocaPaginator(
-                cursor=response_cursor
+                page_size=page_size,
+                cursor=list_result.cursor
             )
         )
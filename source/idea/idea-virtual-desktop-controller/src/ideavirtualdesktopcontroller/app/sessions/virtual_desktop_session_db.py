@@ -8,7 +8,7 @@
 #  or in the 'license' file accompanying this file. This file is distributed on an 'AS IS' BASIS, WITHOUT WARRANTIES
 #  OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions
 #  and limitations under the License.
-from typing import Dict, Optional, Set
+from typing import Dict, List, Optional, Set
 
 import ideavirtualdesktopcontroller
 from ideadatamodel import (
@@ -29,6 +29,7 @@ from ideadatamodel import (
 from ideadatamodel import exceptions
 
 from ideasdk.utils import Utils, scan_db_records
+from ideasdk.dynamodb.dynamodb_filter_compiler import DynamoDBFilterCompiler
 from ideavirtualdesktopcontroller.app.schedules.virtual_desktop_schedule_db import VirtualDesktopScheduleDB
 from ideavirtualdesktopcontroller.app.servers.virtual_desktop_server_db import VirtualDesktopServerDB
 from ideavirtualdesktopcontroller.app.software_stacks.virtual_desktop_software_stack_db import VirtualDesktopSoftwareStackDB
@@ -39,6 +40,10 @@ from ideavirtualdesktopcontroller.app.sessions import constants as sessions_cons
 
 class VirtualDesktopSessionDB(VirtualDesktopNotifiableDB):
     DEFAULT_PAGE_SIZE = 10
+    filter_compiler = DynamoDBFilterCompiler(
+        hash_key=sessions_constants.USER_SESSION_DB_HASH_KEY,
+        range_key=sessions_constants.USER_SESSION_DB_RANGE_KEY
+    )
 
     def __init__(self, context: ideavirtualdesktopcontroller.AppContext, server_db: VirtualDesktopServerDB, software_stack_db: VirtualDesktopSoftwareStackDB, schedule_db: VirtualDesktopScheduleDB):
         self.context = context
@@ -242,8 +247,26 @@ class VirtualDesktopSessionDB(VirtualDesktopNotifiableDB):
         response = self._table.query(**count_request)
         return Utils.get_value_as_int('Count', response)
 
+    def list_all_in_states(self, states: List[VirtualDesktopSessionState]) -> List[VirtualDesktopSession]:
+        """
+        all the sessions in any of the states, reading all the pages of the table
+        """
+        filters = [SocaFilter(**{
+            'key': sessions_constants.USER_SESSION_DB_STATE_KEY,
+            'in': [state.value for state in states]
+        })]
+        result = []
+        cursor = None
+        while True:
+            list_result = self.filter_compiler.list(table=self._table, filters=filters, cursor=cursor)
+            result.extend(self.convert_db_dict_to_session_object(session) for session in list_result.items)
+            cursor = list_result.cursor
+            if cursor is None:
+                break
+        return result
+
     def list_all_from_db(self, request: ListSessionsRequest) -> SocaListingPayload:
-        list_result = scan_db_records(request, self._table)
+        list_result = scan_db_records(request, self._table, compiler=self.filter_compiler)
         session_entries = list_result.get('Items', [])
         result = [self.convert_db_dict_to_session_object(session) for session in session_entries]
 
@@ -266,7 +289,7 @@ class VirtualDesktopSessionDB(VirtualDesktopNotifiableDB):
         if Utils.is_empty(request):
             request = ListSessionsRequest()
 
-        list_result = scan_db_records(request, self._table)
+        list_result = scan_db_records(request, self._table, compiler=self.filter_compiler)
         session_entries = list_result.get('Items', [])
         result = [self.convert_db_dict_to_session_object(session) for session in session_entries 
                   if session.get(sessions_constants.USER_SESSION_DB_FILTER_OWNER_KEY, None)==username or 
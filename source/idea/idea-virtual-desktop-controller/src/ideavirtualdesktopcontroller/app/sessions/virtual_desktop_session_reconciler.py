@@ -0,0 +1,335 @@
+#  Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance
+#  with the License. A copy of the License is located at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  or in the 'license' file accompanying this file. This file is distributed on an 'AS IS' BASIS, WITHOUT WARRANTIES
+#  OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions
+#  and limitations under the License.
+
+from enum import Enum
+from threading import Thread, Event, RLock
+from typing import Optional, Dict, List, Callable
+import time
+
+import ideavirtualdesktopcontroller
+from ideadatamodel import (
+    VirtualDesktopSession,
+    VirtualDesktopSessionState
+)
+from ideasdk.service import SocaService
+from ideasdk.utils import Utils
+from ideavirtualdesktopcontroller.app.app_protocols import DCVClientProtocol
+from ideavirtualdesktopcontroller.app.events.events_utils import EventsUtils
+from ideavirtualdesktopcontroller.app.sessions.virtual_desktop_session_db import VirtualDesktopSessionDB
+from res.resources import vdi_management, session_permissions
+from res.resources import sessions as user_sessions
+
+DEFAULT_RECONCILE_INTERVAL_SECONDS = 5
+# these match the previous per-session validation limits of 30 and 4 redeliveries with a 30 second visibility timeout
+DEFAULT_VALIDATION_TIMEOUT_SECONDS = 900
+DEFAULT_BROKER_DELETED_GRACE_SECONDS = 120
+
+
+class VirtualDesktopSessionValidationType(str, Enum):
+    CREATION = 'CREATION'
+    DELETION = 'DELETION'
+
+
+class VirtualDesktopSessionValidation:
+    """
+    a session for which the DCV broker state is being validated.
+    the session is cached when the validation starts and is only re-read from the db before a transition is applied.
+    """
+
+    def __init__(self, validation_type: VirtualDesktopSessionValidationType, session: VirtualDesktopSession, started_at: float, recovered: bool = False):
+        self.validation_type = validation_type
+        self.session = session
+        self.started_at = started_at
+        # tracked from the sessions table by the leader, instead of from a validation event
+        self.recovered = recovered
+
+
+class VirtualDesktopSessionReconciler(SocaService):
+    """
+    reconciles the state of sessions that are being created, stopped or deleted against the DCV broker.
+
+    sessions are tracked in memory and every tick issues a single paginated describe_sessions call covering all
+    tracked sessions, after which the state transitions are applied in bulk.
+    this replaces re-delivering one validation message per session through the events queue.
+
+    tracked sessions are not persisted. sessions left in a transitional state by a controller that did not stop
+    cleanly (crash, instance replacement) are tracked again from the sessions table, by the leader only, so that the
+    controller instances do not all validate the same sessions. a controller that loses leadership drops the sessions
+    it recovered, the new leader recovers them. on stop, validation events are re-published for the sessions that are
+    still pending, so that another controller instance picks them up.
+    """
+
+    def __init__(self, context: ideavirtualdesktopcontroller.AppContext,
+                 session_db: VirtualDesktopSessionDB,
+                 dcv_broker_client: Optional[DCVClientProtocol] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        super().__init__(context)
+        self.context = context
+        self._logger = context.logger('virtual-desktop-session-reconciler')
+        self._session_db = session_db
+        self._dcv_broker_client = dcv_broker_client
+        self._clock = clock
+        self._events_utils = EventsUtils(context=context)
+
+        self._pending: Dict[str, VirtualDesktopSessionValidation] = {}
+        self._lock = RLock()
+
+        self._is_recovered = False
+        self._is_running = False
+        self._service_thread: Optional[Thread] = None
+        self._exit = Event()
+
+        self.interval_seconds = context.config().get_int('virtual-desktop-controller.controller.session_reconciler.interval_seconds', default=DEFAULT_RECONCILE_INTERVAL_SECONDS)
+        self.validation_timeout_seconds = context.config().get_int('virtual-desktop-controller.controller.session_reconciler.validation_timeout_seconds', default=DEFAULT_VALIDATION_TIMEOUT_SECONDS)
+        self.broker_deleted_grace_seconds = context.config().get_int('virtual-desktop-controller.controller.session_reconciler.broker_deleted_grace_seconds', default=DEFAULT_BROKER_DELETED_GRACE_SECONDS)
+
+    @property
+    def dcv_broker_client(self) -> DCVClientProtocol:
+        if self._dcv_broker_client is None:
+            return self.context.dcv_broker_client
+        return self._dcv_broker_client
+
+    def _track(self, validation_type: VirtualDesktopSessionValidationType, session: VirtualDesktopSession, recovered: bool = False):
+        with self._lock:
+            # a later deletion replaces a creation that is still being validated for the same session
+            self._pending[session.idea_session_id] = VirtualDesktopSessionValidation(
+                validation_type=validation_type,
+                session=session,
+                started_at=self._clock(),
+                recovered=recovered
+            )
+        self._logger.info(f'RES Session ID: {session.idea_session_id}:{session.name} tracked for {validation_type.value.lower()} validation. pending: {self.get_pending_count()}')
+
+    def track_creation(self, session: VirtualDesktopSession):
+        self._track(VirtualDesktopSessionValidationType.CREATION, session)
+
+    def track_deletion(self, session: VirtualDesktopSession):
+        self._track(VirtualDesktopSessionValidationType.DELETION, session)
+
+    def untrack(self, idea_session_id: str):
+        with self._lock:
+            self._pending.pop(idea_session_id, None)
+
+    def is_tracked(self, idea_session_id: str) -> bool:
+        with self._lock:
+            return idea_session_id in self._pending
+
+    def get_pending_count(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def _complete(self, validation: VirtualDesktopSessionValidation):
+        with self._lock:
+            # the session may have been tracked again while this tick was running
+            if self._pending.get(validation.session.idea_session_id) is validation:
+                del self._pending[validation.session.idea_session_id]
+
+    def _describe_broker_states(self, validations: List[VirtualDesktopSessionValidation]) -> Dict[str, str]:
+        sessions = [validation.session for validation in validations if Utils.is_not_empty(validation.session.dcv_session_id)]
+        if len(sessions) == 0:
+            return {}
+        response = self.dcv_broker_client.describe_sessions(sessions)
+        broker_states = {}
+        for dcv_session_id, session_info in Utils.get_value_as_dict('sessions', response, {}).items():
+            broker_states[dcv_session_id] = Utils.get_value_as_string('state', session_info, None)
+        return broker_states
+
+    def reconcile(self) -> int:
+        """
+        run a single reconciliation tick for all pending sessions
+        :return: number of validations completed in this tick
+        """
+        with self._lock:
+            validations = list(self._pending.values())
+        if len(validations) == 0:
+            return 0
+
+        broker_states = self._describe_broker_states(validations)
+
+        now = self._clock()
+        completed = 0
+        for validation in validations:
+            broker_state = broker_states.get(validation.session.dcv_session_id)
+            try:
+                if validation.validation_type == VirtualDesktopSessionValidationType.CREATION:
+                    is_complete = self._reconcile_creation(validation, broker_state, now)
+                else:
+                    is_complete = self._reconcile_deletion(validation, broker_state, now)
+            except Exception as e:
+                self._logger.exception(f'RES Session ID: {validation.session.idea_session_id} failed to reconcile session: {e}. will retry.')
+                continue
+
+            if is_complete:
+                self._complete(validation)
+                completed += 1
+
+        self._logger.debug(f'reconciled {len(validations)} sessions. completed: {completed}, pending: {self.get_pending_count()}')
+        return completed
+
+    def _get_latest_session(self, validation: VirtualDesktopSessionValidation) -> Optional[VirtualDesktopSession]:
+        return self._session_db.get_from_db(idea_session_owner=validation.session.owner, idea_session_id=validation.session.idea_session_id)
+
+    def _reconcile_creation(self, validation: VirtualDesktopSessionValidation, broker_state: Optional[str], now: float) -> bool:
+        elapsed = now - validation.started_at
+
+        if broker_state == 'READY':
+            session = self._get_latest_session(validation)
+            if Utils.is_empty(session):
+                self._logger.error(f'RES Session ID: {validation.session.idea_session_id} no longer exists. Ignoring Validation.')
+                return True
+            if session.state in {VirtualDesktopSessionState.DELETING, VirtualDesktopSessionState.DELETED, VirtualDesktopSessionState.STOPPING}:
+                self._logger.info(f'RES Session ID: {session.idea_session_id}:{session.name} is in state: {session.state}. Ignoring Validation.')
+                return True
+            self._logger.info(f'RES Session ID: {session.idea_session_id}:{session.name} is stable with state: {broker_state}. Validation complete. Moving to ready state')
+            session.state = VirtualDesktopSessionState.READY
+            self._session_db.update(session)
+            return True
+
+        if (broker_state == 'DELETED' and elapsed > self.broker_deleted_grace_seconds) or broker_state == 'UNKNOWN' or elapsed > self.validation_timeout_seconds:
+            session = self._get_latest_session(validation)
+            if Utils.is_empty(session) or session.state in {VirtualDesktopSessionState.DELETING, VirtualDesktopSessionState.DELETED, VirtualDesktopSessionState.STOPPING}:
+                return True
+            session.state = VirtualDesktopSessionState.ERROR
+            self._session_db.update(session)
+            self._logger.error(f'RES Session ID: {session.idea_session_id}:{session.name} is not stable with state: {broker_state}. Validation ERROR. elapsed: {int(elapsed)}s')
+            return True
+
+        if validation.session.state != VirtualDesktopSessionState.INITIALIZING:
+            session = self._get_latest_session(validation)
+            if Utils.is_empty(session) or session.state in {VirtualDesktopSessionState.DELETING, VirtualDesktopSessionState.DELETED, VirtualDesktopSessionState.STOPPING}:
+                return True
+            session.state = VirtualDesktopSessionState.INITIALIZING
+            validation.session = self._session_db.update(session)
+        return False
+
+    def _reconcile_deletion(self, validation: VirtualDesktopSessionValidation, broker_state: Optional[str], now: float) -> bool:
+        if Utils.is_not_empty(broker_state) and broker_state not in {'DELETED', 'UNKNOWN'}:
+            if now - validation.started_at > self.validation_timeout_seconds:
+                self._logger.error(f'RES Session ID: {validation.session.idea_session_id}:{validation.session.name} is not deleted with state: {broker_state} after {int(now - validation.started_at)}s. Giving up.')
+                return True
+            return False
+
+        session = self._get_latest_session(validation)
+        if Utils.is_empty(session):
+            return True
+        self._logger.info(f'RES Session ID: {session.idea_session_id}:{session.name} is deleted with state: {broker_state}. Validation complete.')
+        if session.state is VirtualDesktopSessionState.DELETING:
+            self._continue_delete_session(session)
+        elif session.state is VirtualDesktopSessionState.STOPPING:
+            self._continue_stop_session(session)
+        else:
+            self._logger.info(f'State not being handled: {session.state}. Will not handle.')
+        return True
+
+    def _continue_stop_session(self, session: VirtualDesktopSession):
+        session.server.is_idle = session.is_idle if session.is_idle else False
+        if session.hibernation_enabled:
+            self._logger.debug(f'Continuing to hibernate session... {session.idea_session_id}:{session.name}')
+            vdi_management.hibernate_servers(servers=[session.server.dict()])
+        else:
+            self._logger.debug(f'Continuing to stop session... {session.idea_session_id}:{session.name}')
+            vdi_management.stop_servers(servers=[session.server.dict()])
+
+    def _continue_delete_session(self, session: VirtualDesktopSession):
+        self._logger.info(f'Continuing to delete session... {session.idea_session_id}:{session.name}')
+        vdi_management.delete_schedule_for_session(session=session.dict())
+        session_permissions.delete_session_permission_by_id(session_id=session.idea_session_id)
+        # delete session entry
+        user_sessions.delete_session(session=session.dict())
+        vdi_management.terminate_servers([session.server.dict()])
+
+    def recover_pending(self) -> int:
+        """
+        track the validation of the sessions in a transitional state in the sessions table
+        :return: number of sessions tracked
+        """
+        sessions = self._session_db.list_all_in_states([
+            VirtualDesktopSessionState.INITIALIZING,
+            VirtualDesktopSessionState.STOPPING,
+            VirtualDesktopSessionState.DELETING
+        ])
+        recovered = 0
+        for session in sessions:
+            # sessions without a dcv session have no broker state to validate
+            if Utils.is_empty(session.dcv_session_id) or self.is_tracked(session.idea_session_id):
+                continue
+            if session.state == VirtualDesktopSessionState.INITIALIZING:
+                self._track(VirtualDesktopSessionValidationType.CREATION, session, recovered=True)
+            else:
+                self._track(VirtualDesktopSessionValidationType.DELETION, session, recovered=True)
+            recovered += 1
+        self._logger.info(f'recovered {recovered} pending session validations')
+        return recovered
+
+    def _drop_recovered(self) -> int:
+        """
+        stop tracking the sessions recovered from the sessions table
+        :return: number of sessions no longer tracked
+        """
+        with self._lock:
+            recovered = [idea_session_id for idea_session_id, validation in self._pending.items() if validation.recovered]
+            for idea_session_id in recovered:
+                del self._pending[idea_session_id]
+        return len(recovered)
+
+    def recover_pending_if_leader(self):
+        """
+        recover the pending session validations once leadership is acquired, and drop them when it is lost
+        """
+        if not self.context.is_leader():
+            if self._is_recovered:
+                dropped = self._drop_recovered()
+                self._logger.info(f'no longer the leader. dropped {dropped} recovered session validations')
+                self._is_recovered = False
+            return
+        if not self._is_recovered:
+            self.recover_pending()
+            self._is_recovered = True
+
+    def _reconcile_loop(self):
+        while not self._exit.is_set():
+            try:
+                self.recover_pending_if_leader()
+                self.reconcile()
+            except Exception as e:
+                self._logger.exception(f'failed to reconcile sessions: {e}')
+            self._exit.wait(self.interval_seconds)
+
+    def _republish_pending(self):
+        with self._lock:
+            validations = list(self._pending.values())
+            self._pending.clear()
+        for validation in validations:
+            try:
+                if validation.validation_type == VirtualDesktopSessionValidationType.CREATION:
+                    self._events_utils.publish_validate_dcv_session_creation_event(idea_session_id=validation.session.idea_session_id, idea_session_owner=validation.session.owner)
+                else:
+                    self._events_utils.publish_validate_dcv_session_deletion_event(idea_session_id=validation.session.idea_session_id, idea_session_owner=validation.session.owner)
+            except Exception as e:
+                self._logger.exception(f'RES Session ID: {validation.session.idea_session_id} failed to re-publish validation event: {e}')
+
+    def start(self):
+        if self._is_running:
+            return
+        self._service_thread = Thread(
+            name='session-reconciler-thread',
+            target=self._reconcile_loop
+        )
+        self._service_thread.start()
+        self._is_running = True
+
+    def stop(self):
+        self._logger.info('stopping virtual-desktop-session-reconciler ...')
+        self._exit.set()
+        self._is_running = False
+        if self._service_thread is not None:
+            self._service_thread.join()
+        self._republish_pending()
@@ -8,7 +8,7 @@
 #  or in the 'license' file accompanying this file. This file is distributed on an 'AS IS' BASIS, WITHOUT WARRANTIES
 #  OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions
 #  and limitations under the License.
-from typing import Optional, Dict
+from typing import Optional, Dict, List
 
 import ideavirtualdesktopcontroller
 from ideadatamodel import (
@@ -27,12 +27,17 @@ from ideadatamodel import (
 )
 from ideadatamodel.virtual_desktop.virtual_desktop_model import VirtualDesktopGPU
 from ideasdk.utils import Utils, scan_db_records
+from ideasdk.dynamodb.dynamodb_filter_compiler import DynamoDBFilterCompiler
 from ideavirtualdesktopcontroller.app.virtual_desktop_notifiable_db import VirtualDesktopNotifiableDB
 from ideavirtualdesktopcontroller.app.software_stacks import constants as software_stacks_constants
 
 
 class VirtualDesktopSoftwareStackDB(VirtualDesktopNotifiableDB):
     DEFAULT_PAGE_SIZE = 10
+    filter_compiler = DynamoDBFilterCompiler(
+        hash_key=software_stacks_constants.SOFTWARE_STACK_DB_HASH_KEY,
+        range_key=software_stacks_constants.SOFTWARE_STACK_DB_RANGE_KEY
+    )
 
     def __init__(self, context: ideavirtualdesktopcontroller.AppContext):
         self.context = context
@@ -136,18 +141,23 @@ class VirtualDesktopSoftwareStackDB(VirtualDesktopNotifiableDB):
 
         software_stack_entry = self.convert_db_dict_to_software_stack_object(software_stack_db_entry)
 
-        def _get_project(project_id):
-            project = self.context.projects_client.get_project(GetProjectRequest(project_id=project_id)).project
-            return {
-                software_stacks_constants.SOFTWARE_STACK_DB_PROJECT_ID_KEY: project_id,
-                software_stacks_constants.SOFTWARE_STACK_DB_PROJECT_NAME_KEY: project.name,
-                software_stacks_constants.SOFTWARE_STACK_DB_PROJECT_TITLE_KEY: project.title
-            }
-
-        software_stack_projects = [_get_project(project_entry.project_id) for project_entry in software_stack_entry.projects]
-        software_stack_entry.projects = software_stack_projects
+        projects = self.get_projects([project_entry.project_id for project_entry in software_stack_entry.projects])
+        software_stack_entry.projects = [{
+            software_stacks_constants.SOFTWARE_STACK_DB_PROJECT_ID_KEY: project.project_id,
+            software_stacks_constants.SOFTWARE_STACK_DB_PROJECT_NAME_KEY: project.name,
+            software_stacks_constants.SOFTWARE_STACK_DB_PROJECT_TITLE_KEY: project.title
+        } for project in projects]
         return software_stack_entry
 
+    def get_projects(self, project_ids: List[str]) -> List[Project]:
+        """
+        resolve the projects attached to a software stack.
+        projects are read from the project catalog when available, instead of calling the cluster manager once per project.
+        """
+        if self.context.project_catalog is not None:
+            return self.context.project_catalog.get_projects(project_ids)
+        return [self.context.projects_client.get_project(GetProjectRequest(project_id=project_id)).project for project_id in project_ids]
+
     def update(self, software_stack: VirtualDesktopSoftwareStack) -> VirtualDesktopSoftwareStack:
         db_entry = self.convert_software_stack_object_to_db_dict(software_stack)
         db_entry[software_stacks_constants.SOFTWARE_STACK_DB_UPDATED_ON_KEY] = Utils.current_time_ms()
@@ -192,7 +202,7 @@ class VirtualDesktopSoftwareStackDB(VirtualDesktopNotifiableDB):
         self.trigger_delete_event(old_db_entry[software_stacks_constants.SOFTWARE_STACK_DB_HASH_KEY], old_db_entry[software_stacks_constants.SOFTWARE_STACK_DB_RANGE_KEY], deleted_entry=old_db_entry)
 
     def list_all_from_db(self, request: ListSoftwareStackRequest) -> ListSoftwareStackResponse:
-        list_result = scan_db_records(request, self._table)
+        list_result = scan_db_records(request, self._table, compiler=self.filter_compiler)
 
         session_entries = list_result.get('Items', [])
         result = [self.convert_db_dict_to_software_stack_object(session) for session in session_entries]
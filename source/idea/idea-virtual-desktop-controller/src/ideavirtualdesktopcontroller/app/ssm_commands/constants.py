@@ -1,3 +1,4 @@
 SSM_COMMANDS_DB_HASH_KEY = 'command_id'
 SSM_COMMANDS_DB_COMMAND_TYPE_KEY = 'command_type'
 SSM_COMMANDS_DB_COMMAND_ADDITIONAL_PAYLOAD_KEY = 'additional_payload'
+SSM_COMMANDS_DB_COMMAND_INSTANCES_KEY = 'instances'
@@ -98,6 +98,26 @@ class VirtualDesktopSSMCommandsDB:
 
         return self._convert_db_dict_to_db_model(db_entry)
 
+    def update_instance_status(self, command_id: str, instance_id: str, status: str):
+        """
+        update the status of an instance of a command sent to multiple instances
+        """
+        self._table.update_item(
+            Key={
+                ssm_commands_constants.SSM_COMMANDS_DB_HASH_KEY: command_id
+            },
+            UpdateExpression='SET #payload.#instances.#instance_id.#status = :status',
+            ExpressionAttributeNames={
+                '#payload': ssm_commands_constants.SSM_COMMANDS_DB_COMMAND_ADDITIONAL_PAYLOAD_KEY,
+                '#instances': ssm_commands_constants.SSM_COMMANDS_DB_COMMAND_INSTANCES_KEY,
+                '#instance_id': instance_id,
+                '#status': 'status'
+            },
+            ExpressionAttributeValues={
+                ':status': status
+            }
+        )
+
     def delete(self, command_id: Optional[str]):
         self._table.delete_item(
             Key={
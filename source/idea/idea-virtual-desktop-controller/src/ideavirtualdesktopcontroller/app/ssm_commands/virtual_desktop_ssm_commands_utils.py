@@ -8,13 +8,36 @@
 #  or in the 'license' file accompanying this file. This file is distributed on an 'AS IS' BASIS, WITHOUT WARRANTIES
 #  OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions
 #  and limitations under the License.
-from typing import List
+from typing import Dict, List, Optional, Tuple
+
+from botocore.exceptions import ClientError
 
 import ideavirtualdesktopcontroller
-from ideadatamodel import VirtualDesktopBaseOS
+from ideadatamodel import VirtualDesktopBaseOS, VirtualDesktopSession
 from ideasdk.utils import Utils
+from ideavirtualdesktopcontroller.app.ssm_commands import constants as ssm_commands_constants
 from ideavirtualdesktopcontroller.app.ssm_commands.virtual_desktop_ssm_commands_db import VirtualDesktopSSMCommandsDB, VirtualDesktopSSMCommand, VirtualDesktopSSMCommandType
 
+# max. number of instance ids of a SendCommand call
+MAX_INSTANCES_PER_SSM_COMMAND = 50
+
+
+class VirtualDesktopSSMCommandTarget:
+    instance_id: str
+    idea_session_id: str
+    idea_session_owner: str
+    document_name: str
+    commands: List[str]
+    additional_payload: Optional[Dict]
+
+    def __init__(self, instance_id: str, idea_session_id: str, idea_session_owner: str, document_name: str, commands: List[str], additional_payload: Optional[Dict] = None):
+        self.instance_id = instance_id
+        self.idea_session_id = idea_session_id
+        self.idea_session_owner = idea_session_owner
+        self.document_name = document_name
+        self.commands = commands
+        self.additional_payload = additional_payload
+
 
 class VirtualDesktopSSMCommandsUtils:
     def __init__(self, context: ideavirtualdesktopcontroller.AppContext, db: VirtualDesktopSSMCommandsDB):
@@ -23,11 +46,11 @@ class VirtualDesktopSSMCommandsUtils:
         self._ssm_commands_db = db
         self._ssm_client = self.context.aws().ssm()
 
-    def submit_ssm_command_to_resume_session(self, instance_id: str, idea_session_id: str, idea_session_owner: str, commands: List[str], document_name: str) -> str:
+    def _send_command(self, instance_ids: List[str], document_name: str, comment: str, commands: List[str], output_prefix: str) -> str:
         response = self._ssm_client.send_command(
-            InstanceIds=[instance_id],
+            InstanceIds=instance_ids,
             DocumentName=document_name,
-            Comment=f'idea_session_id: {idea_session_id}, owner: {idea_session_owner}',
+            Comment=comment,
             Parameters={'commands': commands},
             ServiceRoleArn=self.context.config().get_string('virtual-desktop-controller.ssm_commands_pass_role_arn', required=True),
             NotificationConfig={
@@ -37,13 +60,83 @@ class VirtualDesktopSSMCommandsUtils:
             },
             CloudWatchOutputConfig={
                 'CloudWatchOutputEnabled': True,
-                'CloudWatchLogGroupName': f'/{self.context.cluster_name()}/{self.context.module_id()}/dcv-session/{idea_session_id}/resume'
+                'CloudWatchLogGroupName': output_prefix
             },
             OutputS3BucketName=self.context.config().get_string('cluster.cluster_s3_bucket', required=True),
-            OutputS3KeyPrefix=f'/{self.context.cluster_name()}/{self.context.module_id()}/dcv-session/{idea_session_id}/resume'
+            OutputS3KeyPrefix=output_prefix
         )
         # self._logger.info(f'response is {response}')
-        command_id = Utils.get_value_as_string('CommandId', Utils.get_value_as_dict('Command', response, {}), '')
+        return Utils.get_value_as_string('CommandId', Utils.get_value_as_dict('Command', response, {}), '')
+
+    def submit_bulk_ssm_commands(self, command_type: VirtualDesktopSSMCommandType, targets: List[VirtualDesktopSSMCommandTarget], comment: str, output_name: str) -> Tuple[Dict[str, str], Dict[str, str]]:
+        """
+        send the commands of multiple sessions, using one SendCommand call for up to MAX_INSTANCES_PER_SSM_COMMAND instances
+        running the same document and commands.
+
+        one command entry is created per SendCommand call, with the session and the status of each of its instances. the
+        invocation notifications of the command are published as progress events of the session of each instance.
+
+        :return: command id by instance id for the submitted targets, and failure reason by instance id for the targets that
+        could not be submitted
+        """
+        groups: Dict[Tuple[str, Tuple[str, ...]], List[VirtualDesktopSSMCommandTarget]] = {}
+        instance_ids = set()
+        for target in targets:
+            if target.instance_id in instance_ids:
+                self._logger.warning(f'duplicate SSM command target: {target.instance_id}, skipped.')
+                continue
+            instance_ids.add(target.instance_id)
+            groups.setdefault((target.document_name, tuple(target.commands)), []).append(target)
+
+        submitted: Dict[str, str] = {}
+        failed: Dict[str, str] = {}
+        output_prefix = f'/{self.context.cluster_name()}/{self.context.module_id()}/dcv-session/bulk/{output_name}'
+        for (document_name, commands), group_targets in groups.items():
+            for index in range(0, len(group_targets), MAX_INSTANCES_PER_SSM_COMMAND):
+                batch = group_targets[index:index + MAX_INSTANCES_PER_SSM_COMMAND]
+                try:
+                    command_id = self._send_command(
+                        instance_ids=[target.instance_id for target in batch],
+                        document_name=document_name,
+                        comment=comment,
+                        commands=list(commands),
+                        output_prefix=output_prefix
+                    )
+                except ClientError as e:
+                    self._logger.error(f'failed to send SSM command {command_type} to {len(batch)} instances: {e}')
+                    for target in batch:
+                        failed[target.instance_id] = str(e)
+                    continue
+
+                instances = {}
+                for target in batch:
+                    instances[target.instance_id] = {
+                        **(target.additional_payload or {}),
+                        'idea_session_id': target.idea_session_id,
+                        'idea_session_owner': target.idea_session_owner,
+                        'instance_id': target.instance_id,
+                        'status': 'Pending'
+                    }
+                    submitted[target.instance_id] = command_id
+                _ = self._ssm_commands_db.create(VirtualDesktopSSMCommand(
+                    command_id=command_id,
+                    command_type=command_type,
+                    additional_payload={
+                        ssm_commands_constants.SSM_COMMANDS_DB_COMMAND_INSTANCES_KEY: instances
+                    }
+                ))
+
+        self._logger.info(f'SSM command {command_type} sent to {len(submitted)} instances, failed for {len(failed)} instances.')
+        return submitted, failed
+
+    def submit_ssm_command_to_resume_session(self, instance_id: str, idea_session_id: str, idea_session_owner: str, commands: List[str], document_name: str) -> str:
+        command_id = self._send_command(
+            instance_ids=[instance_id],
+            document_name=document_name,
+            comment=f'idea_session_id: {idea_session_id}, owner: {idea_session_owner}',
+            commands=commands,
+            output_prefix=f'/{self.context.cluster_name()}/{self.context.module_id()}/dcv-session/{idea_session_id}/resume'
+        )
         _ = self._ssm_commands_db.create(VirtualDesktopSSMCommand(
             command_id=command_id,
             command_type=VirtualDesktopSSMCommandType.RESUME_SESSION,
@@ -57,26 +150,13 @@ class VirtualDesktopSSMCommandsUtils:
         return command_id
 
     def submit_ssm_command_to_disable_userdata_execution_on_windows(self, instance_id: str, idea_session_id: str, idea_session_owner: str) -> str:
-        response = self._ssm_client.send_command(
-            InstanceIds=[instance_id],
-            DocumentName='AWS-RunPowerShellScript',
-            Comment='Enabling userdata execution for Windows EC2 Instance',
-            Parameters={'commands': ['Unregister-ScheduledTask -TaskName "Amazon Ec2 Launch - Instance Initialization" -Confirm$False']},
-            ServiceRoleArn=self.context.config().get_string('virtual-desktop-controller.ssm_commands_pass_role_arn', required=True),
-            NotificationConfig={
-                'NotificationArn': self.context.config().get_string('virtual-desktop-controller.ssm_commands_sns_topic_arn', required=True),
-                'NotificationEvents': ['All'],
-                'NotificationType': 'Invocation'
-            },
-            CloudWatchOutputConfig={
-                'CloudWatchOutputEnabled': True,
-                'CloudWatchLogGroupName': f'/{self.context.cluster_name()}/{self.context.module_id()}/dcv-session/{idea_session_id}/disable-userdata'
-            },
-            OutputS3BucketName=self.context.config().get_string('cluster.cluster_s3_bucket', required=True),
-            OutputS3KeyPrefix=f'/{self.context.cluster_name()}/{self.context.module_id()}/dcv-session/{idea_session_id}/disable-userdata'
+        command_id = self._send_command(
+            instance_ids=[instance_id],
+            document_name='AWS-RunPowerShellScript',
+            comment='Enabling userdata execution for Windows EC2 Instance',
+            commands=['Unregister-ScheduledTask -TaskName "Amazon Ec2 Launch - Instance Initialization" -Confirm$False'],
+            output_prefix=f'/{self.context.cluster_name()}/{self.context.module_id()}/dcv-session/{idea_session_id}/disable-userdata'
         )
-        # self._logger.info(f'response is {response}')
-        command_id = Utils.get_value_as_string('CommandId', Utils.get_value_as_dict('Command', response, {}), '')
         _ = self._ssm_commands_db.create(VirtualDesktopSSMCommand(
             command_id=command_id,
             command_type=VirtualDesktopSSMCommandType.WINDOWS_DISABLE_USERDATA_EXECUTION,
@@ -90,26 +170,13 @@ class VirtualDesktopSSMCommandsUtils:
         return command_id
 
     def submit_ssm_command_to_enable_userdata_execution_on_windows(self, instance_id: str, idea_session_id: str, idea_session_owner: str, software_stack_id: str) -> str:
-        response = self._ssm_client.send_command(
-            InstanceIds=[instance_id],
-            DocumentName='AWS-RunPowerShellScript',
-            Comment='Enabling userdata execution for Windows EC2 Instance',
-            Parameters={'commands': ['C:\\ProgramData\\Amazon\\EC2-Windows\\Launch\\Scripts\\InitializeInstance.ps1 -Schedule']},
-            ServiceRoleArn=self.context.config().get_string('virtual-desktop-controller.ssm_commands_pass_role_arn', required=True),
-            NotificationConfig={
-                'NotificationArn': self.context.config().get_string('virtual-desktop-controller.ssm_commands_sns_topic_arn', required=True),
-                'NotificationEvents': ['All'],
-                'NotificationType': 'Invocation'
-            },
-            CloudWatchOutputConfig={
-                'CloudWatchOutputEnabled': True,
-                'CloudWatchLogGroupName': f'/{self.context.cluster_name()}/{self.context.module_id()}/dcv-session/{idea_session_id}/enable-userdata'
-            },
-            OutputS3BucketName=self.context.config().get_string('cluster.cluster_s3_bucket', required=True),
-            OutputS3KeyPrefix=f'/{self.context.cluster_name()}/{self.context.module_id()}/dcv-session/{idea_session_id}/enable-userdata'
+        command_id = self._send_command(
+            instance_ids=[instance_id],
+            document_name='AWS-RunPowerShellScript',
+            comment='Enabling userdata execution for Windows EC2 Instance',
+            commands=['C:\\ProgramData\\Amazon\\EC2-Windows\\Launch\\Scripts\\InitializeInstance.ps1 -Schedule'],
+            output_prefix=f'/{self.context.cluster_name()}/{self.context.module_id()}/dcv-session/{idea_session_id}/enable-userdata'
         )
-        # self._logger.info(f'response is {response}')
-        command_id = Utils.get_value_as_string('CommandId', Utils.get_value_as_dict('Command', response, {}), '')
         _ = self._ssm_commands_db.create(VirtualDesktopSSMCommand(
             command_id=command_id,
             command_type=VirtualDesktopSSMCommandType.WINDOWS_ENABLE_USERDATA_EXECUTION,
@@ -123,7 +190,8 @@ class VirtualDesktopSSMCommandsUtils:
         self._logger.info(f'SSM command to enable userdata execution sent to {instance_id}.')
         return command_id
 
-    def submit_ssm_command_to_get_cpu_utilization(self, instance_id: str, idea_session_id: str, idea_session_owner: str, base_os: VirtualDesktopBaseOS):
+    @staticmethod
+    def _get_cpu_utilization_command(base_os: VirtualDesktopBaseOS) -> Tuple[str, List[str]]:
         if base_os == VirtualDesktopBaseOS.WINDOWS:
             document_name = 'AWS-RunPowerShellScript'
             commands = [
@@ -138,27 +206,18 @@ class VirtualDesktopSSMCommandsUtils:
                 "CPUAveragePerformanceLast10Secs=$(top -d 5 -b -n2 | grep 'Cpu(s)' |tail -n 1 | awk '{print $2 + $4}')",
                 "echo '{\"CPUAveragePerformanceLast10Secs\": '"'$CPUAveragePerformanceLast10Secs'"'}'"
             ]
+        return document_name, commands
 
-        response = self._ssm_client.send_command(
-            InstanceIds=[instance_id],
-            DocumentName=document_name,
-            Comment=f'Checking CPU Utilization for {instance_id}',
-            Parameters={'commands': commands},
-            ServiceRoleArn=self.context.config().get_string('virtual-desktop-controller.ssm_commands_pass_role_arn', required=True),
-            NotificationConfig={
-                'NotificationArn': self.context.config().get_string('virtual-desktop-controller.ssm_commands_sns_topic_arn', required=True),
-                'NotificationEvents': ['All'],
-                'NotificationType': 'Invocation'
-            },
-            CloudWatchOutputConfig={
-                'CloudWatchOutputEnabled': True,
-                'CloudWatchLogGroupName': f'/{self.context.cluster_name()}/{self.context.module_id()}/dcv-session/{idea_session_id}/cpu-utilization'
-            },
-            OutputS3BucketName=self.context.config().get_string('cluster.cluster_s3_bucket', required=True),
-            OutputS3KeyPrefix=f'/{self.context.cluster_name()}/{self.context.module_id()}/dcv-session/{idea_session_id}/cpu-utilization'
+    def submit_ssm_command_to_get_cpu_utilization(self, instance_id: str, idea_session_id: str, idea_session_owner: str, base_os: VirtualDesktopBaseOS):
+        document_name, commands = self._get_cpu_utilization_command(base_os)
+
+        command_id = self._send_command(
+            instance_ids=[instance_id],
+            document_name=document_name,
+            comment=f'Checking CPU Utilization for {instance_id}',
+            commands=commands,
+            output_prefix=f'/{self.context.cluster_name()}/{self.context.module_id()}/dcv-session/{idea_session_id}/cpu-utilization'
         )
-        # self._logger.info(f'response is {response}')
-        command_id = Utils.get_value_as_string('CommandId', Utils.get_value_as_dict('Command', response, {}), '')
         _ = self._ssm_commands_db.create(VirtualDesktopSSMCommand(
             command_id=command_id,
             command_type=VirtualDesktopSSMCommandType.CPU_UTILIZATION_CHECK_STOP_SCHEDULED_SESSION,
@@ -170,3 +229,26 @@ class VirtualDesktopSSMCommandsUtils:
         ))
         self._logger.info(f'SSM command to check CPU Utilization sent to {instance_id}.')
         return command_id
+
+    def submit_ssm_commands_to_get_cpu_utilization(self, sessions: List[VirtualDesktopSession]) -> Tuple[Dict[str, str], Dict[str, str]]:
+        """
+        check the CPU utilization of multiple sessions, using multi-instance SSM commands
+        :return: command id by instance id for the submitted sessions, and failure reason by instance id for the sessions
+        that could not be submitted
+        """
+        targets = []
+        for session in sessions:
+            document_name, commands = self._get_cpu_utilization_command(session.base_os)
+            targets.append(VirtualDesktopSSMCommandTarget(
+                instance_id=session.server.instance_id,
+                idea_session_id=session.idea_session_id,
+                idea_session_owner=session.owner,
+                document_name=document_name,
+                commands=commands
+            ))
+        return self.submit_bulk_ssm_commands(
+            command_type=VirtualDesktopSSMCommandType.CPU_UTILIZATION_CHECK_STOP_SCHEDULED_SESSION,
+            targets=targets,
+            comment='Checking CPU Utilization for scheduled session stop',
+            output_name='cpu-utilization'
+        )
@@ -14,6 +14,7 @@ from ideadatamodel import constants
 from ideasdk.client import NotificationsAsyncClient, ProjectsClient, SocaClientOptions, AccountsClient, RolesClient, RoleAssignmentsClient
 from ideasdk.utils import Utils, GroupNameHelper
 from ideasdk.auth import TokenService, TokenServiceOptions
+from ideasdk.aws import BudgetsSnapshotService
 from ideasdk.server import SocaServerOptions
 
 import ideavirtualdesktopcontroller
@@ -21,6 +22,7 @@ from ideavirtualdesktopcontroller.app.api import VirtualDesktopApiInvoker
 from ideavirtualdesktopcontroller.app.clients.dcv_broker_client.dcv_broker_client import DCVBrokerClient
 from ideavirtualdesktopcontroller.app.clients.events_client.events_client import EventsClient
 from ideavirtualdesktopcontroller.app.events.service.controller_queue_monitor_service import ControllerQueueMonitorService
+from ideavirtualdesktopcontroller.app.projects.virtual_desktop_project_catalog import VirtualDesktopProjectCatalog
 from ideavirtualdesktopcontroller.app.events.service.event_queue_monitoring_service import EventsQueueMonitoringService
 from ideavirtualdesktopcontroller.app.permission_profiles.virtual_desktop_permission_profile_db import VirtualDesktopPermissionProfileDB
 from ideavirtualdesktopcontroller.app.schedules.virtual_desktop_schedule_db import VirtualDesktopScheduleDB
@@ -28,6 +30,7 @@ from ideavirtualdesktopcontroller.app.servers.virtual_desktop_server_db import V
 from ideavirtualdesktopcontroller.app.session_permissions.virtual_desktop_session_permission_db import VirtualDesktopSessionPermissionDB
 from ideavirtualdesktopcontroller.app.sessions.virtual_desktop_session_counters_db import VirtualDesktopSessionCounterDB
 from ideavirtualdesktopcontroller.app.sessions.virtual_desktop_session_db import VirtualDesktopSessionDB
+from ideavirtualdesktopcontroller.app.sessions.virtual_desktop_session_reconciler import VirtualDesktopSessionReconciler
 from ideavirtualdesktopcontroller.app.software_stacks.virtual_desktop_software_stack_db import VirtualDesktopSoftwareStackDB
 from ideavirtualdesktopcontroller.app.ssm_commands.virtual_desktop_ssm_commands_db import VirtualDesktopSSMCommandsDB
 from ideavirtualdesktopcontroller.app.auth.api_authorization_service import VdcApiAuthorizationService
@@ -162,10 +165,16 @@ class VirtualDesktopControllerApp(ideasdk.app.SocaApp):
         self.context.dcv_broker_client = DCVBrokerClient(context=self.context)
 
     def _initialize_services(self):
+        self.context.project_catalog = VirtualDesktopProjectCatalog(context=self.context)
+        self.context.budgets_snapshot = BudgetsSnapshotService(context=self.context)
         self.context.event_queue_monitor_service = EventsQueueMonitoringService(context=self.context)
         self.context.controller_queue_monitor_service = ControllerQueueMonitorService(context=self.context)
+        self.context.session_reconciler = VirtualDesktopSessionReconciler(context=self.context, session_db=self._session_db)
 
     def app_start(self):
+        self.context.project_catalog.start()
+        self.context.budgets_snapshot.start()
+        self.context.session_reconciler.start()
         self.context.event_queue_monitor_service.start()
         self.context.controller_queue_monitor_service.start()
 
@@ -175,6 +184,15 @@ class VirtualDesktopControllerApp(ideasdk.app.SocaApp):
 
         if Utils.is_not_empty(self.context.controller_queue_monitor_service):
             self.context.controller_queue_monitor_service.stop()
+        if Utils.is_not_empty(self.context.session_reconciler):
+            # stopped after the queue monitors so that validations still pending are re-published to the events queue
+            self.context.session_reconciler.stop()
+
+        if Utils.is_not_empty(self.context.project_catalog):
+            self.context.project_catalog.stop()
+
+        if Utils.is_not_empty(self.context.budgets_snapshot):
+            self.context.budgets_snapshot.stop()
 
         if Utils.is_not_empty(self.context.projects_client):
             self.context.projects_client.destroy()
@@ -34,6 +34,15 @@ from ideasdk.utils import Utils, GroupNameHelper
 from ideavirtualdesktopcontroller.app.clients.events_client.events_client import VirtualDesktopEventType
 from ideavirtualdesktopcontroller.app.events.events_utils import EventsUtils
 
+# the values of the dcv host bootstrap templates that differ for each session. the rest of the templates is rendered
+# once for the sessions with the same owner, project, base os and instance type.
+DCV_HOST_SESSION_EXPRESSIONS = [
+    'context.vars.idea_session_id',
+    'context.vars.dcv_host_ready_message',
+    'context.utils.generate_password()',
+    'context.utils.short_uuid()'
+]
+
 
 class VirtualDesktopControllerUtils:
 
@@ -49,6 +58,8 @@ class VirtualDesktopControllerUtils:
         self.INSTANCE_TYPES_NAMES_LIST_CACHE_KEY = 'aws.ec2.all-instance-types-names-list'
         self.INSTANCE_INFO_CACHE_KEY = 'aws.ec2.all-instance-types-data'
         self.instance_types_lock = RLock()
+        self.instance_types_cache = self.context.cache().register_cache('vdc.instance_types', max_size=10, ttl_seconds=86400)
+        self.valid_instance_types_cache = self.context.cache().register_cache('vdc.valid_instance_types', max_size=1000, ttl_seconds=86400)
         self.group_name_helper = GroupNameHelper(self.context)
 
     def create_tag(self, instance_id: str, tag_key: str, tag_value: str):
@@ -97,7 +108,8 @@ class VirtualDesktopControllerUtils:
             components=components,
             tmp_dir=os.path.join(f'{self.context.config().get_string("shared-storage.internal.mount_dir", required=True)}', self.context.cluster_name(), self.context.module_id(), 'dcv-host-bootstrap', session.owner, f'{Utils.to_secure_filename(session.name)}-{session.idea_session_id}'),
             force_build=True,
-            logger=self._logger
+            logger=self._logger,
+            session_expressions=DCV_HOST_SESSION_EXPRESSIONS
         ).build()
 
         self._logger.debug(f'{session.idea_session_id} built bootstrap package: {bootstrap_package_archive_file}')
@@ -387,12 +399,13 @@ class VirtualDesktopControllerUtils:
 
     def _add_instance_data_to_cache(self):
         with self.instance_types_lock:
-            instance_type_names = self.context.cache().long_term().get(self.INSTANCE_TYPES_NAMES_LIST_CACHE_KEY)
-            instance_info_data = self.context.cache().long_term().get(self.INSTANCE_INFO_CACHE_KEY)
+            instance_type_names = self.instance_types_cache.get(self.INSTANCE_TYPES_NAMES_LIST_CACHE_KEY)
+            instance_info_data = self.instance_types_cache.get(self.INSTANCE_INFO_CACHE_KEY)
             if instance_type_names is None or instance_info_data is None:
                 instance_type_names = []
                 instance_info_data = {}
 
+                load_start = Utils.current_time_ms()
                 has_more = True
                 next_token = None
                 while has_more:
@@ -409,18 +422,21 @@ class VirtualDesktopControllerUtils:
                         instance_type_names.append(instance_type_name)
                         instance_info_data[instance_type_name] = current_instance_type
 
-                self.context.cache().long_term().set(self.INSTANCE_TYPES_NAMES_LIST_CACHE_KEY, instance_type_names)
-                self.context.cache().long_term().set(self.INSTANCE_INFO_CACHE_KEY, instance_info_data)
+                self.instance_types_cache.record_load_time(Utils.current_time_ms() - load_start)
+                self.instance_types_cache.set(self.INSTANCE_TYPES_NAMES_LIST_CACHE_KEY, instance_type_names)
+                self.instance_types_cache.set(self.INSTANCE_INFO_CACHE_KEY, instance_info_data)
+                # valid instance types are computed from the instance types data
+                self.valid_instance_types_cache.flush()
 
     def is_gpu_instance(self, instance_type: str) -> bool:
         return self.get_gpu_manufacturer(instance_type) != VirtualDesktopGPU.NO_GPU
 
     def get_instance_type_info(self, instance_type: str) -> Dict:
-        instance_types_data = self.context.cache().long_term().get(self.INSTANCE_INFO_CACHE_KEY)
+        instance_types_data = self.instance_types_cache.get(self.INSTANCE_INFO_CACHE_KEY)
         if instance_types_data is None:
             # not found in cache, need to update it again.
             self._add_instance_data_to_cache()
-            instance_types_data = self.context.cache().long_term().get(self.INSTANCE_INFO_CACHE_KEY)
+            instance_types_data = self.instance_types_cache.get(self.INSTANCE_INFO_CACHE_KEY)
         return instance_types_data[instance_type]
 
     def get_instance_ram(self, instance_type: str) -> SocaMemory:
@@ -454,19 +470,48 @@ class VirtualDesktopControllerUtils:
         return VirtualDesktopGPU.NO_GPU
 
     def get_valid_instance_types(self, hibernation_support: bool, software_stack: VirtualDesktopSoftwareStack = None, gpu: VirtualDesktopGPU = None) -> List[Dict]:
-        instance_types_names = self.context.cache().long_term().get(self.INSTANCE_TYPES_NAMES_LIST_CACHE_KEY)
-        instance_info_data = self.context.cache().long_term().get(self.INSTANCE_INFO_CACHE_KEY)
+        """
+        the result only depends on the software stack attributes checked below, the gpu, the allow/deny lists and the instance types data,
+        and is memoized for the combination of these.
+        """
+        allowed_instance_types = self.context.config().get_list('virtual-desktop-controller.dcv_session.instance_types.allow', default=[])
+        denied_instance_types = self.context.config().get_list('virtual-desktop-controller.dcv_session.instance_types.deny', default=[])
+        cache_key = (
+            bool(hibernation_support),
+            software_stack.base_os if Utils.is_not_empty(software_stack) else None,
+            str(software_stack.min_ram) if Utils.is_not_empty(software_stack) else None,
+            software_stack.architecture if Utils.is_not_empty(software_stack) else None,
+            software_stack.gpu if Utils.is_not_empty(software_stack) else None,
+            gpu,
+            tuple(allowed_instance_types),
+            tuple(denied_instance_types)
+        )
+        valid_instance_types = self.valid_instance_types_cache.get(cache_key)
+        if valid_instance_types is None:
+            valid_instance_types = self._get_valid_instance_types(
+                hibernation_support=hibernation_support,
+                software_stack=software_stack,
+                gpu=gpu,
+                allowed_instance_types=allowed_instance_types,
+                denied_instance_types=denied_instance_types
+            )
+            self.valid_instance_types_cache.set(cache_key, valid_instance_types)
+        # callers may modify the returned list
+        return list(valid_instance_types)
+
+    def _get_valid_instance_types(self, hibernation_support: bool, software_stack: Optional[VirtualDesktopSoftwareStack], gpu: Optional[VirtualDesktopGPU], allowed_instance_types: List[str], denied_instance_types: List[str]) -> List[Dict]:
+        instance_types_names = self.instance_types_cache.get(self.INSTANCE_TYPES_NAMES_LIST_CACHE_KEY)
+        instance_info_data = self.instance_types_cache.get(self.INSTANCE_INFO_CACHE_KEY)
         if instance_types_names is None or instance_info_data is None:
             # not found in cache, need to update it again.
             self._add_instance_data_to_cache()
-            instance_types_names = self.context.cache().long_term().get(self.INSTANCE_TYPES_NAMES_LIST_CACHE_KEY)
-            instance_info_data = self.context.cache().long_term().get(self.INSTANCE_INFO_CACHE_KEY)
+            instance_types_names = self.instance_types_cache.get(self.INSTANCE_TYPES_NAMES_LIST_CACHE_KEY)
+            instance_info_data = self.instance_types_cache.get(self.INSTANCE_INFO_CACHE_KEY)
 
         # We now have a list of all instance types (Cache has been updated IF it was empty).
         valid_instance_types = []
         valid_instance_types_names = []
 
-        allowed_instance_types = self.context.config().get_list('virtual-desktop-controller.dcv_session.instance_types.allow', default=[])
         allowed_instance_type_names = set()
         allowed_instance_type_families = set()
         for instance_type in allowed_instance_types:
@@ -475,7 +520,6 @@ class VirtualDesktopControllerUtils:
             else:
                 allowed_instance_type_families.add(instance_type)
 
-        denied_instance_types = set(self.context.config().get_list('virtual-desktop-controller.dcv_session.instance_types.deny', default=[]))
         denied_instance_type_names = set()
         denied_instance_type_families = set()
         for instance_type in denied_instance_types:
@@ -333,6 +333,20 @@ vdc_session_permission_table: RESDDBTable = RESDDBTable(
             type=AttributeType.STRING,
         ),
     ),
+    global_secondary_indexes_props=[
+        GlobalSecondaryIndexProps(
+            index_name=session_permissions.GSI_ACTOR,
+            partition_key=Attribute(
+                name=session_permissions.GSI_ACTOR_HASH_KEY,
+                type=AttributeType.STRING,
+            ),
+            sort_key=Attribute(
+                name=session_permissions.GSI_ACTOR_RANGE_KEY,
+                type=AttributeType.STRING,
+            ),
+            projection_type=_dynamodb.ProjectionType.ALL,
+        )
+    ],
 )
 
 vdc_distributed_lock_table: RESDDBTable = RESDDBTable(
@@ -5,10 +5,12 @@ import json
 import os
 import re
 import sys
+import threading
+import time
 import typing
 import urllib.parse
 from datetime import datetime
-from typing import Any, Dict, List, Union
+from typing import Any, Dict, List, Optional, Tuple, Union
 from urllib.parse import unquote
 
 import boto3
@@ -36,14 +38,105 @@ CONTENT_TYPE_JSON = "application/json"
 CONTENT_TYPE_XML = "text/xml"
 
 
+# Warm containers reuse module state across invocations. The TTLs below bound how
+# long a lookup result is served from memory before it is fetched again.
+JWKS_CACHE_TTL_SECONDS = 3600
+ADMIN_GROUPS_CACHE_TTL_SECONDS = 60
+IDP_NAME_CACHE_TTL_SECONDS = 300
+ASSUMED_ROLE_CREDENTIALS_CACHE_TTL_SECONDS = 3600
+IDP_NAME_CACHE_KEY = "idp_name"
+ADMIN_GROUPS_CACHE_KEY = "admin_groups"
+
+
+class TTLCache:
+    """
+    Minimal thread-safe key/value cache where every entry expires after its own TTL.
+    """
+
+    def __init__(self, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self._entries: Dict[Any, Tuple[float, Any]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Any) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            return value
+
+    def contains(self, key: Any) -> bool:
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and entry[0] > time.monotonic()
+
+    def put(self, key: Any, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+_jwks_cache = TTLCache(JWKS_CACHE_TTL_SECONDS)
+_admin_groups_cache = TTLCache(ADMIN_GROUPS_CACHE_TTL_SECONDS)
+_idp_name_cache = TTLCache(IDP_NAME_CACHE_TTL_SECONDS)
+_assumed_role_credentials_cache = TTLCache(ASSUMED_ROLE_CREDENTIALS_CACHE_TTL_SECONDS)
+_jwk_clients: Dict[str, PyJWKClient] = {}
+_dynamodb_resource: Optional[Any] = None
+
+
+def clear_caches() -> None:
+    """
+    Drop all warm-container state. Used by tests and to force a full refresh.
+    """
+    global _dynamodb_resource
+    _jwks_cache.clear()
+    _admin_groups_cache.clear()
+    _idp_name_cache.clear()
+    _assumed_role_credentials_cache.clear()
+    _jwk_clients.clear()
+    _dynamodb_resource = None
+
+
+def get_dynamodb_resource() -> Any:
+    global _dynamodb_resource
+    if _dynamodb_resource is None:
+        _dynamodb_resource = boto3.resource("dynamodb")
+    return _dynamodb_resource
+
+
+def get_jwk_client() -> PyJWKClient:
+    uri = f'{os.environ["COGNITO_USER_POOL_PROVIDER_URL"]}/.well-known/jwks.json'
+    jwk_client = _jwk_clients.get(uri)
+    if jwk_client is None:
+        jwk_client = PyJWKClient(
+            uri=uri,
+            cache_keys=DEFAULT_JWK_CACHE_KEYS,
+            max_cached_keys=DEFAULT_JWK_MAX_CACHED_KEYS,
+        )
+        _jwk_clients[uri] = jwk_client
+    return jwk_client
+
+
 def get_signing_key(jwt_token: str) -> Any:
-    jwk_client = PyJWKClient(
-        uri=f'{os.environ["COGNITO_USER_POOL_PROVIDER_URL"]}/.well-known/jwks.json',
-        cache_keys=DEFAULT_JWK_CACHE_KEYS,
-        max_cached_keys=DEFAULT_JWK_MAX_CACHED_KEYS,
-    )
+    # raises DecodeError for malformed tokens before any network call is made
+    kid = jwt.get_unverified_header(jwt_token).get("kid")
+    if kid:
+        signing_key = _jwks_cache.get(kid)
+        if signing_key is not None:
+            return signing_key
 
-    return jwk_client.get_signing_key_from_jwt(jwt_token).key
+    signing_key = get_jwk_client().get_signing_key_from_jwt(jwt_token).key
+    if kid:
+        _jwks_cache.put(kid, signing_key)
+    return signing_key
 
 
 def decode_jwt(jwt_token: str) -> Dict[str, Any]:
@@ -62,7 +155,7 @@ def decode_jwt(jwt_token: str) -> Dict[str, Any]:
 def get_user(username: str) -> Dict[str, Any]:
     idp_name = get_idp_name()
     ddb_user_name = get_ddb_user_name(username, idp_name)
-    dynamodb = boto3.resource("dynamodb")
+    dynamodb = get_dynamodb_resource()
     users_table_name = os.environ["DDB_USERS_TABLE_NAME"]
     response = (
         dynamodb.Table(users_table_name)
@@ -77,8 +170,8 @@ def get_user(username: str) -> Dict[str, Any]:
     return response if isinstance(response, dict) else {}
 
 
-def get_all_admin_groups() -> List[str]:
-    dynamodb = boto3.resource("dynamodb")
+def scan_admin_groups() -> List[str]:
+    dynamodb = get_dynamodb_resource()
     groups_table_name = os.environ["DDB_GROUPS_TABLE_NAME"]
     groups_table = dynamodb.Table(groups_table_name)
     admin_groups = []
@@ -87,7 +180,7 @@ def get_all_admin_groups() -> List[str]:
         response = (
             (groups_table.scan())
             if not last_evaluated_key
-            else groups_table.scan(LastEvaluatedKey=last_evaluated_key)
+            else groups_table.scan(ExclusiveStartKey=last_evaluated_key)
         )
         items = response.get("Items", [])
         for item in items:
@@ -101,24 +194,36 @@ def get_all_admin_groups() -> List[str]:
     return admin_groups
 
 
+def get_all_admin_groups() -> List[str]:
+    admin_groups = _admin_groups_cache.get(ADMIN_GROUPS_CACHE_KEY)
+    if admin_groups is None:
+        admin_groups = scan_admin_groups()
+        _admin_groups_cache.put(ADMIN_GROUPS_CACHE_KEY, admin_groups)
+    return list(admin_groups)
+
+
 def is_any_group_admin(
     user_groups: List[str],
 ) -> bool:
-    all_admin_groups = get_all_admin_groups()
+    all_admin_groups = set(get_all_admin_groups())
     return any(user_group in all_admin_groups for user_group in user_groups)
 
 
 def get_idp_name() -> typing.Optional[str]:
+    # a missing IdP name is a valid result and is cached as well
+    if _idp_name_cache.contains(IDP_NAME_CACHE_KEY):
+        return typing.cast(Optional[str], _idp_name_cache.get(IDP_NAME_CACHE_KEY))
+
     cluster_settings_table_name = os.environ["DDB_CLUSTER_SETTINGS_TABLE_NAME"]
-    dynamodb = boto3.resource("dynamodb")
+    dynamodb = get_dynamodb_resource()
     response = (
         dynamodb.Table(cluster_settings_table_name)
         .get_item(Key={"key": "identity-provider.cognito.sso_idp_provider_name"})
         .get("Item")
     )
-    if not response:
-        return None
-    return str(response["value"])
+    idp_name = str(response["value"]) if response else None
+    _idp_name_cache.put(IDP_NAME_CACHE_KEY, idp_name)
+    return idp_name
 
 
 def get_ddb_user_name(username: str, idp_name: typing.Union[str, None]) -> str:
@@ -183,6 +288,20 @@ class InvalidRequestException(Exception):
 
 
 def get_assumed_role_creds(role_arn: str, user_name: str) -> Any:
+    """
+    Returns refreshable credentials for the role, reused across invocations for the same user.
+    botocore refreshes the credentials shortly before they expire, so the
+    assume-role call is only made once per credential lifetime.
+    """
+    cache_key = (role_arn, user_name)
+    creds = _assumed_role_credentials_cache.get(cache_key)
+    if creds is None:
+        creds = create_assumed_role_creds(role_arn, user_name)
+        _assumed_role_credentials_cache.put(cache_key, creds)
+    return creds
+
+
+def create_assumed_role_creds(role_arn: str, user_name: str) -> Any:
     base_session = boto3.session.Session()
     fetcher = botocore.credentials.AssumeRoleCredentialFetcher(
         client_creator=typing.cast(
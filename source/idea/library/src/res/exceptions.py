@@ -42,6 +42,10 @@ class EmailTemplateNotFound(Exception):
     pass
 
 
+class BatchOperationIncomplete(Exception):
+    pass
+
+
 class UnauthorizedAccess(Exception):
     def __init__(self, error_code: str, message: str = None):
         self._error_code = error_code
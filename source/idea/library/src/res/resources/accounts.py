@@ -26,6 +26,8 @@ GSI_EMAIL = "email-index"
 GSI_ROLE_HASH_KEY = "role"
 GSI_EMAIL_HASH_KEY = "email"
 USERS_DB_HASH_KEY = "username"
+# batch_get_item chunks of users requested in parallel
+GET_USERS_MAX_WORKERS = 8
 
 GROUP_MEMBERS_TABLE_NAME = "accounts.group-members"
 GROUPS_MEMBERS_DB_HASH_KEY = "group_name"
@@ -548,6 +550,27 @@ def get_user(username: str) -> Dict[str, Any]:
     return user
 
 
+def get_users(
+    usernames: List[str], projection: Optional[List[str]] = None
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Retrieve multiple users from DDB with a batched read
+    :param usernames: names of the users
+    :param projection: names of the user attributes to retrieve. all attributes are retrieved if not provided
+    :return: the users keyed by username. users that do not exist are omitted
+    """
+    keys = [{USERS_DB_HASH_KEY: username} for username in sorted(set(usernames))]
+    if projection and USERS_DB_HASH_KEY not in projection:
+        projection = [USERS_DB_HASH_KEY, *projection]
+    users = table_utils.batch_get_items_by_keys(
+        USERS_TABLE_NAME,
+        keys,
+        projection=projection,
+        max_workers=GET_USERS_MAX_WORKERS,
+    )
+    return {user[USERS_DB_HASH_KEY]: user for user in users}
+
+
 def is_active_admin(username: str) -> bool:
     """
     Check if the user is active and an admin
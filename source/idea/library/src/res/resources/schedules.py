@@ -3,7 +3,7 @@
 
 import logging
 import uuid
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 
 import res.exceptions as exceptions
 from res.clients.events import events_client
@@ -73,3 +73,37 @@ def delete_schedule(schedule: Dict[str, Any]) -> None:
             SCHEDULE_DB_RANGE_KEY: schedule.get(SCHEDULE_DB_RANGE_KEY),
         },
     )
+
+
+def delete_schedules(schedules: List[Dict[str, Any]], max_workers: int = 1) -> None:
+    """
+    Delete multiple schedules from DDB with batch writes
+    Schedules without a schedule type, or of type NO_SCHEDULE, have nothing to delete.
+    :param schedules: schedules to be deleted
+    :param max_workers: number of batches written in parallel
+    """
+    keys = {}
+    for schedule in schedules:
+        if (
+            not schedule.get(SCHEDULE_DB_SCHEDULE_TYPE_KEY)
+            or schedule.get(SCHEDULE_DB_SCHEDULE_TYPE_KEY) == "NO_SCHEDULE"
+        ):
+            continue
+        if not schedule.get(SCHEDULE_DB_HASH_KEY):
+            raise Exception(f"{SCHEDULE_DB_HASH_KEY} not provided")
+        if not schedule.get(SCHEDULE_DB_RANGE_KEY):
+            raise Exception(f"{SCHEDULE_DB_RANGE_KEY} not provided")
+        key = (schedule[SCHEDULE_DB_HASH_KEY], schedule[SCHEDULE_DB_RANGE_KEY])
+        keys[key] = {
+            SCHEDULE_DB_HASH_KEY: schedule[SCHEDULE_DB_HASH_KEY],
+            SCHEDULE_DB_RANGE_KEY: schedule[SCHEDULE_DB_RANGE_KEY],
+        }
+
+    if not keys:
+        logger.info("No schedule to delete")
+        return
+    table_utils.batch_write_items(
+        SCHEDULE_DB_TABLE_NAME,
+        delete_keys=list(keys.values()),
+        max_workers=max_workers,
+    )
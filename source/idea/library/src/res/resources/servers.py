@@ -2,9 +2,11 @@
 #  SPDX-License-Identifier: Apache-2.0
 
 import logging
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional
 
+import botocore.exceptions
 import res.exceptions as exceptions
+from boto3.dynamodb.conditions import Attr
 from res.utils import table_utils, time_utils
 
 logger = logging.getLogger(__name__)
@@ -57,6 +59,70 @@ def update_server(server: Dict[str, Any]) -> Dict[str, Any]:
     return updated_server
 
 
+def update_server_state(
+    instance_id: str, state: str, attributes: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """
+    Update the state of a server with a single conditional write, without reading the server first
+    :param instance_id: Ec2 instance id
+    :param state: new state of the server
+    :param attributes: other attributes to update with the state
+    :return updated server
+    """
+    logger.info(
+        f"Updating server state for {SERVER_DB_HASH_KEY}: {instance_id} to {state}"
+    )
+
+    item = {
+        **(attributes or {}),
+        SERVER_DB_STATE_KEY: state,
+        SERVER_DB_UPDATED_ON_KEY: time_utils.current_time_ms(),
+    }
+    try:
+        updated_server: Dict[str, Any] = table_utils.update_item(
+            SERVER_TABLE_NAME,
+            key={SERVER_DB_HASH_KEY: instance_id},
+            item=item,
+            condition=Attr(SERVER_DB_HASH_KEY).exists(),
+        )
+    except botocore.exceptions.ClientError as e:
+        if e.response["Error"]["Code"] == "ConditionalCheckFailedException":
+            raise exceptions.ServerNotFound(
+                f"Server not found: {instance_id}",
+            )
+        raise e
+    return updated_server
+
+
+def update_server_states(
+    server_states: Dict[str, Dict[str, Any]], max_workers: int = 1
+) -> List[str]:
+    """
+    Update the state of multiple servers with transactions of conditional writes, without reading the servers first
+    :param server_states: attributes to update, including the state, by Ec2 instance id
+    :param max_workers: number of transactions written in parallel
+    :return instance ids of the servers that were not found
+    """
+    if not server_states:
+        return []
+    logger.info(f"Updating server state for {len(server_states)} servers")
+
+    updated_on = time_utils.current_time_ms()
+    not_found = table_utils.transact_update_items(
+        SERVER_TABLE_NAME,
+        updates=[
+            (
+                {SERVER_DB_HASH_KEY: instance_id},
+                {**attributes, SERVER_DB_UPDATED_ON_KEY: updated_on},
+            )
+            for instance_id, attributes in server_states.items()
+        ],
+        require_exists=True,
+        max_workers=max_workers,
+    )
+    return [key[SERVER_DB_HASH_KEY] for key in not_found]
+
+
 def delete_server(instance_id: str) -> None:
     """
     Delete server in DDB
@@ -68,3 +134,20 @@ def delete_server(instance_id: str) -> None:
         raise Exception("No instance id provided")
 
     table_utils.delete_item(SERVER_TABLE_NAME, key={SERVER_DB_HASH_KEY: instance_id})
+
+
+def delete_servers(instance_ids: List[str], max_workers: int = 1) -> None:
+    """
+    Delete multiple servers in DDB with batch writes
+    :param instance_ids: Ec2 instance ids
+    :param max_workers: number of batches written in parallel
+    :return None
+    """
+    if not instance_ids:
+        return
+
+    table_utils.batch_write_items(
+        SERVER_TABLE_NAME,
+        delete_keys=[{SERVER_DB_HASH_KEY: instance_id} for instance_id in instance_ids],
+        max_workers=max_workers,
+    )
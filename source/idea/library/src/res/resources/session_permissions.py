@@ -2,6 +2,7 @@
 #  SPDX-License-Identifier: Apache-2.0
 
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any, Dict, List, Optional
 
 import res.exceptions as exceptions
@@ -14,6 +15,9 @@ logger.setLevel(logging.INFO)
 SESSION_PERMISSION_TABLE_NAME = "vdc.controller.session-permissions"
 SESSION_PERMISSION_DB_HASH_KEY = "idea_session_id"
 SESSION_PERMISSION_DB_RANGE_KEY = "actor_name"
+GSI_ACTOR = "actor-index"
+GSI_ACTOR_HASH_KEY = SESSION_PERMISSION_DB_RANGE_KEY
+GSI_ACTOR_RANGE_KEY = SESSION_PERMISSION_DB_HASH_KEY
 
 
 def get_session_permission(session_id: str, user: str) -> Optional[Dict[str, Any]]:
@@ -102,3 +106,45 @@ def delete_session_permission_by_id(session_id: str) -> None:
 
     for session_permission in session_permissions:
         delete_session_permission(session_permission)
+
+
+def delete_session_permissions_by_ids(
+    session_ids: List[str], max_workers: int = 1
+) -> None:
+    """
+    Delete the session permissions of multiple sessions
+    The session permissions of each session are queried in parallel, and deleted with batch writes.
+    :param session_ids: session_ids of the VDI sessions
+    :param max_workers: number of queries and batches run in parallel
+    :return None
+    """
+    if not session_ids:
+        return
+
+    def query_session_permissions(session_id: str) -> List[Dict[str, Any]]:
+        return table_utils.query(
+            SESSION_PERMISSION_TABLE_NAME,
+            attributes={SESSION_PERMISSION_DB_HASH_KEY: session_id},
+        )
+
+    with ThreadPoolExecutor(
+        max_workers=max(1, min(max_workers, len(session_ids)))
+    ) as executor:
+        results = list(executor.map(query_session_permissions, session_ids))
+
+    table_utils.batch_write_items(
+        SESSION_PERMISSION_TABLE_NAME,
+        delete_keys=[
+            {
+                SESSION_PERMISSION_DB_HASH_KEY: session_permission[
+                    SESSION_PERMISSION_DB_HASH_KEY
+                ],
+                SESSION_PERMISSION_DB_RANGE_KEY: session_permission[
+                    SESSION_PERMISSION_DB_RANGE_KEY
+                ],
+            }
+            for session_permissions in results
+            for session_permission in session_permissions
+        ],
+        max_workers=max_workers,
+    )
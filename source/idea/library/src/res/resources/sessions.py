@@ -2,7 +2,7 @@
 #  SPDX-License-Identifier: Apache-2.0
 
 import logging
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 
 import res.exceptions as exceptions
 from res.utils import table_utils, time_utils
@@ -97,3 +97,77 @@ def delete_session(session: Dict[str, Any]) -> None:
             SESSION_DB_RANGE_KEY: session[SESSION_DB_RANGE_KEY],
         },
     )
+
+
+def get_sessions(
+    session_keys: List[Dict[str, Any]], max_workers: int = 1
+) -> List[Dict[str, Any]]:
+    """
+    Get multiple sessions from DDB with batch reads
+    :param session_keys: owner and session_id of the sessions
+    :param max_workers: number of batches read in parallel
+    :return the sessions that were found, in no particular order
+    """
+    keys = [
+        {
+            SESSION_DB_HASH_KEY: session_key[SESSION_DB_HASH_KEY],
+            SESSION_DB_RANGE_KEY: session_key[SESSION_DB_RANGE_KEY],
+        }
+        for session_key in session_keys
+    ]
+    # the same session can be requested more than once, batch_get_item rejects duplicate keys
+    unique_keys = list(
+        {
+            (key[SESSION_DB_HASH_KEY], key[SESSION_DB_RANGE_KEY]): key for key in keys
+        }.values()
+    )
+    return table_utils.batch_get_items_by_keys(
+        SESSIONS_TABLE_NAME, keys=unique_keys, max_workers=max_workers
+    )
+
+
+def update_sessions(
+    sessions: List[Dict[str, Any]], max_workers: int = 1
+) -> List[Dict[str, Any]]:
+    """
+    Write multiple sessions to DDB with batch writes
+    The sessions are written as a whole, they must be read from DDB before being updated.
+    :param sessions: the session dicts to write
+    :param max_workers: number of batches written in parallel
+    :return: the written sessions
+    """
+    if not sessions:
+        return []
+    updated_on = time_utils.current_time_ms()
+    for session in sessions:
+        session[SESSION_DB_UPDATED_ON_KEY] = updated_on
+    logger.info(f"Updating {len(sessions)} sessions")
+
+    table_utils.batch_write_items(
+        SESSIONS_TABLE_NAME, items=sessions, max_workers=max_workers
+    )
+    return sessions
+
+
+def delete_sessions(sessions: List[Dict[str, Any]], max_workers: int = 1) -> None:
+    """
+    Delete multiple sessions from DDB with batch writes
+    :param sessions: the session dicts to delete
+    :param max_workers: number of batches written in parallel
+    :return: None
+    """
+    if not sessions:
+        return
+    logger.info(f"Deleting {len(sessions)} sessions")
+
+    table_utils.batch_write_items(
+        SESSIONS_TABLE_NAME,
+        delete_keys=[
+            {
+                SESSION_DB_HASH_KEY: session[SESSION_DB_HASH_KEY],
+                SESSION_DB_RANGE_KEY: session[SESSION_DB_RANGE_KEY],
+            }
+            for session in sessions
+        ],
+        max_workers=max_workers,
+    )
@@ -2,9 +2,11 @@
 #  SPDX-License-Identifier: Apache-2.0
 
 import logging
-from typing import Any, Dict, List, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 import boto3
+import botocore.exceptions
 import res.exceptions as exceptions
 from res.clients.dcv_broker import dcv_broker_client
 from res.clients.events import events_client
@@ -18,6 +20,10 @@ logger.addHandler(logging.StreamHandler())
 logger.setLevel(logging.INFO)
 
 SESSION_ID_KEY = "idea_session_id"
+# number of instance ids per EC2 StopInstances/TerminateInstances request in bulk operations
+EC2_INSTANCE_IDS_CHUNK_SIZE = 100
+# number of EC2 and DDB requests run in parallel in bulk operations
+BULK_MAX_WORKERS = 8
 
 
 # Stop VDI logic
@@ -27,41 +33,13 @@ def stop_sessions(sessions: List[Dict[str, Any]]) -> Tuple[List, List]:
     :param sessions: list of sessions to be stopped
     :returns successful and unsuccessul list of stopped sessions
     """
-    vdi_with_no_dcv_session = []
-    vdi_with_dcv_session = []
     success_response_list = []
-    fail_response_list = []
-    session_map: Dict[str, Any] = {}
-    for curr_session in sessions:
-        try:
-            session = user_sessions.get_session(
-                owner=curr_session["owner"],
-                session_id=curr_session[SESSION_ID_KEY],
-            )
-        except exceptions.UserSessionNotFound as e:
-            session = {}
-            session["failure_reason"] = (
-                f"Invalid RES Session ID: {curr_session[SESSION_ID_KEY]}:{curr_session['name']} for user: {curr_session['owner']}. Nothing to stop"
-            )
-            logger.error(session["failure_reason"])
-            fail_response_list.append(session)
-            continue
-
-        session["is_idle"] = curr_session.get("is_idle", False)
-        if session.get("state", "") != "READY":
-            session["failure_reason"] = (
-                f"RES Session ID: {session[SESSION_ID_KEY]}:{session['name']} for user: {session['owner']} is in {session['state']} state. Can't stop. Wait for it to be READY."
-            )
-            logger.error(session["failure_reason"])
-            fail_response_list.append(session)
-            continue
-
-        if not session.get("dcv_session_id"):
-            vdi_with_no_dcv_session.append(session)
-        else:
-            session["force"] = curr_session.get("force", False)
-            vdi_with_dcv_session.append(session)
-            session_map[session.get("dcv_session_id")] = session
+    (
+        vdi_with_no_dcv_session,
+        vdi_with_dcv_session,
+        session_map,
+        fail_response_list,
+    ) = _sort_sessions_to_stop(sessions, _get_session)
 
     success_list, error_list = dcv_broker_client.delete_sessions(vdi_with_dcv_session)
 
@@ -89,11 +67,7 @@ def stop_sessions(sessions: List[Dict[str, Any]]) -> Tuple[List, List]:
         session = user_sessions.update_session(session)
         success_response_list.append(session)
 
-    for session in error_list:
-        session_map.get(session.get("dcv_session_id"))["failure_reason"] = session.get(
-            "failure_reason"
-        )
-        fail_response_list.append(session_map[session["dcv_session_id"]])
+    _fail_dcv_session_errors(error_list, session_map, fail_response_list)
 
     session_id_names = [
         f"{session.get(SESSION_ID_KEY)}:{session.get('name')}"
@@ -123,14 +97,23 @@ def hibernate_servers(servers: List[Dict] = None) -> None:
 def _stop_or_hibernate_servers(servers, hibernate=False) -> None:
     response = _stop_hosts(servers=servers, hibernate=hibernate)
     instances = response.get("StoppingInstances", [])
+    servers_by_instance_id = {server["instance_id"]: server for server in servers}
     for instance in instances:
         instance_id = instance.get("InstanceId")
-        server = server_db.get_server(instance_id=instance_id)
-        if server.get("is_idle"):
-            server["state"] = "STOPPED_IDLE"
+        # the servers to stop are read with their sessions, the state is updated without reading the server again
+        is_idle = bool(servers_by_instance_id.get(instance_id, {}).get("is_idle"))
+        if is_idle:
+            state = "STOPPED_IDLE"
         else:
-            server["state"] = "HIBERNATED" if hibernate else "STOPPED"
-        server_db.update_server(server)
+            state = "HIBERNATED" if hibernate else "STOPPED"
+        try:
+            server_db.update_server_state(
+                instance_id=instance_id, state=state, attributes={"is_idle": is_idle}
+            )
+        except exceptions.ServerNotFound:
+            logger.warning(
+                f"Server {instance_id} was deleted while stopping. Not updating its state"
+            )
 
 
 def _stop_hosts(servers: List[Dict], hibernate=False) -> dict:
@@ -157,36 +140,13 @@ def terminate_sessions(sessions: List[Dict[str, Any]]):
     :param sessions: list of sessions to be terminated
     :returns successful and unsuccessul list of terminated sessions
     """
-    vdi_with_no_dcv_session = []
-    vdi_with_dcv_session = []
     success_response_list = []
-    fail_response_list = []
-    session_map: Dict[str, Any] = {}
-
-    for curr_session in sessions:
-        try:
-            session = user_sessions.get_session(
-                owner=curr_session["owner"],
-                session_id=curr_session[SESSION_ID_KEY],
-            )
-        except exceptions.UserSessionNotFound as e:
-            session = {}
-            session["failure_reason"] = (
-                f"Invalid RES Session ID: {curr_session[SESSION_ID_KEY]}:{curr_session['name']} for user: {curr_session['owner']}.  Nothing to delete"
-            )
-            logger.error(session["failure_reason"])
-            fail_response_list.append(session)
-            continue
-
-        session["force"] = curr_session.get("force", False)
-        if session.get("state", "") in {"STOPPED", "STOPPED_IDLE"} or not session.get(
-            user_sessions.SESSION_DB_DCV_SESSION_ID_KEY
-        ):
-            vdi_with_no_dcv_session.append(session)
-            continue
-
-        session_map[session["dcv_session_id"]] = session
-        vdi_with_dcv_session.append(session)
+    (
+        vdi_with_no_dcv_session,
+        vdi_with_dcv_session,
+        session_map,
+        fail_response_list,
+    ) = _sort_sessions_to_terminate(sessions, _get_session)
 
     success_list, error_list = dcv_broker_client.delete_sessions(vdi_with_dcv_session)
 
@@ -217,11 +177,7 @@ def terminate_sessions(sessions: List[Dict[str, Any]]):
         session["state"] = "DELETED"
         success_response_list.append(session)
 
-    for session in error_list:
-        session_map.get(session.get("dcv_session_id"))["failure_reason"] = session.get(
-            "failure_reason"
-        )
-        fail_response_list.append(session_map[session["dcv_session_id"]])
+    _fail_dcv_session_errors(error_list, session_map, fail_response_list)
 
     return success_response_list, fail_response_list
 
@@ -261,3 +217,425 @@ def delete_schedule_for_session(session: Dict[str, Any]) -> None:
         schedule = curr_session.get(key)
         if schedule and schedule.get("schedule_id"):
             schedules.delete_schedule(schedule=schedule)
+
+
+# Bulk stop/terminate VDI logic
+def bulk_stop_sessions(sessions: List[Dict[str, Any]]) -> Tuple[List, List]:
+    """
+    Stop sessions, with batched reads and writes of the sessions and servers
+    The sessions are read with batch reads, instances are stopped with concurrent EC2 requests of up to
+    EC2_INSTANCE_IDS_CHUNK_SIZE instances, and the session and server states are written with batch writes and
+    transactions. A session is only marked STOPPING once the request to stop its instance succeeded.
+    :param sessions: list of sessions to be stopped
+    :returns successful and unsuccessul list of stopped sessions
+    """
+    success_response_list = []
+    # each session is written once per batch
+    sessions = _unique_sessions(sessions)
+    db_sessions = _get_sessions_by_key(sessions)
+    (
+        vdi_with_no_dcv_session,
+        vdi_with_dcv_session,
+        session_map,
+        fail_response_list,
+    ) = _sort_sessions_to_stop(
+        sessions,
+        lambda curr_session: db_sessions.get(
+            (curr_session["owner"], curr_session[SESSION_ID_KEY])
+        ),
+    )
+
+    success_list, error_list = dcv_broker_client.delete_sessions(vdi_with_dcv_session)
+
+    sessions_with_dcv_session_deleted = []
+    for dcv_session in success_list:
+        session = session_map.get(dcv_session.get("dcv_session_id"))
+        session["state"] = "STOPPING"
+        sessions_with_dcv_session_deleted.append(session)
+
+    servers_to_stop = []
+    servers_to_hibernate = []
+    for session in vdi_with_no_dcv_session:
+        session["server"]["is_idle"] = (
+            session.get("is_idle") if session.get("is_idle") else False
+        )
+        if session.get("hibernation_enabled"):
+            servers_to_hibernate.append(session.get("server"))
+        else:
+            servers_to_stop.append(session.get("server"))
+
+    logger.info(f"Stopping {len(vdi_with_no_dcv_session)} session(s)")
+    failed_instances = {
+        **_bulk_stop_or_hibernate_servers(servers_to_stop),
+        **_bulk_stop_or_hibernate_servers(servers_to_hibernate, True),
+    }
+
+    sessions_with_instance_stopped = []
+    for session in vdi_with_no_dcv_session:
+        failure_reason = failed_instances.get(session["server"].get("instance_id"))
+        if failure_reason:
+            session["failure_reason"] = _session_failure_reason(
+                session, f"could not be stopped: {failure_reason}"
+            )
+            fail_response_list.append(session)
+            continue
+        session["state"] = "STOPPING"
+        sessions_with_instance_stopped.append(session)
+
+    user_sessions.update_sessions(
+        sessions_with_dcv_session_deleted + sessions_with_instance_stopped,
+        max_workers=BULK_MAX_WORKERS,
+    )
+    for session in sessions_with_dcv_session_deleted:
+        events_client.publish_validate_dcv_session_deletion_event(
+            session_id=session.get(SESSION_ID_KEY), owner=session.get("owner")
+        )
+    success_response_list.extend(sessions_with_dcv_session_deleted)
+    success_response_list.extend(sessions_with_instance_stopped)
+
+    _fail_dcv_session_errors(error_list, session_map, fail_response_list)
+
+    return success_response_list, fail_response_list
+
+
+def bulk_terminate_sessions(sessions: List[Dict[str, Any]]) -> Tuple[List, List]:
+    """
+    Terminate sessions, with batched reads and writes of the sessions, servers, schedules and session permissions
+    The sessions are read with batch reads, instances are terminated with concurrent EC2 requests of up to
+    EC2_INSTANCE_IDS_CHUNK_SIZE instances, and the sessions and their servers, schedules and session permissions
+    are deleted with batch writes. A session is only deleted once the request to terminate its instance succeeded.
+    :param sessions: list of sessions to be terminated
+    :returns successful and unsuccessul list of terminated sessions
+    """
+    success_response_list = []
+    # each session is written once per batch
+    sessions = _unique_sessions(sessions)
+    db_sessions = _get_sessions_by_key(sessions)
+    (
+        vdi_with_no_dcv_session,
+        vdi_with_dcv_session,
+        session_map,
+        fail_response_list,
+    ) = _sort_sessions_to_terminate(
+        sessions,
+        lambda curr_session: db_sessions.get(
+            (curr_session["owner"], curr_session[SESSION_ID_KEY])
+        ),
+    )
+
+    success_list, error_list = dcv_broker_client.delete_sessions(vdi_with_dcv_session)
+
+    sessions_with_dcv_session_deleted = []
+    for dcv_session in success_list:
+        session = session_map.get(dcv_session.get("dcv_session_id"))
+        session["state"] = "DELETING"
+        sessions_with_dcv_session_deleted.append(session)
+    user_sessions.update_sessions(
+        sessions_with_dcv_session_deleted, max_workers=BULK_MAX_WORKERS
+    )
+    for session in sessions_with_dcv_session_deleted:
+        events_client.publish_validate_dcv_session_deletion_event(
+            session_id=session.get(SESSION_ID_KEY), owner=session.get("owner")
+        )
+    success_response_list.extend(sessions_with_dcv_session_deleted)
+
+    failed_instances = _bulk_terminate_servers(
+        [
+            session["server"]
+            for session in vdi_with_no_dcv_session
+            if session.get("server")
+        ]
+    )
+
+    session_db_entries_to_delete = []
+    for session in vdi_with_no_dcv_session:
+        failure_reason = failed_instances.get(
+            (session.get("server") or {}).get("instance_id")
+        )
+        if failure_reason:
+            session["failure_reason"] = _session_failure_reason(
+                session, f"could not be terminated: {failure_reason}"
+            )
+            fail_response_list.append(session)
+            continue
+        session_db_entries_to_delete.append(session)
+
+    delete_schedules_for_sessions(session_db_entries_to_delete)
+    session_permissions.delete_session_permissions_by_ids(
+        session_ids=[
+            session[SESSION_ID_KEY] for session in session_db_entries_to_delete
+        ],
+        max_workers=BULK_MAX_WORKERS,
+    )
+    user_sessions.delete_sessions(
+        session_db_entries_to_delete, max_workers=BULK_MAX_WORKERS
+    )
+    for session in session_db_entries_to_delete:
+        session["state"] = "DELETED"
+        success_response_list.append(session)
+
+    _fail_dcv_session_errors(error_list, session_map, fail_response_list)
+
+    return success_response_list, fail_response_list
+
+
+def delete_schedules_for_sessions(sessions: List[Dict[str, Any]]) -> None:
+    """
+    Delete the schedules of the sessions in one batch
+    The sessions are expected to be read from DDB by the caller, they are not read again.
+    :param sessions: sessions of the schedules to be deleted
+    """
+    sessions_schedules = []
+    for session in sessions:
+        for day in schedules.SCHEDULE_DAYS:
+            schedule = session.get(f"{day}{user_sessions.SESSION_DB_SCHEDULE_SUFFIX}")
+            if schedule and schedule.get("schedule_id"):
+                sessions_schedules.append(schedule)
+    schedules.delete_schedules(sessions_schedules, max_workers=BULK_MAX_WORKERS)
+
+
+def _get_sessions_by_key(
+    sessions: List[Dict[str, Any]]
+) -> Dict[Tuple[str, str], Dict[str, Any]]:
+    db_sessions = user_sessions.get_sessions(
+        [
+            {
+                user_sessions.SESSION_DB_HASH_KEY: session["owner"],
+                user_sessions.SESSION_DB_RANGE_KEY: session[SESSION_ID_KEY],
+            }
+            for session in sessions
+        ],
+        max_workers=BULK_MAX_WORKERS,
+    )
+    return {
+        (session["owner"], session[SESSION_ID_KEY]): session for session in db_sessions
+    }
+
+
+def _ec2_client() -> Any:
+    return boto3.client("ec2")
+
+
+def _run_in_instance_chunks(
+    instance_ids: List[str],
+    operation: Callable[[Any, List[str]], Dict[str, Any]],
+    response_key: str,
+) -> Tuple[List[str], Dict[str, str]]:
+    """
+    Run an EC2 operation on chunks of instance ids concurrently
+    A chunk that fails does not fail the other chunks, its instances are returned with the reason of the failure.
+    :return: the instance ids returned by the operation, and the failure reason by instance id
+    """
+    if not instance_ids:
+        return [], {}
+
+    ec2_client = _ec2_client()
+    chunks = [
+        instance_ids[start : start + EC2_INSTANCE_IDS_CHUNK_SIZE]
+        for start in range(0, len(instance_ids), EC2_INSTANCE_IDS_CHUNK_SIZE)
+    ]
+
+    def run_chunk(chunk: List[str]) -> Tuple[List[str], Dict[str, str]]:
+        try:
+            response = operation(ec2_client, chunk)
+        except botocore.exceptions.ClientError as e:
+            logger.error(f"Failed to run EC2 operation for {chunk}: {e}")
+            return [], {instance_id: str(e) for instance_id in chunk}
+        return [
+            instance.get("InstanceId") for instance in response.get(response_key, [])
+        ], {}
+
+    processed_instance_ids: List[str] = []
+    failed_instances: Dict[str, str] = {}
+    with ThreadPoolExecutor(max_workers=min(BULK_MAX_WORKERS, len(chunks))) as executor:
+        for chunk_instance_ids, chunk_failures in executor.map(run_chunk, chunks):
+            processed_instance_ids.extend(chunk_instance_ids)
+            failed_instances.update(chunk_failures)
+    return processed_instance_ids, failed_instances
+
+
+def _bulk_stop_or_hibernate_servers(
+    servers: List[Dict[str, Any]], hibernate: bool = False
+) -> Dict[str, str]:
+    """
+    Stop or hibernate the instances of the servers and update the state of the servers
+    :return: the failure reason by instance id, for the instances that could not be stopped
+    """
+    if not servers:
+        return {}
+
+    servers_by_instance_id = {server["instance_id"]: server for server in servers}
+    instance_ids = list(servers_by_instance_id.keys())
+    logger.info(
+        f"{'Hibernating' if hibernate else 'Stopping'} {len(instance_ids)} instance(s)"
+    )
+    stopping_instance_ids, failed_instances = _run_in_instance_chunks(
+        instance_ids,
+        lambda ec2_client, chunk: ec2_client.stop_instances(
+            InstanceIds=chunk, Hibernate=hibernate
+        ),
+        "StoppingInstances",
+    )
+
+    server_states = {}
+    for instance_id in stopping_instance_ids:
+        is_idle = bool(servers_by_instance_id.get(instance_id, {}).get("is_idle"))
+        if is_idle:
+            state = "STOPPED_IDLE"
+        else:
+            state = "HIBERNATED" if hibernate else "STOPPED"
+        server_states[instance_id] = {
+            server_db.SERVER_DB_STATE_KEY: state,
+            "is_idle": is_idle,
+        }
+
+    for instance_id in server_db.update_server_states(
+        server_states, max_workers=BULK_MAX_WORKERS
+    ):
+        logger.warning(
+            f"Server {instance_id} was deleted while stopping. Not updating its state"
+        )
+    return failed_instances
+
+
+def _bulk_terminate_servers(servers: List[Dict[str, Any]]) -> Dict[str, str]:
+    """
+    Terminate the instances of the servers and delete the servers
+    :return: the failure reason by instance id, for the instances that could not be terminated
+    """
+    if not servers:
+        return {}
+
+    instance_ids = list({server["instance_id"]: server for server in servers}.keys())
+    logger.info(f"Terminating {len(instance_ids)} instance(s)")
+    terminating_instance_ids, failed_instances = _run_in_instance_chunks(
+        instance_ids,
+        lambda ec2_client, chunk: ec2_client.terminate_instances(InstanceIds=chunk),
+        "TerminatingInstances",
+    )
+    server_db.delete_servers(terminating_instance_ids, max_workers=BULK_MAX_WORKERS)
+    return failed_instances
+
+
+# Session validation shared by the stop/terminate logic
+def _get_session(curr_session: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    try:
+        return user_sessions.get_session(
+            owner=curr_session["owner"],
+            session_id=curr_session[SESSION_ID_KEY],
+        )
+    except exceptions.UserSessionNotFound:
+        return None
+
+
+def _unique_sessions(sessions: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    unique_sessions = {}
+    for curr_session in sessions:
+        key = (curr_session["owner"], curr_session[SESSION_ID_KEY])
+        unique_sessions.setdefault(key, curr_session)
+    return list(unique_sessions.values())
+
+
+def _session_failure_reason(session: Dict[str, Any], reason: str) -> str:
+    return f"RES Session ID: {session[SESSION_ID_KEY]}:{session['name']} for user: {session['owner']} {reason}"
+
+
+def _session_not_found(curr_session: Dict[str, Any], action: str) -> Dict[str, Any]:
+    session = {
+        "failure_reason": f"Invalid RES Session ID: {curr_session[SESSION_ID_KEY]}:{curr_session.get('name')} for user: {curr_session['owner']}. Nothing to {action}"
+    }
+    logger.error(session["failure_reason"])
+    return session
+
+
+def _sort_sessions_to_stop(
+    sessions: List[Dict[str, Any]],
+    get_session: Callable[[Dict[str, Any]], Optional[Dict[str, Any]]],
+) -> Tuple[List, List, Dict[str, Any], List]:
+    """
+    Validate the sessions to stop, and sort them by whether they have a DCV session
+    :param sessions: list of sessions to be stopped
+    :param get_session: the session in DDB of a session to be stopped, None if it does not exist
+    :returns sessions without a DCV session, sessions with a DCV session, sessions by DCV session id and failed sessions
+    """
+    vdi_with_no_dcv_session = []
+    vdi_with_dcv_session = []
+    session_map: Dict[str, Any] = {}
+    fail_response_list = []
+    for curr_session in sessions:
+        session = get_session(curr_session)
+        if session is None:
+            fail_response_list.append(_session_not_found(curr_session, "stop"))
+            continue
+
+        session["is_idle"] = curr_session.get("is_idle", False)
+        if session.get("state", "") != "READY":
+            session["failure_reason"] = _session_failure_reason(
+                session,
+                f"is in {session['state']} state. Can't stop. Wait for it to be READY.",
+            )
+            logger.error(session["failure_reason"])
+            fail_response_list.append(session)
+            continue
+
+        if not session.get("dcv_session_id"):
+            vdi_with_no_dcv_session.append(session)
+        else:
+            session["force"] = curr_session.get("force", False)
+            vdi_with_dcv_session.append(session)
+            session_map[session.get("dcv_session_id")] = session
+    return (
+        vdi_with_no_dcv_session,
+        vdi_with_dcv_session,
+        session_map,
+        fail_response_list,
+    )
+
+
+def _sort_sessions_to_terminate(
+    sessions: List[Dict[str, Any]],
+    get_session: Callable[[Dict[str, Any]], Optional[Dict[str, Any]]],
+) -> Tuple[List, List, Dict[str, Any], List]:
+    """
+    Validate the sessions to terminate, and sort them by whether their DCV session must be deleted
+    :param sessions: list of sessions to be terminated
+    :param get_session: the session in DDB of a session to be terminated, None if it does not exist
+    :returns sessions without a DCV session, sessions with a DCV session, sessions by DCV session id and failed sessions
+    """
+    vdi_with_no_dcv_session = []
+    vdi_with_dcv_session = []
+    session_map: Dict[str, Any] = {}
+    fail_response_list = []
+    for curr_session in sessions:
+        session = get_session(curr_session)
+        if session is None:
+            fail_response_list.append(_session_not_found(curr_session, "delete"))
+            continue
+
+        session["force"] = curr_session.get("force", False)
+        if session.get("state", "") in {"STOPPED", "STOPPED_IDLE"} or not session.get(
+            user_sessions.SESSION_DB_DCV_SESSION_ID_KEY
+        ):
+            vdi_with_no_dcv_session.append(session)
+            continue
+
+        session_map[session["dcv_session_id"]] = session
+        vdi_with_dcv_session.append(session)
+    return (
+        vdi_with_no_dcv_session,
+        vdi_with_dcv_session,
+        session_map,
+        fail_response_list,
+    )
+
+
+def _fail_dcv_session_errors(
+    error_list: List[Dict[str, Any]],
+    session_map: Dict[str, Any],
+    fail_response_list: List[Dict[str, Any]],
+) -> None:
+    for session in error_list:
+        session_map.get(session.get("dcv_session_id"))["failure_reason"] = session.get(
+            "failure_reason"
+        )
+        fail_response_list.append(session_map[session["dcv_session_id"]])
@@ -2,13 +2,34 @@
 #  SPDX-License-Identifier: Apache-2.0
 
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 from functools import lru_cache
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 import boto3
+import botocore.exceptions
 from boto3.dynamodb.conditions import Attr, Key
 from python_dynamodb_lock.python_dynamodb_lock import DynamoDBLockClient
 from res.constants import ENVIRONMENT_NAME_KEY
+from res.exceptions import BatchOperationIncomplete
+
+BATCH_GET_ITEM_MAX_KEYS = 100
+BATCH_WRITE_ITEM_MAX_ITEMS = 25
+TRANSACT_WRITE_ITEMS_MAX_ITEMS = 100
+# attempts of a batch request before the items that are still unprocessed are reported as failed
+BATCH_MAX_ATTEMPTS = 8
+# cancellation reasons of a transaction that is retried as is
+TRANSACTION_RETRYABLE_REASONS = {
+    "TransactionConflict",
+    "ThrottlingError",
+    "ProvisionedThroughputExceeded",
+    "RequestLimitExceeded",
+}
+
+
+def _backoff(attempt: int) -> None:
+    time.sleep(min(0.05 * (2**attempt), 1))
 
 
 @lru_cache
@@ -104,6 +125,73 @@ def batch_get_items(
     return result
 
 
+def batch_get_items_by_keys(
+    table_name: str,
+    keys: List[Dict[str, Any]],
+    projection: Optional[List[str]] = None,
+    max_workers: int = 1,
+) -> List[Dict[str, Any]]:
+    """
+    Retrieve multiple items by primary key with batch_get_item
+    Keys are requested in chunks of 100 and unprocessed keys are retried, up to 8 attempts per chunk.
+    :param table_name: name of the table without the environment prefix
+    :param keys: primary keys of the items to retrieve
+    :param projection: names of the attributes to retrieve. all attributes are retrieved if not provided
+    :param max_workers: number of chunks requested in parallel
+    :return: the items that were found, in no particular order
+    :raises BatchOperationIncomplete: if keys are still unprocessed after the last attempt
+    """
+    if not keys:
+        return []
+
+    ddb_table = table(table_name)
+    client = ddb_table.meta.client
+    keys_and_attributes: Dict[str, Any] = {}
+    if projection:
+        expression_attribute_names = {
+            f"#p{index}": name for index, name in enumerate(projection)
+        }
+        keys_and_attributes["ProjectionExpression"] = ", ".join(
+            expression_attribute_names.keys()
+        )
+        keys_and_attributes["ExpressionAttributeNames"] = expression_attribute_names
+
+    def get_chunk(chunk: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        chunk_items: List[Dict[str, Any]] = []
+        request_items: Dict[str, Any] = {
+            ddb_table.name: {**keys_and_attributes, "Keys": chunk}
+        }
+        attempt = 0
+        while request_items:
+            if attempt >= BATCH_MAX_ATTEMPTS:
+                raise BatchOperationIncomplete(
+                    f"{len(request_items[ddb_table.name]['Keys'])} keys of {ddb_table.name} "
+                    f"were not processed after {attempt} attempts"
+                )
+            if attempt > 0:
+                _backoff(attempt)
+            response = client.batch_get_item(RequestItems=request_items)
+            chunk_items.extend(response.get("Responses", {}).get(ddb_table.name, []))
+            request_items = response.get("UnprocessedKeys", {})
+            attempt += 1
+        return chunk_items
+
+    chunks = [
+        keys[start : start + BATCH_GET_ITEM_MAX_KEYS]
+        for start in range(0, len(keys), BATCH_GET_ITEM_MAX_KEYS)
+    ]
+    items: List[Dict[str, Any]] = []
+    if max_workers <= 1 or len(chunks) == 1:
+        for chunk in chunks:
+            items.extend(get_chunk(chunk))
+        return items
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(chunks))) as executor:
+        for chunk_items in executor.map(get_chunk, chunks):
+            items.extend(chunk_items)
+    return items
+
+
 def query(
     table_name: str,
     attributes: Dict[str, Any],
@@ -141,8 +229,8 @@ def query(
     return results
 
 
-def update_item(
-    table_name: str, key: Dict[str, str], item: Dict[str, Any], versioned: bool = False
+def _build_update_expression(
+    key: Dict[str, Any], item: Dict[str, Any], versioned: bool = False
 ) -> Dict[str, Any]:
     update_expression_tokens = []
     expression_attr_names = {}
@@ -161,13 +249,28 @@ def update_item(
         expression_attr_values[":version"] = 1
         expression_attr_names["#version"] = "version"
 
-    result = table(table_name).update_item(
-        Key=key,
-        UpdateExpression=update_expression,
-        ExpressionAttributeNames=expression_attr_names,
-        ExpressionAttributeValues=expression_attr_values,
-        ReturnValues="ALL_NEW",
-    )
+    return {
+        "Key": key,
+        "UpdateExpression": update_expression,
+        "ExpressionAttributeNames": expression_attr_names,
+        "ExpressionAttributeValues": expression_attr_values,
+    }
+
+
+def update_item(
+    table_name: str,
+    key: Dict[str, str],
+    item: Dict[str, Any],
+    versioned: bool = False,
+    condition: Optional[Any] = None,
+) -> Dict[str, Any]:
+    request: Dict[str, Any] = {
+        **_build_update_expression(key, item, versioned),
+        "ReturnValues": "ALL_NEW",
+    }
+    if condition is not None:
+        request["ConditionExpression"] = condition
+    result = table(table_name).update_item(**request)
 
     updated_item: Dict[str, Any] = result["Attributes"]
     for attribute_name, attribute_value in key.items():
@@ -175,6 +278,150 @@ def update_item(
     return updated_item
 
 
+def batch_write_items(
+    table_name: str,
+    items: Optional[List[Dict[str, Any]]] = None,
+    delete_keys: Optional[List[Dict[str, Any]]] = None,
+    max_workers: int = 1,
+) -> None:
+    """
+    Put and delete multiple items with batch_write_item
+    Requests are sent in chunks of 25 and unprocessed items are retried, up to 8 attempts per chunk.
+    :param table_name: name of the table without the environment prefix
+    :param items: items to put
+    :param delete_keys: primary keys of the items to delete
+    :param max_workers: number of chunks written in parallel
+    :raises BatchOperationIncomplete: if items are still unprocessed after the last attempt
+    """
+    requests: List[Dict[str, Any]] = [
+        {"PutRequest": {"Item": item}} for item in items or []
+    ]
+    requests.extend({"DeleteRequest": {"Key": key}} for key in delete_keys or [])
+    if not requests:
+        return
+
+    ddb_table = table(table_name)
+    client = ddb_table.meta.client
+
+    def write_chunk(chunk: List[Dict[str, Any]]) -> None:
+        request_items: Dict[str, Any] = {ddb_table.name: chunk}
+        attempt = 0
+        while request_items:
+            if attempt >= BATCH_MAX_ATTEMPTS:
+                raise BatchOperationIncomplete(
+                    f"{len(request_items[ddb_table.name])} items of {ddb_table.name} "
+                    f"were not processed after {attempt} attempts"
+                )
+            if attempt > 0:
+                _backoff(attempt)
+            response = client.batch_write_item(RequestItems=request_items)
+            request_items = response.get("UnprocessedItems", {})
+            attempt += 1
+
+    chunks = [
+        requests[start : start + BATCH_WRITE_ITEM_MAX_ITEMS]
+        for start in range(0, len(requests), BATCH_WRITE_ITEM_MAX_ITEMS)
+    ]
+    if max_workers <= 1 or len(chunks) == 1:
+        for chunk in chunks:
+            write_chunk(chunk)
+        return
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(chunks))) as executor:
+        list(executor.map(write_chunk, chunks))
+
+
+def transact_update_items(
+    table_name: str,
+    updates: List[Tuple[Dict[str, Any], Dict[str, Any]]],
+    require_exists: bool = False,
+    max_workers: int = 1,
+) -> List[Dict[str, Any]]:
+    """
+    Update attributes of multiple items with transact_write_items, in transactions of up to 100 items
+    When require_exists is set, items that do not exist are not created: their updates are removed from the
+    transaction, which is retried with the remaining updates. Transactions cancelled by a conflict with another
+    write or by throttling are retried, up to 8 attempts per transaction.
+    :param table_name: name of the table without the environment prefix
+    :param updates: (primary key, attributes to set) of each item
+    :param require_exists: only update items that exist
+    :param max_workers: number of transactions written in parallel
+    :return: the primary keys of the items that were not updated because they do not exist
+    :raises BatchOperationIncomplete: if a transaction is still cancelled after the last attempt
+    """
+    if not updates:
+        return []
+
+    ddb_table = table(table_name)
+    client = ddb_table.meta.client
+    key_names = list(updates[0][0].keys())
+
+    def transact_chunk(
+        chunk: List[Tuple[Dict[str, Any], Dict[str, Any]]]
+    ) -> List[Dict[str, Any]]:
+        not_found: List[Dict[str, Any]] = []
+        attempt = 0
+        while chunk:
+            transact_items = []
+            for key, item in chunk:
+                update = {
+                    "TableName": ddb_table.name,
+                    **_build_update_expression(key, item),
+                }
+                if require_exists:
+                    update["ConditionExpression"] = f"attribute_exists(#{key_names[0]})"
+                    update["ExpressionAttributeNames"][f"#{key_names[0]}"] = key_names[
+                        0
+                    ]
+                transact_items.append({"Update": update})
+            if attempt >= BATCH_MAX_ATTEMPTS:
+                raise BatchOperationIncomplete(
+                    f"{len(chunk)} updates of {ddb_table.name} "
+                    f"were not processed after {attempt} attempts"
+                )
+            if attempt > 0:
+                _backoff(attempt)
+            attempt += 1
+            try:
+                client.transact_write_items(TransactItems=transact_items)
+                return not_found
+            except botocore.exceptions.ClientError as e:
+                if e.response["Error"]["Code"] != "TransactionCanceledException":
+                    raise e
+                reasons = e.response.get("CancellationReasons", [])
+                failed = {
+                    index
+                    for index, reason in enumerate(reasons)
+                    if reason.get("Code") == "ConditionalCheckFailed"
+                }
+                retryable = any(
+                    reason.get("Code") in TRANSACTION_RETRYABLE_REASONS
+                    for reason in reasons
+                )
+                if not failed and not retryable:
+                    raise e
+                not_found.extend(chunk[index][0] for index in sorted(failed))
+                chunk = [
+                    update for index, update in enumerate(chunk) if index not in failed
+                ]
+        return not_found
+
+    chunks = [
+        updates[start : start + TRANSACT_WRITE_ITEMS_MAX_ITEMS]
+        for start in range(0, len(updates), TRANSACT_WRITE_ITEMS_MAX_ITEMS)
+    ]
+    not_found: List[Dict[str, Any]] = []
+    if max_workers <= 1 or len(chunks) == 1:
+        for chunk in chunks:
+            not_found.extend(transact_chunk(chunk))
+        return not_found
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(chunks))) as executor:
+        for chunk_not_found in executor.map(transact_chunk, chunks):
+            not_found.extend(chunk_not_found)
+    return not_found
+
+
 def scan(
     table_name: str, attributes: Optional[Dict[str, Any]] = None
 ) -> List[Dict[str, Any]]:
@@ -171,6 +171,21 @@ def test_accounts_crud_get_user(context):
     assert user.get("gid") == crud_user.get("gid")
 
 
+def test_accounts_crud_get_users(context):
+    """
+    get multiple users with a batched read
+    """
+    assert AccountsTestContext.crud_user is not None
+    crud_user = AccountsTestContext.crud_user
+
+    users = accounts.get_users(
+        usernames=[crud_user.get("username"), "accounts_unknown_user"]
+    )
+
+    assert list(users.keys()) == [crud_user.get("username")]
+    assert users[crud_user.get("username")].get("uid") == crud_user.get("uid")
+
+
 def test_accounts_crud_update_user(context):
     """
     update user
@@ -86,3 +86,34 @@ class TestServers(unittest.TestCase):
         with pytest.raises(exceptions.ServerNotFound) as exc_info:
             servers.get_server(instance_id=TEST_INSTANCE_ID)
         assert f"Server not found: {TEST_INSTANCE_ID}" == exc_info.value.args[0]
+
+    def test_servers_update_server_state_should_pass(self):
+        """
+        update server state happy path
+        """
+        servers.update_server_state(
+            instance_id=TEST_INSTANCE_ID,
+            state=UPDATED_STATE,
+            attributes={"is_idle": True},
+        )
+        server = servers.get_server(instance_id=TEST_INSTANCE_ID)
+        assert server.get(servers.SERVER_DB_STATE_KEY) == UPDATED_STATE
+        assert server.get("is_idle") is True
+        assert server.get(servers.SERVER_DB_UPDATED_ON_KEY) is not None
+
+    def test_servers_update_server_state_invalid_instance_id_should_fail(self):
+        """
+        update server state does not create a server that does not exist
+        """
+        with pytest.raises(exceptions.ServerNotFound) as exc_info:
+            servers.update_server_state(
+                instance_id=RANDOM_INSTANCE_ID, state=UPDATED_STATE
+            )
+        assert f"Server not found: {RANDOM_INSTANCE_ID}" == exc_info.value.args[0]
+        assert (
+            table_utils.get_item(
+                servers.SERVER_TABLE_NAME,
+                key={servers.SERVER_DB_HASH_KEY: RANDOM_INSTANCE_ID},
+            )
+            is None
+        )
@@ -1,9 +1,12 @@
 #  Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
 #  SPDX-License-Identifier: Apache-2.0
 
+import time
 import unittest
+from typing import Any, Dict, List
 from unittest.mock import MagicMock
 
+import botocore.exceptions
 import pytest
 import res as res
 from res import exceptions
@@ -35,6 +38,35 @@ SESSION = {
 READY_STATE = "READY"
 STOPPED_STATE = "STOPPED"
 STOPPING_STATE = "STOPPING"
+BENCHMARK_SESSION_COUNT = 2_000
+EC2_LATENCY_SECONDS = 0.05
+
+
+class StubEC2Client:
+    """
+    local stand-in for the EC2 client, with a fixed latency per API call
+    """
+
+    def __init__(self, failing_instance_ids: List[str] = None) -> None:
+        self.calls: List[List[str]] = []
+        self.failing_instance_ids = set(failing_instance_ids or [])
+
+    def _call(self, operation: str, instance_ids: List[str]) -> None:
+        self.calls.append(instance_ids)
+        time.sleep(EC2_LATENCY_SECONDS)
+        if self.failing_instance_ids.intersection(instance_ids):
+            raise botocore.exceptions.ClientError(
+                {"Error": {"Code": "IncorrectInstanceState", "Message": "failed"}},
+                operation,
+            )
+
+    def stop_instances(self, InstanceIds: List[str], Hibernate: bool = False) -> Dict:
+        self._call("StopInstances", InstanceIds)
+        return {"StoppingInstances": [{"InstanceId": i} for i in InstanceIds]}
+
+    def terminate_instances(self, InstanceIds: List[str]) -> Dict:
+        self._call("TerminateInstances", InstanceIds)
+        return {"TerminatingInstances": [{"InstanceId": i} for i in InstanceIds]}
 
 
 @pytest.fixture(scope="class")
@@ -183,6 +215,31 @@ class TestVDIManagement(unittest.TestCase):
         assert fail[0].items() > current_session.items()
         assert fail[0].get("failure_reason")
 
+    def test_stop_sessions_and_bulk_stop_sessions_fail_alike(self):
+        self.monkeypatch.setattr(
+            dcv_broker_client, "delete_sessions", self.delete_dcv_session_response()
+        )
+
+        current_session = self.SESSION
+        current_session[sessions.SESSION_DB_STATE_KEY] = STOPPED_STATE
+        sessions.update_session(current_session)
+        missing_session = {
+            sessions.SESSION_DB_HASH_KEY: TEST_OWNER,
+            sessions.SESSION_DB_RANGE_KEY: "missing-session",
+            "name": TEST_STRING,
+        }
+
+        _, fail = vdi_management.stop_sessions([current_session, missing_session])
+        _, bulk_fail = vdi_management.bulk_stop_sessions(
+            [current_session, missing_session]
+        )
+
+        assert [session["failure_reason"] for session in fail] == [
+            session["failure_reason"] for session in bulk_fail
+        ]
+        assert "Can't stop. Wait for it to be READY." in fail[0]["failure_reason"]
+        assert fail[1]["failure_reason"].endswith("Nothing to stop")
+
     def delete_dcv_session_response(self):
         def delete_session_response(curr_sessions):
             if curr_sessions and curr_sessions[0].get(
@@ -257,3 +314,204 @@ class TestVDIManagement(unittest.TestCase):
         )
 
         assert len(success) == 1
+
+    def create_sessions(self, count: int, prefix: str) -> List[Dict[str, Any]]:
+        """
+        create sessions without DCV session, with their server, schedule and session permission
+        """
+        created_sessions = []
+        for index in range(count):
+            session_id = f"{prefix}-session-{index:05d}"
+            server = {
+                servers.SERVER_DB_HASH_KEY: f"{prefix}-instance-{index:05d}",
+                servers.SERVER_DB_STATE_KEY: READY_STATE,
+                servers.SERVER_DB_SESSION_ID_KEY: session_id,
+            }
+            schedule = {
+                schedules.SCHEDULE_DB_HASH_KEY: TEST_SCHEDULE_DAY,
+                schedules.SCHEDULE_DB_RANGE_KEY: f"{prefix}-schedule-{index:05d}",
+                schedules.SCHEDULE_DB_SCHEDULE_TYPE_KEY: TEST_SCHEDULE_TYPE,
+            }
+            created_sessions.append(
+                {
+                    sessions.SESSION_DB_HASH_KEY: f"{TEST_OWNER}-{index % 50}",
+                    sessions.SESSION_DB_RANGE_KEY: session_id,
+                    sessions.SESSION_DB_STATE_KEY: READY_STATE,
+                    sessions.SESSION_DB_DCV_SESSION_ID_KEY: "",
+                    "name": f"{TEST_STRING}-{index}",
+                    "server": server,
+                    f"{TEST_SCHEDULE_DAY}{sessions.SESSION_DB_SCHEDULE_SUFFIX}": schedule,
+                }
+            )
+            table_utils.create_item(servers.SERVER_TABLE_NAME, item=server)
+            table_utils.create_item(schedules.SCHEDULE_DB_TABLE_NAME, item=schedule)
+            table_utils.create_item(
+                session_permissions.SESSION_PERMISSION_TABLE_NAME,
+                item={
+                    session_permissions.SESSION_PERMISSION_DB_HASH_KEY: session_id,
+                    session_permissions.SESSION_PERMISSION_DB_RANGE_KEY: TEST_USER,
+                },
+            )
+        sessions.update_sessions(created_sessions)
+        return created_sessions
+
+    def test_bulk_stop_sessions_pass(self):
+        self.monkeypatch.setattr(
+            dcv_broker_client, "delete_sessions", self.delete_dcv_session_response()
+        )
+        self.monkeypatch.setattr(
+            events_client, "publish_validate_dcv_session_deletion_event", MagicMock()
+        )
+        ec2_client = StubEC2Client()
+        self.monkeypatch.setattr(vdi_management, "_ec2_client", lambda: ec2_client)
+        bulk_sessions = self.create_sessions(150, "bulk-stop")
+
+        success, fail = vdi_management.bulk_stop_sessions(
+            [self.SESSION] + bulk_sessions + bulk_sessions[:1]
+        )
+
+        assert len(fail) == 0
+        assert len(success) == 151
+        assert [len(chunk) for chunk in ec2_client.calls] == [100, 50]
+        for session in bulk_sessions:
+            server = servers.get_server(
+                instance_id=session["server"][servers.SERVER_DB_HASH_KEY]
+            )
+            assert server.get(servers.SERVER_DB_STATE_KEY) == STOPPED_STATE
+            current_session = sessions.get_session(
+                owner=session[sessions.SESSION_DB_HASH_KEY],
+                session_id=session[sessions.SESSION_DB_RANGE_KEY],
+            )
+            assert current_session.get(sessions.SESSION_DB_STATE_KEY) == STOPPING_STATE
+        # the session with a DCV session is stopped once the DCV session is deleted
+        current_server = servers.get_server(instance_id=TEST_INSTANCE_ID)
+        assert current_server.get(servers.SERVER_DB_STATE_KEY) == READY_STATE
+
+    def test_bulk_stop_sessions_failed_chunk_fail(self):
+        self.monkeypatch.setattr(
+            dcv_broker_client, "delete_sessions", self.delete_dcv_session_response()
+        )
+        bulk_sessions = self.create_sessions(150, "bulk-stop-fail")
+        failing_instance_id = bulk_sessions[120]["server"][servers.SERVER_DB_HASH_KEY]
+        ec2_client = StubEC2Client(failing_instance_ids=[failing_instance_id])
+        self.monkeypatch.setattr(vdi_management, "_ec2_client", lambda: ec2_client)
+
+        success, fail = vdi_management.bulk_stop_sessions(bulk_sessions)
+
+        assert len(success) == 100
+        assert len(fail) == 50
+        assert all(session.get("failure_reason") for session in fail)
+        for session in fail:
+            current_session = sessions.get_session(
+                owner=session[sessions.SESSION_DB_HASH_KEY],
+                session_id=session[sessions.SESSION_DB_RANGE_KEY],
+            )
+            assert current_session.get(sessions.SESSION_DB_STATE_KEY) == READY_STATE
+
+    def test_bulk_terminate_sessions_pass(self):
+        self.monkeypatch.setattr(
+            dcv_broker_client, "delete_sessions", self.delete_dcv_session_response()
+        )
+        self.monkeypatch.setattr(
+            events_client, "publish_validate_dcv_session_deletion_event", MagicMock()
+        )
+        ec2_client = StubEC2Client()
+        self.monkeypatch.setattr(vdi_management, "_ec2_client", lambda: ec2_client)
+        bulk_sessions = self.create_sessions(30, "bulk-terminate")
+
+        success, fail = vdi_management.bulk_terminate_sessions(bulk_sessions)
+
+        assert len(fail) == 0
+        assert len(success) == 30
+        assert len(ec2_client.calls) == 1
+        for session in bulk_sessions:
+            session_id = session[sessions.SESSION_DB_RANGE_KEY]
+            with pytest.raises(exceptions.ServerNotFound):
+                servers.get_server(
+                    instance_id=session["server"][servers.SERVER_DB_HASH_KEY]
+                )
+            with pytest.raises(exceptions.UserSessionNotFound):
+                sessions.get_session(
+                    owner=session[sessions.SESSION_DB_HASH_KEY], session_id=session_id
+                )
+            with pytest.raises(exceptions.SessionPermissionsNotFound):
+                session_permissions.get_session_permission(
+                    session_id=session_id, user=TEST_USER
+                )
+            schedule = session[
+                f"{TEST_SCHEDULE_DAY}{sessions.SESSION_DB_SCHEDULE_SUFFIX}"
+            ]
+            assert (
+                table_utils.get_item(
+                    schedules.SCHEDULE_DB_TABLE_NAME,
+                    key={
+                        schedules.SCHEDULE_DB_HASH_KEY: TEST_SCHEDULE_DAY,
+                        schedules.SCHEDULE_DB_RANGE_KEY: schedule[
+                            schedules.SCHEDULE_DB_RANGE_KEY
+                        ],
+                    },
+                )
+                is None
+            )
+
+    @pytest.mark.benchmark
+    def test_benchmark_bulk_stop_sessions(self):
+        """
+        compare the requests made to stop the sessions one at a time and in bulk, with a local stand-in for EC2
+        """
+        self.monkeypatch.setattr(
+            dcv_broker_client, "delete_sessions", self.delete_dcv_session_response()
+        )
+        ec2_client = StubEC2Client()
+        self.monkeypatch.setattr(vdi_management, "_ec2_client", lambda: ec2_client)
+        self.monkeypatch.setattr(
+            vdi_management,
+            "_stop_hosts",
+            lambda servers, hibernate=False: ec2_client.stop_instances(
+                InstanceIds=[server["instance_id"] for server in servers]
+            ),
+        )
+        dynamodb_requests: List[str] = []
+        for table_name in [
+            sessions.SESSIONS_TABLE_NAME,
+            servers.SERVER_TABLE_NAME,
+            schedules.SCHEDULE_DB_TABLE_NAME,
+            session_permissions.SESSION_PERMISSION_TABLE_NAME,
+        ]:
+            table_utils.table(table_name).meta.client.meta.events.register(
+                "before-call.dynamodb",
+                lambda model, **kwargs: dynamodb_requests.append(model.name),
+            )
+
+        results = {}
+        for name, stop in [
+            ("one at a time", vdi_management.stop_sessions),
+            ("bulk", vdi_management.bulk_stop_sessions),
+        ]:
+            bulk_sessions = self.create_sessions(
+                BENCHMARK_SESSION_COUNT, f"benchmark-{name.replace(' ', '-')}"
+            )
+            ec2_client.calls = []
+            dynamodb_requests.clear()
+            start = time.perf_counter()
+            success, fail = stop(bulk_sessions)
+            results[name] = {
+                "seconds": time.perf_counter() - start,
+                "dynamodb": len(dynamodb_requests),
+                "ec2": len(ec2_client.calls),
+            }
+            assert len(success) == BENCHMARK_SESSION_COUNT
+            assert len(fail) == 0
+
+        print(
+            f"stop {BENCHMARK_SESSION_COUNT} sessions: "
+            + ", ".join(
+                f"{name} {result['seconds']:.2f}s "
+                f"({result['dynamodb']} DynamoDB requests, {result['ec2']} EC2 requests)"
+                for name, result in results.items()
+            )
+        )
+        # sessions are read and written 100 and 25 at a time, and server states in transactions of 100
+        assert results["one at a time"]["dynamodb"] >= 3 * BENCHMARK_SESSION_COUNT
+        assert results["bulk"]["dynamodb"] <= BENCHMARK_SESSION_COUNT // 10
+        assert results["bulk"]["ec2"] == BENCHMARK_SESSION_COUNT // 100
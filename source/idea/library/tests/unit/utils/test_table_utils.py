@@ -0,0 +1,108 @@
+#  Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#  SPDX-License-Identifier: Apache-2.0
+
+from typing import Any, Dict
+from unittest.mock import MagicMock
+
+import botocore.exceptions
+import pytest
+from res.exceptions import BatchOperationIncomplete
+from res.utils import table_utils
+
+TABLE_NAME = "res-test.accounts.users"
+
+
+class ThrottledClient:
+    """
+    batch client that never processes the first key of a request
+    """
+
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def batch_get_item(self, RequestItems: Dict[str, Any]) -> Dict[str, Any]:
+        self.calls += 1
+        keys = RequestItems[TABLE_NAME]["Keys"]
+        return {
+            "Responses": {TABLE_NAME: keys[1:]},
+            "UnprocessedKeys": {
+                TABLE_NAME: {**RequestItems[TABLE_NAME], "Keys": keys[:1]}
+            },
+        }
+
+
+@pytest.fixture()
+def client(monkeypatch: pytest.MonkeyPatch) -> ThrottledClient:
+    client = ThrottledClient()
+    ddb_table = MagicMock()
+    ddb_table.name = TABLE_NAME
+    ddb_table.meta.client = client
+    monkeypatch.setattr(table_utils, "table", lambda table_name: ddb_table)
+    monkeypatch.setattr(table_utils.time, "sleep", lambda seconds: None)
+    return client
+
+
+def test_batch_get_items_by_keys_stops_retrying_unprocessed_keys(
+    client: ThrottledClient,
+):
+    keys = [{"username": f"user{index}"} for index in range(3)]
+
+    with pytest.raises(BatchOperationIncomplete):
+        table_utils.batch_get_items_by_keys("accounts.users", keys)
+
+    assert client.calls == table_utils.BATCH_MAX_ATTEMPTS
+
+
+def test_batch_write_items_stops_retrying_unprocessed_items(
+    monkeypatch: pytest.MonkeyPatch,
+):
+    client = MagicMock()
+    client.batch_write_item.side_effect = lambda RequestItems: {
+        "UnprocessedItems": RequestItems
+    }
+    ddb_table = MagicMock()
+    ddb_table.name = TABLE_NAME
+    ddb_table.meta.client = client
+    monkeypatch.setattr(table_utils, "table", lambda table_name: ddb_table)
+    monkeypatch.setattr(table_utils.time, "sleep", lambda seconds: None)
+
+    with pytest.raises(BatchOperationIncomplete):
+        table_utils.batch_write_items("accounts.users", items=[{"username": "user0"}])
+
+    assert client.batch_write_item.call_count == table_utils.BATCH_MAX_ATTEMPTS
+
+
+def test_transact_update_items_retries_conflicting_transactions(
+    monkeypatch: pytest.MonkeyPatch,
+):
+    conflict = botocore.exceptions.ClientError(
+        {
+            "Error": {"Code": "TransactionCanceledException"},
+            "CancellationReasons": [
+                {"Code": "None"},
+                {"Code": "TransactionConflict"},
+            ],
+        },
+        "TransactWriteItems",
+    )
+    client = MagicMock()
+    client.transact_write_items.side_effect = [conflict, None]
+    ddb_table = MagicMock()
+    ddb_table.name = TABLE_NAME
+    ddb_table.meta.client = client
+    monkeypatch.setattr(table_utils, "table", lambda table_name: ddb_table)
+    monkeypatch.setattr(table_utils.time, "sleep", lambda seconds: None)
+
+    not_found = table_utils.transact_update_items(
+        "accounts.users",
+        updates=[
+            ({"username": "user0"}, {"enabled": False}),
+            ({"username": "user1"}, {"enabled": False}),
+        ],
+        require_exists=True,
+    )
+
+    assert not_found == []
+    assert client.transact_write_items.call_count == 2
+    retried_items = client.transact_write_items.call_args.kwargs["TransactItems"]
+    assert len(retried_items) == 2
@@ -0,0 +1,185 @@
+#  Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance
+#  with the License. A copy of the License is located at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  or in the 'license' file accompanying this file. This file is distributed on an 'AS IS' BASIS, WITHOUT WARRANTIES
+#  OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions
+#  and limitations under the License.
+
+"""
+Test Cases for AwsServiceAvailabilityHelper, against a local SSM stand-in with 30 regions
+"""
+
+import json
+import math
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import pytest
+from ideaadministrator.app.aws_service_availability_helper import (
+    AwsServiceAvailabilityHelper,
+)
+
+REGION_COUNT = 30
+OTHER_SERVICE_COUNT = 250
+# simulated round trip of a GetParametersByPath call
+API_LATENCY_SECONDS = 0.002
+
+REGIONS = [f"region-{index:02d}" for index in range(REGION_COUNT)]
+
+
+class LocalSSM:
+    """
+    GetParametersByPath stand-in for the /aws/service/global-infrastructure parameters. every region has all the
+    services used by IDEA, except region-01 without 'aps', and 250 other services.
+    """
+
+    def __init__(self, idea_services: List[str], latency: float = 0.0) -> None:
+        self.latency = latency
+        self.calls = 0
+        self._lock = threading.Lock()
+        self.region_services = {}
+        for region in REGIONS:
+            services = [
+                f"other-service-{index}" for index in range(OTHER_SERVICE_COUNT)
+            ]
+            services += [
+                service
+                for service in idea_services
+                if not (region == "region-01" and service == "aps")
+            ]
+            self.region_services[region] = sorted(services)
+
+    def get_parameters_by_path(
+        self, Path: str, MaxResults: int, NextToken: Optional[str] = None
+    ) -> Dict[str, Any]:
+        assert MaxResults <= 10
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.latency)
+        region = Path.split("/")[-2]
+        services = self.region_services[region]
+        start = int(NextToken) if NextToken is not None else 0
+        response: Dict[str, Any] = {
+            "Parameters": [
+                {"Name": f"{Path}/{service}", "Value": service}
+                for service in services[start : start + MaxResults]
+            ]
+        }
+        if start + MaxResults < len(services):
+            response["NextToken"] = str(start + MaxResults)
+        return response
+
+    def pages(self, regions: List[str]) -> int:
+        return sum(
+            [math.ceil(len(self.region_services[region]) / 10) for region in regions]
+        )
+
+
+def build_helper(
+    ssm: Optional[LocalSSM], cache_file: str, **kwargs: Any
+) -> AwsServiceAvailabilityHelper:
+    helper = AwsServiceAvailabilityHelper(
+        aws_region="us-east-1", cache_file=cache_file, **kwargs
+    )
+    if ssm is None:
+        ssm = LocalSSM(helper.idea_service_names)
+    helper.ssm_client = ssm
+    return helper
+
+
+@pytest.fixture
+def cache_file(tmp_path: Any) -> str:
+    return os.path.join(tmp_path, "cache", "aws-service-availability.json")
+
+
+def test_availability_matrix(cache_file: str):
+    helper = build_helper(None, cache_file)
+    matrix = {
+        entry["service"]: entry["regions"]
+        for entry in helper.get_availability_matrix(REGIONS)
+    }
+
+    assert sorted(matrix.keys()) == helper.idea_service_names
+    assert matrix["aps"]["region-01"] is False
+    assert matrix["aps"]["region-02"] is True
+    assert all(matrix["ec2"].values())
+    assert helper.get_available_services("region-01")["aps"] is False
+
+
+def test_services_are_cached_on_disk(cache_file: str):
+    helper = build_helper(None, cache_file)
+    ssm = helper.ssm_client
+    helper.get_availability_matrix(REGIONS[:2])
+    assert ssm.calls == ssm.pages(REGIONS[:2])
+
+    with open(cache_file) as f:
+        cache = json.load(f)
+    assert sorted(cache.keys()) == REGIONS[:2]
+    assert "other-service-0" in cache["region-00"]["services"]
+
+    # another process reads the cache, and only the regions not cached are read
+    helper = build_helper(ssm, cache_file)
+    helper.get_availability_matrix(REGIONS[:3])
+    assert ssm.calls == ssm.pages(REGIONS[:3])
+    with open(cache_file) as f:
+        assert sorted(json.load(f).keys()) == REGIONS[:3]
+
+    # --refresh reads all regions again
+    helper = build_helper(ssm, cache_file, refresh=True)
+    helper.get_availability_matrix(REGIONS[:3])
+    assert ssm.calls == 2 * ssm.pages(REGIONS[:3])
+
+
+def test_expired_or_corrupt_cache_is_read_again(cache_file: str):
+    helper = build_helper(None, cache_file, cache_ttl_seconds=60)
+    ssm = helper.ssm_client
+    helper.get_available_services("region-00")
+    calls = ssm.calls
+
+    with open(cache_file) as f:
+        cache = json.load(f)
+    cache["region-00"]["cached_at"] -= 61
+    with open(cache_file, "w") as f:
+        json.dump(cache, f)
+    helper.get_available_services("region-00")
+    assert ssm.calls == 2 * calls
+
+    with open(cache_file, "w") as f:
+        f.write("{")
+    assert helper.get_available_services("region-00")["ec2"] is True
+    assert ssm.calls == 3 * calls
+    helper.get_available_services("region-00")
+    assert ssm.calls == 3 * calls
+
+
+@pytest.mark.benchmark
+def test_benchmark_region_sweep(cache_file: str):
+    def sweep(**kwargs: Any) -> Dict[str, Any]:
+        helper = build_helper(None, cache_file, **kwargs)
+        helper.ssm_client.latency = API_LATENCY_SECONDS
+        start = time.perf_counter()
+        matrix = helper.get_availability_matrix(REGIONS)
+        return {
+            "ms": (time.perf_counter() - start) * 1000,
+            "calls": helper.ssm_client.calls,
+            "matrix": matrix,
+        }
+
+    sequential = sweep(max_workers=1, refresh=True)
+    concurrent = sweep(refresh=True)
+    cached = sweep()
+
+    print(
+        f"{REGION_COUNT} regions: sequential {sequential['calls']} calls {sequential['ms']:.1f}ms, "
+        f"concurrent {concurrent['calls']} calls {concurrent['ms']:.1f}ms, "
+        f"cached {cached['calls']} calls {cached['ms']:.1f}ms"
+    )
+    assert sequential["matrix"] == concurrent["matrix"] == cached["matrix"]
+    assert sequential["calls"] == concurrent["calls"]
+    assert cached["calls"] == 0
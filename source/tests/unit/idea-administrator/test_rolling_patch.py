@@ -0,0 +1,353 @@
+#  Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance
+#  with the License. A copy of the License is located at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  or in the 'license' file accompanying this file. This file is distributed on an 'AS IS' BASIS, WITHOUT WARRANTIES
+#  OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions
+#  and limitations under the License.
+
+"""
+Test Cases for RollingPatchEngine, against a local SSM stand-in simulating a fleet of 1,000 instances
+"""
+
+import heapq
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import pytest
+from ideaadministrator.app.rolling_patch import (
+    RollingPatchEngine,
+    ec2_instance_status_health_check,
+    parse_ssm_rate,
+    plan_patch_waves,
+    split_ssm_rate,
+)
+
+from ideadatamodel import exceptions
+
+FLEET_SIZE = 1000
+PATCH_SECONDS = 30
+POLL_INTERVAL_SECONDS = 10
+
+
+def instance_id(index: int) -> str:
+    return f"i-{index:017x}"
+
+
+FLEET = [instance_id(index) for index in range(FLEET_SIZE)]
+
+
+class SimulatedClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def time(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.now += seconds
+
+
+class LocalSSM:
+    """
+    SSM Run Command stand-in. the invocations of a command are scheduled on the simulated clock when the command is
+    sent: at most MaxConcurrency invocations run at once, each for PATCH_SECONDS, and the invocations that have not
+    started are cancelled once the failed invocations exceed MaxErrors.
+    """
+
+    def __init__(self, clock: SimulatedClock, failing: Optional[Set[str]] = None):
+        self.clock = clock
+        self.failing = failing or set()
+        self.commands: Dict[str, Dict[str, Any]] = {}
+        self.send_command_calls = 0
+        self.list_command_invocations_calls = 0
+
+    def send_command(
+        self,
+        InstanceIds: List[str],
+        DocumentName: str,
+        MaxConcurrency: str,
+        MaxErrors: str,
+        Parameters: Dict[str, Any],
+        Comment: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        assert len(InstanceIds) <= 50
+        self.send_command_calls += 1
+        command_id = f"command-{self.send_command_calls}"
+        concurrency = max(parse_ssm_rate(MaxConcurrency, len(InstanceIds)), 1)
+        max_errors = parse_ssm_rate(MaxErrors, len(InstanceIds))
+
+        schedule: Dict[str, Tuple[float, float, str]] = {}
+        running: List[Tuple[float, str]] = []
+        now = self.clock.now
+        failed = 0
+        for target in InstanceIds:
+            if len(running) >= concurrency:
+                end, finished = heapq.heappop(running)
+                now = end
+                failed += schedule[finished][2] == "Failed"
+            if failed > max_errors:
+                schedule[target] = (now, now, "Cancelled")
+                continue
+            status = "Failed" if target in self.failing else "Success"
+            schedule[target] = (now, now + PATCH_SECONDS, status)
+            heapq.heappush(running, (now + PATCH_SECONDS, target))
+
+        self.commands[command_id] = {
+            "instance_ids": InstanceIds,
+            "schedule": schedule,
+            "max_concurrency": MaxConcurrency,
+            "max_errors": MaxErrors,
+        }
+        return {"Command": {"CommandId": command_id}}
+
+    def status(self, command_id: str, target: str) -> str:
+        start, end, status = self.commands[command_id]["schedule"][target]
+        if self.clock.now < start:
+            return "Pending"
+        if self.clock.now < end:
+            return "InProgress"
+        return status
+
+    def list_command_invocations(
+        self,
+        CommandId: str,
+        Details: bool,
+        MaxResults: int,
+        NextToken: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        assert MaxResults <= 50
+        self.list_command_invocations_calls += 1
+        instance_ids = self.commands[CommandId]["instance_ids"]
+        start = int(NextToken) if NextToken is not None else 0
+        # pages of 10 invocations, less than MaxResults, as returned by SSM under load
+        page = instance_ids[start : start + 10]
+        response: Dict[str, Any] = {
+            "CommandInvocations": [
+                {
+                    "CommandId": CommandId,
+                    "InstanceId": target,
+                    "Status": self.status(CommandId, target),
+                }
+                for target in page
+            ]
+        }
+        if start + 10 < len(instance_ids):
+            response["NextToken"] = str(start + 10)
+        return response
+
+
+class LocalEC2:
+    def __init__(self, impaired: Optional[Set[str]] = None):
+        self.impaired = impaired or set()
+
+    def describe_instance_status(
+        self, InstanceIds: List[str], IncludeAllInstances: bool
+    ) -> Dict[str, Any]:
+        assert len(InstanceIds) <= 100
+        return {
+            "InstanceStatuses": [
+                {
+                    "InstanceId": target,
+                    "InstanceState": {"Name": "running"},
+                    "InstanceStatus": {
+                        "Status": "impaired" if target in self.impaired else "ok"
+                    },
+                    "SystemStatus": {"Status": "ok"},
+                }
+                for target in InstanceIds
+            ]
+        }
+
+
+def build_engine(
+    ssm: LocalSSM, clock: SimulatedClock, waves: List[List[str]], **kwargs: Any
+) -> RollingPatchEngine:
+    return RollingPatchEngine(
+        ssm_client=ssm,
+        commands=["echo patch"],
+        waves=waves,
+        poll_interval_seconds=POLL_INTERVAL_SECONDS,
+        clock=clock.time,
+        sleep=clock.sleep,
+        **kwargs,
+    )
+
+
+def test_plan_patch_waves():
+    assert plan_patch_waves(FLEET) == [FLEET]
+
+    waves = plan_patch_waves(FLEET, batch_percentage=20, canary_size=10)
+    assert [len(wave) for wave in waves] == [10, 200, 200, 200, 200, 190]
+    assert [target for wave in waves for target in wave] == FLEET
+
+    waves = plan_patch_waves(FLEET, batch_size=300)
+    assert [len(wave) for wave in waves] == [300, 300, 300, 100]
+
+    assert plan_patch_waves(FLEET[:3], batch_percentage=1) == [
+        [target] for target in FLEET[:3]
+    ]
+    assert plan_patch_waves([]) == []
+
+    with pytest.raises(exceptions.SocaException):
+        plan_patch_waves(FLEET, batch_size=10, batch_percentage=10)
+    with pytest.raises(exceptions.SocaException):
+        plan_patch_waves(FLEET, batch_percentage=120)
+    with pytest.raises(exceptions.SocaException):
+        plan_patch_waves(FLEET, batch_size=0)
+
+
+def test_parse_ssm_rate():
+    assert parse_ssm_rate("10", 200) == 10
+    assert parse_ssm_rate("10%", 200) == 20
+    assert parse_ssm_rate("0", 200) == 0
+    with pytest.raises(exceptions.SocaException):
+        parse_ssm_rate("ten", 200)
+    with pytest.raises(exceptions.SocaException):
+        parse_ssm_rate("150%", 200)
+
+
+def test_split_ssm_rate():
+    assert split_ssm_rate("10%", 3) == ["10%"] * 3
+    assert split_ssm_rate("50", 4) == ["13", "13", "12", "12"]
+    assert split_ssm_rate("2", 4) == ["1", "1", "0", "0"]
+    assert split_ssm_rate("2", 4, minimum=1) == ["1", "1", "1", "1"]
+    with pytest.raises(exceptions.SocaException):
+        split_ssm_rate("ten", 2)
+
+
+def test_rolling_patch_of_the_fleet(capsys):
+    clock = SimulatedClock()
+    ssm = LocalSSM(clock)
+    waves = plan_patch_waves(FLEET, batch_percentage=20, canary_size=10)
+    engine = build_engine(
+        ssm,
+        clock,
+        waves,
+        max_concurrency="25%",
+        health_check=ec2_instance_status_health_check(LocalEC2()),
+    )
+
+    result = engine.run()
+
+    assert result.is_success()
+    assert set(result.get_statuses().values()) == {"Success"}
+    assert len(result.get_statuses()) == FLEET_SIZE
+    # each wave is sent in chunks of 50 instances, with the MaxConcurrency of the wave
+    assert ssm.send_command_calls == 1 + 4 * 4 + 4
+    assert {command["max_concurrency"] for command in ssm.commands.values()} == {"25%"}
+    # 25% of the canary wave of 10 is 2 concurrent instances, and 25% of a chunk of 50 is 12 concurrent instances:
+    # 5 rounds of invocations per wave
+    assert [wave.completed_at - wave.started_at for wave in result.waves] == [
+        5 * PATCH_SECONDS
+    ] * 6
+
+    # the invocations are read across pages of 10 invocations
+    assert ssm.list_command_invocations_calls > ssm.send_command_calls * 5
+    output = capsys.readouterr().out
+    assert (
+        "patched 0 out of 1000 instances. estimated completion: available after the first wave"
+        in output
+    )
+    assert (
+        "patched 1000 out of 1000 instances. estimated completion: 0 seconds remaining"
+        in output
+    )
+    # the estimate after the canary wave of 10 instances in 150 seconds: 990 instances at 15 seconds per instance
+    assert "patched 10 out of 1000 instances. estimated completion: 4 hours" in output
+
+
+def test_estimated_completion_is_refined_with_completed_waves():
+    clock = SimulatedClock()
+    ssm = LocalSSM(clock)
+    engine = build_engine(
+        ssm, clock, plan_patch_waves(FLEET, batch_size=100), print_progress=False
+    )
+    assert engine.estimate_remaining_seconds() is None
+
+    wave = engine.waves[0]
+    engine.send_wave(wave)
+    engine.wait_for_wave(wave)
+    wave.status = "Completed"
+    # 100 instances in 2 chunks of 50 instances, the MaxConcurrency of 50 split across the chunks
+    assert {
+        ssm.commands[command_id]["max_concurrency"] for command_id in wave.command_ids
+    } == {"25"}
+    assert wave.completed_at - wave.started_at == 2 * PATCH_SECONDS
+    assert engine.estimate_remaining_seconds() == 9 * 2 * PATCH_SECONDS
+
+
+def test_failed_canary_halts_the_rollout():
+    clock = SimulatedClock()
+    ssm = LocalSSM(clock, failing={FLEET[3]})
+    waves = plan_patch_waves(FLEET, batch_percentage=25, canary_size=10)
+    engine = build_engine(ssm, clock, waves, print_progress=False)
+
+    result = engine.run()
+
+    assert not result.is_success()
+    assert "1 out of 10 instances of wave 1" in result.halted_reason
+    assert ssm.send_command_calls == 1
+    statuses = result.get_statuses()
+    assert statuses[FLEET[3]] == "Failed"
+    assert [wave.status for wave in result.waves] == ["Failed"] + ["Skipped"] * 4
+    assert list(statuses.values()).count("Skipped") == FLEET_SIZE - 10
+
+
+def test_max_errors_allows_failures_within_the_wave():
+    clock = SimulatedClock()
+    ssm = LocalSSM(clock, failing={FLEET[3], FLEET[500]})
+    waves = plan_patch_waves(FLEET, batch_size=250)
+    engine = build_engine(ssm, clock, waves, max_errors="2", print_progress=False)
+
+    result = engine.run()
+
+    assert result.halted_reason is None
+    assert result.failed_count == 2
+    assert not result.is_success()
+    # the MaxErrors of the wave is sent with each of its 5 chunks
+    assert [
+        ssm.commands[command_id]["max_errors"]
+        for command_id in result.waves[0].command_ids
+    ] == ["2"] * 5
+
+
+def test_max_errors_applies_to_each_chunk_of_the_wave():
+    clock = SimulatedClock()
+    # in the 4th chunk of the first wave
+    ssm = LocalSSM(clock, failing={FLEET[160]})
+    waves = plan_patch_waves(FLEET, batch_size=250)
+    engine = build_engine(ssm, clock, waves, max_errors="2", print_progress=False)
+
+    result = engine.run()
+
+    assert result.halted_reason is None
+    assert result.failed_count == 1
+    statuses = result.get_statuses()
+    assert statuses[FLEET[160]] == "Failed"
+    assert list(statuses.values()).count("Success") == FLEET_SIZE - 1
+
+
+def test_health_gate_halts_the_rollout():
+    clock = SimulatedClock()
+    ssm = LocalSSM(clock)
+    waves = plan_patch_waves(FLEET, batch_size=200)
+    health_check = ec2_instance_status_health_check(LocalEC2(impaired={FLEET[450]}))
+    engine = build_engine(
+        ssm, clock, waves, health_check=health_check, print_progress=False
+    )
+
+    result = engine.run()
+
+    assert "health check failed after wave 3" in result.halted_reason
+    assert FLEET[450] in result.halted_reason
+    assert [wave.status for wave in result.waves] == [
+        "Completed",
+        "Completed",
+        "Failed",
+        "Skipped",
+        "Skipped",
+    ]
+    assert ssm.send_command_calls == 3 * 4
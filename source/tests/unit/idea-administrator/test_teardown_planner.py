@@ -0,0 +1,214 @@
+#  Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance
+#  with the License. A copy of the License is located at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  or in the 'license' file accompanying this file. This file is distributed on an 'AS IS' BASIS, WITHOUT WARRANTIES
+#  OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions
+#  and limitations under the License.
+
+import threading
+from typing import Optional
+from unittest.mock import MagicMock
+
+import botocore.exceptions
+import pytest
+from ideaadministrator.app import teardown_planner
+from ideaadministrator.app.delete_cluster import DeleteCluster
+from ideaadministrator.app.teardown_planner import (
+    TeardownExecutor,
+    TeardownPlan,
+    TeardownTask,
+    call_with_throttling_backoff,
+    map_concurrently,
+)
+
+from ideadatamodel import exceptions
+
+
+def build_plan(*tasks: TeardownTask) -> TeardownPlan:
+    plan = TeardownPlan()
+    for task in tasks:
+        plan.add_task(task)
+    return plan
+
+
+def client_error(code: str) -> botocore.exceptions.ClientError:
+    return botocore.exceptions.ClientError({"Error": {"Code": code}}, "Operation")
+
+
+def test_teardown_plan_waves_and_critical_path():
+    plan = build_plan(
+        TeardownTask("ec2", "terminate instances", estimated_seconds=30),
+        TeardownTask("stack-a", "delete", depends_on=["ec2"], estimated_seconds=600),
+        TeardownTask("stack-b", "delete", depends_on=["ec2"], estimated_seconds=300),
+        TeardownTask("backups", "delete", estimated_seconds=100),
+        TeardownTask(
+            "cluster",
+            "delete",
+            depends_on=["stack-a", "stack-b", "backups"],
+            estimated_seconds=900,
+        ),
+    )
+
+    waves = [[task.task_id for task in wave] for wave in plan.get_waves()]
+    assert waves == [["backups", "ec2"], ["stack-a", "stack-b"], ["cluster"]]
+
+    critical_path, estimated_seconds = plan.get_critical_path()
+    assert [task.task_id for task in critical_path] == ["ec2", "stack-a", "cluster"]
+    assert estimated_seconds == 30 + 600 + 900
+
+
+def test_teardown_plan_ignores_dependencies_on_absent_tasks():
+    plan = build_plan(TeardownTask("stack-a", "delete"))
+    plan.add_dependency("stack-a", "not-planned")
+    assert plan.tasks["stack-a"].depends_on == set()
+
+
+def test_teardown_plan_detects_cycles():
+    plan = build_plan(
+        TeardownTask("stack-a", "delete", depends_on=["stack-b"]),
+        TeardownTask("stack-b", "delete", depends_on=["stack-a"]),
+    )
+    with pytest.raises(exceptions.SocaException):
+        plan.get_waves()
+
+
+def test_teardown_executor_runs_independent_tasks_concurrently():
+    lock = threading.Lock()
+    running = {"current": 0, "max": 0}
+    finished = []
+    # the stacks are only released once all 4 run at the same time, else the barrier breaks and the tasks fail
+    stacks_running = threading.Barrier(4, timeout=10)
+
+    def action(task_id: str, barrier: Optional[threading.Barrier] = None):
+        def run():
+            with lock:
+                running["current"] += 1
+                running["max"] = max(running["max"], running["current"])
+            if barrier is not None:
+                barrier.wait()
+            with lock:
+                running["current"] -= 1
+                finished.append(task_id)
+
+        return run
+
+    plan = build_plan(
+        *[
+            TeardownTask(
+                f"stack-{i}", "delete", action=action(f"stack-{i}", stacks_running)
+            )
+            for i in range(4)
+        ],
+        TeardownTask(
+            "cluster",
+            "delete",
+            action=action("cluster"),
+            depends_on=[f"stack-{i}" for i in range(4)],
+        ),
+    )
+
+    executor = TeardownExecutor(plan, max_workers=4)
+    assert executor.execute() is True
+    assert running["max"] == 4
+    assert finished[-1] == "cluster"
+    assert len(executor.completed) == 5
+
+
+def test_teardown_executor_skips_dependents_of_failed_tasks():
+    cluster_action = MagicMock()
+    independent_action = MagicMock()
+
+    def fail():
+        raise exceptions.general_exception("delete failed")
+
+    plan = build_plan(
+        TeardownTask("stack-a", "delete", action=fail),
+        TeardownTask("stack-b", "delete", action=independent_action),
+        TeardownTask("idp", "delete", depends_on=["stack-a"]),
+        TeardownTask("cluster", "delete", action=cluster_action, depends_on=["idp"]),
+    )
+
+    executor = TeardownExecutor(plan, max_workers=2)
+    assert executor.execute() is False
+    assert list(executor.failed.keys()) == ["stack-a"]
+    assert sorted(executor.skipped) == ["cluster", "idp"]
+    independent_action.assert_called_once()
+    cluster_action.assert_not_called()
+
+
+def test_call_with_throttling_backoff(monkeypatch):
+    monkeypatch.setattr(teardown_planner.time, "sleep", MagicMock())
+    fn = MagicMock(
+        side_effect=[
+            client_error("Throttling"),
+            client_error("RequestLimitExceeded"),
+            "ok",
+        ]
+    )
+    assert call_with_throttling_backoff(fn) == "ok"
+    assert fn.call_count == 3
+
+    fn = MagicMock(side_effect=client_error("ValidationError"))
+    with pytest.raises(botocore.exceptions.ClientError):
+        call_with_throttling_backoff(fn)
+    assert fn.call_count == 1
+
+    fn = MagicMock(side_effect=client_error("Throttling"))
+    with pytest.raises(botocore.exceptions.ClientError):
+        call_with_throttling_backoff(fn, max_retries=2)
+    assert fn.call_count == 3
+
+
+def test_map_concurrently_preserves_order():
+    assert map_concurrently(lambda value: value * 2, range(20), max_workers=4) == [
+        value * 2 for value in range(20)
+    ]
+    assert map_concurrently(lambda value: value, []) == []
+
+
+def test_delete_cluster_teardown_plan():
+    delete_cluster = DeleteCluster.__new__(DeleteCluster)
+    delete_cluster.app_modules = [{"module_id": "cluster-manager"}]
+    delete_cluster.vpc_lambda_functions = []
+    delete_cluster.ec2_instances = [MagicMock()]
+    delete_cluster.termination_protected_ec2_instances = []
+    delete_cluster.cloud_formation_stacks = [
+        {"StackName": "res-vdc"},
+        {"StackName": "res-cluster-manager"},
+        {"StackName": "res-shared-storage"},
+    ]
+    delete_cluster.identity_provider_stacks = [{"StackName": "res-identity-provider"}]
+    delete_cluster.cluster_stacks = [{"StackName": "res-cluster"}]
+    delete_cluster.stack_importers = {"res-shared-storage": {"res-vdc"}}
+    delete_cluster.dynamodb_tables = ["res.accounts.users"]
+
+    plan = delete_cluster.build_teardown_plan(
+        delete_backups=True,
+        delete_bootstrap=False,
+        delete_databases=True,
+        delete_cloudwatch_logs=False,
+    )
+    waves = [sorted(task.task_id for task in wave) for wave in plan.get_waves()]
+    assert waves == [
+        ["app-module-clean-up", "delete-backup-recovery-points"],
+        ["terminate-ec2-instances"],
+        ["stack:res-cluster-manager", "stack:res-vdc"],
+        ["stack:res-shared-storage"],
+        ["stack:res-identity-provider"],
+        ["stack:res-cluster"],
+        ["delete-dynamodb-tables", "delete-target-groups"],
+    ]
+    critical_path, _ = plan.get_critical_path()
+    assert [task.task_id for task in critical_path] == [
+        "app-module-clean-up",
+        "terminate-ec2-instances",
+        "stack:res-vdc",
+        "stack:res-shared-storage",
+        "stack:res-identity-provider",
+        "stack:res-cluster",
+        "delete-dynamodb-tables",
+    ]
@@ -0,0 +1,247 @@
+#  Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance
+#  with the License. A copy of the License is located at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  or in the 'license' file accompanying this file. This file is distributed on an 'AS IS' BASIS, WITHOUT WARRANTIES
+#  OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions
+#  and limitations under the License.
+
+"""
+Test Cases for GroupMembersDAO
+"""
+
+import time
+from collections import Counter
+from typing import Any, Dict, Iterator, List
+
+import boto3
+import pytest
+from ideaclustermanager.app.accounts.db.group_members_dao import GroupMembersDAO
+from ideasdk.utils import Utils
+from moto import mock_aws
+from res.resources import accounts
+from res.utils import table_utils
+
+from ideadatamodel import ListUsersInGroupRequest, SocaPaginator
+
+GROUP_SIZES = [100, 1000, 10000]
+
+
+class DynamoDBCallCounter:
+    def __init__(self) -> None:
+        self.calls: Counter = Counter()
+
+    def __call__(self, model: Any, **_: Any) -> None:
+        self.calls[model.name] += 1
+
+
+@pytest.fixture()
+def call_counter(monkeypatch: Any) -> Iterator[DynamoDBCallCounter]:
+    monkeypatch.setenv("environment_name", "idea-mock")
+    with mock_aws():
+        boto3.setup_default_session(region_name="us-east-1")
+        dynamodb = boto3.resource("dynamodb")
+        dynamodb.create_table(
+            TableName="idea-mock.accounts.users",
+            KeySchema=[{"AttributeName": "username", "KeyType": "HASH"}],
+            AttributeDefinitions=[{"AttributeName": "username", "AttributeType": "S"}],
+            BillingMode="PAY_PER_REQUEST",
+        )
+        dynamodb.create_table(
+            TableName="idea-mock.accounts.group-members",
+            KeySchema=[
+                {"AttributeName": "group_name", "KeyType": "HASH"},
+                {"AttributeName": "username", "KeyType": "RANGE"},
+            ],
+            AttributeDefinitions=[
+                {"AttributeName": "group_name", "AttributeType": "S"},
+                {"AttributeName": "username", "AttributeType": "S"},
+            ],
+            BillingMode="PAY_PER_REQUEST",
+        )
+        counter = DynamoDBCallCounter()
+        boto3.DEFAULT_SESSION.events.register("before-call.dynamodb", counter)
+        table_utils.table.cache_clear()
+        yield counter
+        table_utils.table.cache_clear()
+        boto3.DEFAULT_SESSION = None
+
+
+@pytest.fixture()
+def group_members_dao(call_counter: DynamoDBCallCounter) -> GroupMembersDAO:
+    dao = GroupMembersDAO.__new__(GroupMembersDAO)
+    dao.table = table_utils.table(accounts.GROUP_MEMBERS_TABLE_NAME)
+    return dao
+
+
+def create_group(group_name: str, size: int, offset: int = 0) -> None:
+    users = table_utils.table(accounts.USERS_TABLE_NAME)
+    members = table_utils.table(accounts.GROUP_MEMBERS_TABLE_NAME)
+    with users.batch_writer() as users_batch, members.batch_writer() as members_batch:
+        for index in range(offset, offset + size):
+            username = f"user{index:05d}"
+            users_batch.put_item(
+                Item={
+                    "username": username,
+                    "email": f"{username}@example.com",
+                    "uid": 10000 + index,
+                    "role": "user",
+                    "enabled": True,
+                }
+            )
+            members_batch.put_item(
+                Item={"group_name": group_name, "username": username}
+            )
+
+
+def test_members_of_all_groups_are_read_in_batches(
+    group_members_dao: GroupMembersDAO, call_counter: DynamoDBCallCounter
+) -> None:
+    create_group("group-a", 150)
+    create_group("group-b", 150, offset=100)
+    # membership of a deleted user
+    table_utils.table(accounts.USERS_TABLE_NAME).delete_item(
+        Key={"username": "user00000"}
+    )
+    call_counter.calls.clear()
+
+    result = group_members_dao.list_users_in_group(
+        ListUsersInGroupRequest(
+            group_names=["group-a", "group-b"], paginator=SocaPaginator(page_size=1000)
+        )
+    )
+
+    assert [user.username for user in result.listing] == [
+        f"user{index:05d}" for index in range(1, 250)
+    ]
+    assert result.listing[0].email == "user00001@example.com"
+    assert result.listing[0].uid == 10001
+    assert call_counter.calls == {"Query": 2, "BatchGetItem": 3}
+
+
+def test_projection_narrows_the_user_reads(
+    group_members_dao: GroupMembersDAO, call_counter: DynamoDBCallCounter
+) -> None:
+    create_group("group-a", 150)
+    table_utils.table(accounts.USERS_TABLE_NAME).delete_item(
+        Key={"username": "user00000"}
+    )
+    call_counter.calls.clear()
+
+    result = group_members_dao.list_users_in_group(
+        ListUsersInGroupRequest(
+            group_names=["group-a"],
+            paginator=SocaPaginator(page_size=1000),
+            projection=["username"],
+        )
+    )
+    # users are read by key only, to omit the deleted users as the full reads do
+    assert len(result.listing) == 149
+    assert result.listing[0].username == "user00001"
+    assert result.listing[0].email is None
+    assert call_counter.calls == {"Query": 1, "BatchGetItem": 2}
+
+    result = group_members_dao.list_users_in_group(
+        ListUsersInGroupRequest(
+            group_names=["group-a"],
+            paginator=SocaPaginator(page_size=1000),
+            projection=["email"],
+        )
+    )
+    assert result.listing[0].username == "user00001"
+    assert result.listing[0].email == "user00001@example.com"
+    assert result.listing[0].uid is None
+    assert call_counter.calls == {"Query": 2, "BatchGetItem": 4}
+
+
+def test_unprocessed_keys_are_retried(
+    group_members_dao: GroupMembersDAO,
+    call_counter: DynamoDBCallCounter,
+    monkeypatch: Any,
+) -> None:
+    create_group("group-a", 100)
+    client = table_utils.table(accounts.USERS_TABLE_NAME).meta.client
+    batch_get_item = client.batch_get_item
+
+    def throttled_batch_get_item(RequestItems: Dict[str, Any]) -> Dict[str, Any]:
+        # process half of the keys of each request
+        table_name = next(iter(RequestItems))
+        keys = RequestItems[table_name]["Keys"]
+        processed = {table_name: {**RequestItems[table_name], "Keys": keys[::2]}}
+        response = batch_get_item(RequestItems=processed)
+        if len(keys) > 1:
+            response["UnprocessedKeys"] = {
+                table_name: {**RequestItems[table_name], "Keys": keys[1::2]}
+            }
+        return response
+
+    monkeypatch.setattr(client, "batch_get_item", throttled_batch_get_item)
+    backoffs: List[float] = []
+    monkeypatch.setattr(table_utils.time, "sleep", backoffs.append)
+    call_counter.calls.clear()
+
+    result = group_members_dao.list_users_in_group(
+        ListUsersInGroupRequest(
+            group_names=["group-a"], paginator=SocaPaginator(page_size=1000)
+        )
+    )
+
+    assert len(result.listing) == 100
+    # 100, 50, 25, 12, 6, 3, 1 keys
+    assert call_counter.calls["BatchGetItem"] == 7
+    assert backoffs == [0.1, 0.2, 0.4, 0.8, 1, 1]
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("group_size", GROUP_SIZES)
+def test_benchmark_list_users_in_group(
+    group_members_dao: GroupMembersDAO,
+    call_counter: DynamoDBCallCounter,
+    group_size: int,
+) -> None:
+    create_group("group-a", group_size)
+    request = ListUsersInGroupRequest(
+        group_names=["group-a"], paginator=SocaPaginator(page_size=group_size)
+    )
+
+    # hydration with one GetItem per member
+    call_counter.calls.clear()
+    start = time.perf_counter()
+    memberships = group_members_dao.table.query(
+        Limit=group_size,
+        KeyConditionExpression="group_name = :g",
+        ExpressionAttributeValues={":g": "group-a"},
+    )["Items"]
+    users = [accounts.get_user(membership["username"]) for membership in memberships]
+    get_item_ms = (time.perf_counter() - start) * 1000
+    get_item_calls = sum(call_counter.calls.values())
+
+    call_counter.calls.clear()
+    start = time.perf_counter()
+    result = group_members_dao.list_users_in_group(request)
+    batch_ms = (time.perf_counter() - start) * 1000
+    batch_calls = sum(call_counter.calls.values())
+
+    call_counter.calls.clear()
+    start = time.perf_counter()
+    group_members_dao.list_users_in_group(
+        ListUsersInGroupRequest(
+            group_names=["group-a"],
+            paginator=SocaPaginator(page_size=group_size),
+            projection=["username"],
+        )
+    )
+    projection_ms = (time.perf_counter() - start) * 1000
+    projection_calls = sum(call_counter.calls.values())
+
+    print(
+        f"{group_size} members: get_item {get_item_calls} calls {get_item_ms:.1f}ms, "
+        f"batch_get_item {batch_calls} calls {batch_ms:.1f}ms, "
+        f"usernames only {projection_calls} calls {projection_ms:.1f}ms"
+    )
+    assert len(users) == len(result.listing) == group_size
+    assert Utils.is_not_empty(result.listing[-1].email)
+    assert batch_calls == get_item_calls - group_size + group_size // 100
@@ -0,0 +1,215 @@
+#  Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance
+#  with the License. A copy of the License is located at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  or in the 'license' file accompanying this file. This file is distributed on an 'AS IS' BASIS, WITHOUT WARRANTIES
+#  OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions
+#  and limitations under the License.
+
+"""
+Test Cases for NotificationsService
+"""
+
+import threading
+import time
+from typing import Any, Dict, List, Tuple
+
+import pytest
+from ideaclustermanager import AppContext
+from ideaclustermanager.app.notifications.notifications_service import (
+    NotificationsService,
+)
+from ideaclustermanager.app.notifications.rate_limiter import TokenBucketRateLimiter
+from res.resources import email_templates
+
+from ideadatamodel import User
+
+MAX_SENDING_RATE = 100
+NOTIFICATION_COUNT = 200
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.now += seconds
+
+
+class StubSES:
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.sent_at: List[float] = []
+        self.destinations: List[str] = []
+
+    def send_email(self, **kwargs: Any) -> Dict[str, Any]:
+        with self.lock:
+            self.sent_at.append(time.monotonic())
+            self.destinations.append(kwargs["Destination"]["ToAddresses"][0])
+        return {"MessageId": str(len(self.sent_at))}
+
+
+class StubSQS:
+    def __init__(self) -> None:
+        self.deleted_batches: List[List[Dict[str, Any]]] = []
+
+    def delete_message_batch(self, **kwargs: Any) -> Dict[str, Any]:
+        self.deleted_batches.append(kwargs["Entries"])
+        return {"Successful": kwargs["Entries"], "Failed": []}
+
+
+class StubAccounts:
+    def __init__(self) -> None:
+        self.get_users_calls = 0
+
+    def get_users(self, usernames: List[str]) -> Dict[str, User]:
+        self.get_users_calls += 1
+        return {
+            username: User(
+                username=username, email=f"{username}@example.org", enabled=True
+            )
+            for username in usernames
+        }
+
+    def get_user(self, username: str) -> User:
+        raise AssertionError("users must be looked up in batches")
+
+
+def test_token_bucket_rate_limiter_releases_at_exact_rate() -> None:
+    clock = FakeClock()
+    limiter = TokenBucketRateLimiter(rate=10, clock=clock, sleep=clock.sleep)
+
+    released_at = []
+    for _ in range(50):
+        limiter.acquire()
+        released_at.append(clock.now)
+
+    assert released_at[0] == 0
+    assert released_at[-1] == pytest.approx(4.9)
+    intervals = [b - a for a, b in zip(released_at, released_at[1:])]
+    assert all(interval == pytest.approx(0.1) for interval in intervals)
+
+
+def test_token_bucket_rate_limiter_does_not_burst_after_idle() -> None:
+    clock = FakeClock()
+    limiter = TokenBucketRateLimiter(rate=10, clock=clock, sleep=clock.sleep)
+    limiter.acquire()
+
+    clock.now += 60
+    assert limiter.acquire() == 0
+    assert limiter.acquire() == pytest.approx(0.1)
+
+
+def build_service(
+    context: AppContext, monkeypatch: pytest.MonkeyPatch
+) -> Tuple[NotificationsService, StubSES, StubSQS, StubAccounts, List[str]]:
+    context.config().put("cluster.ses.enabled", True)
+    context.config().put("cluster.ses.sender_email", "admin@example.org")
+    context.config().put("cluster.ses.region", "us-east-1")
+    context.config().put("cluster.ses.max_sending_rate", MAX_SENDING_RATE)
+    context.config().put("cluster-manager.notifications.email.enabled", True)
+    context.config().put(
+        "cluster-manager.notifications_queue_url", "https://sqs/notifications"
+    )
+
+    ses = StubSES()
+    sqs = StubSQS()
+    monkeypatch.setattr(context.aws(), "ses", lambda region_name=None: ses)
+    monkeypatch.setattr(context.aws(), "sqs", lambda: sqs)
+
+    template_loads: List[str] = []
+
+    def get_email_template(email_template_name: str) -> Dict[str, Any]:
+        template_loads.append(email_template_name)
+        return {
+            "name": email_template_name,
+            "subject": "Session {{ session_name }} is ready",
+            "body": "<p>Hello {{ username }}</p>",
+            "updated_on": 1,
+        }
+
+    monkeypatch.setattr(email_templates, "get_email_template", get_email_template)
+
+    accounts = StubAccounts()
+    service = NotificationsService(context=context, accounts=accounts)  # type: ignore[arg-type]
+    return service, ses, sqs, accounts, template_loads
+
+
+def build_messages() -> List[Dict[str, Any]]:
+    return [
+        {
+            "MessageId": str(index),
+            "ReceiptHandle": f"receipt-{index}",
+            "Body": f'{{"username": "user{index}", "template_name": "session-ready", '
+            f'"params": {{"username": "user{index}", "session_name": "s{index}"}}}}',
+        }
+        for index in range(NOTIFICATION_COUNT)
+    ]
+
+
+def send_notifications(service: NotificationsService) -> None:
+    messages = build_messages()
+    try:
+        for batch_start in range(0, NOTIFICATION_COUNT, 10):
+            service.execute_notifications(messages[batch_start : batch_start + 10])
+    finally:
+        service.notifications_executors.shutdown(wait=True)
+
+
+def test_notifications_send_rate_and_batching(
+    context: AppContext, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    service, ses, sqs, accounts, template_loads = build_service(context, monkeypatch)
+    # the clock is frozen, so the waits are the release schedule of the sends, irrespective of thread scheduling
+    clock = FakeClock()
+    waits: List[float] = []
+    service.rate_limiter = TokenBucketRateLimiter(
+        rate=MAX_SENDING_RATE, clock=clock, sleep=waits.append
+    )
+
+    send_notifications(service)
+
+    assert len(ses.sent_at) == NOTIFICATION_COUNT
+    assert sorted(ses.destinations) == sorted(
+        f"user{index}@example.org" for index in range(NOTIFICATION_COUNT)
+    )
+    assert accounts.get_users_calls == NOTIFICATION_COUNT // 10
+    assert template_loads == ["session-ready"]
+    assert len(sqs.deleted_batches) == NOTIFICATION_COUNT // 10
+
+    # the rate is honored across all executor threads: one send every 1 / max_sending_rate seconds
+    assert sorted(waits) == pytest.approx(
+        [index / MAX_SENDING_RATE for index in range(1, NOTIFICATION_COUNT)]
+    )
+
+
+@pytest.mark.benchmark
+def test_benchmark_notifications_send_rate(
+    context: AppContext, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    service, ses, sqs, accounts, template_loads = build_service(context, monkeypatch)
+
+    start = time.monotonic()
+    send_notifications(service)
+    elapsed = time.monotonic() - start
+
+    throughput = NOTIFICATION_COUNT / elapsed
+    print(
+        f"{NOTIFICATION_COUNT} notifications at max_sending_rate={MAX_SENDING_RATE}: "
+        f"{elapsed:.2f}s, {throughput:.1f} emails/s, user lookups: {accounts.get_users_calls}, "
+        f"template loads: {len(template_loads)}, delete batches: {len(sqs.deleted_batches)}"
+    )
+
+    assert len(ses.sent_at) == NOTIFICATION_COUNT
+    # no more than max_sending_rate sends in any 1 second window, while the throughput reaches the limit
+    sent_at = sorted(ses.sent_at)
+    for index, sent in enumerate(sent_at):
+        window = [other for other in sent_at[index:] if other - sent < 1.0]
+        assert len(window) <= MAX_SENDING_RATE + 1
+    assert throughput >= MAX_SENDING_RATE * 0.9
@@ -0,0 +1,132 @@
+#  Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance
+#  with the License. A copy of the License is located at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  or in the 'license' file accompanying this file. This file is distributed on an 'AS IS' BASIS, WITHOUT WARRANTIES
+#  OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions
+#  and limitations under the License.
+
+"""
+Test Cases for the project membership lookups of RoleAssignmentsDAO
+"""
+
+import logging
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+
+from ideaclustermanager.app.authz.db.role_assignments_dao import RoleAssignmentsDAO
+
+
+class LocalTable:
+    """
+    DynamoDB table stand-in for query and scan with key equality conditions, returning pages of 1,000 items
+    """
+
+    def __init__(self, hash_key: str, indexes: Optional[Dict[str, str]] = None):
+        self.hash_key = hash_key
+        self.indexes = indexes or {}
+        self.items: List[Dict[str, Any]] = []
+        self.calls = 0
+
+    def put(self, item: Dict[str, Any]) -> None:
+        self.items.append(item)
+
+    def _page(
+        self, items: List[Dict[str, Any]], start_key: Optional[Dict[str, int]]
+    ) -> Dict[str, Any]:
+        self.calls += 1
+        start = start_key["offset"] if start_key else 0
+        response: Dict[str, Any] = {"Items": items[start : start + 1000]}
+        if start + 1000 < len(items):
+            response["LastEvaluatedKey"] = {"offset": start + 1000}
+        return response
+
+    @staticmethod
+    def _matches(condition: Any, item: Dict[str, Any]) -> bool:
+        attribute, value = condition.get_expression()["values"]
+        return item.get(attribute.name) == value
+
+    def query(
+        self,
+        KeyConditionExpression: Any,
+        IndexName: Optional[str] = None,
+        ExclusiveStartKey: Optional[Dict[str, int]] = None,
+    ) -> Dict[str, Any]:
+        attribute, _ = KeyConditionExpression.get_expression()["values"]
+        assert attribute.name == self.indexes.get(IndexName, self.hash_key)
+        items = [
+            item for item in self.items if self._matches(KeyConditionExpression, item)
+        ]
+        return self._page(items, ExclusiveStartKey)
+
+    def scan(
+        self,
+        FilterExpression: Any = None,
+        ExclusiveStartKey: Optional[Dict[str, int]] = None,
+    ) -> Dict[str, Any]:
+        items = [
+            item
+            for item in self.items
+            if FilterExpression is None or self._matches(FilterExpression, item)
+        ]
+        return self._page(items, ExclusiveStartKey)
+
+
+def build_dao(
+    role_assignments_table: Any, group_members_table: Any
+) -> RoleAssignmentsDAO:
+    dao = RoleAssignmentsDAO.__new__(RoleAssignmentsDAO)
+    dao.context = SimpleNamespace(cluster_name=lambda: "idea-mock")
+    dao.logger = logging.getLogger("test-role-assignments-dao")
+    dao.role_assignments_table = role_assignments_table
+    dao.group_members_table = group_members_table
+    return dao
+
+
+def project_role_assignment(
+    actor_id: str, actor_type: str, project_id: str
+) -> Dict[str, Any]:
+    return {
+        "actor_key": f"{actor_id}:{actor_type}",
+        "resource_key": f"{project_id}:project",
+        "actor_id": actor_id,
+        "resource_id": project_id,
+        "actor_type": actor_type,
+        "resource_type": "project",
+        "role_id": "project_member",
+    }
+
+
+def test_project_membership_lookups():
+    role_assignments = LocalTable(
+        hash_key="actor_key", indexes={"resource-key-index": "resource_key"}
+    )
+    group_members = LocalTable(hash_key="group_name")
+    for username in ["user-1", "user-2"]:
+        group_members.put({"group_name": "group-a", "username": username})
+    role_assignments.put(project_role_assignment("group-a", "group", "project-1"))
+    role_assignments.put(project_role_assignment("user-2", "user", "project-1"))
+    role_assignments.put(project_role_assignment("user-3", "user", "project-1"))
+    role_assignments.put(project_role_assignment("user-3", "user", "project-2"))
+    dao = build_dao(role_assignments, group_members)
+
+    assert dao.get_all_users_for_project("project-1") == ["user-1", "user-2", "user-3"]
+    assert sorted(dao.get_projects_for_user("user-3", [])) == ["project-1", "project-2"]
+    assert dao.get_projects_for_user("user-1", ["group-a"]) == ["project-1"]
+    assert dao.get_projects_by_group_name("group-a") == ["project-1"]
+
+
+def test_list_role_assignments_reads_all_pages():
+    table = LocalTable(
+        hash_key="actor_key", indexes={"resource-key-index": "resource_key"}
+    )
+    for index in range(2500):
+        table.put(project_role_assignment(f"user-{index}", "user", "project-1"))
+    dao = build_dao(table, LocalTable(hash_key="group_name"))
+
+    assert len(dao.list_role_assignments(resource_key="project-1:project")) == 2500
+    assert len(dao.list_role_assignments(role_id="project_member")) == 2500
+    assert table.calls == 6
@@ -0,0 +1,85 @@
+#  Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance
+#  with the License. A copy of the License is located at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  or in the 'license' file accompanying this file. This file is distributed on an 'AS IS' BASIS, WITHOUT WARRANTIES
+#  OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions
+#  and limitations under the License.
+
+"""
+Test Cases for RolesDAO listing
+"""
+
+import logging
+from typing import Any, Iterator
+
+import boto3
+import pytest
+from ideaclustermanager.app.authz.db.roles_dao import RolesDAO
+from ideasdk.utils import Utils
+from moto import mock_aws
+
+from ideadatamodel import SocaFilter
+
+ROLE_COUNT = 30
+
+
+@pytest.fixture()
+def roles_dao() -> Iterator[RolesDAO]:
+    with mock_aws():
+        dynamodb = boto3.resource("dynamodb", region_name="us-east-1")
+        table = dynamodb.create_table(
+            TableName="idea-mock.authz.roles",
+            KeySchema=[{"AttributeName": "role_id", "KeyType": "HASH"}],
+            AttributeDefinitions=[{"AttributeName": "role_id", "AttributeType": "S"}],
+            BillingMode="PAY_PER_REQUEST",
+        )
+        with table.batch_writer() as batch:
+            for index in range(ROLE_COUNT):
+                batch.put_item(
+                    Item={
+                        "role_id": f"role-{index:02d}",
+                        "name": f"Role {index}",
+                        "description": "project member" if index % 2 else "owner",
+                        "projects": {"update_personnel": index % 2 == 0},
+                    }
+                )
+        dao = RolesDAO(context=None, logger=logging.getLogger("roles-dao"))
+        dao.roles_table = table
+        yield dao
+
+
+def role_ids(listing: Any) -> list:
+    return sorted(role.role_id for role in listing)
+
+
+def test_list_roles_resumes_from_cursor(roles_dao: RolesDAO) -> None:
+    first_page = roles_dao.roles_table.scan(Limit=10)
+    cursor = Utils.base64_encode(Utils.to_json(first_page["LastEvaluatedKey"]))
+
+    result = roles_dao.list_roles(include_permissions=False, cursor=cursor, filters=[])
+
+    assert len(result.listing) == ROLE_COUNT - 10
+    listed = set(role_ids(result.listing))
+    assert listed.isdisjoint(item["role_id"] for item in first_page["Items"])
+    assert result.paginator.cursor is None
+
+
+def test_list_roles_filters(roles_dao: RolesDAO) -> None:
+    result = roles_dao.list_roles(
+        include_permissions=True,
+        cursor=None,
+        filters=[SocaFilter(key="role_id", eq="role-07")],
+    )
+    assert role_ids(result.listing) == ["role-07"]
+    assert result.listing[0].projects is not None
+
+    result = roles_dao.list_roles(
+        include_permissions=False,
+        cursor=None,
+        filters=[SocaFilter(key="description", like="member")],
+    )
+    assert len(result.listing) == ROLE_COUNT // 2
@@ -20,6 +20,9 @@ import pytest
 import shortuuid
 from _pytest.monkeypatch import MonkeyPatch
 from ideaclustermanager import AppContext
+from ideaclustermanager.app.shared_filesystem.shared_filesystem_registry import (
+    SharedFilesystemRegistry,
+)
 from ideasdk.aws import AwsClientProvider
 
 from ideadatamodel import (
@@ -1214,16 +1217,18 @@ def test_shared_filesystem_update_filesystems_to_project_mappings_some_updates_f
 
     successful_filesystem = "onboarded_s3_bucket"
 
-    def _mock_update_filesystem_project_mapping(filesystem_name, project_name):
+    def _mock_build_filesystem_to_project_mapping_entries(
+        registry, filesystem_name, project_name
+    ):
         if filesystem_name == successful_filesystem:
-            return
+            return {}
         else:
             raise exceptions.general_exception("Unexpected error")
 
     monkeypatch.setattr(
         context.shared_filesystem,
-        "update_filesystem_to_project_mapping",
-        _mock_update_filesystem_project_mapping,
+        "_build_filesystem_to_project_mapping_entries",
+        _mock_build_filesystem_to_project_mapping_entries,
     )
 
     filesystem_names = ["onboarded_s3_bucket", "onboarded_s3_bucket_2"]
@@ -1237,6 +1242,129 @@ def test_shared_filesystem_update_filesystems_to_project_mappings_some_updates_f
     assert filesystems_succeeded[0] == successful_filesystem
 
 
+def test_shared_filesystem_update_filesystems_to_project_mappings_single_listing_and_write(
+    context: AppContext, monkeypatch: MonkeyPatch
+):
+    project_name = "example_project"
+    listing_calls = []
+
+    def _list_onboarded_file_systems(*_):
+        listing_calls.append(1)
+        return ListOnboardedFileSystemsResult(
+            listing=[
+                FileSystem(
+                    name=f"onboarded_s3_bucket_{index}",
+                    storage={
+                        "provider": "s3_bucket",
+                        "s3_bucket": {
+                            "bucket_arn": f"arn:aws:s3:::example-bucket-{index}"
+                        },
+                        "mount_dir": f"/bucket-{index}",
+                        "projects": [project_name] if index % 2 == 0 else [],
+                    },
+                )
+                for index in range(10)
+            ],
+        )
+
+    written_config_entries = []
+    monkeypatch.setattr(
+        context.shared_filesystem,
+        "list_onboarded_file_systems",
+        _list_onboarded_file_systems,
+    )
+    monkeypatch.setattr(
+        context.shared_filesystem.config.db,
+        "set_config_entries",
+        lambda config_entries: written_config_entries.append(config_entries),
+    )
+    monkeypatch.setattr(context.shared_filesystem.config, "put", lambda *_: None)
+
+    filesystem_names = [f"onboarded_s3_bucket_{index}" for index in range(5)]
+    filesystems_succeeded = (
+        context.shared_filesystem.update_filesystems_to_project_mappings(
+            filesystem_names, project_name
+        )
+    )
+
+    assert filesystems_succeeded == filesystem_names
+    assert len(listing_calls) == 1
+    assert len(written_config_entries) == 1
+    # 1 and 3 attached, 6 and 8 detached, 0, 2 and 4 unchanged
+    assert written_config_entries[0] == {
+        f"{constants.MODULE_SHARED_STORAGE}.onboarded_s3_bucket_1.projects": [
+            project_name
+        ],
+        f"{constants.MODULE_SHARED_STORAGE}.onboarded_s3_bucket_3.projects": [
+            project_name
+        ],
+        f"{constants.MODULE_SHARED_STORAGE}.onboarded_s3_bucket_6.projects": [],
+        f"{constants.MODULE_SHARED_STORAGE}.onboarded_s3_bucket_8.projects": [],
+    }
+
+
+def test_shared_filesystem_registry_lookups():
+    registry = SharedFilesystemRegistry(
+        onboarded_filesystems=[
+            FileSystem(
+                name="onboarded_s3_bucket",
+                storage={
+                    "provider": "s3_bucket",
+                    "s3_bucket": {"bucket_arn": MOCK_S3_BUCKET_BUCKET_ARN},
+                    "mount_dir": "/bucket",
+                    "projects": ["project-1", "project-2"],
+                },
+            ),
+            FileSystem(
+                name="onboarded_lustre",
+                storage={
+                    "provider": "fsx_lustre",
+                    "fsx_lustre": {"file_system_id": "fs-lustre"},
+                    "mount_dir": "/lustre",
+                    "projects": ["project-2"],
+                },
+            ),
+        ],
+        global_filesystems=[
+            FileSystem(
+                name="home",
+                storage={
+                    "provider": "efs",
+                    "efs": {"file_system_id": "fs-home"},
+                    "mount_dir": "/home",
+                    "scope": ["cluster"],
+                },
+            ),
+        ],
+    )
+
+    assert registry.get("home").get_mount_dir() == "/home"
+    assert registry.get("unknown") is None
+    assert (
+        registry.get_by_filesystem_id(MOCK_S3_BUCKET_BUCKET_ARN).get_name()
+        == "onboarded_s3_bucket"
+    )
+    assert registry.get_onboarded_filesystem_ids() == {
+        MOCK_S3_BUCKET_BUCKET_ARN,
+        "fs-lustre",
+    }
+    assert [
+        fs.get_name() for fs in registry.list_filesystems_for_project("project-2")
+    ] == [
+        "onboarded_s3_bucket",
+        "onboarded_lustre",
+    ]
+
+    projects = registry.get_projects("onboarded_s3_bucket")
+    projects.remove("project-2")
+    assert registry.get_projects("onboarded_s3_bucket") == ["project-1", "project-2"]
+    registry.set_projects("onboarded_s3_bucket", projects)
+    assert [
+        fs.get_name() for fs in registry.list_filesystems_for_project("project-2")
+    ] == ["onboarded_lustre"]
+    assert registry.list_filesystems_for_project("project-3") == []
+
+
 def test_shared_filesystem_update_s3_bucket_no_mount_point_collision_no_projects_succeed(
     context: AppContext, monkeypatch: MonkeyPatch
 ):
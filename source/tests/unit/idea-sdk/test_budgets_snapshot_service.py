@@ -0,0 +1,223 @@
+#  Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance
+#  with the License. A copy of the License is located at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  or in the 'license' file accompanying this file. This file is distributed on an 'AS IS' BASIS, WITHOUT WARRANTIES
+#  OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions
+#  and limitations under the License.
+
+"""
+Test Cases for BudgetsSnapshotService
+"""
+
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import botocore.exceptions
+import pytest
+from ideasdk.aws import AWSUtil, BudgetsSnapshotService, EC2InstanceTypesDB
+from ideasdk.context import SocaContext
+
+import ideadatamodel.locale as locale
+from ideadatamodel import errorcodes, exceptions
+
+BUDGET_COUNT = 250
+CONCURRENT_READERS = 50
+
+
+def budget_response(index: int, actual_spend: float) -> Dict[str, Any]:
+    # the currency of the configured locale
+    unit = locale.get_currency_code()
+    return {
+        "BudgetName": f"project-{index:03d}-budget",
+        "BudgetLimit": {"Amount": "100.0", "Unit": unit},
+        "CalculatedSpend": {
+            "ActualSpend": {"Amount": str(actual_spend), "Unit": unit},
+            "ForecastedSpend": {"Amount": str(actual_spend * 2), "Unit": unit},
+        },
+        "TimeUnit": "MONTHLY",
+        "BudgetType": "COST",
+    }
+
+
+class MockBudgetsClient:
+    """
+    Budgets API stub, with a latency to let concurrent readers pile up on a sweep in progress
+    """
+
+    def __init__(self, budgets: List[Dict[str, Any]], latency: float = 0.0) -> None:
+        self.budgets = budgets
+        self.latency = latency
+        self.describe_budgets_calls = 0
+        self.describe_budget_calls = 0
+        self.fail = False
+        self._lock = threading.Lock()
+
+    def describe_budgets(
+        self, AccountId: str, MaxResults: int, NextToken: Optional[str] = None
+    ) -> Dict[str, Any]:
+        with self._lock:
+            self.describe_budgets_calls += 1
+        time.sleep(self.latency)
+        if self.fail:
+            raise botocore.exceptions.ClientError(
+                {"Error": {"Code": "ThrottlingException", "Message": "Rate exceeded"}},
+                "DescribeBudgets",
+            )
+        start = int(NextToken) if NextToken is not None else 0
+        response: Dict[str, Any] = {"Budgets": self.budgets[start : start + MaxResults]}
+        if start + MaxResults < len(self.budgets):
+            response["NextToken"] = str(start + MaxResults)
+        return response
+
+    def describe_budget(self, AccountId: str, BudgetName: str) -> Dict[str, Any]:
+        with self._lock:
+            self.describe_budget_calls += 1
+        for budget in self.budgets:
+            if budget["BudgetName"] == BudgetName:
+                return {"Budget": budget}
+        raise botocore.exceptions.ClientError(
+            {"Error": {"Code": "NotFoundException", "Message": "not found"}},
+            "DescribeBudget",
+        )
+
+
+class MockAwsClientProvider:
+    def __init__(self, budgets_client: MockBudgetsClient) -> None:
+        self.budgets_client = budgets_client
+
+    def budgets(self) -> MockBudgetsClient:
+        return self.budgets_client
+
+
+@pytest.fixture()
+def budgets_client() -> MockBudgetsClient:
+    return MockBudgetsClient(
+        [budget_response(index, float(index % 150)) for index in range(BUDGET_COUNT)],
+        latency=0.05,
+    )
+
+
+@pytest.fixture()
+def snapshot(
+    context: SocaContext, budgets_client: MockBudgetsClient, monkeypatch: Any
+) -> BudgetsSnapshotService:
+    monkeypatch.setattr(
+        EC2InstanceTypesDB, "_instance_type_names_from_botocore", lambda self: []
+    )
+    aws_util = AWSUtil(context, aws=MockAwsClientProvider(budgets_client))
+    return BudgetsSnapshotService(context, aws_util=aws_util)
+
+
+def test_refresh_reads_all_pages(
+    snapshot: BudgetsSnapshotService, budgets_client: MockBudgetsClient
+) -> None:
+    assert snapshot.is_stale()
+    assert snapshot.get_staleness_seconds() is None
+
+    snapshot.refresh()
+
+    assert budgets_client.describe_budgets_calls == 3
+    assert not snapshot.is_stale()
+    assert 0 <= snapshot.get_staleness_seconds() < 5
+    budget = snapshot.get_budget("project-120-budget")
+    assert budget.budget_limit.amount == 100.0
+    assert budget.actual_spend.amount == 120.0
+    assert budget.forecasted_spend.amount == 240.0
+    assert budgets_client.describe_budget_calls == 0
+
+
+def test_concurrent_readers_share_a_single_sweep(
+    snapshot: BudgetsSnapshotService, budgets_client: MockBudgetsClient
+) -> None:
+    barrier = threading.Barrier(CONCURRENT_READERS)
+    results: List[Any] = []
+    errors: List[Exception] = []
+
+    def read(index: int) -> None:
+        barrier.wait()
+        try:
+            results.append(snapshot.get_budget(f"project-{index:03d}-budget"))
+        except Exception as e:
+            errors.append(e)
+
+    def read_all() -> None:
+        threads = [
+            threading.Thread(target=read, args=(index,))
+            for index in range(CONCURRENT_READERS)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    # cold snapshot: one sweep of 3 pages for all readers
+    read_all()
+    assert errors == []
+    assert len(results) == CONCURRENT_READERS
+    assert budgets_client.describe_budgets_calls == 3
+    assert budgets_client.describe_budget_calls == 0
+
+    # within the refresh window: served from memory
+    results.clear()
+    barrier.reset()
+    read_all()
+    assert len(results) == CONCURRENT_READERS
+    assert budgets_client.describe_budgets_calls == 3
+
+    # stale snapshot: one more sweep
+    snapshot._refreshed_at -= snapshot.max_staleness_seconds + 1
+    snapshot._attempted_at -= snapshot.max_staleness_seconds + 1
+    results.clear()
+    barrier.reset()
+    read_all()
+    assert len(results) == CONCURRENT_READERS
+    assert budgets_client.describe_budgets_calls == 6
+    assert budgets_client.describe_budget_calls == 0
+
+
+def test_failed_sweep_is_not_retried_by_every_reader(
+    snapshot: BudgetsSnapshotService, budgets_client: MockBudgetsClient
+) -> None:
+    budgets_client.fail = True
+
+    for _ in range(5):
+        budget = snapshot.get_budget("project-001-budget")
+        assert budget.actual_spend.amount == 1.0
+
+    assert budgets_client.describe_budgets_calls == 1
+    assert snapshot.is_stale()
+
+
+def test_budget_missing_from_snapshot(
+    snapshot: BudgetsSnapshotService, budgets_client: MockBudgetsClient
+) -> None:
+    snapshot.refresh()
+    budgets_client.budgets.append(budget_response(BUDGET_COUNT, 10.0))
+
+    budget = snapshot.get_budget(f"project-{BUDGET_COUNT}-budget")
+    assert budget.actual_spend.amount == 10.0
+    assert budgets_client.describe_budget_calls == 1
+
+    with pytest.raises(exceptions.SocaException) as exc_info:
+        snapshot.get_budget("unknown-budget")
+    assert exc_info.value.error_code == errorcodes.BUDGET_NOT_FOUND
+
+
+def test_soft_threshold(snapshot: BudgetsSnapshotService) -> None:
+    snapshot.refresh()
+
+    assert not snapshot.is_over_soft_threshold(
+        snapshot.get_budget("project-100-budget")
+    )
+    assert snapshot.is_over_soft_threshold(snapshot.get_budget("project-101-budget"))
+    assert snapshot.is_over_soft_threshold(
+        snapshot.get_budget("project-091-budget"), threshold_percent=90
+    )
+    assert not snapshot.is_over_soft_threshold(
+        snapshot.get_budget("project-090-budget"), threshold_percent=90
+    )
@@ -0,0 +1,141 @@
+#  Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance
+#  with the License. A copy of the License is located at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  or in the 'license' file accompanying this file. This file is distributed on an 'AS IS' BASIS, WITHOUT WARRANTIES
+#  OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions
+#  and limitations under the License.
+
+from typing import Any, Dict, List
+
+import pytest
+from cacheout import LFUCache, LRUCache
+from ideasdk.cache import CacheProvider
+from ideasdk.context import SocaContext
+
+from ideadatamodel import errorcodes, exceptions
+
+
+@pytest.fixture()
+def cache_provider(context: SocaContext) -> CacheProvider:
+    return CacheProvider(context=context, module_id="mock")
+
+
+def test_cache_provider_register_cache_uses_defaults(
+    cache_provider: CacheProvider,
+) -> None:
+    cache = cache_provider.register_cache(
+        "auth.roles", max_size=5, ttl_seconds=30, eviction_policy="lfu"
+    )
+
+    assert cache.name == "auth.roles"
+    assert cache.max_size == 5
+    assert cache.ttl_seconds == 30
+    assert cache.eviction_policy == "lfu"
+    assert isinstance(cache.cache_backend, LFUCache)
+    assert cache_provider.register_cache("auth.roles") is cache
+    assert cache_provider.get_cache("auth.roles") is cache
+
+
+def test_cache_provider_register_cache_config_overrides(
+    context: SocaContext,
+) -> None:
+    context.config().put("mock.cache.accounts.email.max_size", 2)
+    context.config().put("mock.cache.accounts.email.ttl_seconds", 5)
+    cache_provider = CacheProvider(context=context, module_id="mock")
+
+    cache = cache_provider.register_cache("accounts.email", max_size=100)
+    assert cache.max_size == 2
+    assert cache.ttl_seconds == 5
+    assert isinstance(cache.cache_backend, LRUCache)
+
+    # hot reload applies updated settings to named caches
+    context.config().put("mock.cache.accounts.email.max_size", 3)
+    cache_provider.reload()
+    assert cache.max_size == 3
+
+
+def test_cache_provider_register_cache_invalid(cache_provider: CacheProvider) -> None:
+    with pytest.raises(exceptions.SocaException) as exc_info:
+        cache_provider.register_cache("vdc.instance_types", eviction_policy="random")
+    assert exc_info.value.error_code == errorcodes.INVALID_PARAMS
+
+    with pytest.raises(exceptions.SocaException) as exc_info:
+        cache_provider.register_cache("long_term")
+    assert exc_info.value.error_code == errorcodes.INVALID_PARAMS
+
+
+def test_cache_stats(cache_provider: CacheProvider) -> None:
+    cache = cache_provider.register_cache("vdc.instance_types", max_size=2)
+    loads: List[str] = []
+
+    def loader() -> Dict[str, Any]:
+        loads.append("t3.large")
+        return {"InstanceType": "t3.large"}
+
+    assert cache.get_or_load("t3.large", loader) == {"InstanceType": "t3.large"}
+    assert cache.get_or_load("t3.large", loader) == {"InstanceType": "t3.large"}
+    assert len(loads) == 1
+
+    cache.set("m5.large", {})
+    cache.set("c5.large", {})
+
+    stats = cache.get_stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["evictions"] == 1
+    assert stats["size"] == 2
+    assert stats["load_count"] == 1
+    assert stats["load_time_ms"] >= 0
+
+
+def test_cache_provider_list_and_flush(cache_provider: CacheProvider) -> None:
+    cache = cache_provider.register_cache("auth.roles")
+    cache.set("admin", {"role_id": "admin"})
+    cache.set("user", {"role_id": "user"})
+
+    names = [cache.name for cache in cache_provider.list_caches()]
+    assert names == ["auth.roles", "long_term", "short_term"]
+
+    assert cache_provider.flush("auth.roles") == 2
+    assert cache.size == 0
+    assert cache.get("admin") is None
+
+    with pytest.raises(exceptions.SocaException) as exc_info:
+        cache_provider.flush("unknown")
+    assert exc_info.value.error_code == errorcodes.INVALID_PARAMS
+
+
+def test_cache_publish_metrics_publishes_deltas(
+    cache_provider: CacheProvider, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    published: List[Dict[str, Any]] = []
+
+    def log(self: Any, **kwargs: Any) -> Any:
+        published.append(kwargs)
+        return self
+
+    monkeypatch.setattr("ideasdk.metrics.base_metrics.BaseMetrics._log", log)
+
+    cache = cache_provider.register_cache("auth.roles")
+    cache.get("admin")
+    cache.set("admin", {})
+    cache.get("admin")
+
+    cache.publish_metrics()
+    values = {entry["MetricName"]: entry["Value"] for entry in published}
+    assert values["cache_hits"] == 1
+    assert values["cache_misses"] == 1
+    assert values["cache_evictions"] == 0
+    assert values["cache_size"] == 1
+    assert published[3]["MetricType"] == "Gauge"
+
+    published.clear()
+    cache.get("admin")
+    cache.publish_metrics()
+    values = {entry["MetricName"]: entry["Value"] for entry in published}
+    assert values["cache_hits"] == 1
+    assert values["cache_misses"] == 0
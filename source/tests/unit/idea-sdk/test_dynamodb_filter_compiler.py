@@ -0,0 +1,346 @@
+#  Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance
+#  with the License. A copy of the License is located at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  or in the 'license' file accompanying this file. This file is distributed on an 'AS IS' BASIS, WITHOUT WARRANTIES
+#  OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions
+#  and limitations under the License.
+
+"""
+Test Cases for DynamoDBFilterCompiler
+"""
+
+import math
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import boto3
+import pytest
+from ideasdk.dynamodb.dynamodb_filter_compiler import (
+    DynamoDBFilterCompiler,
+    DynamoDBIndex,
+)
+from ideasdk.utils import Utils, scan_db_records
+from moto import mock_aws
+
+from ideadatamodel import SocaFilter, SocaListingPayload, exceptions
+
+PROJECT_COUNT = 2_000
+RCU_BYTES = 4096
+
+PROJECTS_COMPILER = DynamoDBFilterCompiler(
+    hash_key="project_id",
+    indexes=[DynamoDBIndex(hash_key="name", index_name="project-name-index")],
+)
+
+
+class RecordingTable:
+    """
+    wraps a table to record the DynamoDB read requests issued by the listing, and estimate the consumed read units
+    from the size of the items read, as the table is a local stand-in for DynamoDB
+    """
+
+    def __init__(self, table: Any, item_size: int) -> None:
+        self.table = table
+        self.item_size = item_size
+        self.calls: List[Dict[str, Any]] = []
+
+    def _record(self, operation: str, result: Dict[str, Any]) -> Dict[str, Any]:
+        self.calls.append(
+            {"operation": operation, "scanned": result.get("ScannedCount", 0)}
+        )
+        return result
+
+    def query(self, **kwargs: Any) -> Dict[str, Any]:
+        result = self.table.query(**kwargs)
+        return self._record("query:" + kwargs.get("IndexName", "table"), result)
+
+    def scan(self, **kwargs: Any) -> Dict[str, Any]:
+        return self._record("scan", self.table.scan(**kwargs))
+
+    def read_units(self) -> float:
+        # eventually consistent reads: 0.5 read unit per 4KB read, per request
+        return sum(
+            math.ceil(call["scanned"] * self.item_size / RCU_BYTES) * 0.5
+            for call in self.calls
+        )
+
+    def reset(self) -> None:
+        self.calls = []
+
+
+def project_entry(index: int) -> Dict[str, Any]:
+    return {
+        "project_id": f"project-id-{index:05d}",
+        "name": f"project-{index:05d}",
+        "title": f"Project {index}",
+        "description": "x" * 200,
+        "enabled": index % 3 != 0,
+        "ldap_groups": [f"group-{index % 50}"],
+    }
+
+
+def legacy_scan(table: Any, filters: List[SocaFilter]) -> Iterator[Dict[str, Any]]:
+    """
+    the ScanFilter listing replaced by the compiler, reading all the pages
+    """
+    scan_request: Dict[str, Any] = {}
+    scan_filter: Dict[str, Any] = {}
+    for filter_ in filters:
+        if filter_.eq is not None:
+            scan_filter[filter_.key] = {
+                "AttributeValueList": [filter_.eq],
+                "ComparisonOperator": "EQ",
+            }
+        if filter_.like is not None:
+            scan_filter[filter_.key] = {
+                "AttributeValueList": [filter_.like],
+                "ComparisonOperator": "CONTAINS",
+            }
+    if scan_filter:
+        scan_request["ScanFilter"] = scan_filter
+    while True:
+        result = table.scan(**scan_request)
+        yield from result.get("Items", [])
+        if "LastEvaluatedKey" not in result:
+            break
+        scan_request["ExclusiveStartKey"] = result["LastEvaluatedKey"]
+
+
+def list_pages(
+    table: Any,
+    compiler: DynamoDBFilterCompiler,
+    filters: List[SocaFilter],
+    page_size: Optional[int],
+    total_segments: int = 1,
+) -> List[List[Dict[str, Any]]]:
+    pages = []
+    cursor = None
+    while True:
+        result = compiler.list(
+            table=table,
+            filters=filters,
+            cursor=cursor,
+            page_size=page_size,
+            total_segments=total_segments,
+        )
+        pages.append(result.items)
+        cursor = result.cursor
+        if cursor is None:
+            break
+    return pages
+
+
+def ids(items: List[Dict[str, Any]]) -> List[str]:
+    return sorted(item["project_id"] for item in items)
+
+
+@pytest.fixture()
+def table() -> Iterator[RecordingTable]:
+    with mock_aws():
+        dynamodb = boto3.resource("dynamodb", region_name="us-east-1")
+        ddb_table = dynamodb.create_table(
+            TableName="projects",
+            KeySchema=[{"AttributeName": "project_id", "KeyType": "HASH"}],
+            AttributeDefinitions=[
+                {"AttributeName": "project_id", "AttributeType": "S"},
+                {"AttributeName": "name", "AttributeType": "S"},
+            ],
+            GlobalSecondaryIndexes=[
+                {
+                    "IndexName": "project-name-index",
+                    "KeySchema": [{"AttributeName": "name", "KeyType": "HASH"}],
+                    "Projection": {"ProjectionType": "ALL"},
+                }
+            ],
+            BillingMode="PAY_PER_REQUEST",
+        )
+        with ddb_table.batch_writer() as batch:
+            for index in range(PROJECT_COUNT):
+                batch.put_item(Item=project_entry(index))
+        item_size = len(Utils.to_json(project_entry(0)))
+        yield RecordingTable(ddb_table, item_size=item_size)
+
+
+def test_compile_key_conditions():
+    compiler = DynamoDBFilterCompiler(
+        hash_key="idea_session_id",
+        range_key="actor_name",
+        indexes=[
+            DynamoDBIndex(
+                hash_key="actor_name",
+                range_key="idea_session_id",
+                index_name="actor-index",
+            )
+        ],
+    )
+
+    request = compiler.compile(
+        [
+            SocaFilter(key="actor_name", eq="user1"),
+            SocaFilter(key="idea_session_id", eq="session-1"),
+        ]
+    )
+    assert request.is_query()
+    assert request.index_name is None
+    assert request.filter_expression is None
+
+    request = compiler.compile(
+        [
+            SocaFilter(key="actor_name", eq="user1"),
+            SocaFilter(key="permission_profile_id", like="admin"),
+        ]
+    )
+    assert request.index_name == "actor-index"
+    assert request.filter_expression.expression_operator == "contains"
+
+    request = compiler.compile(
+        [
+            SocaFilter(key="idea_session_id", eq="session-1"),
+            SocaFilter(key="actor_name", starts_with="user"),
+        ]
+    )
+    assert (
+        request.key_condition.get_expression()["values"][1].expression_operator
+        == "begins_with"
+    )
+    assert request.filter_expression is None
+
+    request = compiler.compile(
+        [
+            SocaFilter(key="permission_profile_id", value="$all"),
+            # filters are built from the API payloads, with the "or" and "in" aliases
+            SocaFilter(
+                **{
+                    "or": [
+                        SocaFilter(key="actor_name", like="user"),
+                        SocaFilter(
+                            **{"key": "idea_session_owner", "in": ["owner1", "owner2"]}
+                        ),
+                    ]
+                }
+            ),
+        ]
+    )
+    assert not request.is_query()
+    assert request.filter_expression.expression_operator == "OR"
+
+    assert compiler.compile([SocaFilter(key="actor_name", value="$all")]).build() == {}
+
+    with pytest.raises(exceptions.SocaException) as exc_info:
+        compiler.compile([SocaFilter(key="actor_name", ends_with="1")])
+    assert exc_info.value.error_code == "INVALID_PARAMS"
+
+
+def test_results_identical_to_scan_filter(table: RecordingTable):
+    cases = [
+        [],
+        [SocaFilter(key="name", eq="project-00042")],
+        [SocaFilter(key="project_id", eq="project-id-01234")],
+        [SocaFilter(key="title", like="Project 12")],
+        [SocaFilter(key="enabled", eq=False)],
+        [
+            SocaFilter(key="name", eq="project-00003"),
+            SocaFilter(key="enabled", eq=True),
+        ],
+    ]
+    for filters in cases:
+        expected = ids(list(legacy_scan(table, filters)))
+        # a single page, as returned by the listing APIs
+        single_page = PROJECTS_COMPILER.list(table=table, filters=filters)
+        assert ids(single_page.items) == expected
+        assert single_page.cursor is None
+        # pages of 100 items
+        pages = list_pages(table, PROJECTS_COMPILER, filters, page_size=100)
+        assert ids([item for page in pages for item in page]) == expected
+        assert all(len(page) == 100 for page in pages[:-1])
+
+
+def test_segmented_scan_fills_pages(table: RecordingTable):
+    filters = [SocaFilter(key="title", like="Project 1")]
+    expected = ids(list(legacy_scan(table, filters)))
+
+    pages = list_pages(
+        table, PROJECTS_COMPILER, filters, page_size=50, total_segments=4
+    )
+
+    listed = [item for page in pages for item in page]
+    assert ids(listed) == expected
+    assert len(listed) == len(set(ids(listed)))
+    assert all(len(page) <= 50 for page in pages)
+    assert all(len(page) > 0 for page in pages[:-1])
+    assert {call["operation"] for call in table.calls} == {"scan"}
+
+
+def test_cursor_compatibility(table: RecordingTable):
+    # cursors of the previous listings are the base64 encoded LastEvaluatedKey
+    first_page = table.table.scan(Limit=10)
+    cursor = Utils.base64_encode(Utils.to_json(first_page["LastEvaluatedKey"]))
+    result = PROJECTS_COMPILER.list(table=table, cursor=cursor, page_size=10)
+    assert ids(result.items) == ids(
+        table.table.scan(Limit=10, ExclusiveStartKey=first_page["LastEvaluatedKey"])[
+            "Items"
+        ]
+    )
+
+    with pytest.raises(exceptions.SocaException) as exc_info:
+        PROJECTS_COMPILER.list(table=table, cursor="not a cursor")
+    assert exc_info.value.error_code == "INVALID_PARAMS"
+
+    with pytest.raises(exceptions.SocaException) as exc_info:
+        PROJECTS_COMPILER.list(table=table, page_size=0)
+    assert exc_info.value.error_code == "INVALID_PARAMS"
+
+
+def test_scan_db_records(table: RecordingTable):
+    request = SocaListingPayload(
+        filters=[
+            SocaFilter(key="name", eq="project-00007"),
+            SocaFilter(key="title", value="$all"),
+        ]
+    )
+
+    result = scan_db_records(request, table)
+    assert ids(result["Items"]) == ["project-id-00007"]
+    assert "LastEvaluatedKey" not in result
+    assert table.calls[-1]["operation"] == "scan"
+
+    result = scan_db_records(request, table, compiler=PROJECTS_COMPILER)
+    assert ids(result["Items"]) == ["project-id-00007"]
+    assert table.calls[-1]["operation"] == "query:project-name-index"
+
+
+def test_compiled_listing_read_units(table: RecordingTable):
+    """
+    compare the read units consumed by the ScanFilter listing and the compiled listing
+    """
+    cases: List[Tuple[str, List[SocaFilter], str]] = [
+        (
+            "eq on hash key",
+            [SocaFilter(key="project_id", eq="project-id-01234")],
+            "query:table",
+        ),
+        (
+            "eq on index key",
+            [SocaFilter(key="name", eq="project-01234")],
+            "query:project-name-index",
+        ),
+        ("like on attribute", [SocaFilter(key="title", like="Project 12")], "scan"),
+    ]
+    for name, filters, operation in cases:
+        table.reset()
+        expected = ids(list(legacy_scan(table, filters)))
+        scan_filter_read_units = table.read_units()
+
+        table.reset()
+        listed = ids(PROJECTS_COMPILER.list(table=table, filters=filters).items)
+        compiled_read_units = table.read_units()
+
+        assert listed == expected
+        assert {call["operation"] for call in table.calls} == {operation}
+        if name == "like on attribute":
+            assert compiled_read_units == scan_filter_read_units
+        else:
+            assert compiled_read_units < scan_filter_read_units / 100
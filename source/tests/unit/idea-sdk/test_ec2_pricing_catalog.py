@@ -0,0 +1,486 @@
+#  Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance
+#  with the License. A copy of the License is located at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  or in the 'license' file accompanying this file. This file is distributed on an 'AS IS' BASIS, WITHOUT WARRANTIES
+#  OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions
+#  and limitations under the License.
+
+"""
+Test Cases for EC2PricingCatalog
+"""
+
+import csv
+import io
+import os
+import time
+from ast import literal_eval
+from typing import Any, Dict, List, Optional
+
+import pytest
+from ideasdk.aws import AWSUtil, EC2InstanceTypesDB, EC2PricingCatalog
+from ideasdk.context import SocaContext
+from ideasdk.utils import Utils
+
+from ideadatamodel import EC2InstanceUnitPrice
+
+REGION = "us-gov-west-1"
+BENCHMARK_INSTANCE_TYPE_COUNT = 600
+
+OFFER_FILE_COLUMNS = [
+    "SKU",
+    "OfferTermCode",
+    "RateCode",
+    "TermType",
+    "PriceDescription",
+    "Unit",
+    "PricePerUnit",
+    "Currency",
+    "LeaseContractLength",
+    "PurchaseOption",
+    "OfferingClass",
+    "Product Family",
+    "Location",
+    "Instance Type",
+    "Tenancy",
+    "Operating System",
+    "License Model",
+    "usageType",
+    "CapacityStatus",
+    "Pre Installed S/W",
+    "Region Code",
+]
+
+
+def instance_types(count: int) -> List[str]:
+    families = ["m5", "c5", "r5", "g4dn", "t3", "m6i", "c6i", "r6i", "g5", "x2idn"]
+    sizes = ["large", "xlarge", "2xlarge", "4xlarge", "8xlarge", "12xlarge"]
+    result = []
+    generation = 0
+    while len(result) < count:
+        for family in families:
+            for size in sizes:
+                result.append(f"{family}{'' if generation == 0 else generation}.{size}")
+        generation += 1
+    return result[:count]
+
+
+def ondemand_price(index: int) -> float:
+    return round(0.05 + index * 0.01, 4)
+
+
+def reserved_price(index: int) -> float:
+    return round(ondemand_price(index) * 0.6, 4)
+
+
+def offer_rows(region: str, index: int, instance_type: str) -> List[Dict[str, str]]:
+    base = {
+        "SKU": f"SKU{index:05d}",
+        "Unit": "Hrs",
+        "Currency": "USD",
+        "Product Family": "Compute Instance",
+        "Location": "AWS GovCloud (US-West)",
+        "Instance Type": instance_type,
+        "Tenancy": "Shared",
+        "Operating System": "Linux",
+        "License Model": "No License required",
+        "usageType": f"UGW1-BoxUsage:{instance_type}",
+        "CapacityStatus": "Used",
+        "Pre Installed S/W": "NA",
+        "Region Code": region,
+    }
+    return [
+        {**base, "TermType": "OnDemand", "PricePerUnit": str(ondemand_price(index))},
+        {
+            **base,
+            "TermType": "Reserved",
+            "PricePerUnit": str(reserved_price(index)),
+            "LeaseContractLength": "1yr",
+            "PurchaseOption": "No Upfront",
+            "OfferingClass": "standard",
+        },
+        {
+            **base,
+            "TermType": "Reserved",
+            "PricePerUnit": "0.0001",
+            "LeaseContractLength": "3yr",
+            "PurchaseOption": "No Upfront",
+            "OfferingClass": "standard",
+        },
+        {
+            **base,
+            "TermType": "OnDemand",
+            "PricePerUnit": "0.0",
+            "CapacityStatus": "UnusedCapacityReservation",
+        },
+        {
+            **base,
+            "TermType": "OnDemand",
+            "PricePerUnit": "9.99",
+            "Pre Installed S/W": "SQL Std",
+        },
+        {
+            **base,
+            "TermType": "OnDemand",
+            "PricePerUnit": str(ondemand_price(index) * 2),
+            "Operating System": "Windows",
+        },
+        {
+            **base,
+            "TermType": "OnDemand",
+            "PricePerUnit": "0.001",
+            "Unit": "Quantity",
+        },
+    ]
+
+
+def build_offer_csv(region: str, names: List[str]) -> str:
+    output = io.StringIO()
+    writer = csv.writer(output, quoting=csv.QUOTE_ALL)
+    writer.writerow(["FormatVersion", "v1.0"])
+    writer.writerow(
+        ["Disclaimer", "This pricing list is for informational purposes only."]
+    )
+    writer.writerow(["Publication Date", "2024-01-01T00:00:00Z"])
+    writer.writerow(["Version", "20240101000000"])
+    writer.writerow(["OfferCode", "AmazonEC2"])
+    writer.writerow(OFFER_FILE_COLUMNS)
+    for index, instance_type in enumerate(names):
+        for row in offer_rows(region, index, instance_type):
+            writer.writerow([row.get(column, "") for column in OFFER_FILE_COLUMNS])
+    return output.getvalue()
+
+
+def product_price_list_entry(
+    region: str, index: int, instance_type: str
+) -> Dict[str, Any]:
+    """
+    price list entry, as returned by the Pricing API and found in the json offer file
+    """
+    sku = f"SKU{index:05d}"
+    return {
+        "product": {
+            "productFamily": "Compute Instance",
+            "sku": sku,
+            "attributes": {
+                "instanceType": instance_type,
+                "tenancy": "Shared",
+                "operatingSystem": "Linux",
+                "licenseModel": "No License required",
+                "capacitystatus": "Used",
+                "preInstalledSw": "NA",
+                "regionCode": region,
+                "usagetype": f"UGW1-BoxUsage:{instance_type}",
+            },
+        },
+        "terms": {
+            "OnDemand": {
+                f"{sku}.JRTCKXETXF": {
+                    "priceDimensions": {
+                        f"{sku}.JRTCKXETXF.6YS6EN2CT7": {
+                            "unit": "Hrs",
+                            "description": f"$0.1 per On Demand Linux {instance_type} Instance Hour",
+                            "pricePerUnit": {"USD": str(ondemand_price(index))},
+                        }
+                    },
+                    "termAttributes": {},
+                }
+            },
+            "Reserved": {
+                f"{sku}.4NA7Y494T4": {
+                    "priceDimensions": {
+                        f"{sku}.4NA7Y494T4.6YS6EN2CT7": {
+                            "unit": "Hrs",
+                            "description": "Linux/UNIX (Amazon VPC), No Upfront",
+                            "pricePerUnit": {"USD": str(reserved_price(index))},
+                        }
+                    },
+                    "termAttributes": {
+                        "LeaseContractLength": "1yr",
+                        "OfferingClass": "standard",
+                        "PurchaseOption": "No Upfront",
+                    },
+                },
+                f"{sku}.38NPMPTW36": {
+                    "priceDimensions": {
+                        f"{sku}.38NPMPTW36.6YS6EN2CT7": {
+                            "unit": "Hrs",
+                            "description": "Linux/UNIX (Amazon VPC), No Upfront",
+                            "pricePerUnit": {"USD": "0.0001"},
+                        }
+                    },
+                    "termAttributes": {
+                        "LeaseContractLength": "3yr",
+                        "OfferingClass": "standard",
+                        "PurchaseOption": "No Upfront",
+                    },
+                },
+            },
+        },
+    }
+
+
+def build_offer_json(region: str, names: List[str]) -> Dict[str, Any]:
+    offer: Dict[str, Any] = {
+        "formatVersion": "v1.0",
+        "offerCode": "AmazonEC2",
+        "products": {},
+        "terms": {"OnDemand": {}, "Reserved": {}},
+    }
+    for index, instance_type in enumerate(names):
+        entry = product_price_list_entry(region, index, instance_type)
+        sku = entry["product"]["sku"]
+        offer["products"][sku] = entry["product"]
+        for term_type in ("OnDemand", "Reserved"):
+            offer["terms"][term_type][sku] = entry["terms"][term_type]
+    return offer
+
+
+class MockPricingClient:
+    """
+    Pricing API stub returning the price list entries in the format of get_products
+    """
+
+    def __init__(self, region: str, names: List[str]) -> None:
+        self.entries = {
+            instance_type: str(product_price_list_entry(region, index, instance_type))
+            for index, instance_type in enumerate(names)
+        }
+        self.calls = 0
+
+    def get_products(
+        self, ServiceCode: str, Filters: List[Dict[str, str]]
+    ) -> Dict[str, Any]:
+        self.calls += 1
+        instance_type = Filters[0]["Value"].split("BoxUsage:")[1]
+        return {"PriceList": [self.entries[instance_type]]}
+
+
+def legacy_unit_price(
+    pricing_client: MockPricingClient, instance_type: str
+) -> EC2InstanceUnitPrice:
+    """
+    unit price lookup before the pricing catalog: one get_products call per instance type
+    """
+    response = pricing_client.get_products(
+        ServiceCode="AmazonEC2",
+        Filters=[
+            {
+                "Type": "TERM_MATCH",
+                "Field": "usageType",
+                "Value": f"UGW1-BoxUsage:{instance_type}",
+            }
+        ],
+    )
+    ondemand = 0.0
+    reserved = 0.0
+    for data in response["PriceList"]:
+        data = literal_eval(data)
+        for k, v in data["terms"].items():
+            if k == "OnDemand":
+                for skus in v.keys():
+                    for ratecode in v[skus]["priceDimensions"].keys():
+                        instance_data = v[skus]["priceDimensions"][ratecode]
+                        if (
+                            f"on demand linux {instance_type} instance hour"
+                            in instance_data["description"].lower()
+                        ):
+                            ondemand = float(instance_data["pricePerUnit"]["USD"])
+            else:
+                for skus in v.keys():
+                    term_attributes = v[skus]["termAttributes"]
+                    if (
+                        term_attributes["OfferingClass"] == "standard"
+                        and term_attributes["LeaseContractLength"] == "1yr"
+                        and term_attributes["PurchaseOption"] == "No Upfront"
+                    ):
+                        for ratecode in v[skus]["priceDimensions"].keys():
+                            instance_data = v[skus]["priceDimensions"][ratecode]
+                            if (
+                                "Linux/UNIX (Amazon VPC)"
+                                in instance_data["description"]
+                            ):
+                                reserved = float(instance_data["pricePerUnit"]["USD"])
+    return EC2InstanceUnitPrice(ondemand=ondemand, reserved=reserved)
+
+
+class MockAwsClientProvider:
+    def __init__(self, region: str) -> None:
+        self.region = region
+
+    def aws_region(self) -> str:
+        return self.region
+
+
+@pytest.fixture()
+def aws_util(context: SocaContext, monkeypatch: Any) -> AWSUtil:
+    monkeypatch.setattr(
+        EC2InstanceTypesDB, "_instance_type_names_from_botocore", lambda self: []
+    )
+    return AWSUtil(context, aws=MockAwsClientProvider(REGION))
+
+
+@pytest.fixture()
+def offer_file(tmp_path: Any) -> str:
+    path = os.path.join(tmp_path, "index.csv")
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        f.write(build_offer_csv(REGION, instance_types(20)))
+    return path
+
+
+def test_ingest_csv_offer_file(offer_file: str) -> None:
+    catalog = EC2PricingCatalog()
+
+    assert catalog.ingest(offer_file) == 40
+    assert catalog.get_regions() == {REGION}
+
+    pricing = catalog.get_unit_price(REGION, "m5.2xlarge")
+    assert pricing.ondemand == ondemand_price(2)
+    assert pricing.reserved == reserved_price(2)
+    windows = catalog.get_unit_price(REGION, "m5.2xlarge", operating_system="Windows")
+    assert windows.ondemand == ondemand_price(2) * 2
+    assert windows.reserved == 0.0
+    assert catalog.get_unit_price(REGION, "m5.2xlarge", tenancy="Dedicated") is None
+    assert catalog.get_unit_price("us-gov-east-1", "m5.2xlarge") is None
+
+
+def test_ingest_csv_filters_regions(offer_file: str) -> None:
+    catalog = EC2PricingCatalog()
+    assert catalog.ingest(offer_file, regions={"us-gov-east-1"}) == 0
+    assert not catalog.has_region(REGION)
+
+
+def test_ingest_invalid_offer_file(tmp_path: Any) -> None:
+    path = os.path.join(tmp_path, "index.csv")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write('"FormatVersion","v1.0"\n')
+    with pytest.raises(Exception) as exc_info:
+        EC2PricingCatalog().ingest(path)
+    assert "header not found" in str(exc_info.value)
+
+
+def test_ingest_json_offer_file(tmp_path: Any) -> None:
+    path = os.path.join(tmp_path, "index.json")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(Utils.to_json(build_offer_json(REGION, instance_types(20))))
+    catalog = EC2PricingCatalog()
+
+    assert catalog.ingest(path) == 20
+
+    pricing = catalog.get_unit_price(REGION, "c5.large")
+    assert pricing.ondemand == ondemand_price(6)
+    assert pricing.reserved == reserved_price(6)
+
+
+def wait_for_ingest(aws_util: AWSUtil) -> None:
+    for thread in list(aws_util._ec2_pricing_ingest_threads.values()):
+        thread.join()
+
+
+def test_aws_util_ingests_configured_offer_file_once(
+    context: SocaContext, aws_util: AWSUtil, offer_file: str
+) -> None:
+    context.config().put("cluster.aws.pricing_offer_file", offer_file)
+
+    # the offer file is ingested in the background, prices are zero until then
+    pricing = aws_util.get_ec2_instance_type_unit_price("m5.large")
+    wait_for_ingest(aws_util)
+    pricing = aws_util.get_ec2_instance_type_unit_price("m5.large")
+
+    assert pricing.ondemand == ondemand_price(0)
+    assert pricing.reserved == reserved_price(0)
+    os.remove(offer_file)
+    assert aws_util.get_ec2_instance_type_unit_price(
+        "m5.xlarge"
+    ).ondemand == ondemand_price(1)
+    unknown = aws_util.get_ec2_instance_type_unit_price("z1d.metal")
+    assert unknown.ondemand == 0.0 and unknown.reserved == 0.0
+
+
+def test_aws_util_caches_unknown_prices(
+    context: SocaContext, aws_util: AWSUtil, offer_file: str, monkeypatch: Any
+) -> None:
+    context.config().put("cluster.aws.pricing_offer_file", offer_file)
+    warnings = []
+    monkeypatch.setattr(aws_util._logger, "warning", warnings.append)
+    monkeypatch.setattr(
+        aws_util, "_start_ec2_offer_file_ingest", lambda catalog, region: None
+    )
+
+    # prices are zero while the offer file is ingested, and reported once
+    for _ in range(3):
+        pricing = aws_util.get_ec2_instance_type_unit_price("m5.large")
+        assert pricing.ondemand == 0.0 and pricing.reserved == 0.0
+    assert len(warnings) == 1
+    aws_util._ingest_ec2_offer_file(aws_util.get_ec2_pricing_catalog(), REGION)
+
+    # the cached zero price does not hide the prices of the ingested region
+    pricing = aws_util.get_ec2_instance_type_unit_price("m5.large")
+    assert pricing.ondemand == ondemand_price(0)
+    for _ in range(3):
+        aws_util.get_ec2_instance_type_unit_price("z1d.metal")
+    assert len(warnings) == 2
+
+
+def test_aws_util_returns_zero_price_when_offer_file_is_unavailable(
+    context: SocaContext, aws_util: AWSUtil, tmp_path: Any
+) -> None:
+    context.config().put(
+        "cluster.aws.pricing_offer_file", os.path.join(tmp_path, "missing.csv")
+    )
+
+    for _ in range(3):
+        pricing = aws_util.get_ec2_instance_type_unit_price("m5.large")
+        wait_for_ingest(aws_util)
+        assert pricing.ondemand == 0.0 and pricing.reserved == 0.0
+    assert list(aws_util._ec2_pricing_failed_regions.keys()) == [REGION]
+
+    # the region is ingested again once the failure expires
+    offer_file = os.path.join(tmp_path, "missing.csv")
+    with open(offer_file, "w", encoding="utf-8", newline="") as f:
+        f.write(build_offer_csv(REGION, instance_types(20)))
+    aws_util.get_ec2_instance_type_unit_price("m5.large")
+    assert aws_util._ec2_pricing_ingest_threads == {}
+    aws_util._ec2_pricing_failed_regions[REGION] = time.time()
+    aws_util.get_ec2_instance_type_unit_price("m5.large")
+    wait_for_ingest(aws_util)
+    pricing = aws_util.get_ec2_instance_type_unit_price("m5.large")
+    assert pricing.ondemand == ondemand_price(0)
+    assert aws_util._ec2_pricing_failed_regions == {}
+
+
+@pytest.mark.benchmark
+def test_benchmark_full_catalog_lookup(
+    context: SocaContext, aws_util: AWSUtil, tmp_path: Any
+) -> None:
+    names = instance_types(BENCHMARK_INSTANCE_TYPE_COUNT)
+    path = os.path.join(tmp_path, "index.csv")
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        f.write(build_offer_csv(REGION, names))
+    pricing_client = MockPricingClient(REGION, names)
+
+    start = time.perf_counter()
+    legacy = {name: legacy_unit_price(pricing_client, name) for name in names}
+    legacy_ms = (time.perf_counter() - start) * 1000
+
+    context.config().put("cluster.aws.pricing_offer_file", path)
+    start = time.perf_counter()
+    aws_util.get_ec2_pricing_catalog()
+    aws_util.get_ec2_instance_type_unit_price(names[0])
+    wait_for_ingest(aws_util)
+    ingest_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    current: Dict[str, Optional[EC2InstanceUnitPrice]] = {
+        name: aws_util.get_ec2_instance_type_unit_price(name) for name in names
+    }
+    lookup_ms = (time.perf_counter() - start) * 1000
+
+    print(
+        f"{BENCHMARK_INSTANCE_TYPE_COUNT} instance types: get_products + literal_eval {pricing_client.calls} calls {legacy_ms:.1f}ms, "
+        f"catalog ingest {ingest_ms:.1f}ms, catalog lookups 0 calls {lookup_ms:.1f}ms"
+    )
+    assert current == legacy
+    assert pricing_client.calls == BENCHMARK_INSTANCE_TYPE_COUNT
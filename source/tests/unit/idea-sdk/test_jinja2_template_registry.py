@@ -0,0 +1,405 @@
+#  Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance
+#  with the License. A copy of the License is located at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  or in the 'license' file accompanying this file. This file is distributed on an 'AS IS' BASIS, WITHOUT WARRANTIES
+#  OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions
+#  and limitations under the License.
+
+"""
+Test Cases for Jinja2TemplateRegistry
+"""
+
+import os
+import re
+import tarfile
+import time
+from typing import Callable, Dict, List
+
+import pytest
+from ideasdk.bootstrap import BootstrapPackageBuilder, BootstrapUserDataBuilder
+from ideasdk.config.soca_config import SocaConfig
+from ideasdk.context import BootstrapContext
+from ideasdk.utils import Jinja2TemplateRegistry, Jinja2Utils
+
+from ideadatamodel import exceptions
+
+BOOTSTRAP_DIR = os.path.join(
+    os.path.dirname(__file__), "..", "..", "..", "idea", "idea-bootstrap"
+)
+SESSION_COUNT = 1_000
+SESSION_EXPRESSIONS = [
+    "context.vars.idea_session_id",
+    "context.utils.short_uuid()",
+]
+
+HOST_TEMPLATES = {
+    "_templates/linux/header.jinja2": """
+CLUSTER_NAME="{{ context.config.get_string('cluster.cluster_name', required=True) }}"
+AWS_REGION="{{ context.config.get_string('cluster.aws.region', required=True) }}"
+{%- for name, storage in context.config.get_config('shared-storage').items() %}
+mkdir -p {{ storage['mount_dir'] }}
+{%- endfor %}
+""",
+    "_templates/linux/session.jinja2": """
+IDEA_SESSION_ID="{{ context.vars.idea_session_id }}"
+""",
+    "dcv-host/configure.sh.jinja2": """#!/bin/bash
+{% include '_templates/linux/header.jinja2' %}
+{% include '_templates/linux/session.jinja2' %}
+SESSION_OWNER="{{ context.vars.session_owner }}"
+TOKEN="{{ context.utils.short_uuid() }}"
+{% if context.is_gpu_instance_type() %}
+{{ 'install gpu drivers' }}
+{% endif %}
+{%- for index in range(200) %}
+echo "step {{ index }}: {{ context.module_id }} {{ context.base_os }} {{ context.instance_type }}"
+{%- endfor %}
+""",
+    "dcv-host/install.sh": "#!/bin/bash\necho install\n",
+}
+
+
+def without_token(rendered: str) -> str:
+    return re.sub(r'TOKEN="[^"]*"', 'TOKEN=""', rendered)
+
+
+def token(rendered: str) -> str:
+    return re.search(r'TOKEN="([^"]*)"', rendered).group(1)
+
+
+def write_templates(root: str, templates: Dict[str, str]) -> None:
+    for name, content in templates.items():
+        path = os.path.join(root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(content)
+
+
+def modify_template(root: str, name: str, content: str) -> None:
+    path = os.path.join(root, name)
+    mtime = os.path.getmtime(path)
+    with open(path, "w") as f:
+        f.write(content)
+    os.utime(path, (mtime + 1, mtime + 1))
+
+
+def build_config() -> SocaConfig:
+    return SocaConfig(
+        {
+            "cluster": {"cluster_name": "idea-test", "aws": {"region": "us-east-1"}},
+            "global-settings": {"gpu_settings": {"instance_families": ["g4dn"]}},
+            "shared-storage": {
+                "home": {"mount_dir": "/home"},
+                "apps": {"mount_dir": "/apps"},
+            },
+        }
+    )
+
+
+def build_context(config: SocaConfig, index: int) -> BootstrapContext:
+    context = BootstrapContext(
+        config=config,
+        module_name="virtual-desktop-controller",
+        module_id="vdc",
+        module_set="default",
+        base_os="amazonlinux2",
+        instance_type="g4dn.xlarge" if index % 10 == 0 else "t3.large",
+    )
+    context.vars.session_owner = f"user{index % 20}"
+    context.vars.idea_session_id = f"session-{index:04d}"
+    context.vars.project = "default"
+    return context
+
+
+def userdata_builder(index: int) -> BootstrapUserDataBuilder:
+    return BootstrapUserDataBuilder(
+        base_os="amazonlinux2",
+        aws_region="us-east-1",
+        bootstrap_package_uri=f"s3://bucket/idea/vdc/dcv-host-bootstrap/session-{index:04d}/bootstrap.tar.gz",
+        install_commands=[
+            "/bin/bash virtual-desktop-host-linux/install.sh -r us-east-1 -n idea-test",
+            f"echo project-{index % 5}",
+        ],
+        proxy_config={"https_proxy": "http://proxy:3128"},
+        substitution_support=False,
+        bootstrap_source_dir_path=BOOTSTRAP_DIR,
+    )
+
+
+@pytest.fixture()
+def registry(tmp_path) -> Jinja2TemplateRegistry:
+    return Jinja2TemplateRegistry(bytecode_cache_dir=str(tmp_path / "bytecode"))
+
+
+@pytest.fixture()
+def templates_dir(tmp_path) -> str:
+    root = str(tmp_path / "bootstrap")
+    write_templates(root, HOST_TEMPLATES)
+    return root
+
+
+def test_shared_environment_reloads_modified_templates(
+    registry: Jinja2TemplateRegistry, templates_dir: str
+):
+    environment = registry.get_environment(templates_dir)
+    assert registry.get_environment(os.path.join(templates_dir, ".")) is environment
+    assert registry.get_environment(templates_dir, auto_escape=True) is not environment
+
+    template = registry.get_template(templates_dir, "_templates/linux/session.jinja2")
+    assert (
+        registry.get_template(templates_dir, "_templates/linux/session.jinja2")
+        is template
+    )
+
+    modify_template(templates_dir, "_templates/linux/session.jinja2", "modified")
+    assert (
+        registry.render(templates_dir, "_templates/linux/session.jinja2") == "modified"
+    )
+
+
+def test_bytecode_cache_shared_by_registries(templates_dir: str, tmp_path):
+    bytecode_dir = str(tmp_path / "bytecode")
+    context = build_context(build_config(), 1)
+    template_name = "_templates/linux/header.jinja2"
+    expected = Jinja2TemplateRegistry(bytecode_cache_dir=bytecode_dir).render(
+        templates_dir, template_name, context=context
+    )
+    assert len(os.listdir(bytecode_dir)) == 1
+
+    # a registry of another process loads the compiled template from the bytecode cache
+    registry = Jinja2TemplateRegistry(bytecode_cache_dir=bytecode_dir)
+    environment = registry.get_environment(templates_dir)
+    compiled = []
+    compile_template = environment.compile
+    environment.compile = lambda *args, **kwargs: compiled.append(
+        args
+    ) or compile_template(*args, **kwargs)
+
+    assert registry.render(templates_dir, template_name, context=context) == expected
+    assert compiled == []
+
+
+def test_render_fragments_identical_to_render(
+    registry: Jinja2TemplateRegistry, templates_dir: str
+):
+    config = build_config()
+    for index in range(30):
+        context = build_context(config, index)
+        static_key = context.get_render_key(session_vars=["idea_session_id"])
+        rendered = registry.render(
+            templates_dir, "dcv-host/configure.sh.jinja2", context=context
+        )
+        fragments = registry.render_fragments(
+            templates_dir,
+            "dcv-host/configure.sh.jinja2",
+            session_expressions=SESSION_EXPRESSIONS,
+            static_key=static_key,
+            context=context,
+        )
+        # short_uuid() is evaluated for each render
+        assert token(fragments) != token(rendered)
+        assert without_token(fragments) == without_token(rendered)
+        assert f'IDEA_SESSION_ID="{context.vars.idea_session_id}"' in fragments
+
+    # one static render for each owner and instance type
+    assert registry._static_renders.size() == 20
+
+
+def test_render_fragments_invalidated_by_modified_include(
+    registry: Jinja2TemplateRegistry, templates_dir: str
+):
+    context = build_context(build_config(), 1)
+    static_key = context.get_render_key(session_vars=["idea_session_id"])
+
+    def render() -> str:
+        return registry.render_fragments(
+            templates_dir,
+            "dcv-host/configure.sh.jinja2",
+            session_expressions=SESSION_EXPRESSIONS,
+            static_key=static_key,
+            context=context,
+        )
+
+    assert 'IDEA_SESSION_ID="session-0001"' in render()
+    modify_template(
+        templates_dir,
+        "_templates/linux/session.jinja2",
+        'SESSION="{{ context.vars.idea_session_id }}"',
+    )
+    rendered = render()
+    assert 'SESSION="session-0001"' in rendered
+    assert "IDEA_SESSION_ID" not in rendered
+
+    # a session expression used in a condition cannot be a fragment: the template is rendered for each session
+    modify_template(
+        templates_dir,
+        "_templates/linux/session.jinja2",
+        "{% if context.vars.idea_session_id.endswith('1') %}ODD={{ context.vars.idea_session_id }}{% endif %}",
+    )
+    assert "ODD=session-0001" in render()
+    context.vars.idea_session_id = "session-0002"
+    assert "ODD" not in render()
+
+
+def test_render_fragments_static_key(registry: Jinja2TemplateRegistry):
+    variables = {
+        "base_os": "amazonlinux2",
+        "aws_region": "us-east-1",
+        "bootstrap_package_uri": "s3://bucket/package.tar.gz",
+        "install_commands": ["echo install"],
+        "infra_config": None,
+        "proxy_config": None,
+    }
+    template_name = (
+        "_templates/linux/bootstrap_userdata_linux_base_non_substitution.sh.jinja2"
+    )
+    rendered = registry.render_fragments(
+        BOOTSTRAP_DIR, template_name, ["bootstrap_package_uri"], **variables
+    )
+    assert rendered == registry.render(BOOTSTRAP_DIR, template_name, **variables)
+
+    # the static key is derived from the static variables
+    variables["install_commands"] = ["echo other"]
+    assert "echo other" in registry.render_fragments(
+        BOOTSTRAP_DIR, template_name, ["bootstrap_package_uri"], **variables
+    )
+
+    with pytest.raises(exceptions.SocaException) as exc_info:
+        registry.render_fragments(
+            BOOTSTRAP_DIR,
+            template_name,
+            ["bootstrap_package_uri"],
+            context=build_context(build_config(), 1),
+        )
+    assert exc_info.value.error_code == "INVALID_PARAMS"
+
+
+def test_bootstrap_context_render_key():
+    config = build_config()
+    context = build_context(config, 1)
+    render_key = context.get_render_key(session_vars=["idea_session_id"])
+
+    context.vars.idea_session_id = "session-0002"
+    assert context.get_render_key(session_vars=["idea_session_id"]) == render_key
+    assert context.get_render_key() != render_key
+
+    config.put("cluster.cluster_name", "idea-other")
+    assert context.get_render_key(session_vars=["idea_session_id"]) != render_key
+
+    # session_owner is used by get_prefix_for_object_storage() and must be part of the render key
+    with pytest.raises(exceptions.SocaException) as exc_info:
+        context.get_render_key(session_vars=["session_owner"])
+    assert exc_info.value.error_code == "INVALID_PARAMS"
+
+
+def test_userdata_shared_environment():
+    builder = userdata_builder(0)
+    assert builder.jinja_env is userdata_builder(1).jinja_env
+    userdata = builder.build()
+    builder.jinja_env = Jinja2Utils.env_using_file_system_loader(BOOTSTRAP_DIR)
+    assert builder.build() == userdata
+
+
+def test_bootstrap_package_session_expressions(templates_dir: str, tmp_path):
+    config = build_config()
+
+    def build(session_expressions: List[str]) -> Dict[str, str]:
+        archive = BootstrapPackageBuilder(
+            bootstrap_context=build_context(config, 1),
+            source_directory=templates_dir,
+            target_package_basename="dcv-host-session-0001",
+            components=["dcv-host"],
+            tmp_dir=str(tmp_path / "packages" / str(len(session_expressions))),
+            force_build=True,
+            logger=None,
+            session_expressions=session_expressions,
+        ).build()
+        with tarfile.open(archive) as tar:
+            return {
+                member.name: tar.extractfile(member).read().decode()
+                for member in tar.getmembers()
+                if member.isfile()
+            }
+
+    expected = build([])
+    package = build(SESSION_EXPRESSIONS)
+    assert sorted(package.keys()) == [
+        "./dcv-host/configure.sh",
+        "./dcv-host/install.sh",
+    ]
+    assert without_token(package["./dcv-host/configure.sh"]) == without_token(
+        expected["./dcv-host/configure.sh"]
+    )
+    assert package["./dcv-host/install.sh"] == expected["./dcv-host/install.sh"]
+
+
+@pytest.mark.benchmark
+def test_benchmark_rendering(templates_dir: str, tmp_path):
+    """
+    compare the rendering of the user data and of the bootstrap package templates for 1,000 sessions, with a new
+    Environment for each session and the shared Environment, and for the package, the static and per-session
+    fragments. the user data template is cheaper to render than its static key, and is not split in fragments.
+    """
+    config = build_config()
+    contexts = [build_context(config, index) for index in range(SESSION_COUNT)]
+    template_name = "dcv-host/configure.sh.jinja2"
+    registry = Jinja2TemplateRegistry(bytecode_cache_dir=str(tmp_path / "bytecode"))
+
+    def package_environment_per_session(index: int) -> str:
+        environment = Jinja2Utils.env_using_file_system_loader(templates_dir)
+        return environment.get_template(template_name).render(context=contexts[index])
+
+    def package_shared_environment(index: int) -> str:
+        return registry.render(templates_dir, template_name, context=contexts[index])
+
+    def package_fragments(index: int) -> str:
+        context = contexts[index]
+        return registry.render_fragments(
+            templates_dir,
+            template_name,
+            session_expressions=SESSION_EXPRESSIONS,
+            static_key=context.get_render_key(session_vars=["idea_session_id"]),
+            context=context,
+        )
+
+    def userdata_environment_per_session(index: int) -> str:
+        builder = userdata_builder(index)
+        builder.jinja_env = Jinja2Utils.env_using_file_system_loader(BOOTSTRAP_DIR)
+        return builder.build()
+
+    def userdata_shared_environment(index: int) -> str:
+        return userdata_builder(index).build()
+
+    def run(render: Callable[[int], str]) -> float:
+        start = time.perf_counter()
+        for index in range(SESSION_COUNT):
+            render(index)
+        return time.perf_counter() - start
+
+    Jinja2Utils.template_registry().clear()
+    results = {
+        "package": [
+            run(package_environment_per_session),
+            run(package_shared_environment),
+            run(package_fragments),
+        ],
+        "user data": [
+            run(userdata_environment_per_session),
+            run(userdata_shared_environment),
+        ],
+    }
+    for name, timings in results.items():
+        print(
+            f"{name} rendering for {SESSION_COUNT} sessions: "
+            + ", ".join(
+                f"{label} {timing:.2f}s"
+                for label, timing in zip(
+                    ["environment per session", "shared environment", "fragments"],
+                    timings,
+                )
+            )
+        )
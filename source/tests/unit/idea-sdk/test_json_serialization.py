@@ -0,0 +1,275 @@
+#  Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance
+#  with the License. A copy of the License is located at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  or in the 'license' file accompanying this file. This file is distributed on an 'AS IS' BASIS, WITHOUT WARRANTIES
+#  OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions
+#  and limitations under the License.
+
+import json
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from decimal import Decimal
+from enum import Enum
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import pytest
+from ideasdk.utils import Utils
+from pydantic import Field
+
+from ideadatamodel import (
+    ListSessionsResponse,
+    ListUsersResult,
+    Project,
+    SocaBaseModel,
+    SocaPaginator,
+    User,
+    VirtualDesktopBaseOS,
+    VirtualDesktopServer,
+    VirtualDesktopSession,
+    VirtualDesktopSessionState,
+    VirtualDesktopSessionType,
+    VirtualDesktopSoftwareStack,
+)
+from ideadatamodel.model_utils import ModelUtils
+
+BENCHMARK_ITERATIONS = 5
+CREATED_ON = datetime(2024, 3, 1, 10, 30, 15, 123456, tzinfo=timezone.utc)
+
+
+class Color(Enum):
+    RED = 1
+
+
+class Nested(SocaBaseModel):
+    name: Optional[str]
+    tags: Optional[Dict[str, Any]]
+
+
+class Aliased(SocaBaseModel):
+    type_: Optional[str] = Field(alias="type")
+    params: Optional[Dict[str, Any]]
+    children: Optional[List[Nested]]
+
+
+class Root(SocaBaseModel):
+    __root__: List[Nested]
+
+
+def build_list_sessions_response(count: int) -> ListSessionsResponse:
+    sessions = []
+    for index in range(count):
+        sessions.append(
+            VirtualDesktopSession(
+                dcv_session_id=f"dcv-{index}",
+                idea_session_id=f"session-{index}",
+                base_os=VirtualDesktopBaseOS.AMAZON_LINUX2,
+                name=f"Session {index}",
+                owner=f"user{index % 100}",
+                type=VirtualDesktopSessionType.VIRTUAL,
+                state=VirtualDesktopSessionState.READY,
+                created_on=CREATED_ON,
+                updated_on=CREATED_ON,
+                server=VirtualDesktopServer(
+                    server_id=f"server-{index}",
+                    instance_id=f"i-{index:017d}",
+                    instance_type="m5.large",
+                    private_ip="10.0.0.1",
+                    console_session_count=0,
+                    virtual_session_count=1,
+                ),
+                software_stack=VirtualDesktopSoftwareStack(
+                    stack_id="ss-base-amazonlinux2",
+                    base_os=VirtualDesktopBaseOS.AMAZON_LINUX2,
+                    name="Amazon Linux 2",
+                    ami_id="ami-0123456789abcdef0",
+                    created_on=CREATED_ON,
+                ),
+                project=Project(project_id="project-1", name="default"),
+                tags=[{"Key": "res:SessionId", "Value": f"session-{index}"}],
+                hibernation_enabled=False,
+                is_launched_by_admin=False,
+            )
+        )
+    return ListSessionsResponse(
+        listing=sessions, paginator=SocaPaginator(page_size=count)
+    )
+
+
+def build_list_users_result(count: int) -> ListUsersResult:
+    users = []
+    for index in range(count):
+        users.append(
+            User(
+                username=f"user{index}",
+                email=f"user{index}@example.org",
+                uid=5000 + index,
+                gid=5000,
+                group_name="users",
+                additional_groups=["group-a", "group-b"],
+                login_shell="/bin/bash",
+                home_dir=f"/home/user{index}",
+                sudo=False,
+                enabled=True,
+                created_on=CREATED_ON,
+                updated_on=CREATED_ON,
+                role="user",
+                is_active=True,
+            )
+        )
+    return ListUsersResult(listing=users, paginator=SocaPaginator(page_size=count))
+
+
+def legacy_to_json(payload: Any) -> str:
+    if isinstance(payload, SocaBaseModel):
+        return payload.json(exclude_none=True, by_alias=True)
+    return json.dumps(payload, default=str, separators=(",", ":"))
+
+
+def legacy_to_dict(payload: Any) -> Any:
+    return json.loads(legacy_to_json(payload))
+
+
+def test_to_json_bytes_matches_pydantic_json_for_models() -> None:
+    response = build_list_sessions_response(3)
+    assert json.loads(Utils.to_json_bytes(response)) == legacy_to_dict(response)
+    assert json.loads(Utils.to_json(response)) == legacy_to_dict(response)
+
+    users = build_list_users_result(3)
+    assert json.loads(Utils.to_json_bytes(users)) == legacy_to_dict(users)
+
+
+def test_to_json_bytes_keeps_stdlib_semantics_for_plain_payloads() -> None:
+    payload = {
+        "created_on": CREATED_ON,
+        "amount": Decimal("1.5"),
+        "state": VirtualDesktopSessionState.READY,
+        1: "int key",
+        "items": (1, 2, None),
+    }
+    assert json.loads(Utils.to_json_bytes(payload)) == legacy_to_dict(payload)
+
+
+def test_to_json_bytes_serializes_nested_models_and_enums() -> None:
+    payload = {"nested": Nested(name="a"), "color": Color.RED}
+    assert json.loads(Utils.to_json_bytes(payload)) == {
+        "nested": {"name": "a"},
+        "color": 1,
+    }
+
+
+def test_to_json_bytes_uses_aliases_and_excludes_none_fields() -> None:
+    model = Aliased(
+        type="a",
+        params={"x": None, "y": {"z": None, "w": 1}},
+        children=[Nested(name="b", tags={"k": None})],
+    )
+    expected = {
+        "type": "a",
+        "params": {"x": None, "y": {"z": None, "w": 1}},
+        "children": [{"name": "b", "tags": {"k": None}}],
+    }
+    assert legacy_to_dict(model) == expected
+    assert json.loads(Utils.to_json_bytes(model)) == expected
+    assert Utils.to_dict(model) == expected
+
+
+def test_to_json_bytes_falls_back_for_large_integers() -> None:
+    payload = {"value": 2**70}
+    assert Utils.to_json_bytes(payload) == b'{"value":1180591620717411303424}'
+
+
+def test_to_json_bytes_custom_root_model() -> None:
+    root = Root(__root__=[Nested(name="a"), Nested(name="b", tags={"k": 1})])
+    assert json.loads(Utils.to_json_bytes(root)) == legacy_to_dict(root)
+    assert Utils.to_dict(root) == legacy_to_dict(root)
+
+
+def test_to_dict_matches_json_round_trip() -> None:
+    response = build_list_sessions_response(3)
+    result = Utils.to_dict(response)
+    assert result == legacy_to_dict(response)
+    assert type(result["listing"][0]["state"]) is str
+    assert result["listing"][0]["created_on"] == "2024-03-01T10:30:15.123456+00:00"
+
+
+def test_deep_copy_does_not_share_containers() -> None:
+    payload: Dict[Any, Any] = {
+        "listing": [{"tags": {"a": 1}}],
+        "created_on": CREATED_ON,
+        "amount": Decimal("2"),
+        True: None,
+    }
+    copied = Utils.deep_copy(payload)
+    assert copied == legacy_to_dict(payload)
+
+    copied["listing"][0]["tags"]["a"] = 2
+    assert payload["listing"][0]["tags"]["a"] == 1
+
+
+def measure(fn: Callable[[], Any]) -> Tuple[float, int]:
+    """
+    :return: best wall time in seconds and peak traced allocation in bytes
+    """
+    fn()
+    best = float("inf")
+    for _ in range(BENCHMARK_ITERATIONS):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return best, peak
+
+
+def report(name: str, legacy: Tuple[float, int], current: Tuple[float, int]) -> None:
+    print(
+        f"{name}: legacy {legacy[0] * 1000:.1f}ms peak={legacy[1] / 1024:.0f}KiB, "
+        f"orjson {current[0] * 1000:.1f}ms peak={current[1] / 1024:.0f}KiB, "
+        f"speedup {legacy[0] / current[0]:.1f}x"
+    )
+
+
+@pytest.mark.benchmark
+def test_benchmark_list_sessions_1000() -> None:
+    response = build_list_sessions_response(1000)
+    envelope = {"header": {"namespace": "VirtualDesktop.ListSessions"}, "success": True}
+    envelope["payload"] = response.dict(exclude_none=True, by_alias=True)
+
+    legacy = measure(lambda: legacy_to_json(envelope).encode("utf-8"))
+    current = measure(lambda: Utils.to_json_bytes(envelope))
+    report("ListSessions(1000) response", legacy, current)
+    assert json.loads(Utils.to_json_bytes(envelope)) == legacy_to_dict(envelope)
+    # the envelope carries datetimes that keep the str() format, so the win here is mostly allocations
+    assert current[1] < legacy[1]
+
+    legacy = measure(lambda: legacy_to_dict(response))
+    current = measure(lambda: Utils.to_dict(response))
+    report("ListSessions(1000) to_dict", legacy, current)
+
+
+@pytest.mark.benchmark
+def test_benchmark_list_users_5000() -> None:
+    result = build_list_users_result(5000)
+    envelope = {"header": {"namespace": "Accounts.ListUsers"}, "success": True}
+    envelope["payload"] = result.dict(exclude_none=True, by_alias=True)
+
+    legacy = measure(lambda: legacy_to_json(envelope).encode("utf-8"))
+    current = measure(lambda: Utils.to_json_bytes(envelope))
+    report("ListUsers(5000) response", legacy, current)
+    assert json.loads(Utils.to_json_bytes(envelope)) == legacy_to_dict(envelope)
+    # the envelope carries datetimes that keep the str() format, so the win here is mostly allocations
+    assert current[1] < legacy[1]
+
+    legacy = measure(lambda: legacy_to_json(result))
+    current = measure(lambda: ModelUtils.to_json_bytes(result))
+    report("ListUsers(5000) model", legacy, current)
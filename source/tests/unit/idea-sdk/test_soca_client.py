@@ -0,0 +1,453 @@
+#  Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance
+#  with the License. A copy of the License is located at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  or in the 'license' file accompanying this file. This file is distributed on an 'AS IS' BASIS, WITHOUT WARRANTIES
+#  OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions
+#  and limitations under the License.
+
+"""
+Test Cases for SocaClient token reuse, request coalescing and the client benchmark
+
+the benchmark runs two in-process Sanic servers: an OAuth2 token endpoint standing in for Cognito, and a SocaServer
+serving Projects.GetUserProjects. the client is exercised the way the virtual desktop controller calls the cluster manager.
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from typing import Dict, List, Optional
+
+import pytest
+from ideasdk.api import ApiInvocationContext
+from ideasdk.auth import TokenService, TokenServiceOptions
+from ideasdk.auth import token_service as token_service_module
+from ideasdk.client import SocaClient, SocaClientOptions
+from ideasdk.context import SocaContext, SocaContextOptions
+from ideasdk.protocols import (
+    ApiAuthorizationServiceProtocol,
+    ApiInvokerProtocol,
+    TokenServiceProtocol,
+)
+from ideasdk.server import SocaServer, SocaServerOptions
+from ideatestutils import MockConfig
+from res.constants import (
+    CUSTOM_DOMAIN_NAME_FOR_VDI_KEY,
+    CUSTOM_DOMAIN_NAME_FOR_WEBAPP_KEY,
+)
+from res.utils import table_utils
+from sanic import Sanic
+from sanic.response import json as json_response
+
+from ideadatamodel import (
+    ApiAuthorization,
+    ApiAuthorizationType,
+    AuthResult,
+    GetUserProjectsRequest,
+    GetUserProjectsResult,
+    Project,
+    User,
+    errorcodes,
+    exceptions,
+)
+
+HOST_IP = "127.0.0.1"
+API_SERVER_PORT = 34571
+TOKEN_SERVER_PORT = 34572
+
+# simulated latency of the token endpoint and of the API (database lookups)
+TOKEN_LATENCY_SECONDS = 0.02
+API_LATENCY_SECONDS = 0.01
+
+BENCHMARK_THREADS = 16
+BENCHMARK_REQUESTS = 400
+BENCHMARK_USERS = 4
+
+
+class ServerStats:
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.token_requests = 0
+        self.api_requests = 0
+
+    def reset(self) -> None:
+        with self.lock:
+            self.token_requests = 0
+            self.api_requests = 0
+
+
+STATS = ServerStats()
+
+
+class StubTokenService(TokenServiceProtocol):
+    """
+    accepts any access token issued by the stub OAuth2 token endpoint
+    """
+
+    def decode_token(self, token: str, verify_exp: Optional[bool] = True) -> Dict:
+        if not token.startswith("access-token-"):
+            raise exceptions.unauthorized_access()
+        return {"client_id": "client-id", "scope": "cluster-manager/read"}
+
+    def is_token_expired(self, token: str) -> bool:
+        return False
+
+    def get_access_token_using_client_credentials(self, cached=True) -> AuthResult:
+        raise NotImplementedError()
+
+
+class StubApiAuthorizationService(ApiAuthorizationServiceProtocol):
+    def get_authorization(self, decoded_token: Optional[Dict]) -> ApiAuthorization:
+        return ApiAuthorization(
+            type=ApiAuthorizationType.APP,
+            client_id=decoded_token["client_id"],
+            scopes=decoded_token["scope"].split(" "),
+        )
+
+    def is_scope_authorized(self, decoded_token: str, scope: str) -> bool:
+        return True
+
+    def get_username(self, decoded_token: str) -> Optional[str]:
+        return None
+
+    def get_roles_for_user(
+        self, user: User, role_assignment_resource_key: Optional[str]
+    ) -> List[Dict]:
+        return []
+
+
+class ProjectsApiInvoker(ApiInvokerProtocol):
+    def __init__(self):
+        self.token_service = StubTokenService()
+        self.api_authorization_service = StubApiAuthorizationService()
+
+    def get_token_service(self) -> Optional[TokenServiceProtocol]:
+        return self.token_service
+
+    def get_api_authorization_service(
+        self,
+    ) -> Optional[ApiAuthorizationServiceProtocol]:
+        return self.api_authorization_service
+
+    def invoke(self, context: ApiInvocationContext):
+        with STATS.lock:
+            STATS.api_requests += 1
+        if context.namespace == "Projects.GetUserProjects":
+            if not context.is_authenticated_app():
+                raise exceptions.unauthorized_access()
+            request = context.get_request_payload_as(GetUserProjectsRequest)
+            time.sleep(API_LATENCY_SECONDS)
+            context.success(
+                GetUserProjectsResult(
+                    projects=[
+                        Project(
+                            project_id=f"{request.username}-{index}",
+                            name=f"project-{index}",
+                            title=f"Project {index}",
+                            description="x" * 256,
+                            enabled=True,
+                            security_groups=[f"sg-{index}"],
+                        )
+                        for index in range(20)
+                    ]
+                )
+            )
+        else:
+            raise exceptions.soca_exception(
+                error_code=errorcodes.NOT_SUPPORTED,
+                message=f"namespace: {context.namespace} not supported",
+            )
+
+
+def start_token_server():
+    app = Sanic("test-soca-client-oauth2")
+
+    @app.post("/oauth2/token")
+    async def token(request):
+        with STATS.lock:
+            STATS.token_requests += 1
+            count = STATS.token_requests
+        await asyncio.sleep(TOKEN_LATENCY_SECONDS)
+        return json_response(
+            {
+                "access_token": f"access-token-{count}",
+                "expires_in": 3600,
+                "token_type": "Bearer",
+            }
+        )
+
+    loop = asyncio.new_event_loop()
+    started = threading.Event()
+
+    async def serve():
+        server = await app.create_server(
+            host=HOST_IP,
+            port=TOKEN_SERVER_PORT,
+            return_asyncio_server=True,
+            access_log=False,
+        )
+        await server.startup()
+        started.set()
+        await server.serve_forever()
+
+    def run():
+        asyncio.set_event_loop(loop)
+        try:
+            loop.run_until_complete(serve())
+        except asyncio.CancelledError:
+            pass
+
+    thread = threading.Thread(target=run, name="oauth2-server", daemon=True)
+    thread.start()
+    assert started.wait(10)
+    return loop
+
+
+@pytest.fixture(scope="module")
+def context():
+    mock_config = MockConfig()
+    return SocaContext(
+        options=SocaContextOptions(
+            module_id="test-soca-client",
+            module_name="test-soca-client",
+            config=mock_config.get_config(),
+        )
+    )
+
+
+@pytest.fixture(scope="module", autouse=True)
+def mock_dynamodb():
+    from _pytest.monkeypatch import MonkeyPatch
+
+    def mock_get_item(table_name, key):
+        if key["key"] == CUSTOM_DOMAIN_NAME_FOR_WEBAPP_KEY:
+            return {"value": "test-webapp.example.com"}
+        elif key["key"] == CUSTOM_DOMAIN_NAME_FOR_VDI_KEY:
+            return {"value": "test-vdi.example.com"}
+        return {"value": None}
+
+    mp = MonkeyPatch()
+    mp.setattr(table_utils, "get_item", mock_get_item)
+    yield
+    mp.undo()
+
+
+@pytest.fixture(scope="module", autouse=True)
+def servers(context, mock_dynamodb):
+    from _pytest.monkeypatch import MonkeyPatch
+
+    # SocaServer registers its Sanic apps with fixed names, which may still be registered by another test module's server
+    mp = MonkeyPatch()
+    mp.setattr(Sanic, "test_mode", True)
+
+    token_server_loop = start_token_server()
+
+    api_server = SocaServer(
+        context=context,
+        api_invoker=ProjectsApiInvoker(),
+        options=SocaServerOptions(
+            enable_http=True,
+            hostname=HOST_IP,
+            port=API_SERVER_PORT,
+            enable_unix_socket=False,
+            graceful_shutdown_timeout=1,
+            enable_openapi_spec=False,
+            api_path_prefixes=["/cluster-manager"],
+            max_workers=BENCHMARK_THREADS * 2,
+        ),
+    )
+    api_server.initialize()
+    api_server.start()
+
+    yield
+
+    api_server.stop()
+    for task in asyncio.all_tasks(token_server_loop):
+        token_server_loop.call_soon_threadsafe(task.cancel)
+    mp.undo()
+
+
+@pytest.fixture()
+def token_service(context):
+    return TokenService(
+        context=context,
+        options=TokenServiceOptions(
+            cognito_user_pool_provider_url=f"http://{HOST_IP}:{TOKEN_SERVER_PORT}/pool",
+            cognito_user_pool_domain_url=f"http://{HOST_IP}:{TOKEN_SERVER_PORT}",
+            client_id="client-id",
+            client_secret="client-secret",
+            client_credentials_scope=["cluster-manager/read"],
+        ),
+    )
+
+
+def new_client(context) -> SocaClient:
+    return SocaClient(
+        context=context,
+        options=SocaClientOptions(
+            endpoint=f"http://{HOST_IP}:{API_SERVER_PORT}/cluster-manager/api/v1",
+            enable_logging=False,
+            pool_max_size=BENCHMARK_THREADS,
+        ),
+    )
+
+
+def get_user_projects(
+    client: SocaClient,
+    token_service: TokenService,
+    username: str,
+    force_renewal: bool,
+    coalesce: bool,
+) -> GetUserProjectsResult:
+    return client.invoke_alt(
+        namespace="Projects.GetUserProjects",
+        payload=GetUserProjectsRequest(username=username),
+        result_as=GetUserProjectsResult,
+        access_token=token_service.get_access_token(force_renewal=force_renewal),
+        coalesce=coalesce,
+    )
+
+
+def test_token_service_reuses_token_until_refresh_ahead(token_service, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(
+        token_service_module, "time", SimpleNamespace(monotonic=lambda: now[0])
+    )
+    STATS.reset()
+
+    first = token_service.get_access_token(force_renewal=False)
+    assert token_service.get_access_token(force_renewal=False) == first
+    assert STATS.token_requests == 1
+
+    # still valid just before the refresh ahead window (expires_in: 3600, refresh ahead: 300)
+    now[0] += 3299
+    assert token_service.get_access_token(force_renewal=False) == first
+    assert STATS.token_requests == 1
+
+    # renewed ahead of expiry
+    now[0] += 2
+    second = token_service.get_access_token(force_renewal=False)
+    assert second != first
+    assert STATS.token_requests == 2
+
+    # force renewal always fetches a new token
+    assert token_service.get_access_token() != second
+    assert STATS.token_requests == 3
+
+
+def test_soca_client_coalesces_identical_in_flight_requests(context, token_service):
+    client = new_client(context)
+    STATS.reset()
+    try:
+        barrier = threading.Barrier(BENCHMARK_THREADS)
+
+        def call(index: int) -> GetUserProjectsResult:
+            barrier.wait()
+            username = "user-a" if index % 2 == 0 else "user-b"
+            return get_user_projects(
+                client, token_service, username, force_renewal=False, coalesce=True
+            )
+
+        with ThreadPoolExecutor(max_workers=BENCHMARK_THREADS) as executor:
+            results = list(executor.map(call, range(BENCHMARK_THREADS)))
+    finally:
+        client.close()
+
+    for index, result in enumerate(results):
+        username = "user-a" if index % 2 == 0 else "user-b"
+        assert len(result.projects) == 20
+        assert result.projects[0].project_id == f"{username}-0"
+
+    assert STATS.token_requests == 1
+    # one request per distinct username, plus stragglers that arrive after the in-flight request completed
+    assert STATS.api_requests < BENCHMARK_THREADS / 2
+
+
+def test_soca_client_coalesced_errors_are_raised_to_all_callers(context):
+    client = new_client(context)
+    try:
+        barrier = threading.Barrier(4)
+
+        def call(_) -> Optional[str]:
+            barrier.wait()
+            try:
+                client.invoke_alt(
+                    namespace="Projects.GetUserProjects",
+                    payload=GetUserProjectsRequest(username="user-a"),
+                    result_as=GetUserProjectsResult,
+                    coalesce=True,
+                )
+            except exceptions.SocaException as e:
+                return e.error_code
+            return None
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            error_codes = list(executor.map(call, range(4)))
+    finally:
+        client.close()
+
+    assert error_codes == [errorcodes.UNAUTHORIZED_ACCESS] * 4
+
+
+def run_benchmark(
+    context, token_service: TokenService, force_renewal: bool, coalesce: bool
+) -> dict:
+    client = new_client(context)
+    STATS.reset()
+    latencies: List[float] = []
+    latencies_lock = threading.Lock()
+
+    def call(index: int):
+        start = time.perf_counter()
+        result = get_user_projects(
+            client,
+            token_service,
+            f"user-{index % BENCHMARK_USERS}",
+            force_renewal=force_renewal,
+            coalesce=coalesce,
+        )
+        elapsed = time.perf_counter() - start
+        assert len(result.projects) == 20
+        with latencies_lock:
+            latencies.append(elapsed)
+
+    try:
+        # warm up the connection pool
+        get_user_projects(client, token_service, "user-0", force_renewal, coalesce)
+        STATS.reset()
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=BENCHMARK_THREADS) as executor:
+            list(executor.map(call, range(BENCHMARK_REQUESTS)))
+        total = time.perf_counter() - start
+    finally:
+        client.close()
+
+    latencies.sort()
+    return {
+        "requests_per_second": BENCHMARK_REQUESTS / total,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+        "token_requests": STATS.token_requests,
+        "api_requests": STATS.api_requests,
+    }
+
+
+@pytest.mark.benchmark
+def test_soca_client_benchmark(context, token_service):
+    legacy = run_benchmark(context, token_service, force_renewal=True, coalesce=False)
+    pooled = run_benchmark(context, token_service, force_renewal=False, coalesce=True)
+
+    for name, result in (("legacy", legacy), ("pooled", pooled)):
+        print(
+            f"{name}: {result['requests_per_second']:.1f} req/s, p99: {result['p99_ms']:.1f}ms, "
+            f"token requests: {result['token_requests']}, api requests: {result['api_requests']}"
+        )
+
+    assert legacy["token_requests"] == BENCHMARK_REQUESTS
+    assert pooled["token_requests"] == 0
+    assert pooled["api_requests"] < legacy["api_requests"]
@@ -0,0 +1,354 @@
+#  Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance
+#  with the License. A copy of the License is located at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  or in the 'license' file accompanying this file. This file is distributed on an 'AS IS' BASIS, WITHOUT WARRANTIES
+#  OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions
+#  and limitations under the License.
+
+"""
+Test Cases for SocaLogging queue based handlers, the JSON formatter and the payload log sampling
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, List
+
+import pytest
+from ideasdk.client import SocaClient, SocaClientOptions
+from ideasdk.config.soca_config import SocaConfig
+from ideasdk.logging import (
+    BoundedQueueHandler,
+    PayloadLogSampler,
+    SocaJsonFormatter,
+    SocaLogging,
+)
+
+# simulated latency of a log file write, as seen on a busy EBS volume
+WRITE_LATENCY_SECONDS = 0.0002
+BENCHMARK_INVOCATIONS = 1000
+
+
+class BlockingHandler(logging.Handler):
+    """
+    target handler blocked until released, standing in for a log destination that cannot keep up
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.released = threading.Event()
+        self.records: List[logging.LogRecord] = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.released.wait()
+        self.records.append(record)
+
+
+class SlowFileHandler(logging.FileHandler):
+    def emit(self, record: logging.LogRecord) -> None:
+        super().emit(record)
+        time.sleep(WRITE_LATENCY_SECONDS)
+
+
+@pytest.fixture
+def root_logger():
+    root = logging.getLogger()
+    handlers = list(root.handlers)
+    level = root.level
+    yield root
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    for handler in handlers:
+        root.addHandler(handler)
+    root.setLevel(level)
+
+
+def build_logging_config(log_dir: str, profile: str, formatter: str) -> SocaConfig:
+    return SocaConfig(
+        {
+            "cluster": {
+                "logging": {
+                    "formatters": {
+                        "default": {
+                            "format": "[%(asctime)s] [%(levelname)s] [%(name)s] %(message)s"
+                        },
+                        "json": {"type": "json"},
+                    },
+                    "handlers": {
+                        "file": {
+                            "class": "logging.handlers.TimedRotatingFileHandler",
+                            "interval": 1,
+                            "when": "midnight",
+                            "backupCount": 1,
+                        }
+                    },
+                    "profiles": {
+                        profile: {
+                            "formatter": formatter,
+                            "queue": {"enabled": True, "max_size": 100},
+                            "loggers": {
+                                "app": {"level": "DEBUG", "handlers": ["file"]},
+                                "root": {"level": "WARNING", "handlers": ["file"]},
+                            },
+                        }
+                    },
+                    "audit_logs": {
+                        "enable_payload_tracing": True,
+                        "payload_tracing_sampling": {
+                            "default_rate": 1.0,
+                            "namespaces": [
+                                {"namespace": "VirtualDesktop.*", "rate": 0.0}
+                            ],
+                        },
+                    },
+                }
+            },
+            "test": {
+                "logging": {
+                    "profile": profile,
+                    "logs_directory": log_dir,
+                    "default_log_file_name": "application.log",
+                }
+            },
+        }
+    )
+
+
+def test_queue_handler_drops_and_counts_records_when_full():
+    target = BlockingHandler()
+    handler = BoundedQueueHandler(target=target, max_size=5)
+    logger = logging.getLogger("test-soca-logging-queue-full")
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    logger.addHandler(handler)
+    try:
+        # the application thread is never blocked by the target handler: the records that do not fit in the queue
+        # are dropped. 5 records in the queue, and at most 1 more taken by the listener thread
+        for index in range(20):
+            logger.info("record %d", index)
+        assert 14 <= handler.dropped_count <= 15
+
+        target.released.set()
+        handler.queue.join()
+        logger.info("after release")
+        handler.queue.join()
+        messages = [record.getMessage() for record in target.records]
+        # the dropped records are reported with the next record that fits in the queue
+        assert messages[-2:] == [
+            "after release",
+            f"log queue is full. dropped {handler.dropped_count} log records",
+        ]
+        assert target.records[-1].levelno == logging.WARNING
+        assert len(messages) == 20 - handler.dropped_count + 2
+
+        # records dropped after the last report are reported when the handler is closed
+        target.released.clear()
+        for index in range(20):
+            logger.info("record %d", index)
+        target.released.set()
+    finally:
+        logger.removeHandler(handler)
+        handler.close()
+
+    assert target.records[-1].getMessage().startswith("log queue is full. dropped")
+
+
+def test_queue_handler_formats_exceptions_on_the_application_thread():
+    target = BlockingHandler()
+    target.released.set()
+    target.setFormatter(logging.Formatter("%(message)s"))
+    handler = BoundedQueueHandler(target=target)
+    logger = logging.getLogger("test-soca-logging-queue-exception")
+    logger.propagate = False
+    logger.addHandler(handler)
+    try:
+        try:
+            raise ValueError("failed")
+        except ValueError:
+            logger.exception("exception %s", "message")
+    finally:
+        logger.removeHandler(handler)
+        handler.close()
+
+    record = target.records[0]
+    assert record.getMessage() == "exception message"
+    assert record.exc_info is None
+    assert "ValueError: failed" in record.exc_text
+
+
+def test_json_formatter():
+    formatter = SocaJsonFormatter()
+    record = logging.LogRecord(
+        name="app",
+        level=logging.ERROR,
+        pathname=__file__,
+        lineno=1,
+        msg="invocation %s",
+        args=("failed",),
+        exc_info=None,
+    )
+    record.created = 0
+    record.msecs = 12
+
+    entry = json.loads(formatter.format(record))
+
+    assert entry["timestamp"] == "1970-01-01T00:00:00.012Z"
+    assert entry["level"] == "ERROR"
+    assert entry["logger"] == "app"
+    assert entry["message"] == "invocation failed"
+    assert "exception" not in entry
+
+
+def test_soca_logging_async_profile_with_json_formatter(tmp_path: Any, root_logger):
+    soca_logging = SocaLogging(
+        config=build_logging_config(str(tmp_path), profile="async", formatter="json"),
+        module_id="test",
+    )
+    logger = soca_logging.get_logger("test-soca-logging-async")
+    other_logger = soca_logging.get_logger("test-soca-logging-async-other")
+    logger.debug("debug message")
+    other_logger.info("info message")
+    logging.getLogger("test-soca-logging-async-root").warning("root message")
+    # loggers writing to the same log file share the queue and the listener thread
+    assert logger.handlers[0] is other_logger.handlers[0]
+    assert logger.handlers[0] in root_logger.handlers
+    assert isinstance(logger.handlers[0], BoundedQueueHandler)
+
+    soca_logging.close()
+
+    with open(os.path.join(tmp_path, "application.log")) as f:
+        entries = [json.loads(line) for line in f.read().splitlines()]
+    assert [entry["message"] for entry in entries] == [
+        "debug message",
+        "info message",
+        "root message",
+    ]
+    assert entries[0]["level"] == "DEBUG"
+    assert soca_logging.get_dropped_log_count() == 0
+
+
+def test_payload_sampler():
+    sampler = PayloadLogSampler(
+        default_rate=0.5,
+        namespace_rates={
+            "VirtualDesktop.*": 0.0,
+            "VirtualDesktop.Create*": 1.0,
+            "Accounts.ListUsers": 1.0,
+        },
+    )
+    assert sampler.get_rate("VirtualDesktop.ListSessions") == 0.0
+    assert sampler.get_rate("VirtualDesktop.CreateSession") == 1.0
+    assert sampler.get_rate("Accounts.ListUsers") == 1.0
+    assert sampler.get_rate("Accounts.ListGroups") == 0.5
+    assert sampler.get_rate(None) == 0.5
+    assert not any(
+        sampler.is_sampled("VirtualDesktop.ListSessions") for _ in range(100)
+    )
+    assert all(sampler.is_sampled("VirtualDesktop.CreateSession") for _ in range(100))
+
+    sampled = len(
+        [index for index in range(10000) if sampler.is_sampled("Accounts.ListGroups")]
+    )
+    assert 4000 < sampled < 6000
+
+    sampler = PayloadLogSampler.from_config(
+        {
+            "namespaces": [
+                {"namespace": "Projects.*", "rate": 0.1},
+                {"namespace": "", "rate": 0.2},
+            ]
+        },
+        default_rate=0.01,
+    )
+    assert sampler.get_rate("Projects.GetProject") == 0.1
+    assert sampler.get_rate("Accounts.GetUser") == 0.01
+    assert PayloadLogSampler.from_config(None).get_rate("Accounts.GetUser") == 1.0
+
+
+def test_soca_logging_payload_sampler(tmp_path: Any, root_logger):
+    soca_logging = SocaLogging(
+        config=build_logging_config(
+            str(tmp_path), profile="async", formatter="default"
+        ),
+        module_id="test",
+    )
+    try:
+        sampler = soca_logging.get_payload_sampler()
+        assert sampler is soca_logging.get_payload_sampler()
+        assert sampler.get_rate("VirtualDesktop.ListSessions") == 0.0
+        assert sampler.get_rate("Accounts.ListUsers") == 1.0
+    finally:
+        soca_logging.close()
+
+
+def test_soca_client_log_sample_rates():
+    client = SocaClient(
+        context=None,
+        options=SocaClientOptions(
+            endpoint="http://localhost:8443/api",
+            log_sample_rate=0.0,
+            log_sample_rates={"Projects.*": 1.0},
+        ),
+        logger=logging.getLogger("test-soca-logging-client"),
+    )
+    assert client.is_log_sampled("Projects.GetUserProjects")
+    assert not client.is_log_sampled("Accounts.GetUser")
+    assert not client.is_log_sampled()
+
+
+@pytest.mark.benchmark
+def test_benchmark_api_logging_throughput(tmp_path: Any):
+    """
+    log the request and response of API invocations, the way ApiInvocationContext logs with payload tracing enabled,
+    and measure the time spent on the invocation threads.
+    """
+    payload = {
+        "header": {"namespace": "Projects.GetUserProjects", "request_id": "1"},
+        "payload": {"projects": [{"project_id": str(index)} for index in range(20)]},
+    }
+
+    def run(name: str, handler: logging.Handler, level: int) -> Dict[str, float]:
+        handler.setFormatter(
+            logging.Formatter("[%(asctime)s] [%(levelname)s] [%(name)s] %(message)s")
+        )
+        logger = logging.getLogger(f"test-soca-logging-benchmark-{name}")
+        logger.propagate = False
+        logger.setLevel(level)
+        logger.addHandler(handler)
+        start = time.perf_counter()
+        for _ in range(BENCHMARK_INVOCATIONS):
+            if logger.isEnabledFor(logging.INFO):
+                logger.info(f"(req) [actor:user] {json.dumps(payload)}")
+                logger.info(f"(res) [actor:user] {json.dumps(payload)} (1 ms)")
+        elapsed = time.perf_counter() - start
+        logger.removeHandler(handler)
+        handler.close()
+        return {
+            "ms": elapsed * 1000,
+            "invocations_per_second": BENCHMARK_INVOCATIONS / elapsed,
+        }
+
+    def file_handler(name: str) -> logging.Handler:
+        return SlowFileHandler(os.path.join(tmp_path, f"{name}.log"))
+
+    disabled = run("disabled", file_handler("disabled"), logging.WARNING)
+    synchronous = run("synchronous", file_handler("synchronous"), logging.INFO)
+    queue_handler = BoundedQueueHandler(target=file_handler("queue"))
+    queued = run("queue", queue_handler, logging.INFO)
+
+    print(
+        f"{BENCHMARK_INVOCATIONS} invocations: "
+        f"logging disabled {disabled['ms']:.1f}ms ({disabled['invocations_per_second']:.0f}/s), "
+        f"synchronous file logging {synchronous['ms']:.1f}ms ({synchronous['invocations_per_second']:.0f}/s), "
+        f"queue logging {queued['ms']:.1f}ms ({queued['invocations_per_second']:.0f}/s)"
+    )
+
+    assert queue_handler.dropped_count == 0
+    with open(os.path.join(tmp_path, "queue.log")) as f:
+        assert len(f.read().splitlines()) == 2 * BENCHMARK_INVOCATIONS
@@ -0,0 +1,419 @@
+#  Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance
+#  with the License. A copy of the License is located at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  or in the 'license' file accompanying this file. This file is distributed on an 'AS IS' BASIS, WITHOUT WARRANTIES
+#  OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions
+#  and limitations under the License.
+
+"""
+Test Cases for VirtualDesktopProjectCatalog
+"""
+
+import threading
+import time
+from typing import Any, Dict, List
+
+import pytest
+from ideasdk.context import SocaContext, SocaContextOptions
+from ideatestutils import MockConfig
+from ideavirtualdesktopcontroller.app.api.virtual_desktop_api import VirtualDesktopAPI
+from ideavirtualdesktopcontroller.app.events.service.controller_queue_monitor_service import (
+    ControllerQueueMonitorService,
+)
+from ideavirtualdesktopcontroller.app.projects.virtual_desktop_project_catalog import (
+    VirtualDesktopProjectCatalog,
+)
+from ideavirtualdesktopcontroller.app.software_stacks.virtual_desktop_software_stack_db import (
+    VirtualDesktopSoftwareStackDB,
+)
+from ideavirtualdesktopcontroller.app.virtual_desktop_controller_utils import (
+    VirtualDesktopControllerUtils,
+)
+from res.resources import software_stacks
+
+from ideadatamodel import (
+    GetProjectRequest,
+    GetProjectResult,
+    ListProjectsRequest,
+    ListProjectsResult,
+    Project,
+    SocaEnvelope,
+    SocaHeader,
+    SocaMemory,
+    SocaMemoryUnit,
+    SocaPaginator,
+    VirtualDesktopServer,
+    VirtualDesktopSession,
+    VirtualDesktopSoftwareStack,
+    errorcodes,
+    exceptions,
+)
+
+PROJECT_COUNT = 200
+PROJECTS_PER_STACK = 50
+PROJECT_LOOKUP_LATENCY_SECONDS = 0.002
+BENCHMARK_ITERATIONS = 50
+
+
+class StubProjectsClient:
+    def __init__(self, project_count: int, latency: float = 0.0) -> None:
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.projects: Dict[str, Project] = {}
+        for index in range(project_count):
+            project_id = f"project-{index}"
+            self.projects[project_id] = Project(
+                project_id=project_id,
+                name=f"project{index}",
+                title=f"Project {index}",
+                enabled=True,
+                enable_budgets=False,
+            )
+        self.list_calls = 0
+        self.get_calls = 0
+
+    def list_projects(self, request: ListProjectsRequest) -> ListProjectsResult:
+        with self.lock:
+            self.list_calls += 1
+        project_ids = sorted(self.projects.keys())
+        start = int(request.paginator.cursor) if request.paginator.cursor else 0
+        end = start + request.paginator.page_size
+        return ListProjectsResult(
+            listing=[
+                self.projects[project_id] for project_id in project_ids[start:end]
+            ],
+            paginator=SocaPaginator(
+                page_size=request.paginator.page_size,
+                cursor=str(end) if end < len(project_ids) else None,
+            ),
+        )
+
+    def get_project(
+        self, request: GetProjectRequest, use_cache: bool = True
+    ) -> GetProjectResult:
+        with self.lock:
+            self.get_calls += 1
+        if self.latency > 0:
+            time.sleep(self.latency)
+        project = self.projects.get(request.project_id)
+        if project is None:
+            raise exceptions.soca_exception(
+                error_code=errorcodes.PROJECT_NOT_FOUND,
+                message=f"project not found for project id: {request.project_id}",
+            )
+        return GetProjectResult(project=project)
+
+    def get_user_projects(self, username: str) -> List[Project]:
+        return list(self.projects.values())
+
+
+class StubSoftwareStackTable:
+    def __init__(self, item: Dict[str, Any]) -> None:
+        self.item = item
+
+    def get_item(self, **_: Any) -> Dict[str, Any]:
+        return {"Item": self.item}
+
+
+@pytest.fixture()
+def context() -> SocaContext:
+    return SocaContext(
+        options=SocaContextOptions(
+            cluster_name="idea-mock",
+            module_name="virtual-desktop-controller",
+            module_id="vdc",
+            module_set="default",
+            config=MockConfig().get_config(),
+        )
+    )
+
+
+@pytest.fixture()
+def projects_client() -> StubProjectsClient:
+    return StubProjectsClient(PROJECT_COUNT)
+
+
+@pytest.fixture()
+def catalog(
+    context: SocaContext, projects_client: StubProjectsClient
+) -> VirtualDesktopProjectCatalog:
+    catalog = VirtualDesktopProjectCatalog(
+        context=context, projects_client=projects_client  # type: ignore[arg-type]
+    )
+    catalog.load()
+    return catalog
+
+
+def project_event(namespace: str, project_id: str) -> SocaEnvelope:
+    return SocaEnvelope(
+        header=SocaHeader(namespace=namespace, request_id="request-id"),
+        payload={"project_id": project_id},
+    )
+
+
+def test_load_reads_all_pages(
+    catalog: VirtualDesktopProjectCatalog, projects_client: StubProjectsClient
+) -> None:
+    assert catalog.is_loaded
+    assert catalog.get_project_count() == PROJECT_COUNT
+    assert projects_client.list_calls == 2
+
+
+def test_get_projects_resolves_in_memory(
+    catalog: VirtualDesktopProjectCatalog, projects_client: StubProjectsClient
+) -> None:
+    project_ids = [f"project-{index}" for index in reversed(range(PROJECTS_PER_STACK))]
+    projects = catalog.get_projects(project_ids)
+
+    assert [project.project_id for project in projects] == project_ids
+    assert projects_client.get_calls == 0
+
+
+def test_get_projects_loads_missing_and_skips_unknown(
+    catalog: VirtualDesktopProjectCatalog, projects_client: StubProjectsClient
+) -> None:
+    projects_client.projects["project-new"] = Project(
+        project_id="project-new", name="new", title="New"
+    )
+
+    projects = catalog.get_projects(["project-1", "project-new", "project-unknown"])
+
+    assert [project.project_id for project in projects] == ["project-1", "project-new"]
+    assert projects_client.get_calls == 2
+    assert catalog.get_project("project-new") is not None
+    assert projects_client.get_calls == 2
+
+
+def test_project_events_update_catalog(
+    context: SocaContext,
+    catalog: VirtualDesktopProjectCatalog,
+    projects_client: StubProjectsClient,
+) -> None:
+    context.project_catalog = catalog  # type: ignore[attr-defined]
+    monitor = ControllerQueueMonitorService.__new__(ControllerQueueMonitorService)
+    monitor.context = context  # type: ignore[assignment]
+    monitor._logger = context.logger("controller-q-monitor-service")
+
+    projects_client.projects["project-new"] = Project(
+        project_id="project-new", name="new", title="New"
+    )
+    monitor._handle_project_event(
+        "1", project_event("Projects.ProjectCreatedEvent", "project-new")
+    )
+    assert catalog.get_project_count() == PROJECT_COUNT + 1
+
+    projects_client.projects["project-1"] = Project(
+        project_id="project-1", name="project1", title="Renamed"
+    )
+    monitor._handle_project_event(
+        "2", project_event("Projects.ProjectUpdatedEvent", "project-1")
+    )
+    assert catalog.get_project("project-1").title == "Renamed"
+
+    monitor._handle_project_event(
+        "3", project_event("Projects.ProjectDeletedEvent", "project-2")
+    )
+    assert catalog.get_project_count() == PROJECT_COUNT
+    projects_client.projects.pop("project-2")
+    assert catalog.get_project("project-2") is None
+
+
+def build_api(context: SocaContext, stack_project_ids: List[str]) -> VirtualDesktopAPI:
+    stack_entry = {
+        "base_os": "amazonlinux2",
+        "stack_id": "ss-benchmark",
+        "name": "benchmark",
+        "description": "benchmark",
+        "created_on": 0,
+        "updated_on": 0,
+        "ami_id": "ami-benchmark",
+        "enabled": True,
+        "min_storage_value": "10",
+        "min_storage_unit": "gb",
+        "min_ram_value": "4",
+        "min_ram_unit": "gb",
+        "architecture": "x86_64",
+        "gpu": "NO_GPU",
+        "projects": stack_project_ids,
+    }
+
+    software_stack_db = VirtualDesktopSoftwareStackDB.__new__(
+        VirtualDesktopSoftwareStackDB
+    )
+    software_stack_db.context = context  # type: ignore[assignment]
+    software_stack_db._logger = context.logger("virtual-desktop-software-stack-db")
+    software_stack_db._table_obj = StubSoftwareStackTable(stack_entry)
+
+    instance_types = {}
+    for family in range(60):
+        for size, memory in (("large", 8192), ("xlarge", 16384), ("2xlarge", 32768)):
+            for generation in ("a", "b", "c", "d"):
+                name = f"m{family}{generation}.{size}"
+                instance_types[name] = {
+                    "InstanceType": name,
+                    "MemoryInfo": {"SizeInMiB": memory},
+                    "HibernationSupported": True,
+                    "ProcessorInfo": {"SupportedArchitectures": ["x86_64"]},
+                    "GpuInfo": {},
+                }
+    context.config().put(
+        "virtual-desktop-controller.dcv_session.instance_types.allow",
+        sorted({name.split(".")[0] for name in instance_types}),
+    )
+    context.config().put(
+        "virtual-desktop-controller.dcv_session.instance_types.deny", []
+    )
+    context.config().put(
+        "virtual-desktop-controller.dcv_session.max_root_volume_memory", 1000
+    )
+
+    controller_utils = VirtualDesktopControllerUtils.__new__(
+        VirtualDesktopControllerUtils
+    )
+    controller_utils.context = context  # type: ignore[assignment]
+    controller_utils._logger = context.logger("virtual-desktop-controller-utils")
+    controller_utils.INSTANCE_TYPES_NAMES_LIST_CACHE_KEY = (
+        "aws.ec2.all-instance-types-names-list"
+    )
+    controller_utils.INSTANCE_INFO_CACHE_KEY = "aws.ec2.all-instance-types-data"
+    controller_utils.instance_types_lock = threading.RLock()
+    controller_utils.instance_types_cache = context.cache().register_cache(
+        "vdc.instance_types", max_size=10, ttl_seconds=86400
+    )
+    controller_utils.valid_instance_types_cache = context.cache().register_cache(
+        "vdc.valid_instance_types", max_size=1000, ttl_seconds=86400
+    )
+    controller_utils.instance_types_cache.set(
+        controller_utils.INSTANCE_TYPES_NAMES_LIST_CACHE_KEY,
+        list(instance_types.keys()),
+    )
+    controller_utils.instance_types_cache.set(
+        controller_utils.INSTANCE_INFO_CACHE_KEY, instance_types
+    )
+
+    api = VirtualDesktopAPI.__new__(VirtualDesktopAPI)
+    api.context = context  # type: ignore[assignment]
+    api._logger = context.logger("virtual-desktop-api")
+    api.software_stack_db = software_stack_db
+    api.controller_utils = controller_utils
+    return api
+
+
+def create_session_request() -> VirtualDesktopSession:
+    return VirtualDesktopSession(
+        owner="user1",
+        project=Project(project_id=f"project-{PROJECTS_PER_STACK - 1}"),
+        software_stack=VirtualDesktopSoftwareStack(
+            stack_id="ss-benchmark", base_os="amazonlinux2"
+        ),
+        hibernation_enabled=False,
+        type="VIRTUAL",
+        server=VirtualDesktopServer(
+            instance_type="m59d.2xlarge",
+            root_volume_size=SocaMemory(value=100, unit=SocaMemoryUnit.GB),
+        ),
+    )
+
+
+def run_create_session_validation(
+    api: VirtualDesktopAPI, flush_valid_instance_types: bool
+) -> Dict[str, float]:
+    latencies = []
+    for _ in range(BENCHMARK_ITERATIONS):
+        if flush_valid_instance_types:
+            api.controller_utils.valid_instance_types_cache.flush()
+        start = time.perf_counter()
+        session, is_valid = api.validate_create_session_request(
+            create_session_request()
+        )
+        software_stack = api._get_software_stack_info(
+            session.software_stack.stack_id, session.software_stack.base_os
+        )
+        latencies.append(time.perf_counter() - start)
+        assert is_valid, session.failure_reason
+        assert len(software_stack.projects) == PROJECTS_PER_STACK
+    latencies.sort()
+    return {
+        "mean_ms": sum(latencies) / len(latencies) * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+    }
+
+
+def test_validate_create_session_request_resolves_projects_from_catalog(
+    context: SocaContext, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    stack_project_ids = [f"project-{index}" for index in range(PROJECTS_PER_STACK)]
+    api = build_api(context, stack_project_ids)
+    monkeypatch.setattr(
+        software_stacks,
+        "get_software_stack",
+        lambda stack_id, base_os: api.software_stack_db._table_obj.item,
+    )
+    projects_client = StubProjectsClient(PROJECT_COUNT)
+    context.projects_client = projects_client  # type: ignore[attr-defined]
+    catalog = VirtualDesktopProjectCatalog(
+        context=context, projects_client=projects_client  # type: ignore[arg-type]
+    )
+    catalog.load()
+    context.project_catalog = catalog  # type: ignore[attr-defined]
+
+    session, is_valid = api.validate_create_session_request(create_session_request())
+    software_stack = api._get_software_stack_info(
+        session.software_stack.stack_id, session.software_stack.base_os
+    )
+
+    assert is_valid, session.failure_reason
+    assert len(software_stack.projects) == PROJECTS_PER_STACK
+    assert projects_client.get_calls == 0
+
+
+@pytest.mark.benchmark
+def test_benchmark_validate_create_session_request(
+    context: SocaContext, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    stack_project_ids = [f"project-{index}" for index in range(PROJECTS_PER_STACK)]
+    api = build_api(context, stack_project_ids)
+    monkeypatch.setattr(
+        software_stacks,
+        "get_software_stack",
+        lambda stack_id, base_os: api.software_stack_db._table_obj.item,
+    )
+
+    # before: one cluster manager call per project of the stack, instance types filtered on every request
+    projects_client = StubProjectsClient(
+        PROJECT_COUNT, latency=PROJECT_LOOKUP_LATENCY_SECONDS
+    )
+    context.projects_client = projects_client  # type: ignore[attr-defined]
+    context.project_catalog = None  # type: ignore[attr-defined]
+    before = run_create_session_validation(api, flush_valid_instance_types=True)
+    before_calls = projects_client.get_calls
+
+    # after: projects resolved from the catalog, valid instance types memoized
+    projects_client = StubProjectsClient(
+        PROJECT_COUNT, latency=PROJECT_LOOKUP_LATENCY_SECONDS
+    )
+    context.projects_client = projects_client  # type: ignore[attr-defined]
+    catalog = VirtualDesktopProjectCatalog(
+        context=context, projects_client=projects_client  # type: ignore[arg-type]
+    )
+    catalog.load()
+    context.project_catalog = catalog  # type: ignore[attr-defined]
+    after = run_create_session_validation(api, flush_valid_instance_types=False)
+    after_calls = projects_client.get_calls
+
+    for name, result, calls in (
+        ("per-project lookups", before, before_calls),
+        ("project catalog", after, after_calls),
+    ):
+        print(
+            f"validate_create_session_request with {PROJECTS_PER_STACK} projects per stack, {name}: "
+            f"mean {result['mean_ms']:.2f}ms, p99 {result['p99_ms']:.2f}ms, "
+            f"get_project calls {calls}"
+        )
+
+    assert before_calls == BENCHMARK_ITERATIONS * PROJECTS_PER_STACK
+    assert after_calls == 0
@@ -0,0 +1,330 @@
+#  Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance
+#  with the License. A copy of the License is located at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  or in the 'license' file accompanying this file. This file is distributed on an 'AS IS' BASIS, WITHOUT WARRANTIES
+#  OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions
+#  and limitations under the License.
+
+"""
+Test Cases for VirtualDesktopSessionPermissionDB listing
+"""
+
+import math
+import time
+from typing import Any, Dict, Iterator, List, Set
+
+import boto3
+import pytest
+from ideasdk.context import SocaContext, SocaContextOptions
+from ideasdk.utils import Utils
+from ideatestutils import MockConfig
+from ideavirtualdesktopcontroller.app.session_permissions import (
+    constants as session_permissions_constants,
+)
+from ideavirtualdesktopcontroller.app.session_permissions.virtual_desktop_session_permission_db import (
+    VirtualDesktopSessionPermissionDB,
+)
+from moto import mock_aws
+
+from ideadatamodel import ListPermissionsRequest, SocaFilter, SocaPaginator
+
+BENCHMARK_ROW_COUNT = 100_000
+ACTOR_COUNT = 5_000
+ACTORS_PER_SESSION = 4
+RCU_BYTES = 4096
+
+
+class RecordingTable:
+    """
+    wraps a table to record the DynamoDB read requests issued by the listing
+    """
+
+    def __init__(self, table: Any) -> None:
+        self.table = table
+        self.calls: List[Dict[str, Any]] = []
+
+    def _record(self, operation: str, result: Dict[str, Any]) -> Dict[str, Any]:
+        self.calls.append(
+            {
+                "operation": operation,
+                "scanned": result.get("ScannedCount", 0),
+                "returned": result.get("Count", 0),
+            }
+        )
+        return result
+
+    def query(self, **kwargs: Any) -> Dict[str, Any]:
+        result = self.table.query(**kwargs)
+        self._record("query:" + kwargs.get("IndexName", "table"), result)
+        return result
+
+    def scan(self, **kwargs: Any) -> Dict[str, Any]:
+        return self._record("scan", self.table.scan(**kwargs))
+
+
+def create_table(dynamodb: Any, table_name: str) -> Any:
+    return dynamodb.create_table(
+        TableName=table_name,
+        KeySchema=[
+            {"AttributeName": "idea_session_id", "KeyType": "HASH"},
+            {"AttributeName": "actor_name", "KeyType": "RANGE"},
+        ],
+        AttributeDefinitions=[
+            {"AttributeName": "idea_session_id", "AttributeType": "S"},
+            {"AttributeName": "actor_name", "AttributeType": "S"},
+        ],
+        GlobalSecondaryIndexes=[
+            {
+                "IndexName": session_permissions_constants.SESSION_PERMISSIONS_DB_GSI_ACTOR,
+                "KeySchema": [
+                    {"AttributeName": "actor_name", "KeyType": "HASH"},
+                    {"AttributeName": "idea_session_id", "KeyType": "RANGE"},
+                ],
+                "Projection": {"ProjectionType": "ALL"},
+            }
+        ],
+        BillingMode="PAY_PER_REQUEST",
+    )
+
+
+def permission_entry(index: int) -> Dict[str, Any]:
+    session_index = index // ACTORS_PER_SESSION
+    return {
+        "idea_session_id": f"session-{session_index:06d}",
+        "actor_name": f"user{index % ACTOR_COUNT:05d}",
+        "idea_session_owner": f"owner{session_index % 100}",
+        "idea_session_base_os": "amazonlinux2",
+        "idea_session_instance_type": "t3.large",
+        "idea_session_state": "READY",
+        "idea_session_name": f"Session {session_index}",
+        "idea_session_created_on": 1700000000000,
+        "idea_session_type": "VIRTUAL",
+        "idea_session_hibernation_enabled": False,
+        "permission_profile_id": "observer_profile" if index % 2 else "admin_profile",
+        "actor_type": "USER",
+        "expiry_date": 1900000000000,
+        "created_on": 1700000000000,
+        "updated_on": 1700000000000,
+    }
+
+
+def load_entries(table: Any, count: int) -> None:
+    with table.batch_writer() as batch:
+        for index in range(count):
+            batch.put_item(Item=permission_entry(index))
+
+
+def build_db(context: SocaContext, table: Any) -> VirtualDesktopSessionPermissionDB:
+    db = VirtualDesktopSessionPermissionDB.__new__(VirtualDesktopSessionPermissionDB)
+    db.context = context  # type: ignore[assignment]
+    db._logger = context.logger("virtual-desktop-session-permissions-db")
+    db._table_obj = table
+    return db
+
+
+def list_all_pages(
+    db: VirtualDesktopSessionPermissionDB, filters: List[SocaFilter], page_size: int
+) -> Iterator[List[Any]]:
+    cursor = None
+    while True:
+        response = db.list_session_permissions(
+            ListPermissionsRequest(
+                filters=[filter_.copy() for filter_ in filters],
+                paginator=SocaPaginator(page_size=page_size, cursor=cursor),
+            )
+        )
+        yield response.listing
+        cursor = response.paginator.cursor
+        if cursor is None:
+            break
+
+
+@pytest.fixture()
+def context() -> SocaContext:
+    return SocaContext(
+        options=SocaContextOptions(
+            cluster_name="idea-mock",
+            module_name="virtual-desktop-controller",
+            module_id="vdc",
+            module_set="default",
+            config=MockConfig().get_config(),
+        )
+    )
+
+
+@pytest.fixture()
+def table() -> Iterator[RecordingTable]:
+    with mock_aws():
+        dynamodb = boto3.resource("dynamodb", region_name="us-east-1")
+        ddb_table = create_table(dynamodb, "session-permissions")
+        load_entries(ddb_table, 2_000)
+        yield RecordingTable(ddb_table)
+
+
+def test_session_filter_queries_table(
+    context: SocaContext, table: RecordingTable
+) -> None:
+    db = build_db(context, table)
+
+    response = db.list_session_permissions(
+        ListPermissionsRequest(
+            filters=[SocaFilter(key="idea_session_id", eq="session-000010")]
+        )
+    )
+
+    assert {permission.actor_name for permission in response.listing} == {
+        "user00040",
+        "user00041",
+        "user00042",
+        "user00043",
+    }
+    assert [call["operation"] for call in table.calls] == ["query:table"]
+    assert table.calls[0]["scanned"] == ACTORS_PER_SESSION
+
+
+def test_actor_filter_queries_actor_index(
+    context: SocaContext, table: RecordingTable
+) -> None:
+    db = build_db(context, table)
+
+    response = db.list_session_permissions(
+        ListPermissionsRequest(
+            filters=[
+                SocaFilter(key="actor_name", eq="user00007"),
+                SocaFilter(key="permission_profile_id", value="observer"),
+            ]
+        )
+    )
+
+    assert [permission.idea_session_id for permission in response.listing] == [
+        "session-000001"
+    ]
+    assert [call["operation"] for call in table.calls] == [
+        "query:" + session_permissions_constants.SESSION_PERMISSIONS_DB_GSI_ACTOR
+    ]
+
+
+def test_non_key_filter_scans(context: SocaContext, table: RecordingTable) -> None:
+    db = build_db(context, table)
+
+    response = db.list_session_permissions(
+        ListPermissionsRequest(
+            filters=[SocaFilter(key="idea_session_name", value="Session 49")]
+        )
+    )
+
+    assert {permission.idea_session_name for permission in response.listing} == {
+        "Session 49",
+        "Session 490",
+        "Session 491",
+        "Session 492",
+        "Session 493",
+        "Session 494",
+        "Session 495",
+        "Session 496",
+        "Session 497",
+        "Session 498",
+        "Session 499",
+    }
+    assert {call["operation"] for call in table.calls} == {"scan"}
+
+
+def test_pagination_returns_full_pages_until_exhausted(
+    context: SocaContext, table: RecordingTable
+) -> None:
+    db = build_db(context, table)
+    filters = [SocaFilter(key="permission_profile_id", eq="observer_profile")]
+
+    pages = list(list_all_pages(db, filters, page_size=150))
+
+    assert all(len(page) == 150 for page in pages[:-1])
+    assert 0 < len(pages[-1]) <= 150
+    keys = [
+        (permission.idea_session_id, permission.actor_name)
+        for page in pages
+        for permission in page
+    ]
+    assert len(keys) == len(set(keys)) == 1_000
+
+
+def test_invalid_cursor_is_rejected(
+    context: SocaContext, table: RecordingTable
+) -> None:
+    db = build_db(context, table)
+    with pytest.raises(Exception) as exc_info:
+        db.list_session_permissions(
+            ListPermissionsRequest(paginator=SocaPaginator(cursor="not-a-cursor"))
+        )
+    assert "invalid cursor" in str(exc_info.value)
+
+
+def estimate_read_units(calls: List[Dict[str, Any]], item_size: int) -> float:
+    """
+    eventually consistent reads: 0.5 RCU per 4 KB of items read by each request, whether the items match the filter or not
+    """
+    return sum(
+        math.ceil(call["scanned"] * item_size / RCU_BYTES) * 0.5
+        for call in calls
+        if call["scanned"] > 0
+    )
+
+
+def legacy_list(table: RecordingTable, key: str, value: str) -> Set[str]:
+    """
+    listing before the key condition path: ScanFilter scan, with the pages followed by the caller
+    """
+    results = set()
+    request: Dict[str, Any] = {
+        "ScanFilter": {key: {"AttributeValueList": [value], "ComparisonOperator": "EQ"}}
+    }
+    while True:
+        result = table.scan(**request)
+        for item in result.get("Items", []):
+            results.add(f"{item['idea_session_id']}/{item['actor_name']}")
+        last_evaluated_key = result.get("LastEvaluatedKey")
+        if last_evaluated_key is None:
+            return results
+        request["ExclusiveStartKey"] = last_evaluated_key
+
+
+@pytest.mark.benchmark
+def test_benchmark_100k_permissions(context: SocaContext) -> None:
+    with mock_aws():
+        dynamodb = boto3.resource("dynamodb", region_name="us-east-1")
+        table = RecordingTable(create_table(dynamodb, "session-permissions-100k"))
+        load_entries(table.table, BENCHMARK_ROW_COUNT)
+        item_size = len(Utils.to_json(permission_entry(0)))
+        db = build_db(context, table)
+
+        for name, key, value in (
+            ("shared permissions of one actor", "actor_name", "user00042"),
+            ("permissions of one session", "idea_session_id", "session-001234"),
+        ):
+            table.calls.clear()
+            start = time.perf_counter()
+            legacy = legacy_list(table, key, value)
+            legacy_ms = (time.perf_counter() - start) * 1000
+            legacy_rcu = estimate_read_units(table.calls, item_size)
+
+            table.calls.clear()
+            start = time.perf_counter()
+            current = set()
+            for page in list_all_pages(db, [SocaFilter(key=key, eq=value)], 20):
+                for permission in page:
+                    current.add(f"{permission.idea_session_id}/{permission.actor_name}")
+            current_ms = (time.perf_counter() - start) * 1000
+            current_rcu = estimate_read_units(table.calls, item_size)
+            operations = sorted({call["operation"] for call in table.calls})
+
+            print(
+                f"{BENCHMARK_ROW_COUNT} rows, {name}: scan {legacy_rcu:.1f} RCU {legacy_ms:.0f}ms, "
+                f"{'/'.join(operations)} {current_rcu:.1f} RCU {current_ms:.0f}ms"
+            )
+            assert current == legacy
+            assert len(current) > 0
+            assert all(operation.startswith("query") for operation in operations)
+            assert current_rcu * 100 < legacy_rcu
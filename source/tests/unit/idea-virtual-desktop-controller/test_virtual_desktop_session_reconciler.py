@@ -0,0 +1,448 @@
+#  Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance
+#  with the License. A copy of the License is located at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  or in the 'license' file accompanying this file. This file is distributed on an 'AS IS' BASIS, WITHOUT WARRANTIES
+#  OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions
+#  and limitations under the License.
+
+import math
+from typing import Any, Dict, List, Optional
+from unittest.mock import MagicMock
+
+import pytest
+from ideasdk.context import SocaContext, SocaContextOptions
+from ideatestutils import MockConfig
+from ideavirtualdesktopcontroller.app.clients.dcv_broker_client.dcv_broker_client import (
+    DCVBrokerClient,
+)
+from ideavirtualdesktopcontroller.app.sessions.virtual_desktop_session_reconciler import (
+    VirtualDesktopSessionReconciler,
+)
+from res.resources import session_permissions, sessions, vdi_management
+
+from ideadatamodel import (
+    VirtualDesktopServer,
+    VirtualDesktopSession,
+    VirtualDesktopSessionState,
+)
+
+BROKER_PAGE_SIZE = 100
+LEGACY_VISIBILITY_TIMEOUT_SECONDS = 30
+LAUNCHING_SESSION_COUNT = 1000
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class StubBroker:
+    """
+    DCV broker stub that reports a session as CREATING until its ready time and paginates describe sessions
+    """
+
+    def __init__(self, clock: FakeClock) -> None:
+        self.clock = clock
+        self.ready_at: Dict[str, float] = {}
+        self.states: Dict[str, str] = {}
+        self.describe_calls = 0
+
+    def describe_sessions_page(
+        self, session_ids: Optional[List[str]] = None, next_token: Optional[str] = None
+    ) -> Dict[str, Any]:
+        self.describe_calls += 1
+        session_ids = session_ids or []
+        start = int(next_token) if next_token else 0
+        page = session_ids[start : start + BROKER_PAGE_SIZE]
+        result = []
+        for session_id in page:
+            if session_id in self.states:
+                state = self.states[session_id]
+            elif session_id in self.ready_at:
+                state = (
+                    "READY"
+                    if self.clock.now >= self.ready_at[session_id]
+                    else "CREATING"
+                )
+            else:
+                continue
+            result.append({"id": session_id, "state": state})
+        end = start + BROKER_PAGE_SIZE
+        return {
+            "sessions": result,
+            "next_token": str(end) if end < len(session_ids) else None,
+        }
+
+    def client(self) -> DCVBrokerClient:
+        client = DCVBrokerClient.__new__(DCVBrokerClient)
+        client._describe_sessions = (  # type: ignore[method-assign]
+            lambda session_ids=None, next_token=None, tags=None, owner=None: self.describe_sessions_page(
+                session_ids, next_token
+            )
+        )
+        return client
+
+
+class StubSessionDB:
+    def __init__(self) -> None:
+        self.sessions: Dict[str, VirtualDesktopSession] = {}
+        self.update_calls = 0
+
+    def get_from_db(
+        self, idea_session_owner: str, idea_session_id: str
+    ) -> Optional[VirtualDesktopSession]:
+        session = self.sessions.get(idea_session_id)
+        if session is None:
+            return None
+        return session.copy(deep=True)
+
+    def update(self, session: VirtualDesktopSession) -> VirtualDesktopSession:
+        self.update_calls += 1
+        self.sessions[session.idea_session_id] = session.copy(deep=True)
+        return session
+
+    def list_all_in_states(
+        self, states: List[VirtualDesktopSessionState]
+    ) -> List[VirtualDesktopSession]:
+        return [
+            session.copy(deep=True)
+            for session in self.sessions.values()
+            if session.state in states
+        ]
+
+
+@pytest.fixture()
+def context() -> SocaContext:
+    return SocaContext(
+        options=SocaContextOptions(
+            cluster_name="idea-mock",
+            module_name="virtual-desktop-controller",
+            module_id="vdc",
+            module_set="default",
+            config=MockConfig().get_config(),
+        )
+    )
+
+
+@pytest.fixture()
+def clock() -> FakeClock:
+    return FakeClock()
+
+
+@pytest.fixture()
+def broker(clock: FakeClock) -> StubBroker:
+    return StubBroker(clock)
+
+
+@pytest.fixture()
+def session_db() -> StubSessionDB:
+    return StubSessionDB()
+
+
+@pytest.fixture()
+def reconciler(
+    context: SocaContext,
+    clock: FakeClock,
+    broker: StubBroker,
+    session_db: StubSessionDB,
+) -> VirtualDesktopSessionReconciler:
+    return VirtualDesktopSessionReconciler(
+        context=context,  # type: ignore[arg-type]
+        session_db=session_db,  # type: ignore[arg-type]
+        dcv_broker_client=broker.client(),
+        clock=clock,
+    )
+
+
+def create_session(
+    session_db: StubSessionDB,
+    index: int,
+    state: VirtualDesktopSessionState = VirtualDesktopSessionState.PROVISIONING,
+) -> VirtualDesktopSession:
+    session = VirtualDesktopSession(
+        idea_session_id=f"session-{index}",
+        dcv_session_id=f"dcv-{index}",
+        name=f"Session {index}",
+        owner=f"user{index}",
+        state=state,
+        hibernation_enabled=False,
+        server=VirtualDesktopServer(instance_id=f"i-{index:017d}"),
+    )
+    session_db.sessions[session.idea_session_id] = session
+    return session.copy(deep=True)
+
+
+def test_reconcile_applies_creation_transitions_in_bulk(
+    reconciler: VirtualDesktopSessionReconciler,
+    clock: FakeClock,
+    broker: StubBroker,
+    session_db: StubSessionDB,
+) -> None:
+    for index in range(3):
+        reconciler.track_creation(create_session(session_db, index))
+    broker.states["dcv-0"] = "READY"
+    broker.states["dcv-1"] = "CREATING"
+    broker.states["dcv-2"] = "UNKNOWN"
+
+    assert reconciler.reconcile() == 2
+    assert broker.describe_calls == 1
+    assert session_db.sessions["session-0"].state == VirtualDesktopSessionState.READY
+    assert (
+        session_db.sessions["session-1"].state
+        == VirtualDesktopSessionState.INITIALIZING
+    )
+    assert session_db.sessions["session-2"].state == VirtualDesktopSessionState.ERROR
+    assert reconciler.get_pending_count() == 1
+
+    # sessions that are still creating are not written again on subsequent ticks
+    reconciler.reconcile()
+    assert session_db.update_calls == 3
+
+    broker.states["dcv-1"] = "READY"
+    assert reconciler.reconcile() == 1
+    assert session_db.sessions["session-1"].state == VirtualDesktopSessionState.READY
+    assert reconciler.get_pending_count() == 0
+
+
+def test_reconcile_creation_timeouts(
+    reconciler: VirtualDesktopSessionReconciler,
+    clock: FakeClock,
+    broker: StubBroker,
+    session_db: StubSessionDB,
+) -> None:
+    reconciler.track_creation(create_session(session_db, 0))
+    reconciler.track_creation(create_session(session_db, 1))
+    broker.states["dcv-0"] = "DELETED"
+    broker.states["dcv-1"] = "CREATING"
+
+    reconciler.reconcile()
+    assert reconciler.get_pending_count() == 2
+
+    clock.now = reconciler.broker_deleted_grace_seconds + 1
+    reconciler.reconcile()
+    assert session_db.sessions["session-0"].state == VirtualDesktopSessionState.ERROR
+    assert reconciler.get_pending_count() == 1
+
+    clock.now = reconciler.validation_timeout_seconds + 1
+    reconciler.reconcile()
+    assert session_db.sessions["session-1"].state == VirtualDesktopSessionState.ERROR
+    assert reconciler.get_pending_count() == 0
+
+
+def test_reconcile_ignores_creation_of_session_being_deleted(
+    reconciler: VirtualDesktopSessionReconciler,
+    broker: StubBroker,
+    session_db: StubSessionDB,
+) -> None:
+    reconciler.track_creation(create_session(session_db, 0))
+    session_db.sessions["session-0"].state = VirtualDesktopSessionState.DELETING
+    broker.states["dcv-0"] = "READY"
+
+    assert reconciler.reconcile() == 1
+    assert session_db.sessions["session-0"].state == VirtualDesktopSessionState.DELETING
+    assert session_db.update_calls == 0
+
+
+def test_reconcile_continues_stop_and_delete(
+    reconciler: VirtualDesktopSessionReconciler,
+    broker: StubBroker,
+    session_db: StubSessionDB,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    for name in ("stop_servers", "terminate_servers", "delete_schedule_for_session"):
+        monkeypatch.setattr(vdi_management, name, MagicMock())
+    monkeypatch.setattr(
+        session_permissions, "delete_session_permission_by_id", MagicMock()
+    )
+    monkeypatch.setattr(sessions, "delete_session", MagicMock())
+
+    reconciler.track_creation(create_session(session_db, 0))
+    # a deletion replaces the creation that is still being validated
+    reconciler.track_deletion(
+        create_session(session_db, 0, VirtualDesktopSessionState.DELETING)
+    )
+    reconciler.track_deletion(
+        create_session(session_db, 1, VirtualDesktopSessionState.STOPPING)
+    )
+    reconciler.track_deletion(
+        create_session(session_db, 2, VirtualDesktopSessionState.STOPPING)
+    )
+    broker.states["dcv-0"] = "DELETED"
+    broker.states["dcv-2"] = "DELETING"
+
+    assert reconciler.reconcile() == 2
+    assert broker.describe_calls == 1
+    vdi_management.terminate_servers.assert_called_once()  # type: ignore[attr-defined]
+    sessions.delete_session.assert_called_once()  # type: ignore[attr-defined]
+    vdi_management.stop_servers.assert_called_once()  # type: ignore[attr-defined]
+    assert reconciler.is_tracked("session-2")
+
+
+def test_recover_pending_after_restart(
+    reconciler: VirtualDesktopSessionReconciler,
+    broker: StubBroker,
+    session_db: StubSessionDB,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(vdi_management, "stop_servers", MagicMock())
+    # validations tracked by a controller that was killed before re-publishing them
+    create_session(session_db, 0, VirtualDesktopSessionState.INITIALIZING)
+    create_session(session_db, 1, VirtualDesktopSessionState.STOPPING)
+    create_session(session_db, 2, VirtualDesktopSessionState.READY)
+    session_db.sessions["session-3"] = create_session(
+        session_db, 3, VirtualDesktopSessionState.STOPPING
+    ).copy(update={"dcv_session_id": None})
+    reconciler.track_creation(session_db.sessions["session-0"])
+
+    assert reconciler.recover_pending() == 1
+    assert reconciler.is_tracked("session-0")
+    assert reconciler.is_tracked("session-1")
+    assert not reconciler.is_tracked("session-2")
+    assert not reconciler.is_tracked("session-3")
+
+    broker.states["dcv-0"] = "READY"
+    broker.states["dcv-1"] = "DELETED"
+    assert reconciler.reconcile() == 2
+    assert session_db.sessions["session-0"].state == VirtualDesktopSessionState.READY
+    vdi_management.stop_servers.assert_called_once()  # type: ignore[attr-defined]
+
+
+def test_only_the_leader_recovers_pending_sessions(
+    reconciler: VirtualDesktopSessionReconciler,
+    context: SocaContext,
+    session_db: StubSessionDB,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    is_leader = False
+    monkeypatch.setattr(context, "is_leader", lambda: is_leader)
+    create_session(session_db, 0, VirtualDesktopSessionState.INITIALIZING)
+    create_session(session_db, 1, VirtualDesktopSessionState.DELETING)
+
+    reconciler.recover_pending_if_leader()
+    assert reconciler.get_pending_count() == 0
+
+    is_leader = True
+    reconciler.recover_pending_if_leader()
+    assert reconciler.get_pending_count() == 2
+    # a validation event for a recovered session is kept when leadership is lost
+    reconciler.track_deletion(session_db.sessions["session-1"])
+
+    is_leader = False
+    reconciler.recover_pending_if_leader()
+    assert not reconciler.is_tracked("session-0")
+    assert reconciler.is_tracked("session-1")
+
+
+def test_describe_sessions_follows_next_token(
+    clock: FakeClock, broker: StubBroker, session_db: StubSessionDB
+) -> None:
+    session_list = [create_session(session_db, index) for index in range(250)]
+    for session in session_list:
+        broker.states[session.dcv_session_id] = "READY"  # type: ignore[index]
+
+    response = broker.client().describe_sessions(session_list)
+    assert len(response["sessions"]) == 250
+    assert broker.describe_calls == 3
+
+
+def simulate_legacy_validation(
+    clock: FakeClock, broker: StubBroker, session_list: List[VirtualDesktopSession]
+) -> Dict[str, float]:
+    """
+    per-session validation: every redelivery of the validation message describes a single session
+    and increments its counter in the db, until the session is READY.
+    """
+    client = broker.client()
+    db_writes = 0
+    time_to_ready = []
+    for session in session_list:
+        clock.now = 0.0
+        while True:
+            response = client.describe_sessions([session])
+            state = response["sessions"][session.dcv_session_id]["state"]
+            if state == "READY":
+                # session READY + counter delete
+                db_writes += 2
+                time_to_ready.append(clock.now)
+                break
+            # counter update, plus the INITIALIZING update on the first retry
+            db_writes += 2 if clock.now == 0 else 1
+            clock.now += LEGACY_VISIBILITY_TIMEOUT_SECONDS
+    return {
+        "broker_calls": broker.describe_calls,
+        "db_writes": db_writes,
+        "mean_time_to_ready": sum(time_to_ready) / len(time_to_ready),
+        "max_time_to_ready": max(time_to_ready),
+    }
+
+
+def simulate_reconciler(
+    reconciler: VirtualDesktopSessionReconciler,
+    clock: FakeClock,
+    broker: StubBroker,
+    session_db: StubSessionDB,
+    session_list: List[VirtualDesktopSession],
+) -> Dict[str, float]:
+    clock.now = 0.0
+    for session in session_list:
+        reconciler.track_creation(session)
+    time_to_ready = []
+    while reconciler.get_pending_count() > 0:
+        completed = reconciler.reconcile()
+        time_to_ready.extend([clock.now] * completed)
+        clock.now += reconciler.interval_seconds
+    return {
+        "broker_calls": broker.describe_calls,
+        "db_writes": session_db.update_calls,
+        "mean_time_to_ready": sum(time_to_ready) / len(time_to_ready),
+        "max_time_to_ready": max(time_to_ready),
+    }
+
+
+def test_reconciler_with_1000_launching_sessions(
+    context: SocaContext,
+) -> None:
+    def launch() -> Any:
+        clock = FakeClock()
+        broker = StubBroker(clock)
+        session_db = StubSessionDB()
+        session_list = []
+        for index in range(LAUNCHING_SESSION_COUNT):
+            session_list.append(create_session(session_db, index))
+            # sessions become READY on the broker between 1 and 4 minutes after launch
+            broker.ready_at[f"dcv-{index}"] = 60 + (index * 7) % 180
+        return clock, broker, session_db, session_list
+
+    clock, broker, session_db, session_list = launch()
+    legacy = simulate_legacy_validation(clock, broker, session_list)
+
+    clock, broker, session_db, session_list = launch()
+    reconciler = VirtualDesktopSessionReconciler(
+        context=context,  # type: ignore[arg-type]
+        session_db=session_db,  # type: ignore[arg-type]
+        dcv_broker_client=broker.client(),
+        clock=clock,
+    )
+    current = simulate_reconciler(reconciler, clock, broker, session_db, session_list)
+
+    assert all(
+        session.state == VirtualDesktopSessionState.READY
+        for session in session_db.sessions.values()
+    )
+    # one paginated call per tick for at most all launching sessions
+    max_ticks = (
+        math.ceil(current["max_time_to_ready"] / reconciler.interval_seconds) + 1
+    )
+    assert current["broker_calls"] <= max_ticks * math.ceil(
+        LAUNCHING_SESSION_COUNT / BROKER_PAGE_SIZE
+    )
+    assert current["broker_calls"] * 10 < legacy["broker_calls"]
+    assert current["db_writes"] < legacy["db_writes"]
+    assert current["mean_time_to_ready"] < legacy["mean_time_to_ready"]
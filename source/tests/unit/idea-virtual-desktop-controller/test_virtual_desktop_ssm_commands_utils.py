@@ -0,0 +1,275 @@
+#  Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance
+#  with the License. A copy of the License is located at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  or in the 'license' file accompanying this file. This file is distributed on an 'AS IS' BASIS, WITHOUT WARRANTIES
+#  OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions
+#  and limitations under the License.
+
+"""
+Test Cases for VirtualDesktopSSMCommandsUtils bulk dispatch
+"""
+
+from typing import Any, Dict, Iterator, List
+
+import boto3
+import botocore.exceptions
+import pytest
+from ideasdk.context import SocaContext, SocaContextOptions
+from ideasdk.utils import Utils
+from ideatestutils import MockConfig
+from ideavirtualdesktopcontroller.app.events.service.controller_queue_monitor_service import (
+    ControllerQueueMonitorService,
+)
+from ideavirtualdesktopcontroller.app.ssm_commands.virtual_desktop_ssm_commands_db import (
+    VirtualDesktopSSMCommandsDB,
+    VirtualDesktopSSMCommandType,
+)
+from ideavirtualdesktopcontroller.app.ssm_commands.virtual_desktop_ssm_commands_utils import (
+    MAX_INSTANCES_PER_SSM_COMMAND,
+    VirtualDesktopSSMCommandsUtils,
+)
+from moto import mock_aws
+
+from ideadatamodel import (
+    VirtualDesktopBaseOS,
+    VirtualDesktopServer,
+    VirtualDesktopSession,
+)
+
+LINUX_SESSION_COUNT = 120
+WINDOWS_SESSION_COUNT = 30
+
+
+class RecordingSSMClient:
+    """
+    wraps the SSM stand-in to record the SendCommand calls
+    """
+
+    def __init__(self, client: Any) -> None:
+        self.client = client
+        self.send_command_calls: List[Dict[str, Any]] = []
+        self.fail_document_name = None
+
+    def send_command(self, **kwargs: Any) -> Dict[str, Any]:
+        self.send_command_calls.append(kwargs)
+        if kwargs["DocumentName"] == self.fail_document_name:
+            raise botocore.exceptions.ClientError(
+                {"Error": {"Code": "ThrottlingException", "Message": "Rate exceeded"}},
+                "SendCommand",
+            )
+        return self.client.send_command(**kwargs)
+
+
+class RecordingEventsUtils:
+    def __init__(self) -> None:
+        self.events: List[Dict[str, Any]] = []
+
+    def publish_idea_session_cpu_utilization_command_status_event(
+        self, **kwargs: Any
+    ) -> None:
+        self.events.append(kwargs)
+
+
+def build_session(index: int, base_os: VirtualDesktopBaseOS) -> VirtualDesktopSession:
+    return VirtualDesktopSession(
+        idea_session_id=f"session-{index:04d}",
+        owner=f"user{index % 10}",
+        base_os=base_os,
+        server=VirtualDesktopServer(instance_id=f"i-{index:017x}"),
+    )
+
+
+@pytest.fixture()
+def context() -> SocaContext:
+    context = SocaContext(
+        options=SocaContextOptions(
+            cluster_name="idea-mock",
+            module_name="virtual-desktop-controller",
+            module_id="vdc",
+            module_set="default",
+            config=MockConfig().get_config(),
+        )
+    )
+    context.config().put(
+        "virtual-desktop-controller.ssm_commands_pass_role_arn",
+        "arn:aws:iam::123456789012:role/ssm-commands",
+    )
+    context.config().put(
+        "virtual-desktop-controller.ssm_commands_sns_topic_arn",
+        "arn:aws:sns:us-east-1:123456789012:ssm-commands",
+    )
+    return context
+
+
+@pytest.fixture()
+def ssm_commands_db(context: SocaContext) -> Iterator[VirtualDesktopSSMCommandsDB]:
+    with mock_aws():
+        dynamodb = boto3.resource("dynamodb", region_name="us-east-1")
+        table = dynamodb.create_table(
+            TableName="ssm-commands",
+            KeySchema=[{"AttributeName": "command_id", "KeyType": "HASH"}],
+            AttributeDefinitions=[
+                {"AttributeName": "command_id", "AttributeType": "S"}
+            ],
+            BillingMode="PAY_PER_REQUEST",
+        )
+        db = VirtualDesktopSSMCommandsDB.__new__(VirtualDesktopSSMCommandsDB)
+        db.context = context  # type: ignore[assignment]
+        db._logger = context.logger("virtual-desktop-ssm-commands-db")
+        db._table_obj = table
+        yield db
+
+
+@pytest.fixture()
+def ssm_client(ssm_commands_db: VirtualDesktopSSMCommandsDB) -> RecordingSSMClient:
+    return RecordingSSMClient(boto3.client("ssm", region_name="us-east-1"))
+
+
+@pytest.fixture()
+def ssm_commands_utils(
+    context: SocaContext,
+    ssm_commands_db: VirtualDesktopSSMCommandsDB,
+    ssm_client: RecordingSSMClient,
+) -> VirtualDesktopSSMCommandsUtils:
+    utils = VirtualDesktopSSMCommandsUtils.__new__(VirtualDesktopSSMCommandsUtils)
+    utils.context = context  # type: ignore[assignment]
+    utils._logger = context.logger("virtual-desktop-ssm-commands-utils")
+    utils._ssm_commands_db = ssm_commands_db
+    utils._ssm_client = ssm_client
+    return utils
+
+
+@pytest.fixture()
+def sessions() -> List[VirtualDesktopSession]:
+    return [
+        build_session(index, VirtualDesktopBaseOS.AMAZON_LINUX2)
+        for index in range(LINUX_SESSION_COUNT)
+    ] + [
+        build_session(index, VirtualDesktopBaseOS.WINDOWS)
+        for index in range(
+            LINUX_SESSION_COUNT, LINUX_SESSION_COUNT + WINDOWS_SESSION_COUNT
+        )
+    ]
+
+
+def test_bulk_dispatch_groups_instances_per_document(
+    ssm_commands_utils: VirtualDesktopSSMCommandsUtils,
+    ssm_commands_db: VirtualDesktopSSMCommandsDB,
+    ssm_client: RecordingSSMClient,
+    sessions: List[VirtualDesktopSession],
+) -> None:
+    submitted, failed = ssm_commands_utils.submit_ssm_commands_to_get_cpu_utilization(
+        sessions
+    )
+
+    assert failed == {}
+    assert len(submitted) == len(sessions)
+    # 120 linux sessions in 3 commands, 30 windows sessions in 1 command
+    assert [
+        (call["DocumentName"], len(call["InstanceIds"]))
+        for call in ssm_client.send_command_calls
+    ] == [
+        ("AWS-RunShellScript", MAX_INSTANCES_PER_SSM_COMMAND),
+        ("AWS-RunShellScript", MAX_INSTANCES_PER_SSM_COMMAND),
+        ("AWS-RunShellScript", 20),
+        ("AWS-RunPowerShellScript", WINDOWS_SESSION_COUNT),
+    ]
+
+    command_ids = set(submitted.values())
+    assert len(command_ids) == 4
+    for command_id in command_ids:
+        command = ssm_commands_db._table.get_item(Key={"command_id": command_id})[
+            "Item"
+        ]
+        assert (
+            command["command_type"]
+            == VirtualDesktopSSMCommandType.CPU_UTILIZATION_CHECK_STOP_SCHEDULED_SESSION
+        )
+        for instance_id, instance in command["additional_payload"]["instances"].items():
+            assert submitted[instance_id] == command_id
+            assert instance["instance_id"] == instance_id
+            assert instance["status"] == "Pending"
+
+
+def test_bulk_dispatch_reports_failed_instances(
+    ssm_commands_utils: VirtualDesktopSSMCommandsUtils,
+    ssm_client: RecordingSSMClient,
+    sessions: List[VirtualDesktopSession],
+) -> None:
+    ssm_client.fail_document_name = "AWS-RunPowerShellScript"
+
+    submitted, failed = ssm_commands_utils.submit_ssm_commands_to_get_cpu_utilization(
+        sessions + sessions[:5]
+    )
+
+    assert len(submitted) == LINUX_SESSION_COUNT
+    assert len(failed) == WINDOWS_SESSION_COUNT
+    assert all("Rate exceeded" in reason for reason in failed.values())
+    # duplicate targets are sent once
+    assert len(ssm_client.send_command_calls) == 4
+
+
+def test_progress_events_are_fanned_out_per_session(
+    context: SocaContext,
+    ssm_commands_utils: VirtualDesktopSSMCommandsUtils,
+    ssm_commands_db: VirtualDesktopSSMCommandsDB,
+    sessions: List[VirtualDesktopSession],
+) -> None:
+    submitted, _ = ssm_commands_utils.submit_ssm_commands_to_get_cpu_utilization(
+        sessions[:3]
+    )
+    command_id = submitted[sessions[0].server.instance_id]
+
+    events_utils = RecordingEventsUtils()
+    monitor = ControllerQueueMonitorService.__new__(ControllerQueueMonitorService)
+    monitor._logger = context.logger("controller-q-monitor-service")
+    monitor._ssm_commands_db = ssm_commands_db
+    monitor._events_utils = events_utils
+
+    for session, status in zip(sessions[:3], ["Success", "Failed", "InProgress"]):
+        monitor._handle_ssm_commands(
+            "message-id",
+            {
+                "Message": Utils.to_json(
+                    {
+                        "commandId": command_id,
+                        "instanceId": session.server.instance_id,
+                        "status": status,
+                    }
+                )
+            },
+        )
+    # notification for an instance not part of the command
+    monitor._handle_ssm_commands(
+        "message-id",
+        {
+            "Message": Utils.to_json(
+                {
+                    "commandId": command_id,
+                    "instanceId": "i-unknown",
+                    "status": "Success",
+                }
+            )
+        },
+    )
+
+    assert [
+        (event["idea_session_id"], event["idea_session_owner"], event["status"])
+        for event in events_utils.events
+    ] == [
+        (sessions[0].idea_session_id, sessions[0].owner, "Success"),
+        (sessions[1].idea_session_id, sessions[1].owner, "Failed"),
+        (sessions[2].idea_session_id, sessions[2].owner, "InProgress"),
+    ]
+    assert all(event["command_id"] == command_id for event in events_utils.events)
+
+    instances = ssm_commands_db._table.get_item(Key={"command_id": command_id})["Item"][
+        "additional_payload"
+    ]["instances"]
+    assert instances[sessions[0].server.instance_id]["status"] == "Success"
+    assert instances[sessions[1].server.instance_id]["status"] == "Failed"
+    assert instances[sessions[2].server.instance_id]["status"] == "InProgress"
@@ -2,7 +2,8 @@ import base64
 import json
 import os
 import typing
-from typing import Any, Generator, Optional
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Generator, Optional
 from unittest.mock import MagicMock, Mock, patch
 
 import jwt
@@ -38,6 +39,13 @@ mock_group_data = [
 ]
 
 
+@pytest.fixture(autouse=True)
+def clear_proxy_caches() -> Generator:  # type: ignore
+    proxy_handler.clear_caches()
+    yield
+    proxy_handler.clear_caches()
+
+
 @pytest.fixture(params=(None, "error"), ids=("success", "error"))
 def error(request: pytest.FixtureRequest) -> Optional[str]:
     value = getattr(request, "param")
@@ -481,3 +489,140 @@ def test_get_sanitized_response() -> None:
         "headers": {"Content-Type": "application/json"},
         "body": '{"test": "value"}',
     }
+
+
+def test_ttl_cache_expires_entries(monkeypatch: pytest.MonkeyPatch) -> None:
+    now = [1000.0]
+    monkeypatch.setattr("time.monotonic", lambda: now[0])
+    cache = proxy_handler.TTLCache(ttl_seconds=10)
+
+    cache.put("key", "value")
+    cache.put("short", None, ttl_seconds=1)
+    assert cache.get("key") == "value"
+    assert cache.contains("short")
+
+    now[0] += 5
+    assert cache.get("key") == "value"
+    assert not cache.contains("short")
+
+    now[0] += 5
+    assert cache.get("key") is None
+
+
+def test_get_all_admin_groups_refreshes_after_ttl(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    now = [1000.0]
+    monkeypatch.setattr("time.monotonic", lambda: now[0])
+    scan_admin_groups = MagicMock(return_value=["group2"])
+    monkeypatch.setattr(proxy_handler, "scan_admin_groups", scan_admin_groups)
+
+    assert proxy_handler.get_all_admin_groups() == ["group2"]
+    assert proxy_handler.get_all_admin_groups() == ["group2"]
+    assert scan_admin_groups.call_count == 1
+
+    now[0] += proxy_handler.ADMIN_GROUPS_CACHE_TTL_SECONDS
+    assert proxy_handler.get_all_admin_groups() == ["group2"]
+    assert scan_admin_groups.call_count == 2
+
+
+def test_scan_admin_groups_paginates(monkeypatch: pytest.MonkeyPatch) -> None:
+    groups_table = MagicMock()
+    groups_table.scan.side_effect = [
+        {
+            "Items": [{"group_name": "group1", "role": "user"}],
+            "LastEvaluatedKey": {"group_name": "group1"},
+        },
+        {"Items": [{"group_name": "group2", "role": "admin"}]},
+    ]
+    dynamodb = MagicMock()
+    dynamodb.Table.return_value = groups_table
+    monkeypatch.setattr("boto3.resource", lambda _: dynamodb)
+
+    assert proxy_handler.scan_admin_groups() == ["group2"]
+    groups_table.scan.assert_called_with(ExclusiveStartKey={"group_name": "group1"})
+
+
+def test_handle_proxy_event_reuses_downstream_calls_in_warm_container(
+    monkeypatch: pytest.MonkeyPatch, lambda_context: Context
+) -> None:
+    """
+    Harness: invoke the handler many times in one process, as a warm Lambda container would,
+    and count the calls that leave the process.
+    """
+    invocations = 10_000
+    monkeypatch.setenv("COGNITO_USER_POOL_PROVIDER_URL", "https://example.com/userpool")
+
+    jwk_client = MagicMock()
+    jwk_client.get_signing_key_from_jwt.return_value = Mock(key="mock_signing_key")
+    jwk_client_class = MagicMock(return_value=jwk_client)
+    monkeypatch.setattr(proxy_handler, "PyJWKClient", jwk_client_class)
+
+    tables: Dict[str, MagicMock] = {
+        "mock_users_table": MagicMock(),
+        "mock_groups_table": MagicMock(),
+        "mock_cluster_settings_table": MagicMock(),
+    }
+    tables["mock_users_table"].get_item.return_value = {"Item": mock_user_data}
+    tables["mock_groups_table"].scan.return_value = {
+        "Items": [
+            {"group_name": "group1", "role": "user"},
+            {"group_name": "group2", "role": "admin"},
+        ]
+    }
+    tables["mock_cluster_settings_table"].get_item.return_value = {}
+    dynamodb = MagicMock()
+    dynamodb.Table.side_effect = lambda name: tables[name]
+    boto3_resource = MagicMock(return_value=dynamodb)
+    monkeypatch.setattr("boto3.resource", boto3_resource)
+
+    expiry_time = (datetime.now(timezone.utc) + timedelta(hours=1)).isoformat()
+    credential_fetcher = MagicMock()
+    credential_fetcher.fetch_credentials.return_value = {
+        "access_key": "access_key",
+        "secret_key": "secret_key",
+        "token": "token",
+        "expiry_time": expiry_time,
+    }
+    credential_fetcher_class = MagicMock(return_value=credential_fetcher)
+    monkeypatch.setattr(
+        "botocore.credentials.AssumeRoleCredentialFetcher", credential_fetcher_class
+    )
+    monkeypatch.setattr("boto3.session.Session", MagicMock())
+
+    aws_requests = MagicMock(
+        return_value=MockResponse(200, '{"test": "value"}', "Okay", {})
+    )
+    monkeypatch.setattr("requests.request", aws_requests)
+    monkeypatch.setattr(proxy_handler, "write_audit_log", MagicMock())
+    monkeypatch.setattr("jwt.decode", MagicMock(return_value={"username": "test_user"}))
+
+    jwt_token = jwt.encode(
+        {"username": "test_user"},
+        "mock_signing_key",
+        algorithm="HS256",
+        headers={"kid": "mock-kid"},
+    )
+    for _ in range(invocations):
+        response = proxy_handler.handle_proxy_event(
+            {
+                "path": "/awsproxy/budgets",
+                "httpMethod": "POST",
+                "body": json.dumps({"AccountId": "123456789012"}),
+                "headers": {"authorization": f"Bearer {jwt_token}"},
+                "queryStringParameters": {},
+            },
+            lambda_context,
+        )
+        assert response["statusCode"] == 200
+
+    assert aws_requests.call_count == invocations
+    # the user record is always read to pick up enabled/active changes
+    assert tables["mock_users_table"].get_item.call_count == invocations
+    assert jwk_client_class.call_count == 1
+    assert jwk_client.get_signing_key_from_jwt.call_count == 1
+    assert boto3_resource.call_count == 1
+    assert tables["mock_groups_table"].scan.call_count == 1
+    assert tables["mock_cluster_settings_table"].get_item.call_count == 1
+    assert credential_fetcher_class.call_count == 1
+    assert credential_fetcher.fetch_credentials.call_count == 1
@@ -612,6 +612,16 @@ def test_vdc_session_permission_table_creation(
                     },
                 ],
                 "Tags": vdc_tags,
+                "GlobalSecondaryIndexes": [
+                    {
+                        "IndexName": "actor-index",
+                        "KeySchema": [
+                            {"AttributeName": "actor_name", "KeyType": "HASH"},
+                            {"AttributeName": "idea_session_id", "KeyType": "RANGE"},
+                        ],
+                        "Projection": {"ProjectionType": "ALL"},
+                    }
+                ],
             },
         },
     )
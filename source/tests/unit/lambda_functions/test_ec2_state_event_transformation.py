@@ -0,0 +1,219 @@
+#  Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance
+#  with the License. A copy of the License is located at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  or in the 'license' file accompanying this file. This file is distributed on an 'AS IS' BASIS, WITHOUT WARRANTIES
+#  OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions
+#  and limitations under the License.
+
+"""
+Test Cases for the EC2 state event transformation lambda, with a harness replaying the state changes of a fleet
+"""
+
+import json
+from typing import Any, Dict, List, Optional
+from unittest.mock import patch
+
+import pytest
+
+with patch("boto3.client"):
+    from lambda_functions.idea_ec2_state_event_transformation_lambda import (
+        handler as transformer,
+    )
+
+CLUSTER_NAME = "idea-mock"
+FLEET_SIZE = 1000
+# a stop and a start of each desktop of the fleet
+TRANSITIONS = ["stopping", "stopped", "pending", "running", "stopping"]
+OTHER_CLUSTER_INSTANCE = "i-other"
+
+
+def instance_id(index: int) -> str:
+    return f"i-{index:017x}"
+
+
+def state_change_event(instance: str, state: str) -> Dict[str, Any]:
+    return {
+        "detail-type": "EC2 Instance State-change Notification",
+        "source": "aws.ec2",
+        "detail": {"instance-id": instance, "state": state},
+    }
+
+
+class StubEC2Client:
+    def __init__(self, instances: Dict[str, Dict[str, str]]) -> None:
+        self.instances = instances
+        self.describe_instances_calls = 0
+
+    def describe_instances(
+        self,
+        Filters: List[Dict[str, Any]],
+        MaxResults: int,
+        NextToken: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        self.describe_instances_calls += 1
+        assert len(Filters[0]["Values"]) <= 200
+        return {
+            "Reservations": [
+                {
+                    "Instances": [
+                        {
+                            "InstanceId": instance,
+                            "Tags": [
+                                {"Key": key, "Value": value}
+                                for key, value in self.instances[instance].items()
+                            ],
+                        }
+                        for instance in Filters[0]["Values"]
+                        if instance in self.instances
+                    ]
+                }
+            ]
+        }
+
+
+class StubSNSClient:
+    def __init__(self) -> None:
+        self.publish_batch_calls = 0
+        self.messages: List[Dict[str, Any]] = []
+
+    def publish_batch(
+        self, TopicArn: str, PublishBatchRequestEntries: List[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        self.publish_batch_calls += 1
+        assert len(PublishBatchRequestEntries) <= 10
+        assert len({entry["Id"] for entry in PublishBatchRequestEntries}) == len(
+            PublishBatchRequestEntries
+        )
+        self.messages += PublishBatchRequestEntries
+        return {
+            "Successful": [{"Id": entry["Id"]} for entry in PublishBatchRequestEntries],
+            "Failed": [],
+        }
+
+
+@pytest.fixture
+def clients(monkeypatch: Any) -> Dict[str, Any]:
+    monkeypatch.setenv("IDEA_CLUSTER_NAME_TAG_KEY", "res:EnvironmentName")
+    monkeypatch.setenv("IDEA_CLUSTER_NAME_TAG_VALUE", CLUSTER_NAME)
+    monkeypatch.setenv("IDEA_TAG_PREFIX", "res:")
+    monkeypatch.setenv(
+        "IDEA_EC2_STATE_SNS_TOPIC_ARN",
+        "arn:aws:sns:us-east-1:123456789012:ec2-state-change",
+    )
+    instances = {
+        instance_id(index): {
+            "res:EnvironmentName": CLUSTER_NAME,
+            "res:ModuleId": "vdc",
+            "Name": f"desktop-{index}",
+        }
+        for index in range(FLEET_SIZE)
+    }
+    instances[OTHER_CLUSTER_INSTANCE] = {"res:EnvironmentName": "other"}
+    ec2_client = StubEC2Client(instances)
+    sns_client = StubSNSClient()
+    monkeypatch.setattr(transformer, "ec2_client", ec2_client)
+    monkeypatch.setattr(transformer, "sns_client", sns_client)
+    transformer.tag_cache.clear()
+    yield {"ec2": ec2_client, "sns": sns_client}
+    transformer.tag_cache.clear()
+
+
+def replay_events() -> List[Dict[str, Any]]:
+    return [
+        state_change_event(instance_id(index), state)
+        for state in TRANSITIONS
+        for index in range(FLEET_SIZE)
+    ]
+
+
+def test_forwarded_event(clients: Dict[str, Any]) -> None:
+    transformer.handler(state_change_event(instance_id(1), "running"), None)
+    transformer.handler(state_change_event(OTHER_CLUSTER_INSTANCE, "running"), None)
+    transformer.handler({"detail-type": "AWS API Call via CloudTrail"}, None)
+
+    assert len(clients["sns"].messages) == 1
+    entry = clients["sns"].messages[0]
+    assert entry["MessageStructure"] == "json"
+    assert entry["MessageAttributes"] == {
+        "res_EnvironmentName": {"DataType": "String", "StringValue": CLUSTER_NAME},
+        "res_ModuleId": {"DataType": "String", "StringValue": "vdc"},
+    }
+    forwarding_event = json.loads(json.loads(entry["Message"])["default"])
+    assert forwarding_event == {
+        "header": {"namespace": "Ec2.StateChangeEvent", "request_id": instance_id(1)},
+        "payload": {
+            "instance-id": instance_id(1),
+            "state": "running",
+            "tags": {"res:EnvironmentName": CLUSTER_NAME, "res:ModuleId": "vdc"},
+        },
+    }
+
+
+def test_tags_are_cached_until_terminated(clients: Dict[str, Any]) -> None:
+    for state in ["pending", "running", "stopping", "stopped"]:
+        transformer.handler(state_change_event(instance_id(1), state), None)
+    assert clients["ec2"].describe_instances_calls == 1
+
+    transformer.handler(state_change_event(instance_id(1), "terminated"), None)
+    assert instance_id(1) not in transformer.tag_cache
+    assert clients["ec2"].describe_instances_calls == 1
+    assert len(clients["sns"].messages) == 5
+
+
+def test_instances_not_found_are_not_cached(clients: Dict[str, Any]) -> None:
+    new_instance = instance_id(FLEET_SIZE)
+    # DescribeInstances does not return the new instance yet at pending
+    transformer.handler(state_change_event(new_instance, "pending"), None)
+    assert new_instance not in transformer.tag_cache
+    assert len(clients["sns"].messages) == 0
+
+    clients["ec2"].instances[new_instance] = {"res:EnvironmentName": CLUSTER_NAME}
+    transformer.handler(state_change_event(new_instance, "running"), None)
+    assert clients["ec2"].describe_instances_calls == 2
+    assert len(clients["sns"].messages) == 1
+
+
+def test_expired_tags_are_read_again(clients: Dict[str, Any]) -> None:
+    transformer.handler(state_change_event(instance_id(1), "pending"), None)
+    cached_at, tags = transformer.tag_cache[instance_id(1)]
+    transformer.tag_cache[instance_id(1)] = (
+        cached_at - transformer.TAG_CACHE_TTL_SECONDS - 1,
+        tags,
+    )
+
+    transformer.handler(state_change_event(instance_id(1), "running"), None)
+    assert clients["ec2"].describe_instances_calls == 2
+
+
+def test_replay_single_events(clients: Dict[str, Any]) -> None:
+    events = replay_events()
+    for event in events:
+        transformer.handler(event, None)
+
+    # one DescribeInstances per instance instead of one per event
+    assert clients["ec2"].describe_instances_calls == FLEET_SIZE
+    assert len(clients["sns"].messages) == len(events)
+
+
+@pytest.mark.parametrize("batch_size", [10, 100])
+def test_replay_batched_events(clients: Dict[str, Any], batch_size: int) -> None:
+    events = replay_events() + [state_change_event(OTHER_CLUSTER_INSTANCE, "running")]
+    for start in range(0, len(events), batch_size):
+        batch = events[start : start + batch_size]
+        if batch_size == 10:
+            # SQS batch
+            transformer.handler(
+                {"Records": [{"body": json.dumps(event)} for event in batch]}, None
+            )
+        else:
+            transformer.handler(batch, None)
+
+    # the first transition of the fleet is described in batches
+    assert clients["ec2"].describe_instances_calls == FLEET_SIZE // batch_size + 1
+    # the event of the other cluster is not forwarded
+    assert clients["sns"].publish_batch_calls == (len(events) - 1) // 10
+    assert len(clients["sns"].messages) == len(events) - 1
@@ -1,8 +1,109 @@
 import json
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
 from unittest.mock import MagicMock, patch
 
+import pytest
+from lambda_functions.res_custom_credential_broker.cache import TTLCache
+from lambda_functions.res_custom_credential_broker.object_storage_model import (
+    ObjectStorageModel,
+)
 from lambda_functions.res_custom_credential_broker.utils import Utils
 
+with patch("boto3.resource"):
+    from lambda_functions.res_custom_credential_broker import (
+        handler as credential_broker,
+    )
+
+INSTANCE_ID = "i-1234567890abcdef0"
+PRIVATE_IP_ADDRESS = "192.168.1.1"
+FILESYSTEM_NAME = "myfilesystem"
+STORAGE_PROVIDER_S3_BUCKET = "s3_bucket"
+# simulated round trip of a DynamoDB, EC2 or STS call
+STUB_CLIENT_LATENCY_SECONDS = 0.002
+
+
+def credential_broker_event(source_ip: str = PRIVATE_IP_ADDRESS) -> dict:
+    return {
+        "requestContext": {
+            "identity": {
+                "userArn": f"arn:aws:sts::123456789012:assumed-role/MyRole/{INSTANCE_ID}",
+                "sourceIp": source_ip,
+            }
+        },
+        "queryStringParameters": {"filesystemName": FILESYSTEM_NAME},
+    }
+
+
+def with_latency(return_value=None, side_effect=None) -> MagicMock:
+    def _call(*args, **kwargs):
+        time.sleep(STUB_CLIENT_LATENCY_SECONDS)
+        if side_effect is not None:
+            return side_effect(*args, **kwargs)
+        return return_value
+
+    return MagicMock(side_effect=_call)
+
+
+@pytest.fixture
+def stub_clients(monkeypatch):
+    credential_broker.instance_context_cache.clear()
+    credential_broker.credentials_cache.clear()
+    monkeypatch.setattr(
+        credential_broker, "STORAGE_PROVIDER_S3_BUCKET", STORAGE_PROVIDER_S3_BUCKET
+    )
+
+    vdc_server_db = MagicMock()
+    vdc_server_db.get_owner_id_and_session_id = with_latency(
+        {"owner_id": "owner", "session_id": "session"}
+    )
+    vdc_user_session_db = MagicMock()
+    vdc_user_session_db.get_project_id = with_latency("project")
+    shared_storage_db = MagicMock()
+    shared_storage_db.get_object_storage_model = with_latency(
+        ObjectStorageModel(
+            filesystem_name=FILESYSTEM_NAME,
+            projects=["project"],
+            read_only=True,
+            bucket_arn="arn:aws:s3:::mybucket/myprefix",
+            provider=STORAGE_PROVIDER_S3_BUCKET,
+        )
+    )
+    monkeypatch.setattr(credential_broker, "vdc_server_db", vdc_server_db)
+    monkeypatch.setattr(credential_broker, "vdc_user_session_db", vdc_user_session_db)
+    monkeypatch.setattr(credential_broker, "shared_storage_db", shared_storage_db)
+
+    ec2_client = MagicMock()
+    ec2_client.describe_instances = with_latency(
+        {"Reservations": [{"Instances": [{"PrivateIpAddress": PRIVATE_IP_ADDRESS}]}]}
+    )
+    sts_client = MagicMock()
+    sts_client.assume_role = with_latency(
+        side_effect=lambda **_: {
+            "Credentials": {
+                "AccessKeyId": "AKIA...",
+                "SecretAccessKey": "secret",
+                "SessionToken": "token",
+                "Expiration": datetime.now(timezone.utc) + timedelta(hours=1),
+            }
+        }
+    )
+    monkeypatch.setattr(
+        "boto3.client", lambda name: ec2_client if name == "ec2" else sts_client
+    )
+
+    yield {
+        "vdc_server_db": vdc_server_db,
+        "vdc_user_session_db": vdc_user_session_db,
+        "shared_storage_db": shared_storage_db,
+        "ec2": ec2_client,
+        "sts": sts_client,
+    }
+
+    credential_broker.instance_context_cache.clear()
+    credential_broker.credentials_cache.clear()
+
 
 def test_get_instance_id_from_user_arn():
     user_arn = "arn:aws:sts::123456789012:assumed-role/MyRole/i-1234567890abcdef0"
@@ -198,3 +299,105 @@ def test_generate_session_policy_read_write_no_prefix():
     statement = policy_dict["Statement"]
     assert statement[0]["Action"] == expected_actions
     assert statement[0]["Resource"] == expected_resources
+
+
+def test_ttl_cache_expires_entries(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("time.monotonic", lambda: now[0])
+    cache = TTLCache(ttl_seconds=10)
+
+    cache.put("key", "value")
+    cache.put("expired", "value", ttl_seconds=0)
+    assert cache.get("key") == "value"
+    assert cache.get("expired") is None
+
+    now[0] += 10
+    assert cache.get("key") is None
+    assert cache.size() == 0
+
+
+def test_ttl_cache_evicts_oldest_entry_when_full():
+    cache = TTLCache(ttl_seconds=60, max_size=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.put("c", 3)
+    assert cache.get("a") is None
+    assert cache.get("b") == 2
+    assert cache.get("c") == 3
+
+
+def test_get_seconds_until_expiration():
+    expiration = (datetime.now(timezone.utc) + timedelta(hours=1)).isoformat()
+    assert 3590 < Utils.get_seconds_until_expiration(expiration) <= 3600
+    assert Utils.get_seconds_until_expiration("2023-01-01T00:00:00") < 0
+
+
+def test_handler_serves_warm_requests_from_cache(stub_clients):
+    for _ in range(10):
+        response = credential_broker.handler(credential_broker_event(), None)
+        assert response["statusCode"] == 200
+        assert json.loads(response["body"])["AccessKeyId"] == "AKIA..."
+
+    assert stub_clients["vdc_server_db"].get_owner_id_and_session_id.call_count == 1
+    assert stub_clients["vdc_user_session_db"].get_project_id.call_count == 1
+    assert stub_clients["ec2"].describe_instances.call_count == 1
+    assert stub_clients["sts"].assume_role.call_count == 1
+    # filesystem settings can change at any time and are read on every request
+    assert stub_clients["shared_storage_db"].get_object_storage_model.call_count == 10
+
+
+def test_handler_does_not_serve_cached_credentials_to_other_origin(stub_clients):
+    assert (
+        credential_broker.handler(credential_broker_event(), None)["statusCode"] == 200
+    )
+    response = credential_broker.handler(
+        credential_broker_event(source_ip="192.168.1.5"), None
+    )
+    assert response["statusCode"] == 500
+    assert stub_clients["sts"].assume_role.call_count == 1
+
+
+def test_handler_refreshes_credentials_close_to_expiry(stub_clients):
+    stub_clients["sts"].assume_role = with_latency(
+        {
+            "Credentials": {
+                "AccessKeyId": "AKIA...",
+                "SecretAccessKey": "secret",
+                "SessionToken": "token",
+                "Expiration": datetime.now(timezone.utc)
+                + timedelta(
+                    seconds=credential_broker.CREDENTIALS_REFRESH_MARGIN_SECONDS
+                ),
+            }
+        }
+    )
+    credential_broker.handler(credential_broker_event(), None)
+    credential_broker.handler(credential_broker_event(), None)
+    assert stub_clients["sts"].assume_role.call_count == 2
+
+
+@pytest.mark.benchmark
+def test_handler_latency_cold_vs_warm(stub_clients):
+    def percentiles(samples):
+        quantiles = statistics.quantiles(samples, n=100)
+        return quantiles[49], quantiles[98]
+
+    def invoke():
+        start = time.perf_counter()
+        response = credential_broker.handler(credential_broker_event(), None)
+        assert response["statusCode"] == 200
+        return time.perf_counter() - start
+
+    cold = []
+    for _ in range(50):
+        credential_broker.instance_context_cache.clear()
+        credential_broker.credentials_cache.clear()
+        cold.append(invoke())
+    warm = [invoke() for _ in range(50)]
+
+    cold_p50, cold_p99 = percentiles(cold)
+    warm_p50, warm_p99 = percentiles(warm)
+    print(
+        f"credential broker latency cold p50={cold_p50 * 1000:.2f}ms p99={cold_p99 * 1000:.2f}ms, "
+        f"warm p50={warm_p50 * 1000:.2f}ms p99={warm_p99 * 1000:.2f}ms"
+    )
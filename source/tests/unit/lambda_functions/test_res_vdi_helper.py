@@ -1,12 +1,14 @@
+import time
 from unittest.mock import MagicMock, patch
 
 import pytest
+from lambda_functions.res_vdi_helper import auth
 from lambda_functions.res_vdi_helper.auth import (
     get_instance_id_from_user_arn,
     get_source_ip_from_request_context,
     validate_instance_origin,
 )
-from lambda_functions.res_vdi_helper.handler import handle_vdi_auto_stop
+from lambda_functions.res_vdi_helper.handler import handle_vdi_auto_stop, handler
 from res.resources import servers
 from res.resources import sessions as user_sessions
 from res.resources import vdi_management
@@ -17,6 +19,9 @@ INSTANCE_ID = "i-012345678910"
 ROLE = "arn:aws:sts::123456789012:assumed-role/MyRole"
 TEST_OWNER = "test_owner"
 TEST_SESSION_ID = "test_session_id"
+# simulated round trip of a DynamoDB or EC2 API call
+API_LATENCY_SECONDS = 0.02
+BENCHMARK_INVOCATIONS = 10
 
 
 def test_get_instance_id_from_user_arn():
@@ -112,3 +117,142 @@ def test_validate_terminate_session_called():
     monkeypatch.setattr(vdi_management, "stop_sessions", mock_not_called)
 
     handle_vdi_auto_stop(INSTANCE_ID, "Terminate")
+
+
+class StubClients:
+    """
+    stand-in for the servers table, the sessions table and EC2, counting the calls of an invocation
+    """
+
+    def __init__(self, latency: float = 0.0) -> None:
+        self.latency = latency
+        self.calls = {"get_server": 0, "get_session": 0, "describe_instances": 0}
+        self.stopped_sessions = []
+
+    def get_server(self, instance_id):
+        self.calls["get_server"] += 1
+        time.sleep(self.latency)
+        return mock_get_server(instance_id)
+
+    def get_session(self, owner, session_id):
+        self.calls["get_session"] += 1
+        time.sleep(self.latency)
+        return mock_get_session(owner, session_id)
+
+    def describe_instances(self, InstanceIds):
+        self.calls["describe_instances"] += 1
+        time.sleep(self.latency)
+        return {
+            "Reservations": [{"Instances": [{"PrivateIpAddress": PRIVATE_IP_ADDRESS}]}]
+        }
+
+    def stop_sessions(self, sessions):
+        self.stopped_sessions += sessions
+        return sessions, []
+
+
+@pytest.fixture
+def stub_clients(monkeypatch):
+    clients = StubClients()
+    monkeypatch.setattr(servers, "get_server", clients.get_server)
+    monkeypatch.setattr(user_sessions, "get_session", clients.get_session)
+    monkeypatch.setattr(vdi_management, "stop_sessions", clients.stop_sessions)
+    monkeypatch.setattr(vdi_management, "terminate_sessions", mock_not_called)
+    monkeypatch.setattr(auth.boto3, "client", lambda service_name: clients)
+    auth.instance_context_cache.clear()
+    yield clients
+    auth.instance_context_cache.clear()
+
+
+def auto_stop_event(source_ip=PRIVATE_IP_ADDRESS):
+    return {
+        "requestContext": {
+            "identity": {
+                "userArn": f"{ROLE}/{INSTANCE_ID}",
+                "sourceIp": source_ip,
+            }
+        },
+        "queryStringParameters": {
+            "action": "vdi_auto_stop",
+            "transition_state": "Stop",
+        },
+    }
+
+
+def test_instance_context_is_cached_across_invocations(stub_clients):
+    assert handler(auto_stop_event(), None)["statusCode"] == 200
+    assert handler(auto_stop_event(), None)["statusCode"] == 200
+
+    # the server is read once to validate the first request, and is not read again to stop the session
+    assert stub_clients.calls == {
+        "get_server": 1,
+        "get_session": 2,
+        "describe_instances": 1,
+    }
+    assert len(stub_clients.stopped_sessions) == 2
+    assert stub_clients.stopped_sessions[0]["is_idle"] is True
+
+
+def test_invalid_origin_is_not_cached(stub_clients):
+    assert handler(auto_stop_event(INVALID_IP_ADDRESS), None)["statusCode"] == 500
+    assert handler(auto_stop_event(), None)["statusCode"] == 200
+    assert handler(auto_stop_event(INVALID_IP_ADDRESS), None)["statusCode"] == 500
+
+    # a request from another IP address evicts the cached instance context
+    assert INSTANCE_ID not in auth.instance_context_cache
+    assert stub_clients.calls["describe_instances"] == 2
+    assert len(stub_clients.stopped_sessions) == 1
+
+
+def test_expired_instance_context_is_resolved_again(stub_clients):
+    handler(auto_stop_event(), None)
+    expires_at, instance_context = auth.instance_context_cache[INSTANCE_ID]
+    auth.instance_context_cache[INSTANCE_ID] = (
+        expires_at - auth.INSTANCE_CONTEXT_CACHE_TTL_SECONDS - 1,
+        instance_context,
+    )
+
+    handler(auto_stop_event(), None)
+    assert stub_clients.calls["get_server"] == 2
+    assert stub_clients.calls["describe_instances"] == 2
+
+
+@pytest.mark.benchmark
+def test_benchmark_cold_and_warm_invocations(stub_clients):
+    stub_clients.latency = API_LATENCY_SECONDS
+
+    def invoke(clear_cache):
+        elapsed = 0.0
+        for _ in range(BENCHMARK_INVOCATIONS):
+            if clear_cache:
+                auth.instance_context_cache.clear()
+            start = time.perf_counter()
+            assert handler(auto_stop_event(), None)["statusCode"] == 200
+            elapsed += time.perf_counter() - start
+        return elapsed * 1000 / BENCHMARK_INVOCATIONS
+
+    cold_ms = invoke(clear_cache=True)
+    cold_calls = dict(stub_clients.calls)
+    for key in stub_clients.calls:
+        stub_clients.calls[key] = 0
+    auth.instance_context_cache.clear()
+    handler(auto_stop_event(), None)
+    for key in stub_clients.calls:
+        stub_clients.calls[key] = 0
+    warm_ms = invoke(clear_cache=False)
+    warm_calls = dict(stub_clients.calls)
+
+    print(
+        f"{BENCHMARK_INVOCATIONS} invocations: cold {cold_ms:.1f}ms/invocation {cold_calls}, "
+        f"warm {warm_ms:.1f}ms/invocation {warm_calls}"
+    )
+    assert cold_calls == {
+        "get_server": BENCHMARK_INVOCATIONS,
+        "get_session": BENCHMARK_INVOCATIONS,
+        "describe_instances": BENCHMARK_INVOCATIONS,
+    }
+    assert warm_calls == {
+        "get_server": 0,
+        "get_session": BENCHMARK_INVOCATIONS,
+        "describe_instances": 0,
+    }